@@ -97,6 +97,7 @@ from config import (
     PAGE_COMPLETED,
     PAGE_SCAN,
     PAGE_ADMIN_ACCOUNTS,
+    PAGE_ADMIN_API_METRICS,
     PAGE_BOARD,
 
     # ===== 공용 함수 =====
@@ -112,9 +113,18 @@ from core.google_sheets import (
     read_data_from_sheet,
     read_memo_from_sheet,
     save_memo_to_sheet,
+    start_replica_sync,
+    start_write_replay,
+    get_write_backlog,
+    prefetch_tenant_tabs,
+    read_table,
+    sheet_cache,
+    flush_write_buffers,
 )
+from core.record_store import table_to_records, date_text
+from core.api_metrics import begin_rerun, set_page
 from core.customer_service import (
-    load_customer_df_from_sheet,
+    reload_session_customer_df,
     save_customer_batch_update,
     upsert_customer_from_scan,
     create_customer_folders,
@@ -409,34 +419,26 @@ def create_office_account_via_signup(
         raise RuntimeError("Accounts 시트에 신규 계정을 추가하지 못했습니다.")
 
     # Accounts가 바뀌었으니, 테넌트 sheet_key 캐시를 초기화
-    try:
-        from core.google_sheets import _load_tenant_sheet_keys
-        _load_tenant_sheet_keys.clear()
-    except Exception:
-        st.cache_data.clear()
+    from core.google_sheets import invalidate_tenant_sheet_keys
+    invalidate_tenant_sheet_keys()
 
 
 def find_account(login_id: str):
-    records = read_data_from_sheet(ACCOUNTS_SHEET_NAME, default_if_empty=[])
-    for r in records:
-        if str(r.get("login_id", "")).strip() == login_id.strip():
-            return r
-    return None
+    accounts = read_table(ACCOUNTS_SHEET_NAME)
+    hit = accounts[accounts["login_id"] == login_id.strip()]
+    if hit.empty:
+        return None
+    return table_to_records(hit.head(1))[0]
 
 # --- Event (Calendar) Data Functions ---
-@st.cache_data(ttl=300) 
+@sheet_cache(ttl=300, tabs=(EVENTS_SHEET_NAME,))
 def load_events(): 
-    records = read_data_from_sheet(EVENTS_SHEET_NAME, default_if_empty=[])
+    table = read_table(EVENTS_SHEET_NAME)
+    dates = date_text(table["date_str"])
     events = {}
-    if not records: # Check if records is None or empty
-        return {}
-    for record in records:
-        date_str = record.get('date_str')
-        event_text = record.get('event_text', '') 
+    for date_str, event_text in zip(dates, table["event_text"]):
         if date_str: 
-            if date_str not in events:
-                events[date_str] = []
-            events[date_str].append(str(event_text)) 
+            events.setdefault(date_str, []).append(event_text)
     return events
 
 def save_events(events_dict): 
@@ -454,32 +456,13 @@ def save_events(events_dict):
     return False
 
 # --- Daily Summary & Balance Functions ---
-@st.cache_data(ttl=300) 
+# 타입 변환(금액 int64 등)은 read_table 이 캐시 갱신 때 한 번만 한다 (core/record_store.py)
 def load_daily(): 
-    records = read_data_from_sheet(DAILY_SUMMARY_SHEET_NAME, default_if_empty=[])
-    processed_records = []
-    for r in records:
-        entry = {
-            'id'          : r.get('id', str(uuid.uuid4())), # Ensure ID exists
-            'date'        : str(r.get('date', '')),
-            'time'        : str(r.get('time', '')),
-            'category'    : str(r.get('category', '')),
-            'name'        : str(r.get('name', '')),
-            'task'        : str(r.get('task', '')),
-            'income_cash': safe_int(r.get('income_cash')),
-            'income_etc' : safe_int(r.get('income_etc')),
-            'exp_cash'   : safe_int(r.get('exp_cash')),
-            'exp_etc'    : safe_int(r.get('exp_etc')),
-            'cash_out'   : safe_int(r.get('cash_out')), 
-            'memo'        : str(r.get('memo', ''))
-        }
-        processed_records.append(entry)
-    return processed_records
+    return table_to_records(read_table(DAILY_SUMMARY_SHEET_NAME))
 
 def save_daily(data_list_of_dicts): 
     header = ['id', 'date', 'time', 'category', 'name', 'task', 'income_cash', 'income_etc', 'exp_cash', 'cash_out', 'exp_etc', 'memo']
     if write_data_to_sheet(DAILY_SUMMARY_SHEET_NAME, data_list_of_dicts, header_list=header):
-        load_daily.clear() # Clear cache for load_daily
         load_balance.clear() # Clear cache for load_balance as it might depend on daily data
         
         # Update SESS_ALL_DAILY_ENTRIES_PAGE_LOAD if it's in use and needs to reflect the save
@@ -488,7 +471,7 @@ def save_daily(data_list_of_dicts):
         return True
     return False
 
-@st.cache_data(ttl=300) 
+@sheet_cache(ttl=300, tabs=(DAILY_BALANCE_SHEET_NAME,))
 def load_balance(): 
     records = read_data_from_sheet(DAILY_BALANCE_SHEET_NAME, default_if_empty=[])
     balance = {'cash': 0, 'profit': 0} # Use string keys
@@ -516,7 +499,7 @@ def save_balance(balance_dict):
     return False
 
 # --- Memo Functions ---
-@st.cache_data(ttl=600)
+@sheet_cache(ttl=600, tabs=(MEMO_LONG_SHEET_NAME,))
 def load_long_memo(): return read_memo_from_sheet(MEMO_LONG_SHEET_NAME)
 def save_long_memo(content): 
     if save_memo_to_sheet(MEMO_LONG_SHEET_NAME, content):
@@ -524,7 +507,7 @@ def save_long_memo(content):
         return True # Indicate success
     return False
 
-@st.cache_data(ttl=600)
+@sheet_cache(ttl=600, tabs=(MEMO_MID_SHEET_NAME,))
 def load_mid_memo(): return read_memo_from_sheet(MEMO_MID_SHEET_NAME)
 def save_mid_memo(content): 
     if save_memo_to_sheet(MEMO_MID_SHEET_NAME, content):
@@ -532,7 +515,7 @@ def save_mid_memo(content):
         return True
     return False
 
-@st.cache_data(ttl=600)
+@sheet_cache(ttl=600, tabs=(MEMO_SHORT_SHEET_NAME,))
 def load_short_memo(): return read_memo_from_sheet(MEMO_SHORT_SHEET_NAME)
 def save_short_memo(content): 
     if save_memo_to_sheet(MEMO_SHORT_SHEET_NAME, content):
@@ -541,16 +524,8 @@ def save_short_memo(content):
     return False
 
 # --- Planned Task Functions ---
-@st.cache_data(ttl=300)
 def load_planned_tasks_from_sheet(): 
-    records = read_data_from_sheet(PLANNED_TASKS_SHEET_NAME, default_if_empty=[])
-    return [{
-        'id': r.get('id', str(uuid.uuid4())), 
-        'date': str(r.get('date','')),
-        'period': str(r.get('period','')),
-        'content': str(r.get('content','')),
-        'note': str(r.get('note',''))
-    } for r in records]
+    return table_to_records(read_table(PLANNED_TASKS_SHEET_NAME))
 
 def save_planned_tasks_to_sheet(tenant_id, data_list_of_dicts):
     """
@@ -571,32 +546,12 @@ def save_planned_tasks_to_sheet(tenant_id, data_list_of_dicts):
                            header_list=header,
                            records=normalized,
                            id_field="id")
-    if ok:
-        load_planned_tasks_from_sheet.clear()
     return ok
 
 
 # --- Active Task Functions ---
-@st.cache_data(ttl=300)
-
 def load_active_tasks_from_sheet(): 
-    records = read_data_from_sheet(ACTIVE_TASKS_SHEET_NAME, default_if_empty=[])
-    return [{
-        'id': r.get('id', str(uuid.uuid4())), 
-        'category': str(r.get('category','')),
-        'date': str(r.get('date','')),
-        'name': str(r.get('name','')),
-        'work': str(r.get('work','')),
-        'details': str(r.get('details','')),
-        'transfer': str(r.get('transfer','0') or '0'),
-        'cash': str(r.get('cash','0') or '0'),
-        'card': str(r.get('card','0') or '0'),
-        'stamp': str(r.get('stamp','0') or '0'),
-        'receivable': str(r.get('receivable','0') or '0'),
-        'planned_expense': str(r.get('planned_expense', '0') or '0'),
-        'processed': r.get('processed', False) == True or str(r.get('processed', 'false')).lower() == 'true',
-        'processed_timestamp': str(r.get('processed_timestamp', ''))
-    } for r in records]
+    return table_to_records(read_table(ACTIVE_TASKS_SHEET_NAME))
 
 def save_active_tasks_to_sheet(tenant_id, data_list_of_dicts):
     header = [
@@ -616,24 +571,11 @@ def save_active_tasks_to_sheet(tenant_id, data_list_of_dicts):
                            header_list=header,
                            records=normalized,
                            id_field="id")
-    if ok:
-        load_active_tasks_from_sheet.clear()
     return ok
 
 # --- Completed Task Functions ---
-@st.cache_data(ttl=300) # Added cache
-
 def load_completed_tasks_from_sheet(): # Renamed
-    records = read_data_from_sheet(COMPLETED_TASKS_SHEET_NAME, default_if_empty=[])
-    return [{
-        'id': r.get('id', str(uuid.uuid4())),
-        'category': str(r.get('category', '')),
-        'date': str(r.get('date', '')),
-        'name': str(r.get('name', '')),
-        'work': str(r.get('work', '')),
-        'details': str(r.get('details', '')),
-        'complete_date': str(r.get('complete_date', ''))
-    } for r in records]
+    return table_to_records(read_table(COMPLETED_TASKS_SHEET_NAME))
 
 def save_completed_tasks_to_sheet(tenant_id, records):
     header = ['id','category','date','name','work','details','complete_date']
@@ -649,8 +591,6 @@ def save_completed_tasks_to_sheet(tenant_id, records):
                            header_list=header,
                            records=normalized,
                            id_field="id")
-    if ok:
-        load_completed_tasks_from_sheet.clear()
     return ok
 
 # -----------------------------
@@ -844,9 +784,42 @@ if st:
     # ===== 여기부터는 '로그인된 상태'에서만 실행 =====
     tenant_id = st.session_state.get(SESS_TENANT_ID, DEFAULT_TENANT_ID)
 
+    # 이번 재실행에서 나가는 구글 API 호출을 페이지/테넌트로 묶어서 기록 (관리자 'API 사용량' 패널)
+    begin_rerun(st.session_state.get(SESS_CURRENT_PAGE, PAGE_HOME), tenant_id)
+
+    # REPLICA_MODE 면 로컬 SQLite 복제본 백그라운드 동기화 시작 (테넌트당 1회)
+    start_replica_sync(tenant_id)
+
+    # 쓰기 저널에 남아 있는 연산(재시작 전에 못 보낸 것 포함)을 시트로 이어서 보낸다
+    start_write_replay()
+
     # 테넌트별 데이터 로딩 (고객 / 예정 / 진행)
+    # 비어 있는 것만 스레드 풀에서 동시에 받기 시작하고, 아래 로더들이 받는 대로 소비한다.
+    # (다른 세션이 채워 둔 로더 캐시가 아직 쓸 만한 탭은 prefetch_tenant_tabs 가 건너뛴다)
+    # 로그인 직후(고객 데이터가 아직 없을 때)에는 첫 화면(홈)에서 읽는 탭들도 같이 띄운다.
+    _prefetch_tabs = [
+        tab
+        for sess_key, tab in (
+            (SESS_DF_CUSTOMER, CUSTOMER_SHEET_NAME),
+            (SESS_PLANNED_TASKS_TEMP, PLANNED_TASKS_SHEET_NAME),
+            (SESS_ACTIVE_TASKS_TEMP, ACTIVE_TASKS_SHEET_NAME),
+        )
+        if sess_key not in st.session_state
+    ]
+    if SESS_DF_CUSTOMER not in st.session_state:
+        _prefetch_tabs += [
+            EVENTS_SHEET_NAME,
+            MEMO_SHORT_SHEET_NAME,
+            COMPLETED_TASKS_SHEET_NAME,
+        ]
+    if len(_prefetch_tabs) > 1:
+        try:
+            prefetch_tenant_tabs(_prefetch_tabs, tenant_id, solo_tabs=(CUSTOMER_SHEET_NAME,))
+        except Exception as e:
+            print(f"[prefetch] 선로딩 시작 실패, 탭별로 읽습니다: {e}")
+
     if SESS_DF_CUSTOMER not in st.session_state:
-        st.session_state[SESS_DF_CUSTOMER] = load_customer_df_from_sheet(tenant_id)
+        reload_session_customer_df(tenant_id)
 
     if SESS_PLANNED_TASKS_TEMP not in st.session_state:
         st.session_state[SESS_PLANNED_TASKS_TEMP] = load_planned_tasks_from_sheet()
@@ -857,6 +830,9 @@ if st:
     # 사이드바 / 로그아웃
     with st.sidebar:
         st.caption(f"👤 {st.session_state.get(SESS_USERNAME, '')}")
+        _backlog = get_write_backlog(tenant_id)
+        if _backlog:
+            st.caption(f"⏳ 시트 반영 대기 {_backlog}건 (저장은 완료, 백그라운드로 반영 중)")
         if st.button("로그아웃"):
             for key in [
                 SESS_LOGGED_IN,
@@ -901,6 +877,7 @@ if st:
 
         if st.session_state.get(SESS_IS_ADMIN, False):
             toolbar_options["🧩 계정관리"] = PAGE_ADMIN_ACCOUNTS
+            toolbar_options["📈 API 사용량"] = PAGE_ADMIN_API_METRICS
 
         num_buttons = len(toolbar_options)
         btn_cols = st.columns(num_buttons)
@@ -924,6 +901,7 @@ if st:
     st.markdown("---") 
 
     current_page_to_display = st.session_state[SESS_CURRENT_PAGE]
+    set_page(current_page_to_display)
 
     # -----------------------------
     # ✅ Customer Management Page
@@ -998,12 +976,23 @@ if st:
         from pages import page_admin_accounts
         page_admin_accounts.render()
 
+    elif current_page_to_display == PAGE_ADMIN_API_METRICS:
+        from pages import page_admin_api_metrics
+        page_admin_api_metrics.render()
+
     # -----------------------------
     # ✅ Home Page (Main Dashboard)
     # -----------------------------
     elif current_page_to_display == PAGE_HOME:
         render_home_page()
 
+    # 재실행 끝: 이번 화면에서 공용 쓰기 버퍼에 넘긴 것을 보낸다
+    # (st.rerun() 으로 여기까지 안 오면 다음 읽기 / 백그라운드 타이머가 보낸다)
+    try:
+        flush_write_buffers(tenant_id)
+    except Exception as e:
+        st.error(f"시트 반영 실패: {e}")
+
 else: 
     print("Streamlit is not available. Cannot run the application.")
     print(f"Key path configured: {KEY_PATH}")
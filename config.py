@@ -42,6 +42,65 @@ SESS_USERNAME = "username"
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
+# ===== 로컬 SQLite 읽기 복제본 (선택) =====
+# HANWOORY_REPLICA=1 이면 고객데이터 워크북 탭들을 로컬 SQLite 로 복제해서 읽는다.
+REPLICA_MODE = os.getenv("HANWOORY_REPLICA", "").strip().lower() in ("1", "true", "y")
+REPLICA_DIR = os.getenv("HANWOORY_REPLICA_DIR", os.path.join(BASE_DIR, "replica"))
+REPLICA_SYNC_INTERVAL_SEC = int(os.getenv("HANWOORY_REPLICA_SYNC_SEC", "60"))
+
+# ===== 캐시 디스크 스냅샷 (core/cache_snapshot.py) =====
+# 컨테이너가 재시작돼도 첫 화면이 캐시를 데운 상태처럼 시작하도록 테넌트 캐시를 로컬 디스크에 남긴다.
+SNAPSHOT_ENABLED = os.getenv("HANWOORY_SNAPSHOT", "1").strip().lower() in ("1", "true", "y")
+SNAPSHOT_DIR = os.getenv("HANWOORY_SNAPSHOT_DIR", os.path.join(BASE_DIR, "snapshots"))
+
+# ===== 오프라인 쓰기 저널 (core/write_journal.py) =====
+# write_data_to_sheet / append_rows_to_sheet / upsert_rows_by_id 를 로컬 SQLite(WAL)에 먼저 남기고
+# 바로 성공을 돌려준 뒤, 백그라운드에서 순서대로 시트에 반영한다 (구글 API 가 느리거나 끊겨도 입력 유지).
+# 저널이 지워지면 "저장됨" 으로 보여준 쓰기가 사라지므로 기본은 끈다.
+# 서버(Render)에서는 HANWOORY_JOURNAL_PATH 를 영구 디스크(앱 폴더 밖) 경로로 직접 지정해야만 켜진다
+# (앱 폴더는 컨테이너가 재시작될 때 지워진다).
+_JOURNAL_REQUESTED = os.getenv("HANWOORY_WRITE_JOURNAL", "").strip().lower() in ("1", "true", "y")
+_JOURNAL_PATH_ENV = os.getenv("HANWOORY_JOURNAL_PATH", "").strip()
+JOURNAL_PATH = _JOURNAL_PATH_ENV or os.path.join(BASE_DIR, "journal", "writes.sqlite3")
+JOURNAL_ENABLED = _JOURNAL_REQUESTED and (
+    RUN_ENV != "server"
+    or (bool(_JOURNAL_PATH_ENV)
+        and os.path.commonpath([os.path.abspath(JOURNAL_PATH), BASE_DIR]) != BASE_DIR)
+)
+if _JOURNAL_REQUESTED and not JOURNAL_ENABLED:
+    print("[journal] 서버에서는 영구 디스크 경로(HANWOORY_JOURNAL_PATH, 앱 폴더 밖)가 없으면 쓰기 저널을 켜지 않습니다.")
+JOURNAL_KEEP_DONE_SEC = int(os.getenv("HANWOORY_JOURNAL_KEEP_DONE_SEC", "86400"))
+JOURNAL_DRAIN_WAIT_SEC = float(os.getenv("HANWOORY_JOURNAL_DRAIN_WAIT_SEC", "10"))
+
+# ===== 고객ID 발급 (core/id_allocator.py) =====
+# 임대할 때마다 시트의 그날 최대 번호에서 이어 가고(기준은 시트), 로컬 SQLite 는 같은 서버의 프로세스끼리
+# 아직 안 쓴 번호가 겹치지 않게만 한다 — 임시 디스크에 있어도 된다. 프로세스는 ID_LEASE_BLOCK 개씩 빌린다.
+ID_ALLOCATOR_PATH = os.getenv(
+    "HANWOORY_ID_ALLOCATOR_PATH", os.path.join(BASE_DIR, "journal", "customer_ids.sqlite3")
+)
+ID_LEASE_BLOCK = int(os.getenv("HANWOORY_ID_LEASE_BLOCK", "10"))
+
+# ===== 구글 API 호출 속도 제한 (core/api_scheduler.py) =====
+# Sheets 기본 쿼터(사용자당 분당 읽기 60 / 쓰기 60)보다 조금 낮게 잡는다.
+# 버킷은 읽기/쓰기를 같이 세므로 계정 50 + 버스트 10 이면 어느 1분 구간에서도 60 을 넘지 않는다.
+API_RATE_PER_ACCOUNT_PER_MIN = float(os.getenv("HANWOORY_API_RATE_ACCOUNT", "50"))
+API_RATE_PER_SHEET_PER_MIN = float(os.getenv("HANWOORY_API_RATE_SHEET", "40"))
+API_BURST = float(os.getenv("HANWOORY_API_BURST", "10"))
+API_MAX_RETRIES = int(os.getenv("HANWOORY_API_MAX_RETRIES", "5"))
+API_BACKOFF_MAX_SEC = float(os.getenv("HANWOORY_API_BACKOFF_MAX_SEC", "32"))
+GOOGLE_HTTP_POOL_SIZE = int(os.getenv("HANWOORY_GOOGLE_HTTP_POOL", "8"))   # 자격 증명당 keep-alive 연결 수 (core/google_services.py)
+API_METRICS_MAX_EVENTS = int(os.getenv("HANWOORY_API_METRICS_MAX_EVENTS", "20000"))   # core/api_metrics.py
+
+# ===== 로그인 직후 동시 선로딩 (core/google_sheets.prefetch_tenant_tabs) =====
+PREFETCH_MAX_WORKERS = int(os.getenv("HANWOORY_PREFETCH_WORKERS", "4"))
+PREFETCH_WAIT_SEC = float(os.getenv("HANWOORY_PREFETCH_WAIT_SEC", "30"))
+
+# ===== 시트 저장소 백엔드 (core/sheet_backend.py) =====
+# google: 실제 Google Sheets / fake: 네트워크 없는 프로세스 내 가짜 시트 (벤치마크/부하 테스트용)
+STORAGE_BACKEND = os.getenv("HANWOORY_STORAGE_BACKEND", "google").strip().lower()
+FAKE_SHEETS_LATENCY_MS = float(os.getenv("HANWOORY_FAKE_LATENCY_MS", "0"))
+FAKE_SHEETS_QUOTA_PER_MIN = int(os.getenv("HANWOORY_FAKE_QUOTA_PER_MIN", "0"))   # 0 이면 제한 없음
+
 # ===== 구글 서비스 계정 키 경로 =====
 if platform.system() == "Windows":
     KEY_PATH = r"C:\Users\윤찬\한우리 현행업무\프로그램\출입국업무관리\hanwoory-9eaa1a4c54d7.json"
@@ -81,13 +140,16 @@ MEMO_MID_SHEET_NAME        = "중기메모"
 MEMO_SHORT_SHEET_NAME      = "단기메모"
 BOARD_SHEET_NAME           = "게시판"
 BOARD_COMMENT_SHEET_NAME   = "게시판댓글"
+CHANGELOG_SHEET_NAME       = "_changelog"   # 증분 동기화용 변경 로그 (스프레드시트마다 1개)
 
 
 # ===== Session Keys =====
 SESS_CURRENT_PAGE = 'current_page'
 SESS_DF_CUSTOMER = 'df_customer'
+SESS_CUSTOMER_ROW_VERSIONS = 'customer_row_versions'   # 세션 고객 DF 를 시트에서 읽었을 때의 {고객ID: 행 버전}
 SESS_CUSTOMER_SEARCH_TERM = 'customer_search_term'
 SESS_CUSTOMER_SEARCH_MASK_INDICES = 'customer_search_mask_indices'
+SESS_CUSTOMER_SEARCH_INDEX = 'customer_search_index'   # 이 세션의 고객 검색 색인 (core.customer_search)
 SESS_CUSTOMER_SELECTED_ROW_IDX = 'customer_selected_row_idx'
 SESS_CUSTOMER_AWAITING_DELETE_CONFIRM = 'customer_awaiting_delete_confirm'
 SESS_CUSTOMER_PENDING_DELETE_DISPLAY_IDX = 'customer_pending_delete_display_idx'
@@ -120,6 +182,7 @@ PAGE_SCAN = 'scan'
 PAGE_ADMIN_ACCOUNTS = 'admin_accounts'
 PAGE_BOARD = 'board'
 PAGE_QUICK_DOC = "quick_doc"
+PAGE_ADMIN_API_METRICS = 'admin_api_metrics'
 
 # ===== 공용 헬퍼 =====
 def safe_int(val):
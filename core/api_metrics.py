@@ -0,0 +1,232 @@
+# core/api_metrics.py
+#
+# 구글 API(Sheets / Drive) 호출 계측.
+# core/api_scheduler 의 ScheduledHTTPClient / ScheduledHttp (그리고 가짜 백엔드 core/fake_sheets)가
+# 요청 1건이 끝날 때마다 record_api_call() 을 부른다. 기록 항목:
+#   시각, 재실행(rerun) ID, 페이지, 테넌트, API(sheets/drive), HTTP 메서드, 엔드포인트 종류,
+#   탭 이름, 호출한 앱 함수, 보낸/받은 바이트, 지연(재시도·대기 포함), 재시도 횟수, 상태 코드
+#
+# - 범위(scope): app.py 가 재실행마다 begin_rerun(page, tenant) 을 부르면 그 뒤의 호출이
+#   그 재실행/페이지로 묶인다. contextvars 라서 선로딩 스레드에도 복사해서 넘길 수 있다.
+# - 최근 API_METRICS_MAX_EVENTS 건만 메모리에 보관 (관리자 패널 / JSON lines 내보내기)
+# - 페이지별 / 재실행별 합계: summarize_by_page(), recent_reruns()
+# 이 모듈은 streamlit 에 의존하지 않는다.
+
+import contextvars
+import itertools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from urllib.parse import unquote
+
+from config import API_METRICS_MAX_EVENTS
+
+_scope: contextvars.ContextVar = contextvars.ContextVar(
+    "api_metrics_scope", default={"rerun": 0, "page": "", "tenant": ""}
+)
+_rerun_ids = itertools.count(1)
+
+_lock = threading.Lock()
+_events: deque = deque(maxlen=API_METRICS_MAX_EVENTS)
+
+_SKIP_FILES = ("api_scheduler.py", "api_metrics.py", "fake_sheets.py", "sheet_backend.py")
+_VALUES_PATH_RE = re.compile(r"/values/([^:?]+)")
+
+
+# ===== 범위 (재실행 / 페이지 / 테넌트) =====
+def begin_rerun(page: str, tenant: str | None = None) -> int:
+    """새 재실행 범위를 연다. 반환: rerun ID"""
+    rerun = next(_rerun_ids)
+    _scope.set({"rerun": rerun, "page": page or "", "tenant": tenant or ""})
+    return rerun
+
+
+def set_page(page: str) -> None:
+    """같은 재실행 안에서 페이지만 바꾼다 (페이지 렌더 직전)"""
+    _scope.set(dict(_scope.get(), page=page or ""))
+
+
+def current_scope() -> dict:
+    return dict(_scope.get())
+
+
+def copy_scope():
+    """다른 스레드로 넘길 현재 범위: pool.submit(ctx.run, fn, ...)"""
+    return contextvars.copy_context()
+
+
+# ===== 기록 =====
+def _caller() -> str:
+    """라이브러리 밖에서 처음 만나는 앱 함수 (파일명:함수명)"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        path = frame.f_code.co_filename
+        if "site-packages" not in path and "dist-packages" not in path \
+                and not path.endswith(_SKIP_FILES) and "/lib/python" not in path:
+            return f"{os.path.basename(path)}:{frame.f_code.co_name}"
+        frame = frame.f_back
+    return ""
+
+
+def _tab_of(range_name: str) -> str:
+    tab = unquote(range_name).split("!", 1)[0] if "!" in unquote(range_name) else unquote(range_name)
+    if tab.startswith("'") and tab.endswith("'"):
+        tab = tab[1:-1].replace("''", "'")
+    return tab
+
+
+def tabs_of_request(url: str, params=None, body=None) -> str:
+    """요청 URL / 파라미터 / 본문에서 탭 이름들을 뽑는다 (없으면 빈 문자열)"""
+    ranges = []
+    m = _VALUES_PATH_RE.search(url or "")
+    if m:
+        ranges.append(m.group(1))
+    if isinstance(params, dict):
+        r = params.get("ranges")
+        ranges.extend(r if isinstance(r, list) else [r] if r else [])
+    if isinstance(body, dict):
+        ranges.extend(d.get("range", "") for d in body.get("data", []) if isinstance(d, dict))
+    return ",".join(dict.fromkeys(t for t in (_tab_of(r) for r in ranges if r) if t))
+
+
+def endpoint_kind(url: str, method: str = "GET") -> str:
+    """요청 종류: 'values:get', 'values:append', 'values:batchGet', 'spreadsheets:batchUpdate', 'drive:files' ..."""
+    path = (url or "").split("?", 1)[0]
+    if "/spreadsheets/" in path:
+        sid, _, tail = path.split("/spreadsheets/", 1)[1].partition("/")
+        if not tail:
+            return "spreadsheets:" + (sid.split(":", 1)[1] if ":" in sid else "get")
+        if tail.startswith("values/"):
+            rng = tail[len("values/"):]   # 범위 안의 ':' 는 %3A 로 인코딩돼 있다
+            if ":" in rng:
+                return "values:" + rng.rsplit(":", 1)[1]
+            return "values:update" if method.upper() == "PUT" else "values:get"
+        return tail
+    if "/batch/" in path or path.endswith("/batch"):
+        return "drive:batch" if "drive" in path else "batch"
+    if "/drive/" in path:
+        parts = path.split("/drive/", 1)[1].split("/")
+        return "drive:" + (parts[1] if len(parts) > 1 else "")
+    return path.rsplit("/", 1)[-1][:32]
+
+
+def body_size(body) -> int:
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    if isinstance(body, str):
+        return len(body.encode("utf-8"))
+    try:
+        return len(json.dumps(body, ensure_ascii=False, default=str).encode("utf-8"))
+    except Exception:
+        return 0
+
+
+def record_api_call(api: str, method: str, kind: str, sheet: str = "",
+                    bytes_out: int = 0, bytes_in: int = 0, latency: float = 0.0,
+                    retries: int = 0, status: int = 0) -> None:
+    scope = _scope.get()
+    event = {
+        "ts": round(time.time(), 3),
+        "rerun": scope["rerun"],
+        "page": scope["page"],
+        "tenant": scope["tenant"],
+        "api": api,
+        "method": method,
+        "kind": kind,
+        "sheet": sheet,
+        "fn": _caller(),
+        "bytes_out": int(bytes_out),
+        "bytes_in": int(bytes_in),
+        "latency_ms": round(latency * 1000, 1),
+        "retries": int(retries),
+        "status": int(status),
+        "thread": threading.current_thread().name,
+    }
+    with _lock:
+        _events.append(event)
+
+
+# ===== 조회 / 내보내기 =====
+def get_api_events(page: str | None = None, rerun: int | None = None) -> list[dict]:
+    with _lock:
+        events = list(_events)
+    return [
+        e for e in events
+        if (page is None or e["page"] == page) and (rerun is None or e["rerun"] == rerun)
+    ]
+
+
+def _totals(events) -> dict:
+    out = {"calls": 0, "bytes_out": 0, "bytes_in": 0, "latency_ms": 0.0, "retries": 0, "errors": 0}
+    for e in events:
+        out["calls"] += 1
+        out["bytes_out"] += e["bytes_out"]
+        out["bytes_in"] += e["bytes_in"]
+        out["latency_ms"] += e["latency_ms"]
+        out["retries"] += e["retries"]
+        out["errors"] += 1 if e["status"] >= 400 else 0
+    out["latency_ms"] = round(out["latency_ms"], 1)
+    return out
+
+
+def summarize_by_page(events=None) -> list[dict]:
+    """페이지별 합계 + 재실행당 평균 호출 수"""
+    events = get_api_events() if events is None else events
+    groups: dict[str, list] = {}
+    for e in events:
+        groups.setdefault(e["page"] or "-", []).append(e)
+    rows = []
+    for page, evs in groups.items():
+        t = _totals(evs)
+        reruns = len({e["rerun"] for e in evs})
+        t.update(page=page, reruns=reruns, calls_per_rerun=round(t["calls"] / max(reruns, 1), 1))
+        rows.append(t)
+    return sorted(rows, key=lambda r: r["calls"], reverse=True)
+
+
+def summarize_by(field: str, events=None) -> list[dict]:
+    """fn / sheet / kind / tenant 등 한 필드 기준 합계"""
+    events = get_api_events() if events is None else events
+    groups: dict[str, list] = {}
+    for e in events:
+        groups.setdefault(str(e.get(field) or "-"), []).append(e)
+    rows = [dict(_totals(evs), **{field: k}) for k, evs in groups.items()]
+    return sorted(rows, key=lambda r: r["latency_ms"], reverse=True)
+
+
+def recent_reruns(limit: int = 20) -> list[dict]:
+    """최근 재실행별 합계 (최신 순)"""
+    groups: dict[int, list] = {}
+    for e in get_api_events():
+        groups.setdefault(e["rerun"], []).append(e)
+    rows = []
+    for rerun in sorted(groups, reverse=True)[:limit]:
+        evs = groups[rerun]
+        t = _totals(evs)
+        t.update(rerun=rerun, page=evs[0]["page"], tenant=evs[0]["tenant"],
+                 started=min(e["ts"] for e in evs))
+        rows.append(t)
+    return rows
+
+
+def export_api_events_jsonl(fp=None, events=None) -> str | None:
+    """이벤트를 JSON lines 로. fp(파일 객체)를 주면 거기에 쓰고, 없으면 문자열로 돌려준다."""
+    events = get_api_events() if events is None else events
+    text = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in events)
+    if fp is None:
+        return text
+    fp.write(text)
+    return None
+
+
+def clear_api_events() -> int:
+    with _lock:
+        n = len(_events)
+        _events.clear()
+    return n
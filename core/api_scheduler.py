@@ -0,0 +1,401 @@
+# core/api_scheduler.py
+#
+# 구글 API(gspread / googleapiclient) 호출을 한 곳에서 줄 세우는 스케줄러.
+# - 토큰 버킷: 서비스계정(또는 OAuth 사용자)별 1개 + 스프레드시트별 1개
+#   → 여러 사무실이 동시에 써도 분당 쿼터(429)를 넘기 전에 스스로 속도를 늦춘다.
+# - 429 (Drive 의 403 rateLimitExceeded 포함)는 지수 백오프 + 지터로 재시도
+#   408 / 5xx 는 요청이 반영됐는지 알 수 없으므로 다시 보내도 결과가 같은 요청(읽기, values.update /
+#   values.batchUpdate 같은 덮어쓰기)만 재시도한다. append / spreadsheets.batchUpdate(행 삭제 등) /
+#   Drive 파일 생성·복사는 두 번 반영될 수 있어서 429 에서만 재시도 (is_idempotent_request)
+# - 우선순위 레인: 화면에서 기다리는 호출(interactive)이 백그라운드 동기화(background)보다 먼저
+# - 대기 시간 / 재시도 지표: get_api_scheduler_stats()
+#
+# gspread 는 authorize(creds, http_client=ScheduledHTTPClient),
+# googleapiclient 는 build(..., http=scheduled_http(creds, pool)) 로 연결한다.
+# (서비스 객체 / 연결 풀 재사용은 core/google_services.py)
+# 요청 1건이 끝날 때마다 core.api_metrics 에 기록한다 (바이트 / 지연 / 재시도).
+# 이 모듈은 streamlit 에 의존하지 않는다.
+
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from gspread.exceptions import APIError
+from gspread.http_client import HTTPClient
+from google_auth_httplib2 import AuthorizedHttp
+
+from core.api_metrics import record_api_call, tabs_of_request, endpoint_kind, body_size
+from config import (
+    API_RATE_PER_ACCOUNT_PER_MIN,
+    API_RATE_PER_SHEET_PER_MIN,
+    API_BURST,
+    API_MAX_RETRIES,
+    API_BACKOFF_MAX_SEC,
+    GOOGLE_HTTP_POOL_SIZE,
+)
+
+LANE_INTERACTIVE = "interactive"
+LANE_BACKGROUND = "background"
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+RATE_LIMIT_STATUS = 429
+# POST 이지만 다시 보내도 결과가 같은 요청 (읽기 / 범위를 이 값으로 덮어쓰기·비우기). endpoint_kind 이름 기준
+IDEMPOTENT_POST_KINDS = {
+    "values:batchGet", "values:batchGetByDataFilter",
+    "values:batchUpdate", "values:batchUpdateByDataFilter",
+    "values:clear", "values:batchClear", "values:batchClearByDataFilter",
+    "spreadsheets:getByDataFilter",
+}
+
+_SPREADSHEET_ID_RE = re.compile(r"/spreadsheets/([a-zA-Z0-9_-]+)")
+
+
+class TokenBucket:
+    """초당 rate 개씩 차고 최대 capacity 개까지 쌓이는 버킷 (잠금은 호출하는 쪽 책임)"""
+
+    def __init__(self, rate_per_sec: float, capacity: float):
+        self.rate = rate_per_sec
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """토큰 1개를 쓰려면 몇 초 기다려야 하는지 (0 이면 바로 가능)"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+
+class ApiScheduler:
+    def __init__(self,
+                 account_rate_per_min: float = API_RATE_PER_ACCOUNT_PER_MIN,
+                 sheet_rate_per_min: float = API_RATE_PER_SHEET_PER_MIN,
+                 burst: float = API_BURST,
+                 max_retries: int = API_MAX_RETRIES,
+                 backoff_max_sec: float = API_BACKOFF_MAX_SEC):
+        self.account_rate = account_rate_per_min / 60.0
+        self.sheet_rate = sheet_rate_per_min / 60.0
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_max_sec = backoff_max_sec
+
+        self._cond = threading.Condition()
+        self._buckets: dict[tuple[str, str], TokenBucket] = {}
+        self._waiting = {LANE_INTERACTIVE: 0, LANE_BACKGROUND: 0}
+        self._stats = {
+            lane: {"calls": 0, "wait_total": 0.0, "wait_max": 0.0, "retries": 0, "throttled": 0}
+            for lane in (LANE_INTERACTIVE, LANE_BACKGROUND)
+        }
+
+    def _bucket(self, kind: str, key: str, rate: float) -> TokenBucket:
+        b = self._buckets.get((kind, key))
+        if b is None:
+            b = TokenBucket(rate, self.burst)
+            self._buckets[(kind, key)] = b
+        return b
+
+    # ----- 토큰 얻기 (우선순위 레인) -----
+    def acquire(self, account: str, sheet_id: str | None = None, lane: str | None = None) -> float:
+        """토큰을 얻을 때까지 기다린다. 반환: 기다린 시간(초)"""
+        lane = lane or current_lane()
+        started = time.monotonic()
+        with self._cond:
+            self._waiting[lane] += 1
+            try:
+                while True:
+                    # 화면 쪽 호출이 기다리는 동안 백그라운드는 양보한다
+                    if lane == LANE_BACKGROUND and self._waiting[LANE_INTERACTIVE] > 0:
+                        self._cond.wait(0.05)
+                        continue
+
+                    now = time.monotonic()
+                    buckets = [self._bucket("account", account, self.account_rate)]
+                    if sheet_id:
+                        buckets.append(self._bucket("sheet", sheet_id, self.sheet_rate))
+                    wait = max(b.wait_time(now) for b in buckets)
+                    if wait <= 0:
+                        for b in buckets:
+                            b.take()
+                        break
+                    self._cond.wait(wait)
+            finally:
+                self._waiting[lane] -= 1
+                self._cond.notify_all()
+
+            waited = time.monotonic() - started
+            s = self._stats[lane]
+            s["calls"] += 1
+            s["wait_total"] += waited
+            s["wait_max"] = max(s["wait_max"], waited)
+            if waited > 0.001:
+                s["throttled"] += 1
+        return waited
+
+    # ----- 재시도 -----
+    def backoff_delay(self, attempt: int, retry_after: str | None = None) -> float:
+        """attempt(0부터) 번째 재시도 전 대기 시간: Retry-After 가 있으면 그것, 없으면 full jitter"""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max_sec)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max_sec, 2 ** attempt))
+
+    def run(self, send, status_of, account: str, sheet_id: str | None = None,
+            retry_after_of=None, lane: str | None = None, idempotent: bool = True):
+        """
+        send() 로 요청 1회를 보내고 status_of(결과) 로 HTTP 상태를 본다.
+        재시도 대상 상태면 백오프 후 다시 보낸다 (최대 max_retries 회). 마지막 결과를 그대로 반환.
+        idempotent=False(append, 행 삭제, 파일 생성 등)면 408 / 5xx 는 재시도하지 않는다.
+        """
+        lane = lane or current_lane()
+        attempt = 0
+        while True:
+            self.acquire(account, sheet_id, lane)
+            result = send()
+            if not _should_retry(status_of(result), result, idempotent) or attempt >= self.max_retries:
+                return result
+            retry_after = retry_after_of(result) if retry_after_of else None
+            delay = self.backoff_delay(attempt, retry_after)
+            with self._cond:
+                self._stats[lane]["retries"] += 1
+            print(f"[api] {status_of(result)} 응답, {delay:.1f}초 후 재시도 ({attempt + 1}/{self.max_retries})")
+            time.sleep(delay)
+            attempt += 1
+
+    def stats(self) -> dict:
+        with self._cond:
+            out = {}
+            for lane, s in self._stats.items():
+                out[lane] = dict(s)
+                out[lane]["wait_avg"] = s["wait_total"] / s["calls"] if s["calls"] else 0.0
+                out[lane]["waiting"] = self._waiting[lane]
+            out["buckets"] = len(self._buckets)
+            return out
+
+
+def is_idempotent_request(method: str, kind: str) -> bool:
+    """다시 보내도 결과가 같은 요청인지 (method: HTTP 메서드, kind: endpoint_kind 결과)"""
+    method = (method or "GET").upper()
+    if method == "POST":
+        return kind in IDEMPOTENT_POST_KINDS
+    return True   # GET / PUT(values.update) / PATCH / DELETE
+
+
+def _should_retry(status: int, result=None, idempotent: bool = True) -> bool:
+    if status == RATE_LIMIT_STATUS:
+        return True   # 처리 전에 거절된 요청이라 무엇이든 다시 보내도 된다
+    if status in RETRYABLE_STATUS:
+        return idempotent
+    # Drive API 는 쿼터 초과를 403 + rateLimitExceeded 로 돌려준다
+    if status == 403 and result is not None:
+        body = _body_text(result)
+        return "rateLimitExceeded" in body or "userRateLimitExceeded" in body
+    return False
+
+
+def _body_text(result) -> str:
+    if isinstance(result, tuple):  # httplib2: (resp, content)
+        content = result[1]
+        return content.decode("utf-8", "ignore") if isinstance(content, bytes) else str(content)
+    return getattr(result, "text", "") or ""
+
+
+# ===== 레인 (스레드별) =====
+_lane_local = threading.local()
+
+
+def current_lane() -> str:
+    return getattr(_lane_local, "lane", LANE_INTERACTIVE)
+
+
+@contextmanager
+def api_lane(lane: str):
+    """with api_lane(LANE_BACKGROUND): 블록 안의 구글 API 호출을 해당 레인으로 보낸다"""
+    prev = current_lane()
+    _lane_local.lane = lane
+    try:
+        yield
+    finally:
+        _lane_local.lane = prev
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> ApiScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = ApiScheduler()
+        return _scheduler
+
+
+def get_api_scheduler_stats() -> dict:
+    return get_scheduler().stats()
+
+
+def _account_of(creds) -> str:
+    return (
+        getattr(creds, "service_account_email", None)
+        or getattr(creds, "client_id", None)
+        or "default"
+    )
+
+
+def _spreadsheet_id_of(url: str):
+    m = _SPREADSHEET_ID_RE.search(url or "")
+    return m.group(1) if m else None
+
+
+# ===== gspread 연결 =====
+class ScheduledHTTPClient(HTTPClient):
+    """gspread 의 모든 요청을 스케줄러를 거쳐 보내는 HTTPClient"""
+
+    def request(self, method, endpoint, params=None, data=None, json=None,
+                files=None, headers=None):
+        started = time.perf_counter()
+        attempts = [0]
+
+        def send():
+            attempts[0] += 1
+            return self.session.request(
+                method=method,
+                url=endpoint,
+                json=json,
+                params=params,
+                data=data,
+                files=files,
+                headers=headers,
+                timeout=self.timeout,
+            )
+
+        kind = endpoint_kind(endpoint, method)
+        response = get_scheduler().run(
+            send,
+            status_of=lambda r: r.status_code,
+            account=_account_of(self.auth),
+            sheet_id=_spreadsheet_id_of(endpoint),
+            retry_after_of=lambda r: r.headers.get("Retry-After"),
+            idempotent=is_idempotent_request(method, kind),
+        )
+        record_api_call(
+            "sheets", method, kind,
+            sheet=tabs_of_request(endpoint, params, json),
+            bytes_out=body_size(json if json is not None else data),
+            bytes_in=len(response.content or b""),
+            latency=time.perf_counter() - started,
+            retries=attempts[0] - 1,
+            status=response.status_code,
+        )
+        if response.ok:
+            return response
+        raise APIError(response)
+
+
+# ===== googleapiclient 연결 =====
+class AuthorizedHttpPool:
+    """
+    같은 자격 증명으로 인증된 httplib2 연결 묶음.
+    httplib2.Http 는 스레드 안전하지 않아서 요청마다 1개를 빌려 쓰고 돌려준다.
+    돌려받은 Http 는 keep-alive 연결을 그대로 들고 있으므로 다음 요청은 TLS 핸드셰이크 없이 나간다.
+    """
+
+    def __init__(self, creds, size: int = GOOGLE_HTTP_POOL_SIZE):
+        self.credentials = creds
+        self.size = max(1, size)
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._stats = {"checkouts": 0, "created": 0, "waited": 0}
+
+    def _checkout(self) -> AuthorizedHttp:
+        try:
+            http = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+                    self._stats["created"] += 1
+            if can_create:
+                http = AuthorizedHttp(self.credentials)
+            else:
+                with self._lock:
+                    self._stats["waited"] += 1
+                http = self._idle.get()
+        with self._lock:
+            self._stats["checkouts"] += 1
+        return http
+
+    def request(self, *args, **kwargs):
+        http = self._checkout()
+        try:
+            return http.request(*args, **kwargs)
+        finally:
+            self._idle.put(http)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, size=self.size, idle=self._idle.qsize())
+
+
+class ScheduledHttp:
+    """
+    googleapiclient 에 넘기는 http 객체. request() 만 스케줄러를 거치고 나머지는 그대로 위임.
+    여러 스레드가 같이 써도 되도록 실제 요청은 AuthorizedHttpPool 에서 빌린 연결로 보낸다.
+    """
+
+    def __init__(self, creds, pool: AuthorizedHttpPool | None = None):
+        self._pool = pool or AuthorizedHttpPool(creds)
+        self._account = _account_of(creds)
+        self.credentials = creds
+
+    def request(self, uri, method="GET", body=None, headers=None, *args, **kwargs):
+        started = time.perf_counter()
+        attempts = [0]
+
+        def send():
+            attempts[0] += 1
+            return self._pool.request(uri, method, body, headers, *args, **kwargs)
+
+        kind = endpoint_kind(uri, method)
+        result = get_scheduler().run(
+            send,
+            status_of=lambda r: r[0].status,
+            account=self._account,
+            sheet_id=_spreadsheet_id_of(uri),
+            retry_after_of=lambda r: r[0].get("retry-after"),
+            idempotent=is_idempotent_request(method, kind),
+        )
+        resp, content = result
+        record_api_call(
+            "sheets" if "/spreadsheets/" in uri else "drive",
+            method, kind,
+            bytes_out=body_size(body),
+            bytes_in=len(content or b""),
+            latency=time.perf_counter() - started,
+            retries=attempts[0] - 1,
+            status=resp.status,
+        )
+        return result
+
+    def close(self):
+        """풀 연결은 서비스 레지스트리가 프로세스 끝까지 들고 있으므로 닫지 않는다"""
+        return None
+
+
+def scheduled_http(creds, pool: AuthorizedHttpPool | None = None) -> ScheduledHttp:
+    return ScheduledHttp(creds, pool)
@@ -0,0 +1,157 @@
+# core/cache_snapshot.py
+#
+# 테넌트 캐시의 디스크 스냅샷 (컨테이너 재시작 후 따뜻한 캐시처럼 시작하기).
+# Render 컨테이너가 재시작되면 메모리 캐시가 다 사라져서, 사무실마다 첫 화면에서
+# 고객 데이터 / 일일결산 / 진행업무를 처음부터 다시 받았다. 여기서는 캐시 내용을 로컬 디스크에
+# 압축 스냅샷으로 남겨 두고, 재시작 뒤 처음 필요할 때(지연 로딩) 읽어서 검증 후 재사용한다.
+#
+# - 파일: SNAPSHOT_DIR/{종류}/{sha1(이름)}.snap
+#         = 매직 b"HWSNAP" + 포맷 버전(1바이트) + zlib(pickle(payload))
+#   payload = {"name", "version"(시트 버전 문자열), "saved_at"(epoch 초), "data"}
+# - 포맷 버전(SNAPSHOT_FORMAT)이나 저장 구조가 바뀌면 옛 파일은 조용히 무시된다.
+# - 저장은 백그라운드 스레드 1개가 모아서 한다 (같은 이름은 마지막 값만 저장, tmp → os.replace).
+# - 검증은 부르는 쪽 책임: core.google_sheets 가 Drive modifiedTime|version 또는 변경 로그로 확인한다.
+# - pickle 은 이 앱이 직접 쓴 로컬 파일만 읽는다 (SNAPSHOT_DIR 은 외부에서 쓰지 않는 경로로 둘 것).
+# 이 모듈은 gspread / streamlit 에 의존하지 않는다.
+
+import hashlib
+import os
+import pickle
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from config import SNAPSHOT_ENABLED, SNAPSHOT_DIR
+
+SNAPSHOT_MAGIC = b"HWSNAP"
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_COMPRESS_LEVEL = 3
+
+_lock = threading.Lock()
+_pending: dict[tuple[str, str], dict] = {}   # (종류, 이름) -> 저장할 payload (마지막 값만)
+_writer: ThreadPoolExecutor | None = None
+_stats = {"saved": 0, "loaded": 0, "missing": 0, "rejected": 0, "errors": 0, "bytes_written": 0}
+
+
+def _path(kind: str, name: str) -> str:
+    digest = hashlib.sha1(name.encode("utf-8")).hexdigest()
+    return os.path.join(SNAPSHOT_DIR, kind, f"{digest}.snap")
+
+
+def _encode(payload: dict) -> bytes:
+    raw = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+    return SNAPSHOT_MAGIC + bytes([SNAPSHOT_FORMAT]) + zlib.compress(raw, SNAPSHOT_COMPRESS_LEVEL)
+
+
+def _decode(blob: bytes) -> dict | None:
+    head = len(SNAPSHOT_MAGIC)
+    if blob[:head] != SNAPSHOT_MAGIC or len(blob) <= head or blob[head] != SNAPSHOT_FORMAT:
+        return None
+    return pickle.loads(zlib.decompress(blob[head + 1:]))
+
+
+# ===== 저장 =====
+def _write(kind: str, name: str, payload: dict) -> None:
+    path = _path(kind, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    blob = _encode(payload)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(blob)
+    os.replace(tmp, path)
+    with _lock:
+        _stats["saved"] += 1
+        _stats["bytes_written"] += len(blob)
+
+
+def _flush_pending(key: tuple[str, str]) -> None:
+    with _lock:
+        payload = _pending.pop(key, None)
+    if payload is None:
+        return   # 더 새 값이 이미 저장됨
+    try:
+        _write(key[0], key[1], payload)
+    except Exception as e:
+        with _lock:
+            _stats["errors"] += 1
+        print(f"[snapshot] 저장 실패 ({key[0]}/{key[1]}): {e}")
+
+
+def save_snapshot(kind: str, name: str, version: str | None, data, wait: bool = False) -> None:
+    """
+    스냅샷 저장 예약 (기본: 백그라운드). version 은 data 를 읽기 전에 잡은 시트 버전 문자열.
+    data 는 호출 뒤에 바뀌어도 되도록 여기서 바로 직렬화 가능한 복사본이어야 한다 (부르는 쪽이 복사).
+    """
+    if not SNAPSHOT_ENABLED:
+        return
+    payload = {"name": name, "version": version, "saved_at": time.time(), "data": data}
+    if wait:
+        try:
+            _write(kind, name, payload)
+        except Exception as e:
+            with _lock:
+                _stats["errors"] += 1
+            print(f"[snapshot] 저장 실패 ({kind}/{name}): {e}")
+        return
+
+    global _writer
+    key = (kind, name)
+    with _lock:
+        already = key in _pending
+        _pending[key] = payload
+        if _writer is None:
+            _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot")
+        writer = _writer
+    if not already:
+        writer.submit(_flush_pending, key)
+
+
+# ===== 읽기 =====
+def load_snapshot(kind: str, name: str) -> dict | None:
+    """저장된 payload ({"version", "saved_at", "data", ...}) 또는 None (없음/깨짐/옛 포맷)"""
+    if not SNAPSHOT_ENABLED:
+        return None
+    with _lock:
+        pending = _pending.get((kind, name))
+    if pending is not None:
+        return pending
+    path = _path(kind, name)
+    try:
+        with open(path, "rb") as f:
+            payload = _decode(f.read())
+    except FileNotFoundError:
+        with _lock:
+            _stats["missing"] += 1
+        return None
+    except Exception as e:
+        print(f"[snapshot] 읽기 실패 ({kind}/{name}): {e}")
+        payload = None
+    if payload is None or payload.get("name") != name:
+        with _lock:
+            _stats["rejected"] += 1
+        return None
+    with _lock:
+        _stats["loaded"] += 1
+    return payload
+
+
+def drop_snapshot(kind: str, name: str) -> bool:
+    with _lock:
+        _pending.pop((kind, name), None)
+    try:
+        os.remove(_path(kind, name))
+        return True
+    except OSError:
+        return False
+
+
+def note_snapshot_rejected() -> None:
+    """읽었지만 검증(버전 비교)에서 떨어진 스냅샷 수를 센다"""
+    with _lock:
+        _stats["rejected"] += 1
+
+
+def get_snapshot_stats() -> dict:
+    with _lock:
+        return dict(_stats, pending=len(_pending), enabled=SNAPSHOT_ENABLED, dir=SNAPSHOT_DIR)
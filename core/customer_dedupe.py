@@ -0,0 +1,312 @@
+# core/customer_dedupe.py
+#
+# 스캔(여권/등록증 OCR) 저장용 중복 고객 인덱스.
+# 스캔 저장은 고객 시트 전체를 받아서 여권 / 등록증+번호 가 글자 그대로 같은 행만 찾았다.
+# 그래서 OCR 이 O 를 0 으로 읽었거나, 여권을 새로 발급받아 번호가 바뀐 고객은 새 고객으로 또 들어갔다.
+#
+# - 정확히 일치: 정규화한 여권번호 → 고객, 정규화한 등록번호(앞 6 + 뒤 7) → 고객 (해시 맵)
+#   정규화 = 대문자, 공백/'-'/'.' 제거, OCR 에서 헷갈리는 글자 통일 (O·Q → 0, I → 1)
+# - 비슷한 고객: 블록 키가 같은 고객끼리만 점수를 매긴다 (전체를 훑지 않는다)
+#     블록 1 = (생년월일(등록증 앞 6자리), 국적)
+#     블록 2 = (영문 이름(성/명 순서 무관), 국적)
+#   점수 = 이름 유사도 0.6 + 생년월일 일치 0.25 + 국적 일치 0.15 (FUZZY_MIN_SCORE 이상만 후보)
+# - 후보는 점수 순. 정확히 일치한 후보(exact)는 1.0 으로 맨 앞에 온다.
+#   자동으로 고치는 것은 exact 가 한 명뿐일 때뿐이다 (여권은 A, 등록번호는 B 처럼 갈리면 골라야 한다).
+#   비슷한 후보도 화면에서 사용자가 골라야 반영한다.
+# - 갱신: 같은 DF 객체면 아무것도 안 하고, 새 DF 면 값이 바뀐 고객만 맵/블록에서 빼고 다시 넣는다
+# 이 모듈은 gspread / streamlit 에 의존하지 않는다.
+
+import difflib
+import re
+import threading
+import weakref
+
+import pandas as pd
+
+ID_FIELD = "고객ID"
+# 인덱스에 쓰는 고객 컬럼 (이 순서로 값 튜플을 만든다)
+DEDUPE_COLUMNS = ("고객ID", "한글", "성", "명", "국가", "여권", "등록증", "번호")
+FUZZY_MIN_SCORE = 0.6
+
+_OCR_TABLE = str.maketrans({"O": "0", "Q": "0", "I": "1", " ": None, "-": None, ".": None})
+_NOT_LATIN = re.compile(r"[^A-Z ]+")
+
+
+# ===== 정규화 =====
+def normalize_doc_no(text) -> str:
+    """여권번호 / 등록번호 비교용: 'm 1234-567o' → 'M12345670'"""
+    return str(text or "").strip().upper().translate(_OCR_TABLE)
+
+
+def arc_key(front, back) -> str:
+    """등록증 앞 6 + 뒤 7 → 13자리 키 (둘 중 하나라도 비면 '')"""
+    f, b = normalize_doc_no(front), normalize_doc_no(back)
+    return f + b if f and b else ""
+
+
+def normalize_latin_name(surname, given) -> str:
+    """영문 이름: 대문자 알파벳 토큰을 정렬해서 붙인다 (성/명 순서가 바뀌어도 같게)"""
+    text = _NOT_LATIN.sub(" ", f"{surname or ''} {given or ''}".upper())
+    return " ".join(sorted(text.split()))
+
+
+def normalize_korean_name(text) -> str:
+    return "".join(str(text or "").split())
+
+
+def birth_key(reg_front) -> str:
+    """등록증 앞 6자리(YYMMDD) 가 숫자면 그대로 (세기 판단 없이 블록 키로만 쓴다)"""
+    s = str(reg_front or "").strip().split(".")[0]
+    return s[:6] if len(s) >= 6 and s[:6].isdigit() else ""
+
+
+def _ratio(a: str, b: str) -> float:
+    if not a or not b:
+        return 0.0
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
+
+class _Entry:
+    """고객 1명의 정규화 값"""
+    __slots__ = ("passport", "arc", "latin", "korean", "birth", "nation")
+
+    def __init__(self, values: tuple):
+        f = dict(zip(DEDUPE_COLUMNS, values))
+        self.passport = normalize_doc_no(f["여권"])
+        self.arc = arc_key(f["등록증"], f["번호"])
+        self.latin = normalize_latin_name(f["성"], f["명"])
+        self.korean = normalize_korean_name(f["한글"])
+        self.birth = birth_key(f["등록증"])
+        self.nation = str(f["국가"]).strip().upper()
+
+    def blocks(self) -> list[tuple]:
+        out = []
+        if self.birth:
+            out.append(("birth", self.birth, self.nation))
+        if self.latin:
+            out.append(("name", self.latin, self.nation))
+        return out
+
+
+class DedupeCandidate:
+    """중복일 수 있는 기존 고객"""
+    __slots__ = ("cust_id", "score", "exact", "reasons", "row")
+
+    def __init__(self, cust_id, score, exact, reasons, row):
+        self.cust_id = cust_id
+        self.score = score                # 0 ~ 1 (exact 는 1.0)
+        self.exact = exact                # 여권번호 / 등록번호가 (정규화 후) 같음
+        self.reasons = reasons            # 화면에 보여줄 근거 목록
+        self.row = row                    # 기존 고객 값 {컬럼: 값} (DEDUPE_COLUMNS)
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+# ===== 색인 =====
+class CustomerDedupeIndex:
+    """여권 / 등록번호 해시 맵 + (생년월일, 국적) / (영문 이름, 국적) 블록"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._values: dict[str, tuple] = {}     # 색인에 쓴 원래 값 (바뀜 확인용)
+        self._entries: dict[str, _Entry] = {}
+        # 키 → 고객ID (한 명이면 문자열 그대로, 여러 명일 때만 set — 고객마다 set 을 만들지 않게)
+        self._by_passport: dict[str, str | set] = {}
+        self._by_arc: dict[str, str | set] = {}
+        self._blocks: dict[tuple, str | set] = {}
+        self._frame_ref = None
+        self.stats = {"rows": 0, "reindexed": 0, "removed": 0, "syncs": 0, "lookups": 0}
+
+    # ----- 갱신 -----
+    @staticmethod
+    def _add(table: dict, key, cust_id: str) -> None:
+        if not key:
+            return
+        ids = table.get(key)
+        if ids is None:
+            table[key] = cust_id
+        elif isinstance(ids, str):
+            if ids != cust_id:
+                table[key] = {ids, cust_id}
+        else:
+            ids.add(cust_id)
+
+    @staticmethod
+    def _discard(table: dict, key, cust_id: str) -> None:
+        ids = table.get(key)
+        if ids is None:
+            return
+        if isinstance(ids, str):
+            if ids == cust_id:
+                del table[key]
+            return
+        ids.discard(cust_id)
+        if len(ids) == 1:
+            table[key] = next(iter(ids))
+        elif not ids:
+            del table[key]
+
+    @staticmethod
+    def _ids(table: dict, key) -> tuple | set:
+        ids = table.get(key) if key else None
+        if ids is None:
+            return ()
+        return (ids,) if isinstance(ids, str) else ids
+
+    def _unlink(self, cust_id: str) -> None:
+        entry = self._entries.pop(cust_id, None)
+        if entry is None:
+            return
+        self._discard(self._by_passport, entry.passport, cust_id)
+        self._discard(self._by_arc, entry.arc, cust_id)
+        for block in entry.blocks():
+            self._discard(self._blocks, block, cust_id)
+
+    def upsert(self, cust_id: str, values: tuple) -> bool:
+        """고객 1명 반영 (values = DEDUPE_COLUMNS 순서 값). 바뀐 게 없으면 False"""
+        with self._lock:
+            if self._values.get(cust_id) == values:
+                return False
+            self._unlink(cust_id)
+            entry = _Entry(values)
+            self._values[cust_id] = values
+            self._entries[cust_id] = entry
+            self._add(self._by_passport, entry.passport, cust_id)
+            self._add(self._by_arc, entry.arc, cust_id)
+            for block in entry.blocks():
+                self._add(self._blocks, block, cust_id)
+            self.stats["reindexed"] += 1
+            return True
+
+    def remove(self, cust_id: str) -> bool:
+        with self._lock:
+            if self._values.pop(cust_id, None) is None:
+                return False
+            self._unlink(cust_id)
+            self.stats["removed"] += 1
+            return True
+
+    def sync(self, df: pd.DataFrame) -> int:
+        """
+        df(고객 DF) 와 색인을 맞춘다. 반환: 다시 반영한 + 지운 고객 수.
+        직전에 맞춘 DF 객체와 같으면 바로 0.
+        """
+        with self._lock:
+            if self._frame_ref is not None and self._frame_ref() is df:
+                return 0
+            rows = frame_dedupe_values(df)
+            changed = 0
+            seen = set()
+            for cust_id, values in rows:
+                seen.add(cust_id)
+                changed += self.upsert(cust_id, values)
+            for cust_id in [c for c in self._values if c not in seen]:
+                changed += self.remove(cust_id)
+            try:
+                self._frame_ref = weakref.ref(df)
+            except TypeError:
+                self._frame_ref = None
+            self.stats["syncs"] += 1
+            self.stats["rows"] = len(self._values)
+            return changed
+
+    # ----- 조회 -----
+    def _row(self, cust_id: str) -> dict:
+        return dict(zip(DEDUPE_COLUMNS, self._values[cust_id]))
+
+    def candidates(self, query: dict, limit: int = 5) -> list[DedupeCandidate]:
+        """
+        query({DEDUPE_COLUMNS 중 일부: 값}, 스캔한 값) 와 같거나 비슷한 기존 고객 (점수 순, 최대 limit 명)
+        """
+        q = _Entry(tuple(str(query.get(c, "") or "").strip() for c in DEDUPE_COLUMNS))
+        raw_passport = str(query.get("여권", "") or "").strip().upper()
+        found: dict[str, DedupeCandidate] = {}
+        with self._lock:
+            self.stats["lookups"] += 1
+
+            # 1) 정확히 일치 (해시 맵)
+            for cust_id in self._ids(self._by_passport, q.passport):
+                row = self._row(cust_id)
+                same_raw = str(row["여권"]).strip().upper() == raw_passport
+                reason = "여권번호 일치" if same_raw else "여권번호 일치 (O/0 등 OCR 보정)"
+                found[cust_id] = DedupeCandidate(cust_id, 1.0, True, [reason], row)
+            for cust_id in self._ids(self._by_arc, q.arc):
+                if cust_id in found:
+                    found[cust_id].reasons.append("등록번호 일치")
+                else:
+                    found[cust_id] = DedupeCandidate(cust_id, 1.0, True, ["등록번호 일치"], self._row(cust_id))
+
+            # 2) 블록 안에서만 비슷한 고객 점수
+            pool = set()
+            for block in q.blocks():
+                pool.update(self._ids(self._blocks, block))
+            for cust_id in pool - found.keys():
+                entry = self._entries[cust_id]
+                name_sim = max(_ratio(q.latin, entry.latin), _ratio(q.korean, entry.korean))
+                same_birth = bool(q.birth) and q.birth == entry.birth
+                same_nation = bool(q.nation) and q.nation == entry.nation
+                score = 0.6 * name_sim + 0.25 * same_birth + 0.15 * same_nation
+                if score < FUZZY_MIN_SCORE:
+                    continue
+                reasons = [f"이름 유사도 {name_sim:.2f}"]
+                if same_birth:
+                    reasons.append("생년월일 일치")
+                if same_nation:
+                    reasons.append("국적 일치")
+                if q.passport and entry.passport and q.passport != entry.passport:
+                    reasons.append("여권번호 다름 (재발급?)")
+                found[cust_id] = DedupeCandidate(cust_id, round(score, 3), False, reasons, self._row(cust_id))
+
+        ranked = sorted(found.values(), key=lambda c: (not c.exact, -c.score, c.cust_id))
+        return ranked[:limit]
+
+
+def exact_match_ids(candidates: list[DedupeCandidate]) -> list[str]:
+    """정확히 일치한 후보의 고객ID (자동 반영은 이게 1개일 때만)"""
+    return [c.cust_id for c in candidates if c.exact]
+
+
+def frame_dedupe_values(df: pd.DataFrame) -> list[tuple[str, tuple]]:
+    """고객 DF → [(고객ID, DEDUPE_COLUMNS 순서 값)] (고객ID 가 빈 행은 뺀다)"""
+    if df is None or df.empty or ID_FIELD not in df.columns:
+        return []
+    df = df.loc[:, ~df.columns.duplicated()]
+    n = len(df)
+
+    def col(name):
+        if name in df.columns:
+            return df[name].fillna("").astype(str).str.strip().tolist()
+        return [""] * n
+
+    cols = [col(c) for c in DEDUPE_COLUMNS]
+    return [(values[0], values) for values in zip(*cols) if values[0]]
+
+
+# ===== 테넌트별 색인 =====
+_indexes: dict[str, CustomerDedupeIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_dedupe_index(tenant_id: str) -> CustomerDedupeIndex:
+    with _indexes_lock:
+        index = _indexes.get(tenant_id)
+        if index is None:
+            index = _indexes[tenant_id] = CustomerDedupeIndex()
+        return index
+
+
+def find_duplicate_candidates(tenant_id: str, df: pd.DataFrame, query: dict,
+                              limit: int = 5) -> list[DedupeCandidate]:
+    """df 기준으로 색인을 맞춘 뒤 query 와 같거나 비슷한 기존 고객 후보"""
+    index = get_dedupe_index(tenant_id)
+    index.sync(df)
+    return index.candidates(query, limit)
+
+
+def get_dedupe_stats() -> dict:
+    with _indexes_lock:
+        return {
+            tenant: dict(index.stats, passports=len(index._by_passport), blocks=len(index._blocks))
+            for tenant, index in _indexes.items()
+        }
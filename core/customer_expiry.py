@@ -0,0 +1,286 @@
+# core/customer_expiry.py
+#
+# 등록증 / 여권 만기 인덱스.
+# 홈 화면은 재실행마다 고객 DF 전체의 만기일/만기 컬럼을 pd.to_datetime 으로 다시 읽고,
+# 전화번호/생년월일을 행마다 apply 로 만든 뒤 필터 + 정렬했다.
+# 여기서는 고객 컬럼을 읽을 때 한 번만 만기 날짜를 (날짜, 고객ID) 정렬 목록으로 만들어 두고,
+# "오늘 ~ 4개월 이내" 같은 구간은 이분 탐색으로 잘라 낸다.
+#
+# - 종류: card(등록증, '만기일') / passport(여권, '만기'). 날짜는 'YYYY-MM-DD' / 'YYYY.MM.DD' (앞 10자)
+# - 표시 값(한글이름 / 여권번호 / 생년월일 / 전화번호)도 색인할 때 한 번만 만든다
+# - 갱신: 같은 DF 객체면 아무것도 안 하고, 새 DF 면 값이 바뀐 고객만 정렬 목록에서 빼고 다시 넣는다
+#   (바뀐 고객이 많으면 처음부터 다시 정렬)
+# - 테넌트별로 따로 두므로 관리자 화면에서 여러 사무실의 만기 예정 고객을 한 번에 모을 수 있다
+# 이 모듈은 gspread / streamlit 에 의존하지 않는다.
+
+import bisect
+import datetime
+import threading
+import weakref
+
+import pandas as pd
+
+ID_FIELD = "고객ID"
+EXPIRY_CARD = "card"
+EXPIRY_PASSPORT = "passport"
+EXPIRY_DATE_FIELDS = {EXPIRY_CARD: "만기일", EXPIRY_PASSPORT: "만기"}
+# 만기 인덱스를 만드는 데 필요한 고객 컬럼 (이 순서로 값 튜플을 만든다)
+EXPIRY_COLUMNS = ("고객ID", "한글", "여권", "연", "락", "처", "등록증", "번호", "만기일", "만기")
+DISPLAY_COLUMNS = ("한글이름", "여권번호", "생년월일", "전화번호")
+
+_REBUILD_RATIO = 0.25   # 바뀐 고객이 이 비율을 넘으면 하나씩 고치지 않고 다시 정렬
+
+
+# ===== 값 변환 =====
+def parse_expiry_date(text) -> int | None:
+    """'2026-03-01' / '2026.03.01' (뒤에 시간 등이 붙어도 앞 10자) → date ordinal, 못 읽으면 None"""
+    s = str(text or "").strip().replace(".", "-")[:10]
+    if len(s) != 10:
+        return None
+    try:
+        return datetime.datetime.strptime(s, "%Y-%m-%d").date().toordinal()
+    except ValueError:
+        return None
+
+
+def _phone_part(x, width: int) -> str:
+    x = str(x).split('.')[0]
+    if x.strip() and x.lower() != 'nan':
+        return x.zfill(width)
+    return " "
+
+
+def format_phone(first, middle, last) -> str:
+    """연/락/처 → '010 1234 5678' (세 칸이 다 비면 '(정보없음)')"""
+    text = f"{_phone_part(first, 3)} {_phone_part(middle, 4)} {_phone_part(last, 4)}"
+    return "(정보없음)" if not text.strip() else text
+
+
+def birth_date_text(reg_front, reg_back=None, today: datetime.date | None = None) -> str:
+    """
+    reg_front: '등록증' 앞 6자리(YYMMDD), reg_back: '번호' 뒤 7자리(선택 — 첫 자리로 세기 판단)
+    반환: 'YYYY-MM-DD' 또는 ''
+    """
+    s = str(reg_front or "").strip().split('.')[0]   # '680101.0' 같은 형태 방지
+    if len(s) < 6 or not s[:6].isdigit():
+        return ""
+    yy, mm, dd = int(s[:2]), int(s[2:4]), int(s[4:6])
+
+    # 세기 판단: '번호' 첫 자리(1,2,5,6=1900 / 3,4,7,8=2000). 없으면 휴리스틱
+    century = None
+    rb = str(reg_back or "").strip().split('.')[0]
+    if rb[:1] in ("1", "2", "5", "6"):
+        century = 1900
+    elif rb[:1] in ("3", "4", "7", "8"):
+        century = 2000
+    if century is None:
+        curr_yy = (today or datetime.date.today()).year % 100
+        century = 1900 if yy > curr_yy else 2000
+
+    try:
+        return datetime.date(century + yy, mm, dd).strftime("%Y-%m-%d")
+    except ValueError:
+        return ""
+
+
+def add_months(day: datetime.date, months: int) -> datetime.date:
+    """pd.DateOffset(months=...) 와 같은 규칙 (말일은 그 달 말일로)"""
+    return (pd.Timestamp(day) + pd.DateOffset(months=months)).date()
+
+
+# ===== 색인 =====
+class CustomerExpiryIndex:
+    """고객 키 → 표시 값 + 종류별 (만기 ordinal, 고객 키) 정렬 목록"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._values: dict[str, tuple] = {}     # 색인에 쓴 원래 값 (바뀜 확인용)
+        self._display: dict[str, tuple] = {}    # DISPLAY_COLUMNS 순서 표시 값
+        self._dates: dict[str, dict[str, int]] = {k: {} for k in EXPIRY_DATE_FIELDS}
+        self._sorted: dict[str, list[tuple[int, str]]] = {k: [] for k in EXPIRY_DATE_FIELDS}
+        self._frame_ref = None
+        self.stats = {"rows": 0, "reindexed": 0, "removed": 0, "rebuilds": 0, "syncs": 0, "queries": 0}
+
+    @property
+    def ready(self) -> bool:
+        return self.stats["syncs"] > 0
+
+    # ----- 갱신 -----
+    @staticmethod
+    def _row_entry(values: tuple) -> tuple[tuple, dict]:
+        f = dict(zip(EXPIRY_COLUMNS, values))
+        display = (   # DISPLAY_COLUMNS 순서
+            f["한글"],
+            f["여권"],
+            birth_date_text(f["등록증"], f["번호"]),
+            format_phone(f["연"], f["락"], f["처"]),
+        )
+        dates = {kind: parse_expiry_date(f[col]) for kind, col in EXPIRY_DATE_FIELDS.items()}
+        return display, dates
+
+    def _unlink(self, key: str) -> None:
+        for kind, by_key in self._dates.items():
+            ordinal = by_key.pop(key, None)
+            if ordinal is not None:
+                lst = self._sorted[kind]
+                i = bisect.bisect_left(lst, (ordinal, key))
+                if i < len(lst) and lst[i] == (ordinal, key):
+                    del lst[i]
+
+    def upsert(self, key: str, values: tuple) -> bool:
+        """고객 1명 반영 (values = EXPIRY_COLUMNS 순서 값). 바뀐 게 없으면 False"""
+        with self._lock:
+            if self._values.get(key) == values:
+                return False
+            self._unlink(key)
+            display, dates = self._row_entry(values)
+            self._values[key] = values
+            self._display[key] = display
+            for kind, ordinal in dates.items():
+                if ordinal is not None:
+                    self._dates[kind][key] = ordinal
+                    bisect.insort(self._sorted[kind], (ordinal, key))
+            self.stats["reindexed"] += 1
+            return True
+
+    def remove(self, key: str) -> bool:
+        with self._lock:
+            if self._values.pop(key, None) is None:
+                return False
+            self._unlink(key)
+            self._display.pop(key, None)
+            self.stats["removed"] += 1
+            return True
+
+    def _rebuild(self, rows: list[tuple[str, tuple]]) -> None:
+        self._values, self._display = {}, {}
+        self._dates = {k: {} for k in EXPIRY_DATE_FIELDS}
+        for key, values in rows:
+            display, dates = self._row_entry(values)
+            self._values[key] = values
+            self._display[key] = display
+            for kind, ordinal in dates.items():
+                if ordinal is not None:
+                    self._dates[kind][key] = ordinal
+        self._sorted = {
+            kind: sorted((o, k) for k, o in by_key.items()) for kind, by_key in self._dates.items()
+        }
+        self.stats["rebuilds"] += 1
+        self.stats["reindexed"] += len(rows)
+
+    def sync(self, df: pd.DataFrame) -> int:
+        """
+        df(고객 DF 또는 EXPIRY_COLUMNS 만 읽은 DF) 와 색인을 맞춘다. 반환: 다시 반영한 + 지운 고객 수.
+        직전에 맞춘 DF 객체와 같으면 바로 0.
+        """
+        with self._lock:
+            if self._frame_ref is not None and self._frame_ref() is df:
+                return 0
+            rows = frame_expiry_values(df)
+            keys = {key for key, _ in rows}
+            changed = [(key, values) for key, values in rows if self._values.get(key) != values]
+            gone = [key for key in self._values if key not in keys]
+            if not self._values or len(changed) + len(gone) > _REBUILD_RATIO * len(rows):
+                self._rebuild(rows)
+            else:
+                for key, values in changed:
+                    self.upsert(key, values)
+                for key in gone:
+                    self.remove(key)
+            try:
+                self._frame_ref = weakref.ref(df)
+            except TypeError:
+                self._frame_ref = None
+            self.stats["syncs"] += 1
+            self.stats["rows"] = len(self._values)
+            return len(changed) + len(gone)
+
+    # ----- 조회 -----
+    def expiring(self, kind: str, start: datetime.date, end: datetime.date) -> list[tuple[int, str]]:
+        """start ~ end (양 끝 포함) 에 만기가 있는 [(ordinal, 고객 키)] (만기일 순)"""
+        with self._lock:
+            lst = self._sorted[kind]
+            lo = bisect.bisect_left(lst, (start.toordinal(),))
+            hi = bisect.bisect_left(lst, (end.toordinal() + 1,))
+            self.stats["queries"] += 1
+            return lst[lo:hi]
+
+    def expiring_frame(self, kind: str, start: datetime.date, end: datetime.date,
+                       date_label: str = "만기일") -> pd.DataFrame:
+        """홈 알림 표 모양: 한글이름 / date_label / 여권번호 / 생년월일 / 전화번호"""
+        with self._lock:
+            hits = self.expiring(kind, start, end)
+            shown = [(self._display[key], datetime.date.fromordinal(o).isoformat()) for o, key in hits]
+        rows = [(d[0], day, d[1], d[2], d[3]) for d, day in shown]
+        return pd.DataFrame(rows, columns=["한글이름", date_label, "여권번호", "생년월일", "전화번호"])
+
+
+def frame_expiry_values(df: pd.DataFrame) -> list[tuple[str, tuple]]:
+    """고객 DF → [(고객 키, EXPIRY_COLUMNS 순서 값)] (고객ID 가 없으면 '#행 위치' 를 키로)"""
+    if df is None or df.empty:
+        return []
+    df = df.loc[:, ~df.columns.duplicated()]
+    n = len(df)
+
+    def col(name):
+        if name in df.columns:
+            return df[name].fillna("").astype(str).str.strip().tolist()
+        return [""] * n
+
+    cols = [col(c) for c in EXPIRY_COLUMNS]
+    return [
+        (values[0] or f"#{pos}", values)
+        for pos, values in enumerate(zip(*cols))
+    ]
+
+
+# ===== 테넌트별 색인 =====
+_indexes: dict[str, CustomerExpiryIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_expiry_index(tenant_id: str) -> CustomerExpiryIndex:
+    with _indexes_lock:
+        index = _indexes.get(tenant_id)
+        if index is None:
+            index = _indexes[tenant_id] = CustomerExpiryIndex()
+        return index
+
+
+def sync_expiry_index(tenant_id: str, df: pd.DataFrame) -> CustomerExpiryIndex:
+    """고객 컬럼을 읽은 쪽(로더)이 부른다. 바뀐 고객만 다시 반영"""
+    index = get_expiry_index(tenant_id)
+    index.sync(df)
+    return index
+
+
+def expiry_report(tenant_ids, kind: str, months: int,
+                  today: datetime.date | None = None) -> pd.DataFrame:
+    """
+    여러 테넌트의 만기 예정 고객 (오늘 ~ months 개월 이내) 을 한 표로.
+    색인이 아직 없는 테넌트는 빠진다 (부르는 쪽이 먼저 컬럼을 읽어 sync 해 둔다).
+    """
+    today = today or datetime.date.today()
+    end = add_months(today, months)
+    label = "등록증만기일" if kind == EXPIRY_CARD else "여권만기일"
+    frames = []
+    for tenant_id in tenant_ids:
+        with _indexes_lock:
+            index = _indexes.get(tenant_id)
+        if index is None or not index.ready:
+            continue
+        frame = index.expiring_frame(kind, today, end, label)
+        if not frame.empty:
+            frame.insert(0, "tenant_id", tenant_id)
+            frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=["tenant_id", "한글이름", label, "여권번호", "생년월일", "전화번호"])
+    return pd.concat(frames, ignore_index=True).sort_values(label, kind="stable", ignore_index=True)
+
+
+def get_expiry_stats() -> dict:
+    with _indexes_lock:
+        return {
+            tenant: dict(index.stats, **{kind: len(lst) for kind, lst in index._sorted.items()})
+            for tenant, index in _indexes.items()
+        }
@@ -0,0 +1,278 @@
+# core/customer_search.py
+#
+# 고객 검색 인덱스 (초성 / 자모 부분 일치).
+# 고객관리 화면은 검색어를 칠 때마다(재실행마다) 모든 행을 문자열로 만들어 비교했고,
+# 문서작성 화면은 한글 이름 컬럼을 str.contains 로 매번 훑었다. 고객이 1만 명 가까이 되면
+# 한 번에 수백 ms 가 걸린다. 여기서는 고객 DF 를 읽을 때 역색인을 만들어 두고, 검색은 색인만 본다.
+#
+# - 대상 필드: 한글 / 성 / 명 / 여권 / 등록증 / phone(연+락+처) / 주소 (+ 고객ID)
+# - 정규화: 소문자, 공백·'-'·'.' 제거 (전화번호/등록번호를 붙여 쳐도, 나눠 쳐도 찾는다)
+# - 자모 분해: 음절을 초성·중성·종성(겹자모는 낱자로) 으로 풀어서 후보를 줄인다.
+#   확인은 음절 단위로: 앞 글자들은 음절이 그대로 같아야 하고, 마지막 글자만 치는 중인 것으로 보고
+#   자모 앞부분이 맞으면 된다 ("김처" → "김철수" 는 걸리고, "감" 이 "가마수" 에 걸리지는 않는다).
+# - 초성 검색: 검색어가 자음(ㄱ~ㅎ)으로만 되어 있으면 한글/주소의 초성 문자열에서 찾는다 ("ㄱㅊㅅ")
+# - 색인: 자모/초성 문자열의 3-gram → 행 번호 집합. 검색어 3-gram 들의 교집합 후보만 실제 문자열로 확인
+#   (3글자보다 짧은 검색어는 후보를 줄일 수 없어서 전체를 확인한다 — 그래도 문자열 비교만)
+# - 행: DF 의 행 위치(0부터)로 찾는다 (고객ID 가 빈 — 아직 저장 안 한 — 행도 찾는다).
+#   필드 값이 같은 행들은 문서 하나를 같이 쓴다.
+# - 갱신: 같은 DF 객체면 아무것도 안 하고, 새 DF 면 처음 보는 필드 값만 색인하고 안 쓰는 문서는 지운다
+#   (정렬만 바뀐 DF / 복사본은 행 위치만 다시 맞춘다)
+# - 색인은 세션마다 하나 (화면이 st.session_state 에 둔다) — 세션마다 DF 가 달라서
+#   (저장 안 한 행 등) 하나를 같이 쓰면 서로 다시 맞추느라 매번 전체를 훑고, 다른 세션 행이 섞인다.
+# 이 모듈은 gspread / streamlit 에 의존하지 않는다.
+
+import threading
+import weakref
+
+import pandas as pd
+
+ID_FIELD = "고객ID"
+PHONE_FIELD = "phone"
+PHONE_PARTS = ("연", "락", "처")
+SEARCH_FIELDS = ("한글", "성", "명", "여권", "등록증", PHONE_FIELD, "주소", ID_FIELD)
+CHOSEONG_FIELDS = ("한글", "주소")
+
+# ===== 한글 자모 =====
+_CHO = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNG = ["ㅏ", "ㅐ", "ㅑ", "ㅒ", "ㅓ", "ㅔ", "ㅕ", "ㅖ", "ㅗ", "ㅗㅏ", "ㅗㅐ", "ㅗㅣ", "ㅛ", "ㅜ",
+         "ㅜㅓ", "ㅜㅔ", "ㅜㅣ", "ㅠ", "ㅡ", "ㅡㅣ", "ㅣ"]
+_JONG = ["", "ㄱ", "ㄲ", "ㄱㅅ", "ㄴ", "ㄴㅈ", "ㄴㅎ", "ㄷ", "ㄹ", "ㄹㄱ", "ㄹㅁ", "ㄹㅂ", "ㄹㅅ", "ㄹㅌ",
+         "ㄹㅍ", "ㄹㅎ", "ㅁ", "ㅂ", "ㅂㅅ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ"]
+# 검색어에 낱자로 들어온 겹자모 (치는 중인 마지막 글자)
+_COMPAT_SPLIT = {
+    "ㄳ": "ㄱㅅ", "ㄵ": "ㄴㅈ", "ㄶ": "ㄴㅎ", "ㄺ": "ㄹㄱ", "ㄻ": "ㄹㅁ", "ㄼ": "ㄹㅂ", "ㄽ": "ㄹㅅ",
+    "ㄾ": "ㄹㅌ", "ㄿ": "ㄹㅍ", "ㅀ": "ㄹㅎ", "ㅄ": "ㅂㅅ",
+    "ㅘ": "ㅗㅏ", "ㅙ": "ㅗㅐ", "ㅚ": "ㅗㅣ", "ㅝ": "ㅜㅓ", "ㅞ": "ㅜㅔ", "ㅟ": "ㅜㅣ", "ㅢ": "ㅡㅣ",
+}
+_SYLLABLE_BASE = 0xAC00
+_SYLLABLE_COUNT = 11172
+
+_COMPAT_TABLE = {ord(k): v for k, v in _COMPAT_SPLIT.items()}
+_JAMO_TABLE = dict(_COMPAT_TABLE)
+_CHOSEONG_TABLE = {}
+for _i in range(_SYLLABLE_COUNT):
+    _JAMO_TABLE[_SYLLABLE_BASE + _i] = _CHO[_i // 588] + _JUNG[(_i % 588) // 28] + _JONG[_i % 28]
+    _CHOSEONG_TABLE[_SYLLABLE_BASE + _i] = _CHO[_i // 588]
+_CONSONANTS = set("ㄱㄲㄳㄴㄵㄶㄷㄸㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅃㅄㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ")
+_STRIP_TABLE = {ord(c): None for c in " \t\r\n-."}
+
+
+def normalize_text(text) -> str:
+    """소문자 + 공백/'-'/'.' 제거"""
+    return str(text or "").lower().translate(_STRIP_TABLE)
+
+
+def to_jamo(text: str) -> str:
+    """음절을 자모 낱자로 푼다 ("김철" → "ㄱㅣㅁㅊㅓㄹ"). 한글이 아닌 글자는 그대로"""
+    return text.translate(_JAMO_TABLE)
+
+
+def to_choseong(text: str) -> str:
+    """음절을 초성으로 ("김철수" → "ㄱㅊㅅ"). 한글이 아닌 글자는 그대로"""
+    return text.translate(_CHOSEONG_TABLE)
+
+
+def is_choseong_query(text: str) -> bool:
+    return bool(text) and all(c in _CONSONANTS for c in text)
+
+
+GRAM = 3   # n-gram 길이 (자모 단위라 한 음절 ≒ 2~3 글자)
+
+
+def _grams(text: str) -> set:
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+def _syllable_match(text: str, head: str, tail: str) -> bool:
+    """text 에 head(음절 그대로) 바로 뒤로 자모가 tail 로 시작하는 글자가 오는 자리가 있는가"""
+    end = len(text) - len(head)
+    start = text.find(head)
+    while 0 <= start < end:
+        if to_jamo(text[start + len(head)]).startswith(tail):
+            return True
+        start = text.find(head, start + 1)
+    return False
+
+
+# ===== 색인 =====
+_live_indexes = weakref.WeakSet()   # 통계용 (세션이 끝나면 빠진다)
+
+
+class CustomerSearchIndex:
+    """필드 값 묶음(문서) → (필드별 정규화 문자열, 필드별 초성 문자열) + 자모/초성 3-gram 역색인, 문서 → 행 위치"""
+
+    def __init__(self, tenant_id: str = ""):
+        self.tenant_id = tenant_id
+        self._lock = threading.RLock()
+        self._slot_of: dict[tuple, int] = {}    # 필드 값 → 문서 번호
+        self._values: list[tuple | None] = []   # 문서 번호 → 필드 값 (지운 자리는 None)
+        self._text: list[dict | None] = []
+        self._cho: list[dict | None] = []
+        self._postings: dict[str, set] = {}
+        self._rows_of: dict[int, list[int]] = {}   # 문서 번호 → 지금 맞춘 DF 의 행 위치들
+        self._frame_ref = None
+        self.stats = {"rows": 0, "docs": 0, "reindexed": 0, "removed": 0, "syncs": 0, "searches": 0}
+        _live_indexes.add(self)
+
+    # ----- 갱신 -----
+    @staticmethod
+    def _row_docs(values: tuple) -> tuple[dict, dict]:
+        fields = dict(zip(SEARCH_FIELDS, values))
+        text = {f: normalize_text(v) for f, v in fields.items() if str(v or "").strip()}
+        cho = {f: to_choseong(text[f]) for f in CHOSEONG_FIELDS if f in text}
+        return text, cho
+
+    @staticmethod
+    def _doc_grams(text: dict, cho: dict) -> set:
+        grams = set()
+        for value in text.values():
+            grams |= _grams(to_jamo(value))
+        for value in cho.values():
+            grams |= _grams(value)
+        return grams
+
+    def _add_doc(self, values: tuple) -> int:
+        slot = len(self._values)
+        text, cho = self._row_docs(values)
+        self._values.append(values)
+        self._text.append(text)
+        self._cho.append(cho)
+        self._slot_of[values] = slot
+        for g in self._doc_grams(text, cho):
+            self._postings.setdefault(g, set()).add(slot)
+        self.stats["reindexed"] += 1
+        return slot
+
+    def _drop_doc(self, slot: int) -> None:
+        for g in self._doc_grams(self._text[slot], self._cho[slot]):
+            posting = self._postings.get(g)
+            if posting is not None:
+                posting.discard(slot)
+                if not posting:
+                    del self._postings[g]
+        del self._slot_of[self._values[slot]]
+        self._values[slot] = self._text[slot] = self._cho[slot] = None
+        self.stats["removed"] += 1
+
+    def sync(self, df: pd.DataFrame) -> int:
+        """
+        df(고객 DF) 와 색인을 맞춘다. 반환: 새로 색인한 + 지운 문서 수.
+        직전에 맞춘 DF 객체와 같으면 바로 0 (재실행마다 불러도 된다).
+        """
+        with self._lock:
+            if self._frame_ref is not None and self._frame_ref() is df:
+                return 0
+            changed = 0
+            rows_of: dict[int, list[int]] = {}
+            for pos, values in enumerate(frame_search_values(df)):
+                slot = self._slot_of.get(values)
+                if slot is None:
+                    slot = self._add_doc(values)
+                    changed += 1
+                rows_of.setdefault(slot, []).append(pos)
+            for slot in [s for s in self._slot_of.values() if s not in rows_of]:
+                self._drop_doc(slot)
+                changed += 1
+            self._rows_of = rows_of
+            # 지운 자리가 많이 쌓이면 처음부터 다시 만든다 (문서 번호 목록이 커지지 않게)
+            if len(self._values) > 2 * max(len(self._slot_of), 1000):
+                self._rebuild()
+            try:
+                self._frame_ref = weakref.ref(df)
+            except TypeError:
+                self._frame_ref = None
+            self.stats["syncs"] += 1
+            self.stats["rows"] = sum(len(r) for r in rows_of.values())
+            self.stats["docs"] = len(self._slot_of)
+            return changed
+
+    def _rebuild(self) -> None:
+        live = [(self._values[s], self._rows_of.get(s, [])) for s in self._slot_of.values()]
+        self._slot_of, self._values, self._text, self._cho = {}, [], [], []
+        self._postings, self._rows_of = {}, {}
+        for values, rows in live:
+            self._rows_of[self._add_doc(values)] = rows
+
+    # ----- 검색 -----
+    def search(self, query: str, fields=None, limit: int | None = None) -> list[int]:
+        """
+        query 가 들어간 행 위치 목록 (마지막으로 맞춘 DF 기준, 0부터 오름차순. fields 를 주면 그 필드에서만).
+        자음만 친 검색어는 초성으로, 나머지는 음절 일치(마지막 글자만 자모 앞부분)로 찾는다.
+        """
+        q = normalize_text(query)
+        if not q:
+            return []
+        by_cho = is_choseong_query(q)
+        if by_cho:
+            q = q.translate(_COMPAT_TABLE)
+            gram_q = q
+        else:
+            head, tail = q[:-1], to_jamo(q[-1])
+            gram_q = to_jamo(q)
+        wanted = set(fields) if fields else None
+
+        with self._lock:
+            self.stats["searches"] += 1
+            grams = sorted((self._postings.get(g, set()) for g in _grams(gram_q)), key=len)
+            if grams:
+                candidates = set(grams[0])
+                for posting in grams[1:]:
+                    if not candidates:
+                        break
+                    candidates &= posting
+            else:
+                candidates = self._slot_of.values()
+
+            docs = self._cho if by_cho else self._text
+            out = []
+            for slot in candidates:
+                doc = docs[slot]
+                if not doc:
+                    continue
+                texts = [text for f, text in doc.items() if wanted is None or f in wanted]
+                if by_cho:
+                    hit = any(q in text for text in texts)
+                else:
+                    hit = any(_syllable_match(text, head, tail) for text in texts)
+                if hit:
+                    out.extend(self._rows_of.get(slot, ()))
+            out.sort()
+            return out[:limit] if limit else out
+
+
+def frame_search_values(df: pd.DataFrame) -> list[tuple]:
+    """고객 DF → 행마다 SEARCH_FIELDS 순서 값 (행 위치 순서, 고객ID 가 빈 행도 포함)"""
+    if df is None or df.empty:
+        return []
+    df = df.loc[:, ~df.columns.duplicated()]
+    n = len(df)
+
+    def col(name):
+        if name in df.columns:
+            return df[name].fillna("").astype(str).str.strip().tolist()
+        return [""] * n
+
+    phone_parts = [col(p) for p in PHONE_PARTS]
+    cols = [
+        ["".join(parts) for parts in zip(*phone_parts)] if f == PHONE_FIELD else col(f)
+        for f in SEARCH_FIELDS
+    ]
+    return list(zip(*cols))
+
+
+def search_customer_rows(index: CustomerSearchIndex, df: pd.DataFrame, query: str, fields=None) -> list[int]:
+    """index 를 df 기준으로 맞춘 뒤 query 에 맞는 df 의 행 위치 목록 (df.iloc 에 바로 쓴다)"""
+    index.sync(df)
+    return index.search(query, fields)
+
+
+def get_customer_search_stats() -> dict:
+    """테넌트별로 살아 있는 (세션) 색인 수와 통계 합계"""
+    out: dict[str, dict] = {}
+    for index in list(_live_indexes):
+        agg = out.setdefault(index.tenant_id, {"sessions": 0, "grams": 0})
+        agg["sessions"] += 1
+        agg["grams"] += len(index._postings)
+        for k, v in index.stats.items():
+            agg[k] = agg.get(k, 0) + v
+    return out
@@ -1,5 +1,6 @@
 # core/customer_service.py
 import datetime
+import itertools
 import uuid
 import pandas as pd
 import streamlit as st
@@ -8,7 +9,25 @@ from core.google_sheets import (
     get_gspread_client,
     get_drive_service,
     get_worksheet,
+    read_values_delta,
+    read_columns_from_sheet,
+    record_sheet_changes,
+    write_buffer,
+    compare_and_set_rows,
+    row_version,
+    row_versions,
+    get_row_index,
+    CONFLICT_CHANGED,
+    CONFLICT_DELETED,
+    CONFLICT_EXISTS,
+    tenant_scope,
+    list_active_tenant_ids,
+    sheet_cache,
 )
+from core.customer_expiry import EXPIRY_COLUMNS, get_expiry_index, sync_expiry_index, expiry_report
+from core.id_allocator import get_id_allocator, format_customer_id
+from core.customer_dedupe import DedupeCandidate, find_duplicate_candidates, exact_match_ids
+from core.customer_search import CustomerSearchIndex, search_customer_rows
 from googleapiclient.errors import HttpError
 
 from config import (
@@ -16,6 +35,8 @@ from config import (
     PARENT_DRIVE_FOLDER_ID,
     CUSTOMER_PARENT_FOLDER_ID, 
     SESS_DF_CUSTOMER,
+    SESS_CUSTOMER_ROW_VERSIONS,
+    SESS_CUSTOMER_SEARCH_INDEX,
     ENABLE_CUSTOMER_FOLDERS,
     SESS_TENANT_ID,
     DEFAULT_TENANT_ID,
@@ -111,6 +132,7 @@ def create_customer_folders(df_customers: pd.DataFrame, worksheet=None):
     # 2) 시트에 기록된 고객ID→행 번호, '폴더' 컬럼 위치 찾기
     cust_row_map = {}
     folder_col = None
+    rows = []
     if worksheet is not None:
         rows = worksheet.get_all_values()
         hdr = rows[0]
@@ -121,17 +143,16 @@ def create_customer_folders(df_customers: pd.DataFrame, worksheet=None):
             if cid:
                 cust_row_map[cid] = r
 
-    # 3) 재매핑이 필요한 행 판단 함수
-    def needs_update(r):
-        cid = str(r["고객ID"]).strip()
-        if not cid:
-            return False
-        raw = str(r.get("폴더","")).strip()
-        cur = raw.rsplit("/", 1)[-1] if raw else ""
-        correct = existing.get(cid)
-        return (cur == "") or (correct is not None and cur != correct)
+    # 3) 재매핑이 필요한 행: 폴더가 비었거나, 드라이브의 같은 이름 폴더와 다른 행 (열 단위로 한 번에)
+    ids = df_customers["고객ID"].astype(str).str.strip()
+    raw = df_customers["폴더"] if "폴더" in df_customers.columns else pd.Series("", index=df_customers.index)
+    cur = raw.fillna("").astype(str).str.strip().str.rsplit("/", n=1).str[-1]
+    correct = ids.map(existing)
+    mask = (ids != "") & ((cur == "") | (correct.notna() & (cur != correct)))
 
-    mask = df_customers.apply(needs_update, axis=1)
+    # 시트 '폴더' 칸 갱신은 모아서 batch_update 한 번으로 보낸다
+    buf = write_buffer(CUSTOMER_SHEET_NAME, worksheet) if worksheet is not None else None
+    changed_rows = []  # 변경 로그용 (시트 헤더 순서의 행 값)
 
     for idx, row in df_customers[mask].iterrows():
         cid = str(row["고객ID"]).strip()
@@ -156,7 +177,15 @@ def create_customer_folders(df_customers: pd.DataFrame, worksheet=None):
 
         # 6) 시트도 업데이트
         if worksheet is not None and cid in cust_row_map:
-            worksheet.update_cell(cust_row_map[cid], folder_col, fid)
+            buf.update_cell(cust_row_map[cid], folder_col, fid)
+            row_vals = list(rows[cust_row_map[cid] - 1])
+            row_vals += [""] * (folder_col - len(row_vals))
+            row_vals[folder_col - 1] = fid
+            changed_rows.append(row_vals)
+
+    if buf is not None:
+        buf.flush(log_reset=False)
+        record_sheet_changes(CUSTOMER_SHEET_NAME, upserts=changed_rows)
 
 # ─────────────────────────────────
 # 데이터 로드
@@ -168,23 +197,35 @@ def load_original_customer_df(worksheet):
     return pd.DataFrame(rows, columns=header)
 
 
-@st.cache_data(ttl=300)
+# 전체 고객 DF 는 read_values_delta 가 변경 로그로 맞추므로 (증분 탭과 같이) Drive 재검증/스냅샷은 생략한다.
+# 고객 탭에 쓰는 공용 쓰기 함수가 이 테넌트 항목을 자동으로 버린다.
+@sheet_cache(ttl=300, tabs=(CUSTOMER_SHEET_NAME,), tenant=lambda cache_tenant_id: cache_tenant_id, revalidate=False)
 def load_customer_df_from_sheet(cache_tenant_id: str) -> pd.DataFrame:
     """
-    현재 세션의 tenant에 맞는 '고객 데이터' 시트를 읽어서 DataFrame으로 반환.
+    cache_tenant_id 테넌트의 '고객 데이터' 시트를 읽어서 DataFrame으로 반환.
+    (cache_tenant_id 는 캐시 네임스페이스용 — 실제 시트는 현재 세션/tenant_scope 테넌트 기준으로 읽는다)
+    """
+    # 처음 1회만 전체, 이후엔 변경 로그의 새 줄만 받아서 맞춘다
+    return _customer_df_from_values(read_values_delta(CUSTOMER_SHEET_NAME) or [])
 
-    ⚠ cache_tenant_id는 실제 로직에는 안 쓰고,
-       캐시 키를 테넌트별로 분리하는 용도로만 쓴다.
+
+def _load_customer_df_fresh() -> pd.DataFrame:
+    """
+    캐시(load_customer_df_from_sheet, TTL 300초)를 거치지 않고 변경 로그까지 맞춘 지금 고객 DF.
+    스캔 중복 확인처럼 방금 다른 곳에서 추가된 고객까지 봐야 할 때 쓴다 (증분 읽기라 보통 로그 1회).
     """
-    client = get_gspread_client()
-    worksheet = get_worksheet(client, CUSTOMER_SHEET_NAME)
+    return _customer_df_from_values(read_values_delta(CUSTOMER_SHEET_NAME) or [])
 
-    all_values = worksheet.get_all_values() or []
+
+def _customer_df_from_values(all_values: list[list]) -> pd.DataFrame:
+    """시트 값(헤더 + 행) → 고객 DF (모든 칸 문자열)"""
     if not all_values:
         return pd.DataFrame()
 
     header = [str(h) for h in all_values[0]]
-    data_rows = all_values[1:]
+    # 시트 API 는 행 끝의 빈 칸을 잘라서 준다 → 헤더 폭에 맞춘다 (모자란 칸이 'None' 문자열이 되지 않도록)
+    width = len(header)
+    data_rows = [list(r[:width]) + [""] * (width - len(r)) for r in all_values[1:]]
 
     if not data_rows:
         df = pd.DataFrame(columns=header)
@@ -194,90 +235,304 @@ def load_customer_df_from_sheet(cache_tenant_id: str) -> pd.DataFrame:
     if not df.empty:
         df = df.astype(str)
 
+    # 검색 인덱스는 여기서 만들지 않는다 (저장 직후 다시 읽을 때마다 색인 비용을 내지 않도록).
+    # 검색하는 화면이 search_session_customers 로 처음 찾을 때 세션 색인을 만들고, 그 뒤엔 바뀐 값만 고친다.
     return df
 
 
+@sheet_cache(ttl=300, tabs=(CUSTOMER_SHEET_NAME,), tenant=lambda cache_tenant_id, columns: cache_tenant_id)
+def load_customer_columns_df(cache_tenant_id: str, columns: tuple) -> pd.DataFrame:
+    """
+    '고객 데이터' 시트에서 columns 에 있는 컬럼만 읽어서 DataFrame 으로 반환
+    (홈 만기 알림처럼 몇 개 컬럼만 쓰는 화면용). 시트에 없는 컬럼은 빠진다.
+    TTL 이 지나면 Drive modifiedTime 으로 재검증하고, 재시작 뒤에는 디스크 스냅샷에서 되살린다
+    (그때는 이 함수가 안 돌아 만기 인덱스가 비어 있을 수 있다 → 쓰는 쪽이 index.ready 를 확인).
+    """
+    found, rows = read_columns_from_sheet(CUSTOMER_SHEET_NAME, columns)
+    df = pd.DataFrame(rows, columns=found)
+    if not df.empty:
+        df = df.astype(str)
+    if set(EXPIRY_COLUMNS) <= set(columns):
+        sync_expiry_index(cache_tenant_id, df)
+    return df
+
+
+def load_expiry_report(kind: str, months: int) -> pd.DataFrame:
+    """
+    관리자용: 활성 테넌트 전체의 만기 예정 고객 (오늘 ~ months 개월 이내).
+    테넌트마다 만기 컬럼만 읽어(캐시) 만기 인덱스를 맞춘 뒤, 구간은 인덱스에서 잘라 낸다.
+    """
+    tenant_ids = list_active_tenant_ids()
+    for tid in tenant_ids:
+        try:
+            with tenant_scope(tid):
+                df = load_customer_columns_df(tid, EXPIRY_COLUMNS)
+            index = get_expiry_index(tid)
+            if not index.ready:
+                index.sync(df)   # 스냅샷에서 되살린 경우
+        except Exception as e:
+            print(f"[expiry] '{tid}' 고객 시트 읽기 실패, 보고서에서 뺍니다: {e}")
+    return expiry_report(tenant_ids, kind, months)
+
+
+def reload_session_customer_df(tenant_id: str | None = None) -> pd.DataFrame:
+    """
+    세션 고객 DF 를 (캐시) 시트 값으로 다시 채운다.
+    읽은 그대로의 {고객ID: 행 버전} 도 같이 남겨 둔다 — 세션 DF 는 화면에서 고쳐지므로(폴더 칸 등)
+    저장할 때 기대 버전은 이것으로 만든다.
+    """
+    tenant_id = tenant_id or get_current_tenant_id()
+    df = load_customer_df_from_sheet(tenant_id)
+    st.session_state[SESS_DF_CUSTOMER] = df
+    if df.empty or "고객ID" not in df.columns:
+        st.session_state[SESS_CUSTOMER_ROW_VERSIONS] = {}
+    else:
+        st.session_state[SESS_CUSTOMER_ROW_VERSIONS] = row_versions(
+            itertools.chain([list(df.columns)], _iter_frame_rows(df)), "고객ID"
+        )
+    return df
+
+
+def search_session_customers(tenant_id: str, df: pd.DataFrame, query: str, fields=None) -> list[int]:
+    """
+    df 에서 query 에 맞는 행 위치 목록 (df.iloc 용). 색인은 이 세션 것만 쓴다
+    — 세션마다 고객 DF(저장 안 한 행 등)가 달라서 테넌트 하나로 같이 쓰면 서로 다시 맞추고 행이 섞인다.
+    """
+    index = st.session_state.get(SESS_CUSTOMER_SEARCH_INDEX)
+    if index is None or index.tenant_id != tenant_id:
+        index = st.session_state[SESS_CUSTOMER_SEARCH_INDEX] = CustomerSearchIndex(tenant_id)
+    return search_customer_rows(index, df, query, fields)
+
+
+def _iter_frame_rows(df: pd.DataFrame, chunk: int = 1000):
+    """DF 행을 값 튜플로 (chunk 행씩 컬럼 단위로 풀어서 — 전체를 행 목록으로 한꺼번에 만들지 않는다)"""
+    cols = list(df.columns)
+    for start in range(0, len(df), chunk):
+        part = df.iloc[start:start + chunk]
+        yield from zip(*(part[c].tolist() for c in cols))
+
+
+def clear_customer_df_cache():
+    """고객 시트를 고친 뒤 전체/컬럼 로더 캐시를 같이 비운다"""
+    load_customer_df_from_sheet.clear()
+    load_customer_columns_df.clear()
+
+
+# ─────────────────────────────────
+# 고객ID 발급
+# ─────────────────────────────────
+def _max_customer_seq(tenant_id: str, day: str, known_ids=None) -> int:
+    """
+    지금 시트에 있는 day 고객ID 의 최대 일련번호. 번호 블록을 임대할 때마다 부른다.
+    캐시가 아니라 고객ID 행 인덱스를 probe(batchGet 1회, 어긋나면 ID 컬럼만 다시 읽음)해서 본다
+    — 다른 인스턴스가 방금 붙인 행까지 보인다. known_ids 가 있으면 그 안의 번호도 같이 본다.
+    """
+    with tenant_scope(tenant_id):
+        ws = get_worksheet(get_gspread_client(), CUSTOMER_SHEET_NAME)
+    idx = get_row_index(ws, CUSTOMER_SHEET_NAME, "고객ID", max_age=0)
+    columns = [pd.Series(idx.keys[1:], dtype=str)]
+    if known_ids is not None:
+        columns.append(pd.Series(list(known_ids), dtype=str))
+    best = 0
+    for col in columns:
+        ids = col.astype(str).str.strip()
+        tails = ids[ids.str.startswith(day)].str.slice(len(day))
+        seqs = pd.to_numeric(tails[tails.str.isdigit()], errors="coerce")
+        if not seqs.empty:
+            best = max(best, int(seqs.max()))
+    return best
+
+
+def allocate_customer_ids(n: int = 1, tenant_id: str | None = None, known_ids=None,
+                          fresh: bool = False) -> list[str]:
+    """
+    오늘 날짜 고객ID n 개를 발급한다 ('YYYYMMDD' + 일련번호). 실제로 시트에 쓸 때(저장 시점)만 부른다.
+    테넌트·날짜별 순번(core.id_allocator)에서 받으므로 세션끼리 겹치지 않고, 목록을 세지 않는다.
+    known_ids: 부르는 쪽이 이미 읽어 둔 고객ID 목록 (시작 번호를 정할 때 시트와 같이 본다)
+    fresh: 빌려 둔 블록을 버리고 새로 임대 (방금 받은 ID 가 시트에 이미 있어 추가가 충돌했을 때)
+    """
+    tenant_id = tenant_id or get_current_tenant_id()
+    day = datetime.date.today().strftime('%Y%m%d')
+    if fresh:
+        get_id_allocator().discard(tenant_id, day)
+    seqs = get_id_allocator().allocate(
+        tenant_id, day, n, floor_fn=lambda: _max_customer_seq(tenant_id, day, known_ids)
+    )
+    return [format_customer_id(day, seq) for seq in seqs]
+
+
+def allocate_customer_id(tenant_id: str | None = None, known_ids=None, fresh: bool = False) -> str:
+    return allocate_customer_ids(1, tenant_id, known_ids, fresh)[0]
+
+
 # ─────────────────────────────────
 # 저장(배치 업데이트)
 # ─────────────────────────────────
-def save_customer_batch_update(edited_df: pd.DataFrame, worksheet) -> bool:
+def save_customer_batch_update(edited_df: pd.DataFrame, worksheet, base_df: pd.DataFrame | None = None) -> bool:
     """
     UI에 보이는 컬럼만 비교해서 수정/추가를 처리합니다.
     '고객ID' 컬럼은 변경 감지 대상에서 제외해야 합니다.
+
+    base_df: 사용자가 편집을 시작한 원본 (기본: 세션의 고객 DF) — 무엇을 고쳤는지 비교하는 기준.
+    저장 직전에 시트 전체를 다시 읽지 않고, 세션 DF 를 시트에서 읽었을 때의 행 버전
+    (reload_session_customer_df 가 남긴 것, 없으면 지금 캐시 값)을 기대값으로 넘겨
+    바뀐 행의 바뀐 칸만 compare-and-set 으로 쓴다. 그 사이 다른 곳에서 고친 행은 저장하지 않고 알려주며,
+    그런 행이 있으면 False 를 돌려준다.
+    비교는 고객ID 로 맞춘 문자열 배열끼리 한 번에 하고, 행 수 제한은 없다
+    (많으면 compare_and_set_rows 가 나눠서 쓴다).
+    고객ID 가 빈 새 행('행 추가' / 표에서 추가한 행)은 내용이 있는 것만 여기서 ID 를 받아 추가한다.
     """
     print("🚀 [진입] save_customer_batch_update 시작")
 
-    existing_data = worksheet.get_all_values()
-    raw_headers = existing_data[0]
-    headers = deduplicate_headers(raw_headers)
-    rows = existing_data[1:]
-    existing_df = pd.DataFrame(rows, columns=headers)
-    existing_df = existing_df.applymap(lambda x: str(x).strip() or " ")
-
-    if "고객ID" not in existing_df.columns:
+    # 지금 시트 상태 (변경 로그로 맞춘 캐시) — 어떤 행이 시트에 있는지만 본다
+    sheet_df = load_customer_df_from_sheet(get_current_tenant_id())
+    if "고객ID" not in sheet_df.columns:
         st.error("❌ '고객ID' 컬럼이 시트에 없습니다.")
         return False
-    existing_df.set_index("고객ID", inplace=True)
-
-    batch_updates = []
-    new_rows = []
-    modified_count = 0
-    added_count = 0
-
-    compare_cols = [c for c in edited_df.columns if c not in ("고객ID", "폴더")]
-
-    for _, row in edited_df.iterrows():
-        cust_id = str(row["고객ID"]).strip()
-        row_data = [str(row.get(h, "")).strip() or " " for h in headers]
-
-        if "폴더" in headers:
-            idx_folder = headers.index("폴더")
-            raw = row_data[idx_folder]
-            if raw.startswith("http"):
-                row_data[idx_folder] = raw.rsplit("/", 1)[-1]
-
-        if cust_id in existing_df.index:
-            orig = existing_df.loc[cust_id]
-
-            def norm(x): return str(x).strip()
-            changed = any(norm(orig.get(h, "")) != norm(row[h])
-                          for h in compare_cols)
-
-            if changed:
-                if modified_count >= 10:
-                    st.error("❌ 수정 가능한 행은 최대 10개까지입니다.")
-                    return False
-                modified_count += 1
-
-                base_row = existing_df.index.get_loc(cust_id) + 2
-                for col_idx, val in enumerate(row_data):
-                    if headers[col_idx] == "폴더":
-                        continue
-                    cell = f"{col_index_to_letter(col_idx+1)}{base_row}"
-                    batch_updates.append({"range": cell, "values": [[val]]})
-        else:
-            if added_count >= 10:
-                st.error("❌ 추가 가능한 행은 최대 10개까지입니다.")
-                return False
-            added_count += 1
-            new_rows.append(row_data)
-
-    if batch_updates:
-        worksheet.batch_update(batch_updates)
-    if new_rows:
-        worksheet.append_rows(new_rows)
+    headers = [str(h) for h in sheet_df.columns]
+
+    if base_df is None:
+        base_df = st.session_state.get(SESS_DF_CUSTOMER)
+    if base_df is None or "고객ID" not in getattr(base_df, "columns", []):
+        base_df = sheet_df
+
+    def _aligned(df: pd.DataFrame) -> pd.DataFrame:
+        # 시트 헤더 순서의 strip 된 문자열 표, 고객ID 인덱스 (빈 ID 제외, 같은 ID 가 여러 행이면 마지막 행)
+        df = df.loc[:, ~df.columns.duplicated()].reindex(columns=headers, fill_value="")
+        df = df.fillna("").astype(str).apply(lambda col: col.str.strip())
+        df.index = df["고객ID"].to_numpy()
+        df = df[df.index != ""]
+        return df[~df.index.duplicated(keep="last")]
+
+    # 고객ID 가 빈 새 행: 내용이 있으면 지금 ID 를 받는다 (빈 행은 저장하지 않는다)
+    tenant_id = get_current_tenant_id()
+    content_cols = [c for c in edited_df.columns if c not in ("고객ID", "폴더") and c in headers]
+    new_ids = edited_df["고객ID"].fillna("").astype(str).str.strip()
+    filled = edited_df[content_cols].fillna("").astype(str).apply(lambda col: col.str.strip()).ne("").any(axis=1)
+    need_id = ((new_ids == "") & filled).to_numpy()
+    assigned = []
+    if need_id.any():
+        known = set(sheet_df["고객ID"].astype(str).str.strip()) | set(new_ids)
+        assigned = allocate_customer_ids(int(need_id.sum()), tenant_id, known_ids=known)
+        if known.intersection(assigned):   # 빌려 둔 블록이 그새 다른 곳에서 쓰였다 → 시트를 다시 보고 새로
+            assigned = allocate_customer_ids(int(need_id.sum()), tenant_id, known_ids=known, fresh=True)
+        edited_df = edited_df.copy()
+        edited_df.loc[need_id, "고객ID"] = assigned
+
+    on_sheet = _aligned(sheet_df)
+    base = _aligned(base_df)
+    edited = _aligned(edited_df)
+    compare_cols = [c for c in edited_df.columns if c not in ("고객ID", "폴더") and c in headers]
+
+    # ── 수정: 시트에 있는 행 — 사용자가 본 원본과 비교 (원본에 없으면 — 방금 추가된 행 등 — 지금 시트 값과) ──
+    existing = edited[edited.index.isin(on_sheet.index)]
+    orig = pd.concat([on_sheet[~on_sheet.index.isin(base.index)], base]).reindex(existing.index)
+    new_vals = existing[compare_cols].to_numpy(dtype=str)
+    diff = new_vals != orig[compare_cols].to_numpy(dtype=str)
+    changed = diff.any(axis=1)
+
+    # 기대 버전: 세션 DF 를 읽었을 때 그대로의 행 (세션 DF 자체는 폴더 칸 등이 로컬에서 바뀌어 있을 수 있다)
+    loaded_versions = st.session_state.get(SESS_CUSTOMER_ROW_VERSIONS) or {}
+    records = []
+    expected = {}
+    for cust_id, vals, cols_changed in zip(existing.index[changed], new_vals[changed], diff[changed]):
+        # 사용자가 고친 칸만 (손대지 않은 빈 칸을 " " 로 덮지 않도록)
+        records.append({"고객ID": cust_id, **{
+            h: v or " " for h, v, d in zip(compare_cols, vals, cols_changed) if d
+        }})
+        version = loaded_versions.get(cust_id)
+        if version is None:
+            version = row_version(on_sheet.loc[cust_id].tolist())
+        expected[cust_id] = version
+
+    # ── 추가: 시트에 없는 행 (새 행 / 삭제 취소로 되살린 행) ──
+    added = edited[~edited.index.isin(on_sheet.index)]
+    for cust_id, vals in zip(added.index, added.to_numpy(dtype=str)):
+        rec = {h: v or " " for h, v in zip(headers, vals)}
+        if "폴더" in rec and rec["폴더"].startswith("http"):
+            rec["폴더"] = rec["폴더"].rsplit("/", 1)[-1]
+        records.append(rec)
+        expected[cust_id] = None   # 그 사이 같은 ID 가 생겼으면 충돌
+
+    if not records:
+        st.info("변경된 내용이 없습니다.")
+        return True
+
+    result = compare_and_set_rows(worksheet, CUSTOMER_SHEET_NAME, records, "고객ID", expected)
+
+    # 방금 받은 ID 를 다른 인스턴스가 먼저 썼으면 블록을 버리고 새 ID 로 한 번 더
+    taken = [c for c in result.conflicts if c.key in set(assigned)]
+    if taken:
+        retry_ids = allocate_customer_ids(len(taken), tenant_id, fresh=True)
+        renamed = dict(zip([c.key for c in taken], retry_ids))
+        retry = [{**rec, "고객ID": renamed[rec["고객ID"]]} for rec in records if rec["고객ID"] in renamed]
+        again = compare_and_set_rows(
+            worksheet, CUSTOMER_SHEET_NAME, retry, "고객ID", {cid: None for cid in retry_ids}
+        )
+        ids = edited_df["고객ID"].astype(str).str.strip()
+        edited_df = edited_df.copy()
+        edited_df["고객ID"] = ids.replace(renamed)
+        result.appended += again.appended
+        result.versions.update(again.versions)
+        result.conflicts = [c for c in result.conflicts if c.key not in renamed] + again.conflicts
+
+    if result.appended:
         create_customer_folders(edited_df, worksheet)
-
-    st.success(f"🟢 저장 완료: 수정 {modified_count}건, 추가 {added_count}건")
-    return True
+    if result.updated or result.appended:
+        st.success(f"🟢 저장 완료: 수정 {len(result.updated)}건, 추가 {len(result.appended)}건")
+    if result.conflicts:
+        st.error(
+            f"❌ 다른 곳에서 먼저 바뀐 {len(result.conflicts)}행은 저장하지 않았습니다. "
+            "최신 내용을 다시 불러온 뒤 수정해 주세요."
+        )
+        st.dataframe(
+            pd.DataFrame([
+                {"고객ID": c.key, "사유": _CONFLICT_LABELS.get(c.reason, c.reason),
+                 "한글": c.current_row.get("한글", "")}
+                for c in result.conflicts
+            ]),
+            hide_index=True,
+        )
+    return result.ok
+
+
+# 스캔 저장에서 "비슷한 고객이 있어도 새 고객으로 추가" 를 고른 경우의 target_id
+SCAN_NEW_CUSTOMER = "__new__"
+
+_CONFLICT_LABELS = {
+    CONFLICT_CHANGED: "다른 곳에서 수정됨",
+    CONFLICT_DELETED: "다른 곳에서 삭제됨",
+    CONFLICT_EXISTS: "같은 고객ID 가 이미 있음",
+}
 
 # ─────────────────────────────────
 # OCR 스캔 → 고객정보 업서트
 # ─────────────────────────────────
+def _scan_dedupe_query(passport_info: dict, arc_info: dict) -> dict:
+    """스캔 값 → 중복 인덱스 조회 값 (DEDUPE_COLUMNS 이름)"""
+    return {
+        "한글": arc_info.get("한글"), "성": passport_info.get("성"), "명": passport_info.get("명"),
+        "국가": passport_info.get("국가"), "여권": passport_info.get("여권"),
+        "등록증": arc_info.get("등록증"), "번호": arc_info.get("번호"),
+    }
+
+
+def find_scan_duplicates(passport_info: dict, arc_info: dict, limit: int = 5) -> list[DedupeCandidate]:
+    """
+    스캔한 고객과 같거나 비슷한 기존 고객 후보 (점수 순).
+    시트 전체를 새로 받지 않고, 변경 로그까지 맞춘 고객 DF 의 중복 인덱스에서 찾는다
+    (캐시 DF 만 보면 몇 분 안에 다른 곳에서 추가된 고객을 놓친다).
+    """
+    tenant_id = get_current_tenant_id()
+    df = _load_customer_df_fresh()
+    return find_duplicate_candidates(tenant_id, df, _scan_dedupe_query(passport_info, arc_info), limit)
+
+
 def upsert_customer_from_scan(
     passport_info: dict,
     arc_info: dict,
-    extra_info: dict | None = None
+    extra_info: dict | None = None,
+    target_id: str | None = None,
 ):
     """
     OCR 결과를 기반으로 고객 데이터를 추가/수정.
@@ -285,43 +540,38 @@ def upsert_customer_from_scan(
     passport_info: {"성","명","성별","국가","여권","발급","만기"}
     arc_info     : {"한글","등록증","번호","발급일","만기일","주소"}
     extra_info   : {"연","락","처","V"}  (없으면 무시)
+    target_id    : 화면에서 사용자가 고른 기존 고객ID (SCAN_NEW_CUSTOMER 이면 새 고객으로 추가).
+                   없으면 여권번호 / 등록번호가 (정규화 후) 같은 고객이 한 명일 때만 자동으로 고친다.
     """
     extra_info = extra_info or {}
+    tenant_id = get_current_tenant_id()
 
-    client = get_gspread_client()
-    sheet_name = get_customer_sheet_name()
-    ws = get_worksheet(client, CUSTOMER_SHEET_NAME)
-
-    rows = ws.get_all_values()
-    if not rows:
+    # 시트 전체를 다시 받지 않고, 캐시가 아닌 지금 값(변경 로그까지 맞춘 DF)에서 찾는다
+    # — 캐시 DF 로 "없음" 을 판단하면 그 사이 다른 곳에서 추가된 같은 고객을 또 추가한다
+    df = _load_customer_df_fresh()
+    if "고객ID" not in df.columns:
         return False, "고객 시트가 비어 있습니다."
-
-    headers = rows[0]
-    df = pd.DataFrame(rows[1:], columns=headers)
+    headers = [str(h) for h in df.columns]
+    ws = get_worksheet(get_gspread_client(), CUSTOMER_SHEET_NAME)
 
     def norm(s): 
         return str(s or "").strip()
 
-    # 🔑 기존 고객 찾기 (여권번호 or 등록증 앞/뒤 7자리)
-    key_passport  = norm(passport_info.get("여권"))
-    key_reg_front = norm(arc_info.get("등록증"))
-    key_reg_back  = norm(arc_info.get("번호"))
-
-    hit_idx = None
-    if key_passport:
-        m = df.index[
-            df.get("여권", "").astype(str).str.strip() == key_passport
-        ].tolist()
-        if m:
-            hit_idx = m[0]
-
-    if hit_idx is None and key_reg_front and key_reg_back:
-        m = df.index[
-            (df.get("등록증", "").astype(str).str.strip() == key_reg_front) &
-            (df.get("번호", "").astype(str).str.strip()   == key_reg_back)
-        ].tolist()
-        if m:
-            hit_idx = m[0]
+    # 🔑 기존 고객 찾기 (여권번호 or 등록증 앞/뒤 7자리, O/0 같은 OCR 혼동은 보정)
+    if target_id == SCAN_NEW_CUSTOMER:
+        hit_id = None
+    elif target_id:
+        hit_id = norm(target_id)
+    else:
+        exact = exact_match_ids(
+            find_duplicate_candidates(tenant_id, df, _scan_dedupe_query(passport_info, arc_info))
+        )
+        if len(exact) > 1:
+            return False, (
+                f"여권번호 / 등록번호가 서로 다른 고객({', '.join(exact)})과 일치합니다. "
+                "반영할 고객을 골라 주세요."
+            )
+        hit_id = exact[0] if exact else None
 
     # 🔄 업데이트할 값 모으기
     to_update: dict[str, str] = {}
@@ -343,58 +593,59 @@ def upsert_customer_from_scan(
         v = norm(extra_info.get(k))
         if v:
             to_update[k] = v
+    to_update = {k: v for k, v in to_update.items() if k in headers}
 
     # =========================
-    # 1) 기존 고객이면 해당 행만 업데이트
+    # 1) 기존 고객이면 해당 행의 스캔한 칸만 업데이트 (캐시 행 버전을 기대값으로, 바뀌었으면 지금 값에 다시)
     # =========================
-    if hit_idx is not None:
-        rownum = hit_idx + 2  # 1행은 헤더, 시트는 1부터 시작
-        batch = []
-
-        for col_name, val in to_update.items():
-            if col_name in headers:
-                col_idx = headers.index(col_name) + 1
-                cell = f"{col_index_to_letter(col_idx)}{rownum}"
-                batch.append({"range": cell, "values": [[val]]})
-
-        if batch:
-            ws.batch_update(batch)
-
-        # 캐시 갱신
-        tenant_id = st.session_state.get(SESS_TENANT_ID, DEFAULT_TENANT_ID)
+    if hit_id:
+        ids = df["고객ID"].astype(str).str.strip()
+        cached = df[ids == hit_id]
+        if cached.empty:
+            return False, f"고객({hit_id})을 찾지 못했습니다. 고객 목록을 새로 불러온 뒤 다시 시도해 주세요."
+        version = row_version(cached.iloc[-1].astype(str).tolist())
+
+        for _ in range(3):
+            result = compare_and_set_rows(
+                ws, CUSTOMER_SHEET_NAME, [{"고객ID": hit_id, **to_update}], "고객ID", {hit_id: version}
+            )
+            if result.ok:
+                break
+            conflict = result.conflicts[0]
+            if conflict.reason != CONFLICT_CHANGED:
+                clear_customer_df_cache()
+                return False, f"고객({hit_id})이 다른 곳에서 삭제되었습니다."
+            version = conflict.current
+        else:
+            return False, f"고객({hit_id}) 행이 계속 바뀌고 있어 저장하지 못했습니다. 잠시 후 다시 시도해 주세요."
 
-        load_customer_df_from_sheet.clear()
-        st.session_state[SESS_DF_CUSTOMER] = load_customer_df_from_sheet(tenant_id)
+        clear_customer_df_cache()
+        reload_session_customer_df(tenant_id)
 
-        return True, f"기존 고객({df.at[hit_idx, '고객ID']}) 정보가 업데이트되었습니다."
+        return True, f"기존 고객({hit_id}) 정보가 업데이트되었습니다."
 
     # =========================
-    # 2) 신규 고객이면 새 ID 발급 후 추가
+    # 2) 신규 고객이면 새 ID 발급 후 추가 (그 사이 같은 ID 가 생겼으면 새로 발급해서 1번 더)
     # =========================
-    today_str = datetime.date.today().strftime('%Y%m%d')
-    col_id = df.get("고객ID", pd.Series(dtype=str)).astype(str)
-    next_seq = str(col_id[col_id.str.startswith(today_str)].shape[0] + 1).zfill(2)
-    new_id = today_str + next_seq
-
-    # 모든 컬럼 기본값 공백으로 초기화
-    base = {h: " " for h in headers}
-    base.update({"고객ID": new_id})
+    for attempt in range(2):
+        new_id = allocate_customer_id(tenant_id, known_ids=df["고객ID"], fresh=attempt > 0)
 
-    # 새 값 덮어쓰기
-    for k, v in to_update.items():
-        if k in base:
-            base[k] = v
+        # 모든 컬럼 기본값 공백으로 초기화, 새 값 덮어쓰기
+        base = {h: " " for h in headers}
+        base.update(to_update)
+        base["고객ID"] = new_id
 
-    # 시트에 행 추가
-    ws.append_row([base.get(h, "") for h in headers])
+        result = compare_and_set_rows(ws, CUSTOMER_SHEET_NAME, [base], "고객ID", {new_id: None})
+        if result.appended:
+            break
+    else:
+        return False, "새 고객ID 가 이미 쓰이고 있어 저장하지 못했습니다. 다시 시도해 주세요."
 
     # 👉 고객별 폴더 자동생성 끄고 싶으면 아래 한 줄을 주석 처리하면 됨
     create_customer_folders(pd.DataFrame([base]), ws)
 
     # 캐시 갱신
-    tenant_id = st.session_state.get(SESS_TENANT_ID, DEFAULT_TENANT_ID)
-
-    load_customer_df_from_sheet.clear()
-    st.session_state[SESS_DF_CUSTOMER] = load_customer_df_from_sheet(tenant_id)
+    clear_customer_df_cache()
+    reload_session_customer_df(tenant_id)
 
     return True, f"신규 고객이 추가되었습니다 (고객ID: {new_id})."
@@ -0,0 +1,753 @@
+# core/fake_sheets.py
+#
+# 네트워크 없이 도는 프로세스 내 가짜 Google Sheets (벤치마크 / 부하 테스트용 저장소 백엔드).
+# core/google_sheets 가 쓰는 gspread 표면만 흉내 낸다:
+#   Client.open_by_key / Spreadsheet.worksheet(s) / add_worksheet / values_get / values_batch_get /
+#   batch_update(deleteDimension, insertDimension, appendDimension, updateSheetProperties) /
+#   Worksheet.get_all_values / get_values / get_all_records / row_values / col_values / acell /
+#   update / update_cell / update_acell / batch_update / append_row(s) / delete_rows / resize / clear / findall
+# Drive 쪽은 고객 폴더 작업에 쓰는 files().list / get / create / delete 만 흉내 낸다 (backend.drive()).
+#
+# - A1 범위는 실제 API 처럼 해석한다 ('탭'!A1:E, C:C, 1:1, B3 ...). 읽기 결과는 뒤쪽 빈 칸/빈 행이 잘린다.
+# - 값은 실제 시트처럼 문자열로 저장된다. USER_ENTERED 로 쓴 숫자 모양 문자열은 숫자로 바뀐다 ("007" → "7").
+# - 호출마다 지연(latency_sec + 요청/응답 KB 당 latency_per_kb_sec)을 흉내 내고,
+#   quota_per_min 을 넘으면 실제처럼 429 APIError 를 낸다.
+#   scheduled=True 면 실제 클라이언트와 같이 core.api_scheduler 를 거쳐 속도 제한/재시도까지 재현한다.
+# - stats(): API 메서드별 호출 수 / 보낸·받은 바이트 / 걸린 시간
+#
+#   backend = FakeSheetsBackend(latency_sec=0.05, quota_per_min=300)
+#   key = backend.create_spreadsheet(tabs={"고객 데이터": [header, *rows]})
+#   set_storage_backend(backend)
+#
+# 이 모듈은 streamlit 에 의존하지 않는다.
+
+import datetime
+import itertools
+import json
+import re
+import threading
+import time
+import uuid
+from collections import deque
+
+from gspread.cell import Cell
+from gspread.exceptions import APIError, SpreadsheetNotFound, WorksheetNotFound
+from gspread.utils import a1_range_to_grid_range, numericise_all
+
+from config import FAKE_SHEETS_LATENCY_MS, FAKE_SHEETS_QUOTA_PER_MIN
+from core.api_metrics import record_api_call
+from core.api_scheduler import get_scheduler
+from core.sheet_backend import SheetBackend, register_storage_backend
+
+DEFAULT_ROWS = 1000
+DEFAULT_COLS = 26
+
+_NUMBER_RE = re.compile(r"^[+-]?(\d+\.?\d*|\.\d+)$")
+# 실제 API 에서 POST(재전송 시 두 번 반영될 수 있음)인 연산 — 스케줄러가 5xx 에서 재시도하지 않는다
+_NON_IDEMPOTENT_METHODS = {"values.append", "spreadsheets.batchUpdate", "drive.files.create"}
+
+
+class _FakeResponse:
+    """APIError 가 읽는 requests.Response 의 최소 모양"""
+
+    def __init__(self, code: int, message: str, status: str):
+        self.status_code = code
+        self.ok = False
+        self.headers = {}
+        self._error = {"code": code, "message": message, "status": status}
+        self.text = json.dumps({"error": self._error})
+
+    def json(self):
+        return {"error": self._error}
+
+
+def _api_error(code: int, message: str, status: str = "INVALID_ARGUMENT") -> APIError:
+    return APIError(_FakeResponse(code, message, status))
+
+
+def _nbytes(obj) -> int:
+    if obj is None:
+        return 0
+    return len(json.dumps(obj, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+def _cell_text(value, user_entered: bool) -> str:
+    """시트에 저장되어 FORMATTED_VALUE 로 읽힐 문자열"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    text = str(value)
+    if user_entered and _NUMBER_RE.match(text.strip()):
+        num = float(text)
+        return str(int(num)) if num.is_integer() else repr(num)
+    if user_entered and text.upper() in ("TRUE", "FALSE"):
+        return text.upper()
+    return text
+
+
+def _col_letter(n: int) -> str:
+    s = ""
+    while n > 0:
+        n, r = divmod(n - 1, 26)
+        s = chr(65 + r) + s
+    return s
+
+
+def _quote_title(title: str) -> str:
+    return "'" + title.replace("'", "''") + "'"
+
+
+def _split_range(range_name: str) -> tuple[str | None, str | None]:
+    """"'탭'!A1:E" → ("탭", "A1:E"), "'탭'" → ("탭", None), "A1:E" → (None, "A1:E")"""
+    if "!" in range_name:
+        tab, a1 = range_name.rsplit("!", 1)
+    elif range_name.startswith("'") or not re.match(r"^[A-Za-z]{0,3}\d*(:[A-Za-z]{0,3}\d*)?$", range_name):
+        tab, a1 = range_name, None
+    else:
+        return None, range_name
+    if tab.startswith("'") and tab.endswith("'"):
+        tab = tab[1:-1].replace("''", "'")
+    return tab, a1
+
+
+def _trim(values: list[list[str]]) -> list[list[str]]:
+    """실제 values.get 처럼 각 행 뒤쪽 빈 칸과 뒤쪽 빈 행을 잘라낸다"""
+    out = []
+    for row in values:
+        end = len(row)
+        while end and row[end - 1] == "":
+            end -= 1
+        out.append(row[:end])
+    while out and not out[-1]:
+        out.pop()
+    return out
+
+
+def _pad(values: list[list[str]]) -> list[list[str]]:
+    width = max((len(r) for r in values), default=0)
+    return [list(r) + [""] * (width - len(r)) for r in values]
+
+
+class FakeSheetsBackend(SheetBackend):
+    name = "fake"
+
+    def __init__(self, latency_sec: float = 0.0, latency_per_kb_sec: float = 0.0,
+                 quota_per_min: int | None = None, scheduled: bool = False,
+                 auto_create: bool = False, account: str = "fake-service-account"):
+        self.latency_sec = latency_sec
+        self.latency_per_kb_sec = latency_per_kb_sec
+        self.quota_per_min = quota_per_min
+        self.scheduled = scheduled
+        self.auto_create = auto_create
+        self.account = account
+
+        self._lock = threading.RLock()
+        self._spreadsheets: dict[str, "FakeSpreadsheet"] = {}
+        self._recent_calls: deque = deque()
+        self._sheet_ids = itertools.count(1)
+        self._stats: dict[str, dict] = {}
+        self._client = FakeClient(self)
+        self._drive_files: dict[str, dict] = {}
+        self._drive = FakeDriveService(self)
+
+    # ----- 백엔드 인터페이스 -----
+    def client(self):
+        return self._client
+
+    def drive(self):
+        return self._drive
+
+    def file_versions(self, sheet_keys) -> dict:
+        keys = list(sheet_keys)
+
+        def op():
+            out = {}
+            for k in keys:
+                ss = self._spreadsheets.get(k)
+                out[k] = f"{ss.modified_time}|{ss.version}" if ss else None
+            return out
+
+        return self._call("drive.files.get(batch)", None, op, request=keys)
+
+    # ----- 데이터 준비 -----
+    def create_spreadsheet(self, key: str | None = None, title: str = "",
+                           tabs: dict | None = None) -> str:
+        """가짜 스프레드시트를 만들고 ID 를 돌려준다. tabs = {탭 이름: 2차원 값 목록}"""
+        key = key or uuid.uuid4().hex
+        with self._lock:
+            ss = FakeSpreadsheet(self, key, title or key)
+            self._spreadsheets[key] = ss
+            for tab, values in (tabs or {}).items():
+                ws = ss._add(tab, max(len(values), DEFAULT_ROWS), max((len(r) for r in values), default=DEFAULT_COLS))
+                ws._write_block(0, 0, values, user_entered=False)
+        return key
+
+    def create_drive_file(self, name: str, mime_type: str = "application/vnd.google-apps.folder",
+                          parents=(), file_id: str | None = None) -> str:
+        """가짜 Drive 파일(기본: 폴더)을 만들고 ID 를 돌려준다 (호출 수에 안 잡힘)"""
+        file_id = file_id or uuid.uuid4().hex
+        with self._lock:
+            self._drive_files[file_id] = {
+                "id": file_id,
+                "name": name,
+                "mimeType": mime_type,
+                "parents": list(parents),
+                "trashed": False,
+                "version": "1",
+                "modifiedTime": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            }
+        return file_id
+
+    def spreadsheet(self, key: str) -> "FakeSpreadsheet":
+        with self._lock:
+            ss = self._spreadsheets.get(key)
+            if ss is None:
+                if not self.auto_create:
+                    raise SpreadsheetNotFound(key)
+                ss = FakeSpreadsheet(self, key, key)
+                self._spreadsheets[key] = ss
+            return ss
+
+    # ----- 지표 -----
+    def stats(self) -> dict:
+        with self._lock:
+            methods = {m: dict(s) for m, s in self._stats.items()}
+        total = {"calls": 0, "bytes_out": 0, "bytes_in": 0, "time": 0.0, "throttled": 0}
+        for s in methods.values():
+            for k in total:
+                total[k] += s[k]
+        return {"total": total, "methods": methods}
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    # ----- 호출 흉내 (지연 / 쿼터 / 지표) -----
+    def _over_quota(self, now: float) -> bool:
+        if not self.quota_per_min:
+            return False
+        with self._lock:
+            while self._recent_calls and now - self._recent_calls[0] >= 60:
+                self._recent_calls.popleft()
+            if len(self._recent_calls) >= self.quota_per_min:
+                return True
+            self._recent_calls.append(now)
+            return False
+
+    def _call(self, method: str, sheet_id: str | None, op, request=None, sheet: str = ""):
+        started = time.perf_counter()
+        bytes_out = _nbytes(request)
+        attempts = [0]
+
+        def send():
+            attempts[0] += 1
+            if self._over_quota(time.monotonic()):
+                self._record(method, throttled=1)
+                return 429, None
+            with self._lock:
+                result = op()
+            bytes_in = _nbytes(result)
+            delay = self.latency_sec + (bytes_out + bytes_in) / 1024 * self.latency_per_kb_sec
+            if delay > 0:
+                time.sleep(delay)
+            return 200, (result, bytes_in)
+
+        if self.scheduled:
+            status, payload = get_scheduler().run(
+                send, status_of=lambda r: r[0], account=self.account, sheet_id=sheet_id,
+                idempotent=method not in _NON_IDEMPOTENT_METHODS,
+            )
+        else:
+            status, payload = send()
+        elapsed = time.perf_counter() - started
+        api = "drive" if method.startswith("drive.") else "sheets"
+        if status == 429:
+            record_api_call(api, "FAKE", method, sheet, bytes_out, 0, elapsed, attempts[0] - 1, 429)
+            raise _api_error(429, "Quota exceeded for quota metric 'Read requests'", "RESOURCE_EXHAUSTED")
+
+        result, bytes_in = payload
+        self._record(method, calls=1, bytes_out=bytes_out, bytes_in=bytes_in, time=elapsed)
+        record_api_call(api, "FAKE", method, sheet, bytes_out, bytes_in, elapsed, attempts[0] - 1, 200)
+        return result
+
+    def _record(self, method: str, **inc) -> None:
+        with self._lock:
+            s = self._stats.setdefault(
+                method, {"calls": 0, "bytes_out": 0, "bytes_in": 0, "time": 0.0, "throttled": 0}
+            )
+            for k, v in inc.items():
+                s[k] += v
+
+
+class FakeClient:
+    """gspread.Client 흉내"""
+
+    def __init__(self, backend: FakeSheetsBackend):
+        self.backend = backend
+
+    def open_by_key(self, key: str) -> "FakeSpreadsheet":
+        def op():
+            return self.backend.spreadsheet(key)
+
+        ss = self.backend._call("spreadsheets.get", key, op, request=key)
+        return ss
+
+
+class FakeSpreadsheet:
+    """gspread.Spreadsheet 흉내"""
+
+    def __init__(self, backend: FakeSheetsBackend, key: str, title: str):
+        self.backend = backend
+        self.id = key
+        self.title = title
+        self.version = 1
+        self.modified_time = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        self._sheets: list[FakeWorksheet] = []
+
+    def _touch(self) -> None:
+        self.version += 1
+        self.modified_time = datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+    def _add(self, title: str, rows: int, cols: int) -> "FakeWorksheet":
+        ws = FakeWorksheet(self, next(self.backend._sheet_ids), title, rows, cols)
+        self._sheets.append(ws)
+        return ws
+
+    def _find(self, title: str) -> "FakeWorksheet":
+        for ws in self._sheets:
+            if ws.title == title:
+                return ws
+        if self.backend.auto_create:
+            return self._add(title, DEFAULT_ROWS, DEFAULT_COLS)
+        raise WorksheetNotFound(title)
+
+    def _by_sheet_id(self, sheet_id: int) -> "FakeWorksheet":
+        for ws in self._sheets:
+            if ws.id == sheet_id:
+                return ws
+        raise _api_error(400, f"No grid with id: {sheet_id}")
+
+    # ----- 메타데이터 -----
+    def worksheets(self, exclude_hidden: bool = False) -> list["FakeWorksheet"]:
+        return self.backend._call("spreadsheets.get", self.id, lambda: list(self._sheets))
+
+    def worksheet(self, title: str) -> "FakeWorksheet":
+        return self.backend._call("spreadsheets.get", self.id, lambda: self._find(title), request=title)
+
+    def add_worksheet(self, title: str, rows: int, cols: int, index: int | None = None) -> "FakeWorksheet":
+        def op():
+            if any(ws.title == title for ws in self._sheets):
+                raise _api_error(400, f'A sheet with the name "{title}" already exists.')
+            self._touch()
+            return self._add(title, int(rows), int(cols))
+
+        return self.backend._call("spreadsheets.batchUpdate", self.id, op, request=title)
+
+    # ----- 값 읽기 -----
+    def _value_range(self, range_name: str) -> dict:
+        tab, a1 = _split_range(range_name)
+        ws = self._find(tab) if tab is not None else self._sheets[0]
+        vr = {"range": f"{_quote_title(ws.title)}!{a1 or 'A1:' + _col_letter(ws.col_count) + str(ws.row_count)}",
+              "majorDimension": "ROWS"}
+        values = ws._read(a1)
+        if values:
+            vr["values"] = values
+        return vr
+
+    def values_get(self, range: str, params=None) -> dict:
+        return self.backend._call("values.get", self.id, lambda: self._value_range(range), request=range,
+                                  sheet=_split_range(range)[0] or "")
+
+    def values_batch_get(self, ranges: list[str], params=None) -> dict:
+        def op():
+            return {"spreadsheetId": self.id, "valueRanges": [self._value_range(r) for r in ranges]}
+
+        tabs = ",".join(dict.fromkeys(_split_range(r)[0] or "" for r in ranges))
+        return self.backend._call("values.batchGet", self.id, op, request=ranges, sheet=tabs)
+
+    # ----- 구조 변경 -----
+    def batch_update(self, body: dict) -> dict:
+        def op():
+            replies = []
+            for req in body.get("requests", []):
+                kind, spec = next(iter(req.items()))
+                if kind == "deleteDimension":
+                    rng = spec["range"]
+                    ws = self._by_sheet_id(rng["sheetId"])
+                    ws._delete_dimension(rng["dimension"], rng["startIndex"], rng["endIndex"])
+                elif kind == "insertDimension":
+                    rng = spec["range"]
+                    ws = self._by_sheet_id(rng["sheetId"])
+                    ws._insert_rows(rng["startIndex"], rng["endIndex"] - rng["startIndex"])
+                elif kind == "appendDimension":
+                    ws = self._by_sheet_id(spec["sheetId"])
+                    if spec.get("dimension") == "COLUMNS":
+                        ws.col_count += spec["length"]
+                    else:
+                        ws._insert_rows(ws.row_count, spec["length"])
+                elif kind == "updateSheetProperties":
+                    props = spec["properties"]
+                    ws = self._by_sheet_id(props["sheetId"])
+                    grid = props.get("gridProperties", {})
+                    ws._resize(grid.get("rowCount"), grid.get("columnCount"))
+                    if "title" in props:
+                        ws.title = props["title"]
+                else:
+                    raise NotImplementedError(f"fake_sheets: batchUpdate 요청 '{kind}' 미지원")
+                replies.append({})
+            self._touch()
+            return {"spreadsheetId": self.id, "replies": replies}
+
+        return self.backend._call("spreadsheets.batchUpdate", self.id, op, request=body)
+
+
+class FakeWorksheet:
+    """gspread.Worksheet 흉내 (행/열 번호는 1-based, 내부 저장은 0-based)"""
+
+    def __init__(self, spreadsheet: FakeSpreadsheet, sheet_id: int, title: str, rows: int, cols: int):
+        self.spreadsheet = spreadsheet
+        self.id = sheet_id
+        self.title = title
+        self.row_count = int(rows)
+        self.col_count = int(cols)
+        self._rows: list[list[str]] = []   # 값이 있는 앞쪽 행들만 (뒤는 빈 행)
+
+    @property
+    def spreadsheet_id(self) -> str:
+        return self.spreadsheet.id
+
+    def _call(self, method: str, op, request=None):
+        return self.spreadsheet.backend._call(method, self.spreadsheet.id, op, request=request, sheet=self.title)
+
+    # ----- 내부 연산 (잠금/지표 없이) -----
+    def _bounds(self, a1: str | None) -> tuple[int, int, int, int]:
+        """A1 → (시작행, 끝행, 시작열, 끝열) 0-based, 끝은 제외. 열린 끝은 시트 크기까지"""
+        if not a1:
+            return 0, self.row_count, 0, self.col_count
+        grid = a1_range_to_grid_range(a1)
+        return (
+            grid.get("startRowIndex", 0),
+            grid.get("endRowIndex", self.row_count),
+            grid.get("startColumnIndex", 0),
+            grid.get("endColumnIndex", self.col_count),
+        )
+
+    def _read(self, a1: str | None) -> list[list[str]]:
+        r0, r1, c0, c1 = self._bounds(a1)
+        return _trim([row[c0:c1] for row in self._rows[r0:r1]])
+
+    def _write_block(self, r0: int, c0: int, values, user_entered: bool) -> tuple[int, int]:
+        values = [list(v) for v in values]
+        if not values:
+            return 0, 0
+        width = max(len(v) for v in values)
+        self.row_count = max(self.row_count, r0 + len(values))
+        self.col_count = max(self.col_count, c0 + width)
+        while len(self._rows) < r0 + len(values):
+            self._rows.append([])
+        for i, vals in enumerate(values):
+            row = self._rows[r0 + i]
+            if len(row) < c0 + len(vals):
+                row.extend([""] * (c0 + len(vals) - len(row)))
+            for j, v in enumerate(vals):
+                row[c0 + j] = _cell_text(v, user_entered)
+        return len(values), width
+
+    def _last_data_row(self) -> int:
+        """값이 있는 마지막 행 번호 (1-based, 없으면 0)"""
+        n = len(self._rows)
+        while n and not any(self._rows[n - 1]):
+            n -= 1
+        return n
+
+    def _delete_dimension(self, dimension: str, start: int, end: int) -> None:
+        if dimension == "ROWS":
+            if end > self.row_count or start < 0 or start >= end:
+                raise _api_error(400, f"Invalid requests: rows {start}..{end} of {self.row_count}")
+            if end - start >= self.row_count:
+                raise _api_error(400, "Invalid requests[0].deleteDimension: You can't delete all the rows on the sheet.")
+            del self._rows[start:end]
+            self.row_count -= end - start
+        else:
+            for row in self._rows:
+                del row[start:end]
+            self.col_count -= end - start
+
+    def _insert_rows(self, start: int, count: int) -> None:
+        if start < len(self._rows):
+            self._rows[start:start] = [[] for _ in range(count)]
+        self.row_count += count
+
+    def _resize(self, rows: int | None, cols: int | None) -> None:
+        if rows is not None:
+            self.row_count = int(rows)
+            del self._rows[self.row_count:]
+        if cols is not None:
+            self.col_count = int(cols)
+            for row in self._rows:
+                del row[self.col_count:]
+
+    # ----- 읽기 -----
+    def get_all_values(self, range_name: str | None = None, **kwargs) -> list[list[str]]:
+        return self.get_values(range_name)
+
+    def get_values(self, range_name: str | None = None, **kwargs) -> list[list[str]]:
+        return self._call("values.get", lambda: _pad(self._read(range_name)), request=range_name)
+
+    def get_all_records(self, head: int = 1, default_blank="", **kwargs) -> list[dict]:
+        values = self.get_all_values()
+        if len(values) < head:
+            return []
+        header = values[head - 1]
+        records = []
+        for row in values[head:]:
+            row = list(row) + [""] * (len(header) - len(row))
+            nums = numericise_all(row, default_blank=default_blank)
+            records.append(dict(zip(header, nums)))
+        return records
+
+    def row_values(self, row: int, **kwargs) -> list[str]:
+        def op():
+            vals = self._read(f"{row}:{row}")
+            return vals[0] if vals else []
+
+        return self._call("values.get", op, request=row)
+
+    def col_values(self, col: int, **kwargs) -> list[str]:
+        letter = _col_letter(col)
+
+        def op():
+            return [r[0] if r else "" for r in self._read(f"{letter}:{letter}")]
+
+        return self._call("values.get", op, request=col)
+
+    def acell(self, label: str, **kwargs) -> Cell:
+        grid = a1_range_to_grid_range(label)
+        r, c = grid["startRowIndex"] + 1, grid["startColumnIndex"] + 1
+
+        def op():
+            row = self._rows[r - 1] if r - 1 < len(self._rows) else []
+            return row[c - 1] if c - 1 < len(row) else ""
+
+        return Cell(r, c, self._call("values.get", op, request=label))
+
+    def findall(self, query, in_row: int | None = None, in_column: int | None = None,
+                case_sensitive: bool = True) -> list[Cell]:
+        def match(v: str) -> bool:
+            if isinstance(query, re.Pattern):
+                return query.search(v) is not None
+            if case_sensitive:
+                return v == query
+            return v.casefold() == str(query).casefold()
+
+        def op():
+            out = []
+            for i, row in enumerate(self._rows, start=1):
+                if in_row is not None and i != in_row:
+                    continue
+                for j, v in enumerate(row, start=1):
+                    if (in_column is None or j == in_column) and v != "" and match(v):
+                        out.append(Cell(i, j, v))
+            return out
+
+        return self._call("values.get", op, request=str(query))
+
+    # ----- 쓰기 -----
+    def _after_write(self, result):
+        self.spreadsheet._touch()
+        return result
+
+    def update(self, values=None, range_name: str | None = None, raw: bool = True,
+               value_input_option=None, **kwargs) -> dict:
+        # gspread 6 처럼 (range, values) 순서로 불러도 받아 준다
+        if isinstance(values, str) and range_name is not None and not isinstance(range_name, str):
+            values, range_name = range_name, values
+        user_entered = str(value_input_option or ("RAW" if raw else "USER_ENTERED")).endswith("USER_ENTERED")
+        target = range_name or "A1"
+
+        def op():
+            r0, _, c0, _ = self._bounds(target)
+            n, w = self._write_block(r0, c0, values or [], user_entered)
+            return self._after_write({
+                "spreadsheetId": self.spreadsheet.id,
+                "updatedRange": f"{_quote_title(self.title)}!{target}",
+                "updatedRows": n, "updatedColumns": w, "updatedCells": n * w,
+            })
+
+        return self._call("values.update", op, request={"range": target, "values": values})
+
+    def update_cell(self, row: int, col: int, value) -> dict:
+        return self.update([[value]], f"{_col_letter(col)}{row}", value_input_option="USER_ENTERED")
+
+    def update_acell(self, label: str, value) -> dict:
+        return self.update([[value]], label, value_input_option="USER_ENTERED")
+
+    def batch_update(self, data, raw: bool = True, value_input_option=None, **kwargs) -> dict:
+        user_entered = str(value_input_option or ("RAW" if raw else "USER_ENTERED")).endswith("USER_ENTERED")
+        data = list(data)
+
+        def op():
+            cells = 0
+            for item in data:
+                _, a1 = _split_range(item["range"])
+                r0, _, c0, _ = self._bounds(a1)
+                n, w = self._write_block(r0, c0, item.get("values") or [], user_entered)
+                cells += n * w
+            return self._after_write({
+                "spreadsheetId": self.spreadsheet.id,
+                "totalUpdatedCells": cells,
+                "totalUpdatedSheets": 1 if data else 0,
+            })
+
+        return self._call("values.batchUpdate", op, request=data)
+
+    def append_row(self, values, value_input_option="RAW", insert_data_option=None,
+                   table_range=None, include_values_in_response: bool = False) -> dict:
+        return self.append_rows([values], value_input_option, insert_data_option, table_range)
+
+    def append_rows(self, values, value_input_option="RAW", insert_data_option=None,
+                    table_range=None, include_values_in_response=None) -> dict:
+        rows = [list(v) for v in values]
+        user_entered = str(value_input_option).endswith("USER_ENTERED")
+
+        def op():
+            start = self._last_data_row()   # 0-based 시작 행
+            if str(insert_data_option or "").endswith("INSERT_ROWS"):
+                self._insert_rows(start, len(rows))
+            n, w = self._write_block(start, 0, rows, user_entered)
+            updated = f"{_quote_title(self.title)}!A{start + 1}:{_col_letter(max(w, 1))}{start + n}"
+            return self._after_write({
+                "spreadsheetId": self.spreadsheet.id,
+                "tableRange": f"{_quote_title(self.title)}!A1:{_col_letter(self.col_count)}{start}",
+                "updates": {
+                    "spreadsheetId": self.spreadsheet.id,
+                    "updatedRange": updated,
+                    "updatedRows": n, "updatedColumns": w, "updatedCells": n * w,
+                },
+            })
+
+        return self._call("values.append", op, request=rows)
+
+    def delete_rows(self, start_index: int, end_index: int | None = None) -> dict:
+        end_index = end_index or start_index
+
+        def op():
+            self._delete_dimension("ROWS", start_index - 1, end_index)
+            return self._after_write({"spreadsheetId": self.spreadsheet.id, "replies": [{}]})
+
+        return self._call("spreadsheets.batchUpdate", op, request=[start_index, end_index])
+
+    def resize(self, rows: int | None = None, cols: int | None = None) -> dict:
+        def op():
+            self._resize(rows, cols)
+            return self._after_write({"spreadsheetId": self.spreadsheet.id, "replies": [{}]})
+
+        return self._call("spreadsheets.batchUpdate", op, request=[rows, cols])
+
+    def clear(self) -> dict:
+        def op():
+            self._rows = []
+            return self._after_write({"spreadsheetId": self.spreadsheet.id, "clearedRange": self.title})
+
+        return self._call("values.clear", op)
+
+
+# ===== Drive (files 만) =====
+_Q_PARENT_RE = re.compile(r"'([^']+)'\s+in\s+parents")
+_Q_FIELD_RE = re.compile(r"\b(name|mimeType)\s*=\s*'((?:[^'\\]|\\.)*)'")
+_Q_TRASHED_RE = re.compile(r"\btrashed\s*=\s*(true|false)", re.I)
+
+
+class _FakeDriveRequest:
+    """googleapiclient HttpRequest 흉내: execute() 때 백엔드 호출 1건"""
+
+    def __init__(self, backend: FakeSheetsBackend, method: str, op, request):
+        self._backend = backend
+        self._method = method
+        self._op = op
+        self._request = request
+
+    def execute(self, num_retries: int = 0):
+        return self._backend._call(self._method, None, self._op, request=self._request)
+
+
+class _FakeDriveFiles:
+    def __init__(self, backend: FakeSheetsBackend):
+        self.backend = backend
+
+    def list(self, q: str = "", fields=None, pageSize: int | None = None, pageToken=None, **kwargs):
+        def op():
+            parents = _Q_PARENT_RE.findall(q or "")
+            wanted = {k: v.replace("\\'", "'") for k, v in _Q_FIELD_RE.findall(q or "")}
+            trashed = _Q_TRASHED_RE.search(q or "")
+            files = [
+                f for f in self.backend._drive_files.values()
+                if all(p in f["parents"] for p in parents)
+                and all(f[k] == v for k, v in wanted.items())
+                and (trashed is None or f["trashed"] == (trashed.group(1).lower() == "true"))
+            ]
+            start = int(pageToken or 0)
+            end = start + pageSize if pageSize else len(files)
+            out = {"files": [{"id": f["id"], "name": f["name"]} for f in files[start:end]]}
+            if end < len(files):
+                out["nextPageToken"] = str(end)
+            return out
+
+        return _FakeDriveRequest(self.backend, "drive.files.list", op, {"q": q, "pageToken": pageToken})
+
+    def get(self, fileId: str, fields=None, **kwargs):
+        def op():
+            f = self.backend._drive_files.get(fileId)
+            if f is None:
+                raise _api_error(404, f"File not found: {fileId}.", "NOT_FOUND")
+            return dict(f)
+
+        return _FakeDriveRequest(self.backend, "drive.files.get", op, fileId)
+
+    def create(self, body: dict | None = None, fields=None, media_body=None, **kwargs):
+        body = dict(body or {})
+
+        def op():
+            fid = uuid.uuid4().hex
+            self.backend._drive_files[fid] = {
+                "id": fid,
+                "name": body.get("name", ""),
+                "mimeType": body.get("mimeType", "application/octet-stream"),
+                "parents": list(body.get("parents", [])),
+                "trashed": False,
+                "version": "1",
+                "modifiedTime": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            }
+            return {"id": fid, "name": body.get("name", "")}
+
+        return _FakeDriveRequest(self.backend, "drive.files.create", op, body)
+
+    def delete(self, fileId: str, **kwargs):
+        def op():
+            self.backend._drive_files.pop(fileId, None)
+            return {}
+
+        return _FakeDriveRequest(self.backend, "drive.files.delete", op, fileId)
+
+
+class FakeDriveService:
+    """googleapiclient Drive v3 서비스 흉내 (files() 만)"""
+
+    def __init__(self, backend: FakeSheetsBackend):
+        self._files = _FakeDriveFiles(backend)
+
+    def files(self):
+        return self._files
+
+
+register_storage_backend(
+    "fake",
+    lambda: FakeSheetsBackend(
+        latency_sec=FAKE_SHEETS_LATENCY_MS / 1000.0,
+        quota_per_min=FAKE_SHEETS_QUOTA_PER_MIN or None,
+        auto_create=True,
+    ),
+)
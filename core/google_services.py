@@ -0,0 +1,147 @@
+# core/google_services.py
+#
+# 구글 API 서비스 레지스트리.
+# 예전에는 get_drive_service / get_sheet_column_widths / google_drive_service.get_services 가
+# 부를 때마다 키 파일을 다시 읽고 build("drive", "v3") 로 디스커버리 문서를 다시 파싱했다.
+# 그래서 매 호출에 토큰 발급 + TLS 핸드셰이크 + 디스커버리 파싱 비용이 같이 붙었다.
+#
+# 여기서는 프로세스 전체에서 아래를 한 번만 만들고 재사용한다 (모두 스레드 안전):
+# - 자격 증명: 출처(키 파일 / OAuth 토큰) + scopes 당 1개. 만료되면 google-auth 가 알아서 갱신한다.
+# - 인증된 HTTP 세션: 자격 증명당 1개
+#     googleapiclient → core.api_scheduler.AuthorizedHttpPool (keep-alive httplib2 연결 묶음)
+#     gspread         → requests.Session (urllib3 연결 풀 크기를 GOOGLE_HTTP_POOL_SIZE 로)
+# - 디스커버리 문서: (API, 버전) 당 1번만 읽고, 서비스 객체는 (자격 증명, API, 버전) 당 1개
+#
+#   creds = service_account_credentials(KEY_PATH, SCOPES)
+#   drive = get_api_service("drive", "v3", creds)
+#   gc    = get_gspread_client_for(creds)
+#
+# 이 모듈은 streamlit 에 의존하지 않는다.
+
+import threading
+
+import gspread
+from google.oauth2.service_account import Credentials
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from requests.adapters import HTTPAdapter
+
+from config import GOOGLE_HTTP_POOL_SIZE
+from core.api_scheduler import AuthorizedHttpPool, ScheduledHTTPClient, scheduled_http
+
+_lock = threading.RLock()
+_credentials: dict[tuple, object] = {}
+_http_pools: dict[int, tuple[object, AuthorizedHttpPool]] = {}
+_discovery_docs: dict[tuple[str, str], str] = {}
+_services: dict[tuple[int, str, str], tuple[object, object]] = {}
+_gspread_clients: dict[int, tuple[object, object]] = {}
+_stats = {"credentials_loaded": 0, "services_built": 0, "service_hits": 0, "discovery_loaded": 0}
+
+
+# ===== 자격 증명 =====
+def get_credentials(source: str, scopes, loader):
+    """
+    source(예: 'sa:/etc/secrets/key.json') + scopes 로 자격 증명을 한 번만 만든다.
+    loader(scopes) 는 처음 1번만 불린다.
+    """
+    key = (source, tuple(sorted(scopes)))
+    with _lock:
+        creds = _credentials.get(key)
+        if creds is None:
+            creds = loader(list(scopes))
+            _credentials[key] = creds
+            _stats["credentials_loaded"] += 1
+        return creds
+
+
+def service_account_credentials(path: str, scopes):
+    """서비스 계정 키 파일 → 자격 증명 (파일은 처음 1번만 읽는다)"""
+    return get_credentials(
+        f"sa:{path}", scopes,
+        lambda s: Credentials.from_service_account_file(path, scopes=s),
+    )
+
+
+def forget_credentials(source: str | None = None) -> int:
+    """
+    자격 증명과 거기서 만든 세션/서비스를 버린다 (키 교체, 토큰 취소 등).
+    source 가 None 이면 전부. 반환: 버린 자격 증명 수
+    """
+    with _lock:
+        keys = [k for k in _credentials if source is None or k[0] == source]
+        for k in keys:
+            cid = id(_credentials.pop(k))
+            _http_pools.pop(cid, None)
+            _gspread_clients.pop(cid, None)
+            for skey in [s for s in _services if s[0] == cid]:
+                _services.pop(skey, None)
+        return len(keys)
+
+
+# ===== 인증된 세션 =====
+def _http_pool(creds) -> AuthorizedHttpPool:
+    with _lock:
+        entry = _http_pools.get(id(creds))
+        if entry is None or entry[0] is not creds:
+            entry = (creds, AuthorizedHttpPool(creds, GOOGLE_HTTP_POOL_SIZE))
+            _http_pools[id(creds)] = entry
+        return entry[1]
+
+
+def _discovery_doc(api: str, version: str) -> str:
+    """라이브러리에 들어있는 디스커버리 문서 (네트워크 요청 없음, (API, 버전) 당 1번만 읽음)"""
+    with _lock:
+        doc = _discovery_docs.get((api, version))
+        if doc is None:
+            doc = get_static_doc(api, version)
+            if doc is None:
+                raise ValueError(f"디스커버리 문서가 없습니다: {api} {version}")
+            _discovery_docs[(api, version)] = doc
+            _stats["discovery_loaded"] += 1
+        return doc
+
+
+def get_api_service(api: str, version: str, creds):
+    """googleapiclient 서비스 객체 (자격 증명 + API + 버전 당 1개, 여러 스레드에서 같이 써도 된다)"""
+    key = (id(creds), api, version)
+    with _lock:
+        entry = _services.get(key)
+        if entry is not None and entry[0] is creds:
+            _stats["service_hits"] += 1
+            return entry[1]
+        service = build_from_document(
+            _discovery_doc(api, version),
+            http=scheduled_http(creds, _http_pool(creds)),
+        )
+        _services[key] = (creds, service)
+        _stats["services_built"] += 1
+        return service
+
+
+def get_gspread_client_for(creds):
+    """
+    gspread Client (자격 증명당 1개). 요청은 core.api_scheduler 를 거치고,
+    requests 세션의 연결 풀을 GOOGLE_HTTP_POOL_SIZE 로 늘려 선로딩 스레드들이 같이 keep-alive 를 쓴다.
+    """
+    with _lock:
+        entry = _gspread_clients.get(id(creds))
+        if entry is not None and entry[0] is creds:
+            return entry[1]
+        client = gspread.authorize(creds, http_client=ScheduledHTTPClient)
+        adapter = HTTPAdapter(pool_connections=GOOGLE_HTTP_POOL_SIZE, pool_maxsize=GOOGLE_HTTP_POOL_SIZE)
+        client.http_client.session.mount("https://", adapter)
+        _gspread_clients[id(creds)] = (creds, client)
+        return client
+
+
+def get_service_registry_stats() -> dict:
+    with _lock:
+        out = dict(_stats)
+        out["credentials"] = len(_credentials)
+        out["services"] = len(_services)
+        out["gspread_clients"] = len(_gspread_clients)
+        out["http_pools"] = {
+            getattr(c, "service_account_email", None) or f"creds-{cid}": pool.stats()
+            for cid, (c, pool) in _http_pools.items()
+        }
+        return out
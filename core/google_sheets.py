@@ -7,9 +7,23 @@ from google.oauth2.credentials import Credentials as UserCredentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.errors import HttpError
-from google.auth.exceptions import RefreshError
+from google.auth.exceptions import RefreshError, TransportError
 from config import OAUTH_CLIENT_SECRET_PATH, OAUTH_TOKEN_PATH, RUN_ENV
 import os
+import contextlib
+import contextvars
+import copy
+import datetime
+import functools
+import json
+import re
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
 
 from config import (
     KEY_PATH,
@@ -32,6 +46,30 @@ from config import (
     MEMO_LONG_SHEET_NAME,
     MEMO_MID_SHEET_NAME,
     MEMO_SHORT_SHEET_NAME,
+    REPLICA_MODE,
+    REPLICA_SYNC_INTERVAL_SEC,
+    CHANGELOG_SHEET_NAME,
+    PREFETCH_MAX_WORKERS,
+    PREFETCH_WAIT_SEC,
+    JOURNAL_ENABLED,
+    JOURNAL_DRAIN_WAIT_SEC,
+)
+from gspread.utils import numericise_all, absolute_range_name
+from core.sheet_replica import REPLICA_TABS, get_replica
+from core.api_metrics import copy_scope
+from core.cache_snapshot import save_snapshot, load_snapshot, drop_snapshot, note_snapshot_rejected
+from core.write_journal import get_journal
+from core.record_store import values_to_table, table_to_records
+from core.sheet_backend import SheetBackend, get_storage_backend, register_storage_backend
+from core.api_scheduler import (
+    api_lane,
+    LANE_BACKGROUND,
+)
+from core.google_services import (
+    get_credentials,
+    service_account_credentials,
+    get_api_service,
+    get_gspread_client_for,
 )
 
 def debug_print_drive_user():
@@ -96,11 +134,6 @@ def get_user_credentials(scopes):
     return creds
 
 
-def get_drive_service():
-    scopes = ["https://www.googleapis.com/auth/drive"]
-    creds = Credentials.from_service_account_file(KEY_PATH, scopes=scopes)
-    return build("drive", "v3", credentials=creds)
-
 def create_tenant_workspace(tenant_id: str, office_name: str = "") -> dict:
     """
     새 사무실(테넌트)을 위해 Drive에 워크스페이스를 만든다.
@@ -145,6 +178,7 @@ def create_tenant_workspace(tenant_id: str, office_name: str = "") -> dict:
     ).execute()
     customer_sheet_key = cust_file["id"]
 
+    invalidate_worksheet_cache()
     return {
         "folder_id": folder_id,
         "work_sheet_key": work_sheet_key,
@@ -190,12 +224,8 @@ def update_account_workspace(login_id: str, workspace: dict) -> bool:
     ok = write_data_to_sheet(ACCOUNTS_SHEET_NAME, records, header_list=header_list)
 
     if ok:
-        # Accounts 시트가 바뀌었으니, 테넌트별 sheet_key 캐시 초기화
-        try:
-            _load_tenant_sheet_keys.clear()
-        except Exception:
-            # 혹시 모르니까 전체 cache_data라도 비우기 (최후의 안전장치)
-            st.cache_data.clear()
+        # Accounts 시트가 바뀌었으니, 테넌트별 sheet_key 캐시 + 워크시트 핸들 초기화
+        invalidate_tenant_sheet_keys()
 
     return ok
 
@@ -221,11 +251,31 @@ def create_tenant_spreadsheet(tenant_id: str, office_name: str = "") -> str:
     return new_id
 
 
+_tenant_override: contextvars.ContextVar = contextvars.ContextVar("hanwoory_tenant_override", default=None)
+
+
 def get_current_tenant_id():
-    """현재 세션에서 사용하는 테넌트 ID (없으면 기본 hanwoory)"""
+    """현재 세션에서 사용하는 테넌트 ID (없으면 기본 hanwoory, 백그라운드 작업은 tenant_scope 값)"""
+    override = _tenant_override.get()
+    if override is not None:
+        return override
     return st.session_state.get(SESS_TENANT_ID, DEFAULT_TENANT_ID)
 
 
+@contextlib.contextmanager
+def tenant_scope(tenant_id: str):
+    """
+    세션이 없는 스레드(쓰기 저널 재생 등)에서 헬퍼들이 tenant_id 기준으로 시트 키 / 캐시를 고르게 한다.
+        with tenant_scope("officeA"):
+            upsert_rows_by_id(...)
+    """
+    token = _tenant_override.set(tenant_id)
+    try:
+        yield
+    finally:
+        _tenant_override.reset(token)
+
+
 @st.cache_data(ttl=600)
 def _load_tenant_sheet_keys():
     """
@@ -241,9 +291,7 @@ def _load_tenant_sheet_keys():
       ...
     }
     """
-    from core.google_sheets import read_data_from_sheet  # 자기 자신 호출
-
-    records = read_data_from_sheet(ACCOUNTS_SHEET_NAME, default_if_empty=[]) or []
+    records = table_to_records(read_table(ACCOUNTS_SHEET_NAME))
     mapping: dict[str, dict[str, str]] = {}
 
     for r in records:
@@ -267,6 +315,24 @@ def _load_tenant_sheet_keys():
     return mapping
 
 
+def invalidate_tenant_sheet_keys() -> None:
+    """
+    Accounts 시트를 고친 뒤 호출: 테넌트별 sheet_key 매핑과 워크시트 핸들 캐시를 비운다.
+    (시트 키가 바뀌었을 수 있으니 예전 키로 연 핸들도 같이 버린다)
+    """
+    try:
+        _load_tenant_sheet_keys.clear()
+    except Exception:
+        # 혹시 모르니까 전체 cache_data라도 비우기 (최후의 안전장치)
+        st.cache_data.clear()
+    invalidate_worksheet_cache()
+
+
+def list_active_tenant_ids() -> list[str]:
+    """Accounts 시트에서 활성 상태인 tenant_id 목록 (캐시된 매핑 기준)"""
+    return list(_load_tenant_sheet_keys())
+
+
 def get_customer_sheet_key_for_tenant(tenant_id: str) -> str:
     """
     테넌트별 고객데이터 스프레드시트 ID 반환.
@@ -319,13 +385,13 @@ def get_sheet_column_widths(sheet_key: str, sheet_name: str) -> dict[int, int]:
         return {}
 
     try:
-        # gspread Client 안에 들어있는 Credentials 그대로 사용
-        creds = getattr(client, "auth", None)
+        # gspread Client(의 HTTP 클라이언트) 안에 들어있는 Credentials 그대로 사용
+        creds = getattr(getattr(client, "http_client", None), "auth", None)
         if creds is None:
             return {}
 
-        # Sheets API 서비스 객체
-        service = build("sheets", "v4", credentials=creds, cache_discovery=False)
+        # Sheets API 서비스 객체 (자격 증명당 1개를 재사용)
+        service = get_api_service("sheets", "v4", creds)
 
         resp = (
             service.spreadsheets()
@@ -401,50 +467,91 @@ def get_work_sheet_key_for_tenant(tenant_id: str) -> str:
 
 
 # ===== Google Sheets / Drive Client =====
-@st.cache_resource(ttl=600)
 def get_gspread_client():
     """
-    gspread Client 생성.
+    gspread Client (또는 같은 모양의 객체) 반환.
+    어떤 저장소를 쓸지는 core.sheet_backend 가 정한다 (기본: 실제 Google Sheets).
+    """
+    return get_storage_backend().client()
+
+
+GOOGLE_API_SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive.file",
+    "https://www.googleapis.com/auth/drive",
+]
+
+
+def _google_credentials():
+    """
+    Sheets / Drive 공용 자격 증명 (프로세스당 1개, core.google_services 레지스트리).
     - 서버(Render): 서비스 계정(KEY_PATH) 사용
     - 로컬: OAuth(user) 사용
     """
-    scopes = [
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive.file",
-        "https://www.googleapis.com/auth/drive",
-    ]
-
     if RUN_ENV == "server":
         # Render 서버에서는 서비스 계정으로만 접근
-        creds = Credentials.from_service_account_file(KEY_PATH, scopes=scopes)
-    else:
-        # 로컬에서는 OAuth(데스크톱 클라이언트) 사용
-        creds = get_user_credentials(scopes)
+        return service_account_credentials(KEY_PATH, GOOGLE_API_SCOPES)
+    # 로컬에서는 OAuth(데스크톱 클라이언트) 사용
+    return get_credentials(f"oauth:{OAUTH_TOKEN_PATH}", GOOGLE_API_SCOPES, get_user_credentials)
 
-    return gspread.authorize(creds)
 
-def get_drive_service():
+def _google_gspread_client():
     """
-    Google Drive API 서비스 객체 생성.
-    - 서버(Render): 서비스 계정(KEY_PATH) 사용
-    - 로컬: OAuth(user) 사용
+    gspread Client (자격 증명당 1개를 재사용, keep-alive 연결 풀).
+    모든 gspread 요청은 core.api_scheduler 를 거친다 (속도 제한 + 429/5xx 재시도)
     """
-    scopes = ["https://www.googleapis.com/auth/drive"]
+    return get_gspread_client_for(_google_credentials())
 
-    if RUN_ENV == "server":
-        creds = Credentials.from_service_account_file(KEY_PATH, scopes=scopes)
-    else:
-        creds = get_user_credentials(scopes)
+def get_drive_service():
+    """Drive v3 서비스 (현재 저장소 백엔드 기준, core.sheet_backend)"""
+    return get_storage_backend().drive()
 
-    return build("drive", "v3", credentials=creds)
 
+def _google_drive_service():
+    """Google Drive v3 서비스 객체 (Sheets 와 같은 자격 증명 / 연결 풀을 재사용)"""
+    return get_api_service("drive", "v3", _google_credentials())
 
-def get_worksheet(client, sheet_name: str):
+
+class GoogleSheetsBackend(SheetBackend):
+    """실제 Google Sheets / Drive 저장소 (core.sheet_backend 의 기본 백엔드)"""
+
+    name = "google"
+
+    def client(self):
+        return _google_gspread_client()
+
+    def drive(self):
+        return _google_drive_service()
+
+    def file_versions(self, sheet_keys) -> dict:
+        """Drive files.get(modifiedTime, version) 을 batch 요청 1회로 묻는다"""
+        fetched: dict[str, str | None] = {k: None for k in sheet_keys}
+
+        def _cb(request_id, response, exception):
+            if exception is None and response:
+                fetched[request_id] = f"{response.get('modifiedTime')}|{response.get('version')}"
+
+        drive = self.drive()
+        batch = drive.new_batch_http_request(callback=_cb)
+        for k in fetched:
+            batch.add(
+                drive.files().get(fileId=k, fields="modifiedTime,version", supportsAllDrives=True),
+                request_id=k,
+            )
+        batch.execute()
+        return fetched
+
+
+register_storage_backend("google", GoogleSheetsBackend)
+
+
+def resolve_sheet_key(sheet_name: str, tenant_id: str | None = None) -> str:
     """
-    sheet_name 에 따라 적절한 테넌트별 스프레드시트를 선택해서
-    해당 워크시트를 열어준다.
+    sheet_name(탭 이름)이 들어있는 스프레드시트 ID를 테넌트 기준으로 결정한다.
+    (get_worksheet 와 캐시 키 계산이 같은 규칙을 쓰도록 분리)
     """
-    tenant_id = get_current_tenant_id()
+    if tenant_id is None:
+        tenant_id = get_current_tenant_id()
 
     # ─────────────────────
     # 1) 멀티테넌트 모드 (서버: Render)
@@ -463,29 +570,128 @@ def get_worksheet(client, sheet_name: str):
             MEMO_MID_SHEET_NAME,          # "중기메모"
             MEMO_SHORT_SHEET_NAME,        # "단기메모"
         ):
-            sheet_key = get_customer_sheet_key_for_tenant(tenant_id)
+            return get_customer_sheet_key_for_tenant(tenant_id)
 
         # 1-2) 업무정리 워크북 안에 들어있는 탭들
-        elif sheet_name in ("업무참고", "업무정리"):
-            sheet_key = get_work_sheet_key_for_tenant(tenant_id)
+        if sheet_name in ("업무참고", "업무정리"):
+            return get_work_sheet_key_for_tenant(tenant_id)
 
         # 1-3) 혹시 빠진 탭이 있으면, 일단 기본(admin) 시트로
-        else:
-            sheet_key = SHEET_KEY
+        return SHEET_KEY
 
     # ─────────────────────
     # 2) 단일 테넌트 모드 (로컬 개발)
     #    → 예전 동작 최대한 유지
     # ─────────────────────
-    else:
-        if sheet_name in ("업무참고", "업무정리"):
-            sheet_key = get_work_sheet_key_for_tenant(tenant_id)
-        else:
-            # 기존처럼 하나의 SHEET_KEY 안에 모든 탭이 있는 구조
-            sheet_key = SHEET_KEY
+    if sheet_name in ("업무참고", "업무정리"):
+        return get_work_sheet_key_for_tenant(tenant_id)
+
+    # 기존처럼 하나의 SHEET_KEY 안에 모든 탭이 있는 구조
+    return SHEET_KEY
+
+
+# ===== 스프레드시트/워크시트 핸들 캐시 =====
+# open_by_key + worksheet(name) 은 데이터 읽기 전에 메타데이터 요청을 2번 보낸다.
+# 핸들은 프로세스 전체에서 (sheet_key, 탭 이름) 기준으로 재사용하고,
+# TTL 이 지나거나 테넌트 생성/수정 시 invalidate_worksheet_cache() 로 비운다.
+WORKSHEET_HANDLE_TTL_SEC = 600
+
+_handle_lock = threading.Lock()
+_spreadsheet_handles: dict[str, tuple[float, object, object]] = {}
+_worksheet_handles: dict[tuple[str, str], tuple[float, object, object]] = {}
+_handle_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def _handle_alive(entry, client) -> bool:
+    """캐시 항목이 만료 전이고, 같은 gspread client 로 만든 핸들인지 확인"""
+    if entry is None:
+        return False
+    expires_at, owner, _ = entry
+    return owner is client and time.monotonic() < expires_at
+
+
+def get_spreadsheet_by_key(client, sheet_key: str):
+    """client.open_by_key 결과를 캐시해서 반환"""
+    with _handle_lock:
+        entry = _spreadsheet_handles.get(sheet_key)
+        if _handle_alive(entry, client):
+            return entry[2]
 
     sh = client.open_by_key(sheet_key)
-    return sh.worksheet(sheet_name)
+    with _handle_lock:
+        _spreadsheet_handles[sheet_key] = (
+            time.monotonic() + WORKSHEET_HANDLE_TTL_SEC, client, sh,
+        )
+    return sh
+
+
+def get_worksheet_by_key(client, sheet_key: str, sheet_name: str):
+    """
+    (sheet_key, sheet_name) 워크시트 핸들을 캐시에서 꺼내거나 새로 연다.
+    핸들을 꺼내는 쪽은 곧 그 탭을 읽거나 행 번호로 쓰므로, 공용 쓰기 버퍼에 쌓인 것을 먼저 보낸다.
+    """
+    flush_pending_writes(sheet_name, sheet_key)
+    cache_key = (sheet_key, sheet_name)
+    with _handle_lock:
+        entry = _worksheet_handles.get(cache_key)
+        if _handle_alive(entry, client):
+            _handle_stats["hits"] += 1
+            return entry[2]
+        _handle_stats["misses"] += 1
+
+    ws = get_spreadsheet_by_key(client, sheet_key).worksheet(sheet_name)
+    with _handle_lock:
+        _worksheet_handles[cache_key] = (
+            time.monotonic() + WORKSHEET_HANDLE_TTL_SEC, client, ws,
+        )
+    return ws
+
+
+def invalidate_worksheet_cache(sheet_key: str | None = None, sheet_name: str | None = None) -> int:
+    """
+    핸들 캐시 비우기.
+    - 인자 없음      : 전체
+    - sheet_key 만   : 해당 스프레드시트의 모든 탭
+    - sheet_name 만  : 모든 스프레드시트의 해당 탭 (탭 이름 변경 시)
+    반환: 제거된 워크시트 핸들 수
+    """
+    with _handle_lock:
+        targets = [
+            k for k in _worksheet_handles
+            if (sheet_key is None or k[0] == sheet_key)
+            and (sheet_name is None or k[1] == sheet_name)
+        ]
+        for k in targets:
+            del _worksheet_handles[k]
+
+        if sheet_name is None:
+            if sheet_key is None:
+                _spreadsheet_handles.clear()
+            else:
+                _spreadsheet_handles.pop(sheet_key, None)
+
+        _handle_stats["invalidations"] += 1
+        return len(targets)
+
+
+def get_worksheet_cache_stats() -> dict:
+    """핸들 캐시 hit/miss 카운터와 현재 크기"""
+    with _handle_lock:
+        stats = dict(_handle_stats)
+        stats["worksheets"] = len(_worksheet_handles)
+        stats["spreadsheets"] = len(_spreadsheet_handles)
+    total = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = (stats["hits"] / total) if total else 0.0
+    return stats
+
+
+def get_worksheet(client, sheet_name: str):
+    """
+    sheet_name 에 따라 적절한 테넌트별 스프레드시트를 선택해서
+    해당 워크시트를 열어준다. (핸들은 프로세스 단위로 캐시)
+    """
+    sheet_key = resolve_sheet_key(sheet_name)
+    return get_worksheet_by_key(client, sheet_key, sheet_name)
 
 
 def create_office_files_for_tenant(tenant_id: str, office_name: str = "") -> dict:
@@ -547,31 +753,2371 @@ def create_office_files_for_tenant(tenant_id: str, office_name: str = "") -> dic
     ).execute()
     work_sheet_key = work_file["id"]
 
+    # 새 시트가 생겼으니 이전 테넌트 매핑 기준 핸들은 버린다
+    invalidate_worksheet_cache()
+
     return {
         "folder_id": folder_id,
         "customer_sheet_key": customer_sheet_key,
         "work_sheet_key": work_sheet_key,
     }
 
+# ===== 로컬 SQLite 복제본 (REPLICA_MODE) =====
+def _replica_target(sheet_name: str, tenant_id: str | None = None):
+    """복제 대상이면 (SheetReplica, sheet_key), 아니면 (None, None)"""
+    if not REPLICA_MODE or sheet_name not in REPLICA_TABS:
+        return None, None
+    if tenant_id is None:
+        tenant_id = get_current_tenant_id()
+    return get_replica(tenant_id), resolve_sheet_key(sheet_name, tenant_id)
+
+
+def _replica_apply(sheet_name: str, op: str, *args) -> None:
+    """
+    시트 쓰기가 성공한 뒤 같은 연산을 복제본에도 적용.
+    복제본 반영이 실패하면 해당 탭을 버려서(다음 읽기 때 시트에서 재적재) 어긋남을 막는다.
+    """
+    _discard_prefetched(sheet_name)
+    invalidate_sheet_cache(sheet_name)
+    rep, key = _replica_target(sheet_name)
+    if rep is None:
+        return
+    try:
+        getattr(rep, op)(key, sheet_name, *args)
+    except Exception as e:
+        print(f"[replica] {op} 실패 ({sheet_name}): {e}")
+        rep.drop(key, sheet_name)
+
+
+def invalidate_replica_tab(sheet_name: str, keep_row_index: bool = False, log_reset: bool = True) -> None:
+    """
+    워크시트 객체로 직접 쓰는 코드(update_cell, batch_update 등)는 호출 후 이걸 불러준다.
+    복제본 / 묶음 로드로 미리 받아둔 해당 탭과 행 번호 인덱스를 비워서
+    다음 읽기 때 시트에서 다시 채우게 한다.
+    (note_rows_written 으로 인덱스를 직접 맞췄으면 keep_row_index=True,
+     record_sheet_changes 로 바뀐 행을 직접 남겼으면 log_reset=False)
+    """
+    _discard_local_copies(sheet_name)
+    if not keep_row_index:
+        invalidate_row_index(sheet_name)
+    if log_reset:
+        record_sheet_changes(sheet_name, reset=True)
+
+
+def _discard_local_copies(sheet_name: str) -> None:
+    """복제본 / 묶음 로드 값만 버린다 (행 번호 인덱스는 쓰는 쪽이 직접 맞춘 경우)"""
+    _discard_prefetched(sheet_name)
+    invalidate_sheet_cache(sheet_name)
+    rep, key = _replica_target(sheet_name)
+    if rep is not None:
+        rep.drop(key, sheet_name)
+
+
+def _values_to_records(values: list[list]) -> list[dict]:
+    """get_all_values() 결과를 get_all_records() 와 같은 모양(숫자 변환 포함)으로"""
+    if not values:
+        return []
+    header = values[0]
+    width = len(header)
+    records = []
+    for row in values[1:]:
+        row = list(row[:width]) + [""] * (width - len(row))
+        records.append(dict(zip(header, numericise_all(row))))
+    return records
+
+
+def sync_tenant_replica(tenant_id: str, sheet_keys: dict[str, str], client=None) -> int:
+    """
+    tenant 의 복제 대상 탭들을 시트에서 받아 복제본에 덮어쓴다.
+    sheet_keys: {탭 이름: sheet_key} (세션 밖 스레드에서도 쓰도록 미리 계산해서 넘긴다)
+    스프레드시트 하나당 values_batch_get 1회로 모든 탭을 가져온다.
+    반환: 동기화된 탭 수
+    """
+    client = client or get_gspread_client()
+    rep = get_replica(tenant_id)
+
+    by_key: dict[str, list[str]] = {}
+    for tab, key in sheet_keys.items():
+        by_key.setdefault(key, []).append(tab)
+
+    synced = 0
+    for key, tabs in by_key.items():
+        # 받는 사이에 로컬 쓰기가 있었던 탭은 덮어쓰지 않는다 (다음 주기에 다시 받는다)
+        gens = {tab: rep.generation(key, tab) for tab in tabs}
+        for tab, values in batch_get_values(client, key, tabs).items():
+            if rep.put_values(key, tab, values, expect_generation=gens[tab]):
+                synced += 1
+    return synced
+
+
+_replica_threads: dict[str, threading.Thread] = {}
+_replica_threads_lock = threading.Lock()
+
+
+def start_replica_sync(tenant_id: str | None = None) -> bool:
+    """
+    REPLICA_MODE 일 때 tenant 복제본을 주기적으로 갱신하는 백그라운드 스레드 시작.
+    (테넌트당 1개, 이미 돌고 있으면 아무것도 안 함)
+    """
+    if not REPLICA_MODE:
+        return False
+    tenant_id = tenant_id or get_current_tenant_id()
+
+    with _replica_threads_lock:
+        th = _replica_threads.get(tenant_id)
+        if th is not None and th.is_alive():
+            return True
+
+        # 세션 정보가 필요한 sheet_key / client 는 여기(메인 스레드)에서 미리 계산
+        sheet_keys = {tab: resolve_sheet_key(tab, tenant_id) for tab in REPLICA_TABS}
+        client = get_gspread_client()
+
+        def _loop():
+            # 동기화는 화면 요청보다 뒤로 (api_scheduler 백그라운드 레인)
+            with api_lane(LANE_BACKGROUND):
+                while True:
+                    try:
+                        sync_tenant_replica(tenant_id, sheet_keys, client)
+                    except Exception as e:
+                        print(f"[replica] {tenant_id} 동기화 실패: {e}")
+                    time.sleep(REPLICA_SYNC_INTERVAL_SEC)
+
+        th = threading.Thread(target=_loop, name=f"replica-sync-{tenant_id}", daemon=True)
+        th.start()
+        _replica_threads[tenant_id] = th
+        return True
+
+
+def read_values_from_sheet(sheet_name: str) -> list[list]:
+    """
+    탭 전체를 get_all_values() 형태로 읽는다.
+    REPLICA_MODE 면 복제본에서 읽고, 복제본에 없으면 시트에서 읽어서 채워 둔다.
+    (쓰기 저널에 아직 반영 안 된 연산이 있으면 그 위에 덮어서 돌려준다)
+    """
+    flush_pending_writes(sheet_name)
+    values = _take_prefetched(sheet_name)
+    if values is not None:
+        return _overlay_journal(sheet_name, values)
+
+    rep, key = _replica_target(sheet_name)
+    gen = None
+    if rep is not None:
+        values = rep.get_values(key, sheet_name)
+        if values is not None:
+            return _overlay_journal(sheet_name, values, sheet_key=key)
+        gen = rep.generation(key, sheet_name)
+
+    client = get_gspread_client()
+    worksheet = get_worksheet(client, sheet_name)
+    values = worksheet.get_all_values() or []
+    if rep is not None:
+        rep.put_values(key, sheet_name, values, expect_generation=gen)
+    return _overlay_journal(sheet_name, values)
+
+
+# ===== 여러 탭 한 번에 읽기 (values.batchGet) =====
+# 로그인 직후/홈 첫 진입처럼 여러 탭이 동시에 필요한 곳에서 load_tenant_bundle() 로
+# 한 번에 받아 두면, 이후 read_data_from_sheet / read_values_from_sheet / read_memo_from_sheet
+# (그리고 그 위의 st.cache_data 로더들)가 API 호출 없이 이 값을 1회 소비한다.
+BUNDLE_PREFETCH_TTL_SEC = 30
+
+_prefetch_lock = threading.Lock()
+_prefetched: dict[tuple[str, str], tuple[float, list]] = {}
+
+
+def batch_get_values(client, sheet_key: str, tabs: list[str]) -> dict[str, list[list]]:
+    """
+    스프레드시트 하나의 여러 탭을 values.batchGet 1회로 읽는다.
+    반환: {탭 이름: get_all_values() 와 같은 2차원 리스트}
+    """
+    if not tabs:
+        return {}
+    sh = get_spreadsheet_by_key(client, sheet_key)
+    resp = sh.values_batch_get([absolute_range_name(t) for t in tabs])
+
+    out: dict[str, list[list]] = {}
+    for tab, vr in zip(tabs, resp.get("valueRanges", [])):
+        values = vr.get("values", [])
+        # batchGet 은 뒤쪽 빈 칸을 잘라서 주므로 get_all_values 처럼 직사각형으로 맞춘다
+        width = max((len(r) for r in values), default=0)
+        out[tab] = [list(r) + [""] * (width - len(r)) for r in values]
+    return out
+
+
+def load_tenant_bundle(sheet_names, tenant_id: str | None = None, skip_warm: bool = False) -> dict[str, list[list]]:
+    """
+    현재 테넌트의 여러 탭을 스프레드시트별 batchGet 1회씩으로 읽어서
+    {탭 이름: values} 로 반환하고, 이후 읽기 헬퍼들이 쓰도록 잠깐 보관한다.
+    (REPLICA_MODE 에서 복제본에 이미 있는 탭은 API 를 부르지 않는다)
+    skip_warm=True 면 로더 캐시가 이미 따뜻한 탭(_tab_warm)은 받지도, 반환하지도 않는다
+    (반환값을 안 쓰고 캐시만 채우려는 호출용).
+    """
+    tenant_id = tenant_id or get_current_tenant_id()
+    bundle: dict[str, list[list]] = {}
+    by_key: dict[str, list[str]] = {}
+    gens: dict[str, int] = {}
+
+    for name in dict.fromkeys(sheet_names):
+        rep, key = _replica_target(name, tenant_id)
+        if rep is not None:
+            values = rep.get_values(key, name)
+            if values is not None:
+                bundle[name] = values
+                continue
+            gens[name] = rep.generation(key, name)
+        key = key or resolve_sheet_key(name, tenant_id)
+        if _prefetch_pending_or_ready(key, name):
+            continue   # 로그인 선로딩이 이미 받고 있거나 받아 둔 탭
+        if skip_warm and _tab_warm(name, key, tenant_id):
+            continue
+        by_key.setdefault(key, []).append(name)
+
+    if by_key:
+        client = get_gspread_client()
+        expires_at = time.monotonic() + BUNDLE_PREFETCH_TTL_SEC
+        for key, tabs in by_key.items():
+            fetched = batch_get_values(client, key, tabs)
+            with _prefetch_lock:
+                for tab, values in fetched.items():
+                    _prefetched[(key, tab)] = (expires_at, values)
+            for tab, values in fetched.items():
+                rep, _ = _replica_target(tab, tenant_id)
+                if rep is not None:
+                    rep.put_values(key, tab, values, expect_generation=gens.get(tab))
+            bundle.update(fetched)
+
+    return {name: _overlay_journal(name, values, tenant_id) for name, values in bundle.items()}
+
+
+def _take_prefetched(sheet_name: str):
+    """묶음 로드로 받아둔 값이 있으면 꺼내고(1회용) 없으면 None (선로딩 중이면 끝날 때까지 기다린다)"""
+    if not _prefetched and not _prefetch_jobs:
+        return None
+    key = (resolve_sheet_key(sheet_name), sheet_name)
+    _wait_prefetch_job(key)
+    with _prefetch_lock:
+        entry = _prefetched.pop(key, None)
+    if entry is None or time.monotonic() >= entry[0]:
+        return None
+    return entry[1]
+
+
+def _discard_prefetched(sheet_name: str) -> None:
+    """쓰기 후에는 미리 받아둔 값을 버린다 (모든 스프레드시트의 같은 탭 이름)"""
+    if not _prefetched and not _prefetch_jobs:
+        return
+    with _prefetch_lock:
+        for k in [k for k in _prefetched if k[1] == sheet_name]:
+            del _prefetched[k]
+        # 아직 받는 중인 선로딩 결과도 쓰기 전 값이므로 버리게 한다
+        for k in [k for k in _prefetch_jobs if k[1] == sheet_name]:
+            del _prefetch_jobs[k]
+
+
+# ===== 로그인 직후 동시 선로딩 (스레드 풀) =====
+# 로그인 직후에는 고객/예정/진행 + 홈 화면 탭(일정, 메모, 잔액 ...)이 한꺼번에 필요하다.
+# prefetch_tenant_tabs() 는 스프레드시트별 batchGet(무거운 탭은 따로)을 작은 스레드 풀에 동시에 던져 두고
+# 바로 돌아온다. 받은 값은 묶음 로드와 같은 _prefetched 에 들어가고, 읽기 헬퍼(_take_prefetched)는
+# 그 탭을 받는 중이면 끝날 때까지 기다렸다가 소비한다. → 첫 화면 대기 시간 ≈ 가장 느린 요청 1개
+# - 시트 키/클라이언트는 메인 스레드에서 정해서 넘긴다 (작업 스레드는 session_state 를 못 본다)
+# - 받는 도중 같은 탭에 쓰기가 일어나면 그 결과는 버린다 (_discard_prefetched)
+_prefetch_pool = None
+_prefetch_jobs: dict[tuple[str, str], tuple[object, object]] = {}   # (sheet_key, tab) -> (token, future)
+_prefetch_stats = {"jobs": 0, "tabs": 0, "failed": 0, "waited": 0, "wait_total": 0.0}
+
+
+def _get_prefetch_pool() -> ThreadPoolExecutor:
+    global _prefetch_pool
+    with _prefetch_lock:
+        if _prefetch_pool is None:
+            _prefetch_pool = ThreadPoolExecutor(
+                max_workers=PREFETCH_MAX_WORKERS, thread_name_prefix="sheet-prefetch"
+            )
+        return _prefetch_pool
+
+
+def _tab_warm(sheet_name: str, sheet_key: str, tenant_id: str) -> bool:
+    """
+    다음 읽기가 탭 전체를 받지 않을 탭인지: 증분 탭은 증분 상태가 살아 있으면(변경 로그만 읽는다),
+    나머지는 그 탭을 읽은 sheet_cache 항목이 아직 쓸 만하면. 이런 탭을 미리 받으면 그대로 버려진다.
+    """
+    if sheet_name in DELTA_TABS:
+        return delta_state_warm(sheet_name, sheet_key)
+    return sheet_cache_warm(sheet_name, tenant_id, sheet_key)
+
+
+def _prefetch_pending_or_ready(sheet_key: str, sheet_name: str) -> bool:
+    with _prefetch_lock:
+        if (sheet_key, sheet_name) in _prefetch_jobs:
+            return True
+        entry = _prefetched.get((sheet_key, sheet_name))
+    return entry is not None and time.monotonic() < entry[0]
+
+
+def _run_prefetch_job(token, client, sheet_key: str, tabs: list[str]) -> None:
+    try:
+        fetched = batch_get_values(client, sheet_key, tabs)
+    except Exception as e:
+        fetched = {}
+        _prefetch_stats["failed"] += 1
+        print(f"[prefetch] {tabs} 선로딩 실패 (탭별로 다시 읽습니다): {e}")
+    expires_at = time.monotonic() + BUNDLE_PREFETCH_TTL_SEC
+    with _prefetch_lock:
+        for tab in tabs:
+            job = _prefetch_jobs.get((sheet_key, tab))
+            if job is None or job[0] is not token:
+                continue   # 받는 도중 쓰기가 일어나 버려진 탭
+            # 이제부터는 묶음 로드 값과 똑같이 _prefetched 에서 꺼내 쓴다
+            del _prefetch_jobs[(sheet_key, tab)]
+            if tab in fetched:
+                _prefetched[(sheet_key, tab)] = (expires_at, fetched[tab])
+
+
+def _wait_prefetch_job(key: tuple[str, str]) -> None:
+    with _prefetch_lock:
+        job = _prefetch_jobs.get(key)
+    if job is None:
+        return
+    started = time.monotonic()
+    try:
+        job[1].result(timeout=PREFETCH_WAIT_SEC)
+    except Exception:
+        pass   # 실패/시간초과면 호출한 쪽이 그냥 시트에서 읽는다
+    with _prefetch_lock:
+        if _prefetch_jobs.get(key) is job:
+            del _prefetch_jobs[key]
+    _prefetch_stats["waited"] += 1
+    _prefetch_stats["wait_total"] += time.monotonic() - started
+
+
+def prefetch_tenant_tabs(sheet_names, tenant_id: str | None = None, solo_tabs=()) -> int:
+    """
+    sheet_names 탭들을 스레드 풀에서 동시에 받기 시작하고 바로 돌아온다. 반환: 띄운 작업 수.
+    같은 스프레드시트의 탭들은 batchGet 1회로 묶고, solo_tabs(고객 데이터처럼 큰 탭)는 따로 받는다.
+    복제본에 이미 있거나, 받는 중/받아 둔 탭, 로더 캐시가 아직 따뜻한 탭(_tab_warm)은 건너뛴다.
+    """
+    tenant_id = tenant_id or get_current_tenant_id()
+    jobs: list[tuple[str, list[str]]] = []
+    by_key: dict[str, list[str]] = {}
+    for name in dict.fromkeys(sheet_names):
+        rep, key = _replica_target(name, tenant_id)
+        if rep is not None and rep.get_values(key, name) is not None:
+            continue
+        key = key or resolve_sheet_key(name, tenant_id)
+        if _prefetch_pending_or_ready(key, name) or _tab_warm(name, key, tenant_id):
+            continue
+        if name in solo_tabs:
+            jobs.append((key, [name]))
+        else:
+            by_key.setdefault(key, []).append(name)
+    jobs.extend(by_key.items())
+    if not jobs:
+        return 0
+
+    client = get_gspread_client()
+    pool = _get_prefetch_pool()
+    for key, tabs in jobs:
+        token = object()
+        # 작업이 끝나기 전에 소비자가 찾을 수 있도록 등록을 먼저 하고 던진다
+        with _prefetch_lock:
+            # API 계측 범위(재실행/페이지/테넌트)를 작업 스레드로 넘긴다
+            future = pool.submit(copy_scope().run, _run_prefetch_job, token, client, key, tabs)
+            for tab in tabs:
+                _prefetch_jobs[(key, tab)] = (token, future)
+        _prefetch_stats["jobs"] += 1
+        _prefetch_stats["tabs"] += len(tabs)
+    return len(jobs)
+
+
+def get_prefetch_stats() -> dict:
+    with _prefetch_lock:
+        pending = len(_prefetch_jobs)
+    return dict(_prefetch_stats, pending=pending)
+
+
+def bundle_records(bundle: dict, sheet_name: str) -> list[dict]:
+    """load_tenant_bundle 결과에서 get_all_records() 모양의 레코드 목록"""
+    return _values_to_records(bundle.get(sheet_name) or [])
+
+
+# ===== 테넌트별 시트 캐시 (네임스페이스 + Drive modifiedTime 재검증) =====
+# st.cache_data 는 테넌트를 모르고, 저장 후 st.cache_data.clear() 를 부르면 모든 사무실 캐시가 같이 날아간다.
+# sheet_cache 는 캐시 항목마다 읽은 탭의 네임스페이스 (tenant_id, sheet_key, tab) 를 달아 두고
+# invalidate_sheet_cache(탭 이름) 으로 그 탭을 읽은 항목만 버린다.
+#
+#   @sheet_cache(ttl=300, tabs=(EVENTS_SHEET_NAME,), tenant=lambda tenant_id: tenant_id)
+#   def load_calendar_events_for_tenant(tenant_id): ...
+#
+# - tabs: 탭 이름 tuple (해당 테넌트의 스프레드시트로 해석) 또는
+#         (*args, **kwargs) -> [탭 이름 또는 (sheet_key, tab)] (탭/스프레드시트 ID 를 인자로 받는 경우)
+# - tenant: (*args, **kwargs) -> tenant_id. 없거나 None 이면 현재 세션 테넌트
+# - 공용 스프레드시트(게시판 등)는 sheet_key 가 같으므로 한 사무실이 쓰면 다른 사무실 항목도 같이 버려진다.
+# - TTL 이 지난 항목은 먼저 Drive files.get(modifiedTime, version) 만 묻고 (여러 스프레드시트는 batch 1회)
+#   스프레드시트가 그대로면 캐시를 연장한다 (revalidate=False 면 그냥 다시 읽는다).
+# - 반환값은 st.cache_data 처럼 복사본. 함수.clear() 는 현재 테넌트 항목만, clear(all_tenants=True) 는 전부.
+# - revalidate=True 인 항목은 디스크 스냅샷(core.cache_snapshot)에도 남긴다. 재시작 뒤 메모리에 없으면
+#   스냅샷을 읽고, 저장 당시의 modifiedTime|version 이 지금과 같을 때만 그대로 쓴다.
+# - 공용 쓰기 함수(upsert_rows_by_id, 쓰기 버퍼, invalidate_replica_tab 등)는 쓴 탭을 자동으로 무효화한다.
+REVALIDATE_MIN_SEC = 5        # 같은 스프레드시트의 modifiedTime 은 이 시간 안에 다시 묻지 않는다
+REVALIDATE_MAX_ENTRIES = 64   # 함수 하나당 보관할 캐시 항목 수
+
+_drive_version_lock = threading.Lock()
+_drive_versions: dict[str, tuple[float, str | None]] = {}
+_sheet_cache_stats = {
+    "hits": 0, "revalidated": 0, "refetched": 0, "metadata_calls": 0, "invalidated": 0,
+    "restored": 0,
+}
+
+_sheet_cache_lock = threading.Lock()
+# 함수별 (entries, ttl, revalidate). entries = {cache_key: (fetched_at, versions, value, namespaces)}
+_sheet_cache_stores: list[tuple[dict, float, bool]] = []
+# invalidate_sheet_cache 때마다 +1 (읽는 도중 무효화된 값은 넣지 않는다). 키: 탭 이름 (시트 키를 몰라도 맞도록)
+_sheet_cache_generations: dict[str, int] = {}
+
+
+def _cache_generation(namespaces) -> tuple:
+    return tuple(_sheet_cache_generations.get(ns[2], 0) for ns in namespaces)
+
+
+def get_drive_versions(sheet_keys) -> dict[str, str | None]:
+    """
+    스프레드시트별 'modifiedTime|version' 문자열 (조회 실패 시 None).
+    최근 REVALIDATE_MIN_SEC 안에 물어본 것은 다시 묻지 않고, 나머지는 batch 1회로 묻는다.
+    """
+    sheet_keys = [k for k in dict.fromkeys(sheet_keys) if k]
+    now = time.monotonic()
+    with _drive_version_lock:
+        stale = [
+            k for k in sheet_keys
+            if k not in _drive_versions or now - _drive_versions[k][0] >= REVALIDATE_MIN_SEC
+        ]
+
+    if stale:
+        fetched: dict[str, str | None] = {k: None for k in stale}
+        try:
+            fetched.update(get_storage_backend().file_versions(stale))
+            _sheet_cache_stats["metadata_calls"] += 1
+        except Exception as e:
+            print(f"[revalidate] Drive modifiedTime 조회 실패: {e}")
+
+        with _drive_version_lock:
+            for k, v in fetched.items():
+                _drive_versions[k] = (now, v)
+
+    with _drive_version_lock:
+        return {k: _drive_versions.get(k, (0, None))[1] for k in sheet_keys}
+
+
+def _cache_namespaces(tabs, tenant, args, kwargs) -> tuple[tuple[str, str, str], ...]:
+    tenant_id = (tenant(*args, **kwargs) if tenant else None) or get_current_tenant_id()
+    items = tabs(*args, **kwargs) if callable(tabs) else tabs
+    pairs = [
+        (resolve_sheet_key(item, tenant_id), item) if isinstance(item, str) else tuple(item)
+        for item in items
+    ]
+    return tuple((str(tenant_id), key, tab) for key, tab in pairs)
+
+
+def _namespaces_journal_pending(namespaces) -> bool:
+    if not JOURNAL_ENABLED or _in_replayer():
+        return False
+    journal = get_journal()
+    return any(tab not in JOURNAL_SKIP_TABS and journal.has_pending(key, tab) for _, key, tab in namespaces)
+
+
+def _restore_cache_snapshot(snap_name: str, sheet_keys: tuple):
+    """디스크 스냅샷이 지금 스프레드시트 버전과 같으면 (versions, value), 아니면 None"""
+    snap = load_snapshot("sheet_cache", snap_name)
+    if snap is None:
+        return None
+    current = get_drive_versions(sheet_keys)
+    versions = tuple(current.get(k) for k in sheet_keys)
+    if None in versions or tuple(snap["version"] or ()) != versions:
+        note_snapshot_rejected()
+        return None
+    return versions, snap["data"]
+
+
+def sheet_cache(ttl: float, tabs, tenant=None, revalidate: bool = True):
+    """테넌트/탭 네임스페이스로 나뉘는 캐시 데코레이터 (위 설명 참고)"""
+
+    def decorator(func):
+        entries: dict = {}
+        with _sheet_cache_lock:
+            _sheet_cache_stores.append((entries, ttl, revalidate))
+        func_name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            namespaces = _cache_namespaces(tabs, tenant, args, kwargs)
+            for _, key, tab in namespaces:
+                flush_pending_writes(tab, key)   # 공용 쓰기 버퍼에 남은 쓰기부터 (캐시가 그 뒤에 버려진다)
+            sheet_keys = tuple(dict.fromkeys(ns[1] for ns in namespaces))
+            cache_key = (args, tuple(sorted(kwargs.items())), namespaces)
+            snap_name = f"{func_name}|{cache_key!r}" if revalidate else None
+            now = time.monotonic()
+
+            with _sheet_cache_lock:
+                entry = entries.get(cache_key)
+            # 저널에 시트 반영 전 쓰기가 남은 탭은 시트 버전이 그대로라 스냅샷을 믿을 수도, 남길 수도 없다
+            use_snapshot = bool(snap_name) and not _namespaces_journal_pending(namespaces)
+            if entry is None and use_snapshot:
+                # 재시작 직후: 디스크 스냅샷이 아직 최신이면 그대로 메모리 캐시로 올린다
+                restored = _restore_cache_snapshot(snap_name, sheet_keys)
+                if restored is not None:
+                    versions, value = restored
+                    with _sheet_cache_lock:
+                        entries.setdefault(cache_key, (now, versions, value, namespaces))
+                    _sheet_cache_stats["restored"] += 1
+                    return copy.deepcopy(value)
+            if entry is not None:
+                fetched_at, versions, value, _ = entry
+                if now - fetched_at < ttl:
+                    _sheet_cache_stats["hits"] += 1
+                    return copy.deepcopy(value)
+                if revalidate and None not in versions:
+                    current = get_drive_versions(sheet_keys)
+                    if tuple(current.get(k) for k in sheet_keys) == versions:
+                        with _sheet_cache_lock:
+                            if cache_key in entries:
+                                entries[cache_key] = (now, versions, value, namespaces)
+                        _sheet_cache_stats["revalidated"] += 1
+                        return copy.deepcopy(value)
+
+            # 읽기 전에 버전을 잡아 둔다 (읽는 동안 바뀌면 다음 번에 다시 읽힌다)
+            if revalidate:
+                current = get_drive_versions(sheet_keys)
+                versions = tuple(current.get(k) for k in sheet_keys)
+            else:
+                versions = (None,)
+            # 읽는 사이 다른 스레드(저널 재생 등)가 쓰고 무효화했으면 이번 값은 이미 낡았을 수 있다
+            # (시트는 반영 전, 저널은 반영 완료로 읽힌 경우) → 몇 번까지 다시 읽고, 그래도 겹치면 캐시에 넣지 않는다
+            for _ in range(3):
+                generation = _cache_generation(namespaces)
+                value = func(*args, **kwargs)
+                if generation == _cache_generation(namespaces):
+                    break
+            with _sheet_cache_lock:
+                fresh = generation == _cache_generation(namespaces)
+                if fresh:
+                    entries[cache_key] = (time.monotonic(), versions, value, namespaces)
+                    while len(entries) > REVALIDATE_MAX_ENTRIES:
+                        entries.pop(next(iter(entries)))
+            _sheet_cache_stats["refetched"] += 1
+            if fresh and use_snapshot and None not in versions:
+                # 캐시 값은 밖으로 복사본만 나가므로 그대로 넘겨도 된다 (백그라운드에서 직렬화)
+                save_snapshot("sheet_cache", snap_name, versions, value)
+            return copy.deepcopy(value)
+
+        def clear(all_tenants: bool = False):
+            """현재 테넌트가 읽은 항목(과 같은 스프레드시트/탭을 읽은 다른 테넌트 항목)을 버린다"""
+            with _sheet_cache_lock:
+                if all_tenants:
+                    entries.clear()
+                    return
+                tenant_id = str(get_current_tenant_id())
+                targets = {
+                    ns[1:] for e in entries.values() for ns in e[3] if ns[0] == tenant_id
+                }
+                for k in [k for k, e in entries.items() if any(ns[1:] in targets for ns in e[3])]:
+                    del entries[k]
+
+        wrapper.clear = clear
+        return wrapper
+
+    return decorator
+
+
+def invalidate_sheet_cache(sheet_name: str, tenant_id: str | None = None, sheet_key: str | None = None) -> int:
+    """
+    (sheet_key, sheet_name) 탭을 읽은 캐시 항목을 모든 sheet_cache 함수에서 버린다.
+    sheet_key 를 안 주면 tenant_id(없으면 현재 테넌트) 기준으로 해석한다. 반환: 버린 항목 수
+    """
+    if sheet_key is None:
+        try:
+            sheet_key = resolve_sheet_key(sheet_name, tenant_id)
+        except Exception:
+            sheet_key = None   # 세션 밖(백그라운드 스레드 등): 같은 탭 이름은 모두 버린다
+    # 쓴 직후에는 REVALIDATE_MIN_SEC 동안 기억해 둔 옛 버전으로 스냅샷이 되살아나지 않게 버전도 잊는다
+    with _drive_version_lock:
+        for k in ([sheet_key] if sheet_key else list(_drive_versions)):
+            _drive_versions.pop(k, None)
+    dropped = 0
+    with _sheet_cache_lock:
+        _sheet_cache_generations[sheet_name] = _sheet_cache_generations.get(sheet_name, 0) + 1
+        for entries, _, _ in _sheet_cache_stores:
+            for k in [
+                k for k, e in entries.items()
+                if any(ns[2] == sheet_name and (sheet_key is None or ns[1] == sheet_key) for ns in e[3])
+            ]:
+                del entries[k]
+                dropped += 1
+    _sheet_cache_stats["invalidated"] += dropped
+    return dropped
+
+
+def sheet_cache_warm(sheet_name: str, tenant_id: str | None = None, sheet_key: str | None = None) -> bool:
+    """
+    이 테넌트의 (sheet_key, sheet_name) 탭을 읽은 sheet_cache 항목이 아직 쓸 만한지
+    (TTL 안이거나, 지났어도 Drive 재검증으로 연장될 수 있는 항목)
+    """
+    tenant_id = str(tenant_id or get_current_tenant_id())
+    ns = (tenant_id, sheet_key or resolve_sheet_key(sheet_name, tenant_id), sheet_name)
+    now = time.monotonic()
+    with _sheet_cache_lock:
+        for entries, ttl, revalidate in _sheet_cache_stores:
+            for fetched_at, versions, _, namespaces in entries.values():
+                if ns in namespaces and (now - fetched_at < ttl or (revalidate and None not in versions)):
+                    return True
+    return False
+
+
+def get_sheet_cache_stats() -> dict:
+    with _sheet_cache_lock:
+        entries = sum(len(store) for store, _, _ in _sheet_cache_stores)
+        namespaces = {ns for store, _, _ in _sheet_cache_stores for e in store.values() for ns in e[3]}
+    return dict(_sheet_cache_stats, entries=entries, namespaces=len(namespaces))
+
+
+# ===== 필요한 컬럼만 읽기 =====
+# 화면마다 쓰는 컬럼이 몇 개뿐인데 탭 전체를 받던 것을, 헤더(캐시)에서 컬럼 위치를 찾아
+# 그 열 범위만 batchGet 1회로 받는다. 각 범위는 1행(헤더)부터 받아서
+# 캐시된 헤더 위치가 아직 맞는지 같이 확인한다 (틀리면 헤더를 다시 읽고 1회 재시도).
+SHEET_HEADER_TTL_SEC = 600
+
+_header_lock = threading.Lock()
+_header_cache: dict[tuple[str, str], tuple[float, list[str]]] = {}
+
+
+def get_sheet_header(sheet_name: str, tenant_id: str | None = None, refresh: bool = False) -> list[str]:
+    """탭의 1행(헤더). SHEET_HEADER_TTL_SEC 동안 캐시"""
+    key = (resolve_sheet_key(sheet_name, tenant_id), sheet_name)
+    now = time.monotonic()
+    if not refresh:
+        with _header_lock:
+            entry = _header_cache.get(key)
+        if entry is not None and now < entry[0]:
+            return list(entry[1])
+
+    sh = get_spreadsheet_by_key(get_gspread_client(), key[0])
+    resp = sh.values_get(f"{absolute_range_name(sheet_name)}!1:1")
+    header = [str(h) for h in ((resp.get("values") or [[]])[0])]
+    with _header_lock:
+        _header_cache[key] = (now + SHEET_HEADER_TTL_SEC, header)
+    return list(header)
+
+
+def _project_values(values: list[list], columns) -> tuple[list[str], list[list]]:
+    """get_all_values() 결과에서 columns 만 골라낸다 (로컬 값이 있을 때)"""
+    if not values:
+        return [], []
+    header = [str(h) for h in values[0]]
+    found = [c for c in columns if c in header]
+    pos = [header.index(c) for c in found]
+    rows = [[row[i] if i < len(row) else "" for i in pos] for row in values[1:]]
+    return found, rows
+
+
+def _column_spans(positions: list[int]) -> list[tuple[int, int]]:
+    """0-based 컬럼 위치들을 연속 구간 [(시작, 끝)] 으로 묶는다"""
+    spans = []
+    for p in sorted(set(positions)):
+        if spans and p == spans[-1][1] + 1:
+            spans[-1] = (spans[-1][0], p)
+        else:
+            spans.append((p, p))
+    return spans
+
+
+def read_columns_from_sheet(sheet_name: str, columns) -> tuple[list[str], list[list]]:
+    """
+    columns(컬럼 이름 목록) 중 헤더에 있는 것만 읽는다.
+    반환: (찾은 컬럼 이름 목록, 데이터 행 목록 — 각 행은 찾은 컬럼 순서, 헤더 행 제외)
+    묶음 로드 값 / 복제본이 있으면 네트워크 없이 거기서 골라낸다.
+    """
+    columns = list(dict.fromkeys(columns))
+    flush_pending_writes(sheet_name)
+    if _journal_pending(sheet_name):
+        # 아직 반영 안 된 쓰기가 있으면 탭 전체 + 저널 덮기에서 골라낸다
+        return _project_values(read_values_from_sheet(sheet_name), columns)
+
+    values = _take_prefetched(sheet_name)
+    if values is None:
+        rep, key = _replica_target(sheet_name)
+        if rep is not None:
+            values = rep.get_values(key, sheet_name)
+    if values is not None:
+        return _project_values(values, columns)
+
+    tab = absolute_range_name(sheet_name)
+    sh = get_spreadsheet_by_key(get_gspread_client(), resolve_sheet_key(sheet_name))
+    for attempt in range(2):
+        header = get_sheet_header(sheet_name, refresh=attempt > 0)
+        found = [c for c in columns if c in header]
+        if not found:
+            return [], []
+        pos = {c: header.index(c) for c in found}
+        spans = _column_spans(list(pos.values()))
+
+        resp = sh.values_batch_get(
+            [f"{tab}!{_col_letter(a + 1)}1:{_col_letter(b + 1)}" for a, b in spans]
+        )
+        blocks = [vr.get("values", []) for vr in resp.get("valueRanges", [])]
+
+        # 받은 1행이 캐시된 헤더와 같은지 확인 (컬럼이 옮겨졌으면 다시)
+        got_header = {}
+        for (a, b), block in zip(spans, blocks):
+            first = block[0] if block else []
+            for i in range(a, b + 1):
+                got_header[i] = str(first[i - a]) if i - a < len(first) else ""
+        if all(got_header.get(p) == c for c, p in pos.items()):
+            break
+
+    n_rows = max((len(b) for b in blocks), default=0)
+    col_values = {}
+    for (a, b), block in zip(spans, blocks):
+        for i in range(a, b + 1):
+            col_values[i] = [
+                (block[r][i - a] if r < len(block) and i - a < len(block[r]) else "")
+                for r in range(1, n_rows)
+            ]
+    rows = [[col_values[pos[c]][r] for c in found] for r in range(max(n_rows - 1, 0))]
+    return found, rows
+
+
+def read_records_by_columns(sheet_name: str, columns, default_if_empty=None):
+    """read_data_from_sheet 와 같은 레코드 모양이지만 columns 만 담는다"""
+    found, rows = read_columns_from_sheet(sheet_name, columns)
+    data = _values_to_records([found] + rows) if found else []
+    return data if data else default_if_empty
+
+
+# ===== 변경 로그 기반 증분 동기화 =====
+# 캐시 TTL 이 지날 때마다 탭 전체를 다시 받던 것을, 스프레드시트마다 하나 있는
+# 변경 로그 탭(CHANGELOG_SHEET_NAME)의 새 줄만 읽어서 메모리에 들고 있는 값을 고치는 방식으로 바꾼다.
+# - 로그 1행: [epoch, "tab", "op", "key", "row_json"]  (epoch 가 바뀌면 = 로그가 비워짐 → 전체 재적재)
+# - 로그 행 : [updated_at, 탭, upsert|delete|reset, key 값, 행 값 JSON(시트 헤더 순서)]
+# - 쓰는 쪽: record_sheet_changes() — 공용 쓰기 헬퍼는 자동으로 남기고,
+#   워크시트를 직접 고치는 코드는 invalidate_replica_tab() 이 reset 을 남긴다.
+# - 읽는 쪽: read_values_delta() / read_data_delta() — 워터마크(읽은 로그 줄 수) 이후만 받는다.
+# 증분 대상 탭과 key 컬럼:
+DELTA_TABS = {
+    CUSTOMER_SHEET_NAME: "고객ID",
+    ACTIVE_TASKS_SHEET_NAME: "id",
+    PLANNED_TASKS_SHEET_NAME: "id",
+}
+CHANGELOG_MAX_ROWS = 5000          # 넘으면 로그를 비우고 epoch 를 바꾼다
+DELTA_FULL_RELOAD_SEC = 300        # 시트를 직접 고친 내용(로그에 안 남음)도 기존 캐시 TTL 안에 보이도록 전체 재적재
+
+_delta_lock = threading.Lock()                                 # _delta_state / _delta_tab_locks 자체만 보호 (짧게)
+_delta_state: dict[tuple[str, str], dict] = {}
+_delta_tab_locks: dict[tuple[str, str], threading.Lock] = {}  # (sheet_key, 탭) 별 상태 갱신 잠금 (네트워크 중엔 안 잡는다)
+_changelog_ready: set[str] = set()
+_delta_stats = {"full": 0, "delta": 0, "entries": 0, "logged": 0, "restored": 0}
+
+
+def _changelog_ws(sheet_key: str):
+    """스프레드시트의 변경 로그 탭 (없으면 만든다)"""
+    client = get_gspread_client()
+    if sheet_key in _changelog_ready:
+        return get_worksheet_by_key(client, sheet_key, CHANGELOG_SHEET_NAME)
+
+    sh = get_spreadsheet_by_key(client, sheet_key)
+    try:
+        ws = sh.worksheet(CHANGELOG_SHEET_NAME)
+    except gspread.WorksheetNotFound:
+        try:
+            ws = sh.add_worksheet(title=CHANGELOG_SHEET_NAME, rows=1, cols=5)
+            ws.update("A1:E1", [[f"epoch:{uuid.uuid4().hex}", "tab", "op", "key", "row_json"]])
+        except gspread.exceptions.APIError:
+            # 다른 세션이 먼저 만든 경우
+            invalidate_worksheet_cache(sheet_key, CHANGELOG_SHEET_NAME)
+            ws = sh.worksheet(CHANGELOG_SHEET_NAME)
+    _changelog_ready.add(sheet_key)
+    return ws
+
+
+def record_sheet_changes(sheet_name: str, upserts=None, deletes=None, reset: bool = False,
+                         tenant_id: str | None = None) -> None:
+    """
+    sheet_name 탭에 대한 변경을 변경 로그에 남긴다 (DELTA_TABS 가 아니면 아무것도 안 함).
+    upserts: 시트 헤더 순서의 행 값 목록, deletes: key 값 목록, reset: 탭 전체를 다시 읽어야 함
+    """
+    key_field = DELTA_TABS.get(sheet_name)
+    if key_field is None or not (upserts or deletes or reset):
+        return
+    sheet_key = resolve_sheet_key(sheet_name, tenant_id)
+    now = datetime.datetime.now().isoformat(timespec="seconds")
+
+    entries = []
+    if reset:
+        entries.append([now, sheet_name, "reset", "", ""])
+    else:
+        key_col = None
+        state = _delta_state.get((sheet_key, sheet_name))
+        if state is not None:
+            key_col = state["key_col"]
+        for row in upserts or []:
+            vals = [str(v) for v in row]
+            key = vals[key_col] if key_col is not None and key_col < len(vals) else ""
+            entries.append([now, sheet_name, "upsert", key, json.dumps(vals, ensure_ascii=False)])
+        for key in deletes or []:
+            entries.append([now, sheet_name, "delete", str(key).strip(), ""])
+
+    try:
+        ws = _changelog_ws(sheet_key)
+        resp = ws.append_rows(entries, value_input_option="RAW", insert_data_option="INSERT_ROWS")
+        _delta_stats["logged"] += len(entries)
+        last_row = _appended_start_row(resp)
+        if last_row and last_row + len(entries) - 1 > CHANGELOG_MAX_ROWS:
+            # 로그 비우기: epoch 를 바꿔서 읽는 쪽이 전체 재적재하게 한다
+            ws.resize(rows=1)
+            ws.update("A1:E1", [[f"epoch:{uuid.uuid4().hex}", "tab", "op", "key", "row_json"]])
+    except Exception as e:
+        print(f"[delta] 변경 로그 기록 실패 ({sheet_name}): {e}")
+        # 이 프로세스에서라도 다음 읽기 때 전체 재적재 (로그에 빠진 변경이 있으므로 디스크 스냅샷도 버린다)
+        with _delta_lock:
+            _delta_state.pop((sheet_key, sheet_name), None)
+            drop_snapshot("delta", f"{sheet_key}|{sheet_name}")
+
+
+def _delta_full_load(sheet_key: str, sheet_name: str, key_field: str) -> dict:
+    # 로그 위치를 먼저 잡고 데이터를 읽는다 (사이에 생긴 변경은 다음 증분에서 다시 적용 — 멱등)
+    log_ws = _changelog_ws(sheet_key)
+    col_a = log_ws.spreadsheet.values_get(f"{absolute_range_name(CHANGELOG_SHEET_NAME)}!A:A").get("values", [])
+    epoch = (col_a[0][0] if col_a and col_a[0] else "")
+    values = read_values_from_sheet(sheet_name)
+
+    header = [str(h) for h in values[0]] if values else []
+    state = {
+        "values": [list(r) for r in values],
+        "key_col": header.index(key_field) if key_field in header else None,
+        "epoch": epoch,
+        "watermark": len(col_a),
+        "loaded_at": time.monotonic(),
+        "loaded_wall": time.time(),
+        "sheet_order": True,   # values[i] 가 시트 (i+1)행 — 행이 붙거나 지워지는 로그를 적용하면 False
+    }
+    _reindex_delta(state)
+    _delta_stats["full"] += 1
+    return state
+
+
+def _save_delta_snapshot(sheet_key: str, sheet_name: str, state: dict) -> None:
+    """증분 상태를 디스크에 남긴다 (행은 통째로 교체만 되므로 바깥 목록만 복사하면 된다)"""
+    save_snapshot("delta", f"{sheet_key}|{sheet_name}", state["epoch"], {
+        "values": list(state["values"]),
+        "key_col": state["key_col"],
+        "epoch": state["epoch"],
+        "watermark": state["watermark"],
+        "loaded_wall": state["loaded_wall"],
+    })
+
+
+def _restore_delta_state(sheet_key: str, sheet_name: str, key_field: str) -> dict | None:
+    """
+    재시작 직후: 디스크 스냅샷으로 증분 상태를 되살린다.
+    검증은 평소 증분 읽기와 같다 (변경 로그 epoch 가 같으면 워터마크 뒤 줄만 적용, 다르면 전체 재적재).
+    DELTA_FULL_RELOAD_SEC 는 스냅샷이 처음 전체 적재된 시각부터 센다.
+    """
+    snap = load_snapshot("delta", f"{sheet_key}|{sheet_name}")
+    if snap is None:
+        return None
+    data = snap["data"]
+    age = time.time() - data["loaded_wall"]
+    header = [str(h) for h in data["values"][0]] if data["values"] else []
+    key_col = header.index(key_field) if key_field in header else None
+    if age > DELTA_FULL_RELOAD_SEC or key_col is None or key_col != data["key_col"]:
+        note_snapshot_rejected()
+        return None
+    state = dict(data, values=list(data["values"]), loaded_at=time.monotonic() - max(age, 0))
+    _reindex_delta(state)
+    _delta_stats["restored"] += 1
+    return state
+
+
+def _reindex_delta(state: dict) -> None:
+    kc = state["key_col"]
+    state["pos"] = {
+        str(r[kc]).strip(): i
+        for i, r in enumerate(state["values"][1:], start=1)
+        if kc is not None and kc < len(r) and str(r[kc]).strip()
+    }
+
+
+def _apply_delta_entries(state: dict, sheet_name: str, entries: list[list]) -> bool:
+    """로그 줄들을 순서대로 적용. reset 을 만나면 False (전체 재적재 필요)"""
+    values, pos, kc = state["values"], state["pos"], state["key_col"]
+    removed = False
+    for e in entries:
+        e = list(e) + [""] * (5 - len(e))
+        _, tab, op, key, row_json = e[:5]
+        if tab != sheet_name:
+            continue
+        _delta_stats["entries"] += 1
+        if op == "reset" or kc is None:
+            return False
+        if op == "upsert":
+            row = json.loads(row_json) if row_json else []
+            key = key or (row[kc] if kc < len(row) else "")
+            if key in pos:
+                values[pos[key]] = row
+            else:
+                values.append(row)
+                pos[key] = len(values) - 1
+                state["sheet_order"] = False
+        elif op == "delete" and key in pos:
+            values[pos.pop(key)] = None
+            removed = True
+            state["sheet_order"] = False
+    if removed:
+        state["values"] = [r for r in values if r is not None]
+        _reindex_delta(state)
+    return True
+
+
+def _delta_tab_lock(cache_key: tuple[str, str]) -> threading.Lock:
+    with _delta_lock:
+        lock = _delta_tab_locks.get(cache_key)
+        if lock is None:
+            lock = _delta_tab_locks[cache_key] = threading.Lock()
+        return lock
+
+
+def _current_delta_state(sheet_key: str, sheet_name: str, key_field: str) -> dict | None:
+    """메모리 증분 상태 (없으면 디스크 스냅샷에서 되살려 둔다). 탭 잠금을 잡고 부른다"""
+    state = _delta_state.get((sheet_key, sheet_name))
+    if state is None:
+        state = _restore_delta_state(sheet_key, sheet_name, key_field)
+        if state is not None:
+            _delta_state[(sheet_key, sheet_name)] = state
+    return state
+
+
+def delta_state_warm(sheet_name: str, sheet_key: str) -> bool:
+    """증분 탭인데 이미 상태가 있어서 다음 읽기가 변경 로그 새 줄만 받으면 되는지"""
+    key_field = DELTA_TABS.get(sheet_name)
+    if key_field is None:
+        return False
+    with _delta_tab_lock((sheet_key, sheet_name)):
+        state = _current_delta_state(sheet_key, sheet_name, key_field)
+    return state is not None and time.monotonic() - state["loaded_at"] <= DELTA_FULL_RELOAD_SEC
+
+
+def read_values_delta(sheet_name: str, key_field: str | None = None) -> list[list]:
+    """
+    read_values_from_sheet 와 같은 결과를, 처음 1회 전체를 읽은 뒤로는 변경 로그의 새 줄만 받아서 만든다.
+    (REPLICA_MODE 면 복제본이 이미 로컬이므로 그대로 read_values_from_sheet)
+    잠금은 (스프레드시트, 탭) 별이고 시트 읽기(전체/로그)는 잠금 밖에서 한다
+    — 한 테넌트의 느린 전체 재적재가 다른 탭/테넌트의 읽기를 막지 않는다.
+    """
+    key_field = key_field or DELTA_TABS.get(sheet_name)
+    if key_field is None or _replica_target(sheet_name)[0] is not None:
+        return read_values_from_sheet(sheet_name)
+    flush_pending_writes(sheet_name)
+
+    sheet_key = resolve_sheet_key(sheet_name)
+    cache_key = (sheet_key, sheet_name)
+    lock = _delta_tab_lock(cache_key)
+    with lock:
+        state = _current_delta_state(sheet_key, sheet_name, key_field)
+        expired = state is None or time.monotonic() - state["loaded_at"] > DELTA_FULL_RELOAD_SEC
+        watermark = None if expired else state["watermark"]
+
+    if watermark is not None:
+        log_ws = _changelog_ws(sheet_key)
+        tab = absolute_range_name(CHANGELOG_SHEET_NAME)
+        resp = log_ws.spreadsheet.values_batch_get([f"{tab}!A1:A1", f"{tab}!A{watermark + 1}:E"])
+        vrs = resp.get("valueRanges", [])
+        epoch_vals = vrs[0].get("values", []) if vrs else []
+        epoch = epoch_vals[0][0] if epoch_vals and epoch_vals[0] else ""
+        entries = vrs[1].get("values", []) if len(vrs) > 1 else []
+        _delta_stats["delta"] += 1
+
+        values = None
+        with lock:
+            cur = _delta_state.get(cache_key)
+            if cur is not None and (cur is not state or cur["watermark"] != watermark):
+                # 그 사이 다른 스레드가 더 뒤까지 맞춰 두었다
+                values = [list(r) for r in cur["values"]]
+            elif cur is not None and epoch == state["epoch"] and _apply_delta_entries(state, sheet_name, entries):
+                if entries:
+                    state["watermark"] += len(entries)
+                    _save_delta_snapshot(sheet_key, sheet_name, state)
+                values = [list(r) for r in state["values"]]
+            else:
+                # epoch 가 바뀌었거나 reset 을 만남 (반쯤 적용된 상태는 버린다) → 아래에서 전체 재적재
+                _delta_state.pop(cache_key, None)
+        if values is not None:
+            return _overlay_journal(sheet_name, values, sheet_key=sheet_key)
+
+    fresh = _delta_full_load(sheet_key, sheet_name, key_field)
+    with lock:
+        _delta_state[cache_key] = fresh
+        _save_delta_snapshot(sheet_key, sheet_name, fresh)
+        values = [list(r) for r in fresh["values"]]
+    return _overlay_journal(sheet_name, values, sheet_key=sheet_key)
+
+
+def read_data_delta(sheet_name: str, key_field: str | None = None, default_if_empty=None):
+    """read_data_from_sheet 와 같은 레코드 목록 (증분 동기화 버전)"""
+    data = _values_to_records(read_values_delta(sheet_name, key_field))
+    return data if data else default_if_empty
+
+
+def get_delta_sync_stats() -> dict:
+    with _delta_lock:
+        return dict(_delta_stats, tabs=len(_delta_state))
+
+
+# ===== 타입이 정해진 열 단위 테이블 (core.record_store) =====
+# 알려진 탭(일일결산, 진행/완료/예정업무, 일정, Accounts)은 시트 값 → 타입 DataFrame 변환을
+# 캐시가 갱신될 때 한 번만 한다. 세션/재실행마다 dict 목록을 다시 돌며 safe_int / str() 할 필요가 없다.
+#
+#   df = read_table(DAILY_SUMMARY_SHEET_NAME)      # income_cash 는 int64, date 는 datetime64
+#   records = table_to_records(df)                 # 아직 dict 목록을 쓰는 화면용
+#
+# 쓰기 헬퍼들이 쓴 탭의 sheet_cache 항목을 버리므로 저장 직후의 다음 읽기에서 다시 변환된다.
+# 증분 대상 탭(DELTA_TABS)은 변경 로그로 맞추므로 TTL 을 짧게 두고 Drive 재검증은 생략한다.
+@sheet_cache(ttl=300, tabs=lambda sheet_name: [sheet_name])
+def _read_table_full(sheet_name: str) -> pd.DataFrame:
+    return values_to_table(sheet_name, read_values_from_sheet(sheet_name))
+
+
+@sheet_cache(ttl=30, tabs=lambda sheet_name: [sheet_name], revalidate=False)
+def _read_table_delta(sheet_name: str) -> pd.DataFrame:
+    return values_to_table(sheet_name, read_values_delta(sheet_name))
+
+
+def read_table(sheet_name: str) -> pd.DataFrame:
+    """sheet_name 탭 전체를 스키마 타입의 DataFrame 으로 (복사본, 마음대로 고쳐도 된다)"""
+    if sheet_name in DELTA_TABS:
+        return _read_table_delta(sheet_name)
+    return _read_table_full(sheet_name)
+
+
+# ===== key 컬럼 값 → 행 번호 인덱스 =====
+# upsert/delete 가 행 번호를 찾으려고 매번 get_all_values() 로 탭 전체를 받던 것을
+# 워크시트별 인덱스로 바꾼다.
+# - 처음 1회: 헤더 1행 + key 컬럼 1열만 읽어서 만든다 (탭 전체 X)
+#   증분 읽기가 그 탭을 시트 행 순서 그대로 들고 있으면 거기서 만든다 (읽기 없음)
+# - 이후: 이 프로세스의 append/delete/행 갱신은 인덱스에 바로 반영 (삭제 시 아래 행 당김)
+# - 쓰기 직전: 대상 행 구간의 key 칸만 읽어서(1회) 인덱스와 맞는지 확인,
+#   어긋나면(다른 곳에서 시트를 고친 경우) key 컬럼을 다시 받아 재구성
+# - ROW_INDEX_VERIFY_SEC 가 지나면 probe 로 확인한다: batchGet 1회로 헤더 + 끝쪽 key 칸 + 고르게 뽑은
+#   key 칸 몇 개만 읽어서 행 수 / 체크섬을 비교하고, 어긋날 때만 key 컬럼 전체를 다시 받는다
+# - 찾는 값이 인덱스에 없으면 (다른 곳에서 붙인 행을 probe 가 못 봤을 수 있다) 새 행으로 붙이기 전에
+#   key 컬럼을 한 번 다시 받는다 (locate_rows)
+ROW_INDEX_VERIFY_SEC = 120
+ROW_INDEX_PROBE_TAIL = 20      # 끝에서부터 확인할 행 수 (+ 마지막 다음 행은 비어 있어야 함)
+ROW_INDEX_PROBE_SAMPLES = 32   # 나머지 구간에서 고르게 뽑아 확인할 칸 수
+
+_row_index_lock = threading.RLock()
+_row_indexes: dict[tuple[str, str, str], "RowIndex"] = {}
+_row_index_stats = {
+    "builds": 0, "seeded": 0, "probes": 0, "probe_mismatch": 0, "verify_mismatch": 0, "miss_refresh": 0,
+}
+
+
+class RowIndex:
+    """keys[i] = 시트 (i+1)행의 key 컬럼 값 (keys[0] 은 헤더 칸)"""
+
+    def __init__(self, header: list, field: str, keys: list):
+        self.header = [str(h) for h in header]
+        self.field = field
+        self.col = self.header.index(field) if field in self.header else None
+        self.keys = [str(k).strip() for k in keys]
+        self.verified_at = time.monotonic()
+        self.fetched_at = self.verified_at   # key 컬럼을 통째로 읽은 시각 (probe 로는 바뀌지 않는다)
+        self._map = None
+
+    def _lookup(self) -> dict:
+        if self._map is None:
+            m: dict[str, list[int]] = {}
+            for i, k in enumerate(self.keys[1:], start=2):
+                if k:
+                    m.setdefault(k, []).append(i)
+            self._map = m
+        return self._map
+
+    def rows_of(self, value) -> list[int]:
+        return list(self._lookup().get(str(value).strip(), []))
+
+    def row_of(self, value):
+        rows = self._lookup().get(str(value).strip())
+        return rows[0] if rows else None
+
+    @property
+    def row_count(self) -> int:
+        """마지막으로 key 가 있는 행 번호 (헤더 포함)"""
+        n = len(self.keys)
+        while n > 1 and not self.keys[n - 1]:
+            n -= 1
+        return n
+
+    def checksum(self, row_nos=None) -> int:
+        """key 값의 crc32 (row_nos 를 주면 그 행들만 — probe 용)"""
+        if row_nos is None:
+            keys = self.keys[: self.row_count]
+        else:
+            keys = [self.keys[r - 1] if r <= len(self.keys) else "" for r in row_nos]
+        return zlib.crc32("\x1f".join(keys).encode("utf-8"))
+
+    def probe_rows(self) -> list[int]:
+        """probe 로 읽을 행 번호: 고르게 뽑은 행 + 끝쪽 ROW_INDEX_PROBE_TAIL 행 + 마지막 다음 행"""
+        n = self.row_count
+        tail_lo = max(2, n - ROW_INDEX_PROBE_TAIL + 1)
+        step = max(1, (tail_lo - 2) // ROW_INDEX_PROBE_SAMPLES)
+        return list(range(2, tail_lo, step))[:ROW_INDEX_PROBE_SAMPLES] + list(range(tail_lo, n + 2))
+
+    # ----- 증분 반영 -----
+    def note_rows(self, rows_by_no: dict) -> None:
+        """{행 번호: 행 값(A열부터)} 로 덮어쓴 뒤 호출"""
+        if self.col is None:
+            return
+        for r, vals in rows_by_no.items():
+            if self.col < len(vals):
+                self._set(int(r), vals[self.col])
+
+    def note_append(self, rows: list[list], start_row: int | None = None) -> None:
+        if self.col is None or not rows:
+            return
+        start_row = start_row or self.row_count + 1
+        for i, vals in enumerate(rows):
+            self._set(start_row + i, vals[self.col] if self.col < len(vals) else "")
+
+    def note_delete(self, row_nos) -> None:
+        for r in sorted({int(x) for x in row_nos}, reverse=True):
+            if 1 < r <= len(self.keys):
+                self.keys.pop(r - 1)
+        self._map = None
+
+    def _set(self, row_no: int, value) -> None:
+        while len(self.keys) < row_no:
+            self.keys.append("")
+        self.keys[row_no - 1] = str(value).strip()
+        self._map = None
+
+
+def _ws_key(ws) -> str:
+    return getattr(ws, "spreadsheet_id", None) or ws.spreadsheet.id
+
+
+def _fetch_key_column(ws, sheet_name: str, field: str, header_hint=None):
+    """(헤더, key 컬럼 값 목록) — 헤더 위치를 알면 batchGet 1회, 모르면 헤더/컬럼 2회"""
+    tab = absolute_range_name(sheet_name)
+    if header_hint and field in header_hint:
+        letter = _col_letter(header_hint.index(field) + 1)
+        resp = ws.spreadsheet.values_batch_get([f"{tab}!1:1", f"{tab}!{letter}:{letter}"])
+        vrs = resp.get("valueRanges", [])
+        header = (vrs[0].get("values") or [[]])[0] if vrs else []
+        if field in header and header.index(field) == header_hint.index(field):
+            col_vals = vrs[1].get("values", []) if len(vrs) > 1 else []
+            return header, [r[0] if r else "" for r in col_vals]
+    else:
+        header = ws.row_values(1)
+
+    if field not in header:
+        return header, []
+    return header, ws.col_values(header.index(field) + 1)
+
+
+def get_row_index(ws, sheet_name: str, field: str = "id", max_age: float | None = None) -> RowIndex:
+    """
+    워크시트의 field 컬럼 인덱스 (없으면 만들고, 오래됐으면 probe 로 맞춘다).
+    max_age: 이만큼(초) 지났으면 probe (기본 ROW_INDEX_VERIFY_SEC, 0 이면 항상 — 방금 붙은 행까지 봐야 할 때)
+    """
+    key = (_ws_key(ws), sheet_name, field)
+    flush_pending_writes(sheet_name, key[0])
+    max_age = ROW_INDEX_VERIFY_SEC if max_age is None else max_age
+    with _row_index_lock:
+        idx = _row_indexes.get(key)
+        if idx is None:
+            idx = _seed_row_index(key[0], sheet_name, field)
+            if idx is not None:
+                _row_indexes[key] = idx
+                _row_index_stats["seeded"] += 1
+        if idx is not None and time.monotonic() - idx.verified_at < max_age:
+            return idx
+
+        if idx is not None:
+            _row_index_stats["probes"] += 1
+            if _probe_row_index(ws, sheet_name, idx):
+                idx.verified_at = time.monotonic()
+                return idx
+            _row_index_stats["probe_mismatch"] += 1
+
+        header, keys = _fetch_key_column(ws, sheet_name, field, idx.header if idx else None)
+        fresh = RowIndex(header, field, keys)
+        _row_index_stats["builds"] += 1
+        _row_indexes[key] = fresh
+        return fresh
+
+
+def _seed_row_index(sheet_key: str, sheet_name: str, field: str) -> RowIndex | None:
+    """
+    증분 읽기(read_values_delta)가 들고 있는 탭 값이 시트 행 순서 그대로면 거기서 인덱스를 만든다
+    (key 컬럼을 따로 받지 않는다). 확인 시각은 그 값을 전체로 읽은 시각 — 오래됐으면 바로 probe 한다.
+    """
+    cache_key = (sheet_key, sheet_name)
+    with _delta_lock:
+        known = cache_key in _delta_state
+    if not known:
+        return None
+    with _delta_tab_lock(cache_key):
+        state = _delta_state.get(cache_key)
+        if state is None or not state.get("sheet_order") or not state["values"]:
+            return None
+        header = [str(h) for h in state["values"][0]]
+        if field not in header:
+            return None
+        col = header.index(field)
+        keys = [field] + [r[col] if col < len(r) else "" for r in state["values"][1:]]
+        loaded_at = state["loaded_at"]
+    idx = RowIndex(header, field, keys)
+    idx.verified_at = idx.fetched_at = loaded_at
+    return idx
+
+
+def _probe_row_index(ws, sheet_name: str, idx: RowIndex) -> bool:
+    """
+    헤더 + idx.probe_rows() 의 key 칸만 batchGet 1회로 읽어서 인덱스와 같은지 본다
+    (행 수: 마지막 key 행은 같고 그다음 행은 비어 있어야 함 / 체크섬: 읽은 칸들의 crc32)
+    """
+    if idx.col is None:
+        return False
+    tab = absolute_range_name(sheet_name)
+    letter = _col_letter(idx.col + 1)
+    rows = idx.probe_rows()
+    spans = _row_spans(rows)
+    resp = ws.spreadsheet.values_batch_get(
+        [f"{tab}!1:1"] + [f"{tab}!{letter}{lo}:{letter}{hi}" for lo, hi in spans]
+    )
+    vrs = resp.get("valueRanges", [])
+    header = [str(h) for h in ((vrs[0].get("values") or [[]])[0] if vrs else [])]
+    while header and not header[-1].strip():
+        header.pop()
+    mine = list(idx.header)
+    while mine and not mine[-1].strip():
+        mine.pop()
+    if header != mine:
+        return False
+
+    got: dict[int, str] = {}
+    for (lo, hi), vr in zip(spans, vrs[1:]):
+        vals = vr.get("values", [])
+        for r in range(lo, hi + 1):
+            cell = vals[r - lo] if r - lo < len(vals) else []
+            got[r] = str(cell[0]).strip() if cell else ""
+    probed = zlib.crc32("\x1f".join(got.get(r, "") for r in rows).encode("utf-8"))
+    return probed == idx.checksum(rows)
+
+
+def locate_rows(ws, sheet_name: str, values, field: str = "id") -> tuple[RowIndex, dict]:
+    """
+    values 각각의 시트 행 번호 목록 {값: [행 번호...]} (없는 값은 빠짐).
+    찾은 행 구간의 key 칸만 한 번 읽어서 인덱스가 맞는지 확인하고, 틀리면 재구성 후 다시 찾는다.
+    못 찾은 값이 있으면 (호출한 쪽이 새 행으로 붙일 것이므로) 이번 호출에서 새로 받은 인덱스가 아닐 때
+    key 컬럼을 한 번 다시 받아서 찾는다 — 낡은 인덱스 때문에 이미 있는 행을 또 붙이지 않도록.
+    """
+    wanted = [str(v).strip() for v in values if str(v).strip()]
+    require_journal_drained(sheet_name, sheet_key=_ws_key(ws))   # 저널 대기분이 먼저 반영돼야 행 번호가 맞다
+    started = time.monotonic()
+    refreshed = False
+    for attempt in range(3):
+        idx = get_row_index(ws, sheet_name, field)
+        found = {v: idx.rows_of(v) for v in wanted}
+        found = {v: rows for v, rows in found.items() if rows}
+        if len(found) < len(set(wanted)) and idx.col is not None and not refreshed and idx.fetched_at < started:
+            refreshed = True
+            _row_index_stats["miss_refresh"] += 1
+            with _row_index_lock:
+                _row_indexes.pop((_ws_key(ws), sheet_name, field), None)
+            continue
+        all_rows = [r for rows in found.values() for r in rows]
+        if not all_rows or idx.col is None:
+            return idx, found
+
+        letter = _col_letter(idx.col + 1)
+        lo, hi = min(all_rows), max(all_rows)
+        got = ws.get_values(f"{letter}{lo}:{letter}{hi}")
+        ok = all(
+            (got[r - lo][0] if r - lo < len(got) and got[r - lo] else "").strip() == v
+            for v, rows in found.items() for r in rows
+        )
+        if ok:
+            return idx, found
+
+        _row_index_stats["verify_mismatch"] += 1
+        invalidate_row_index(sheet_name)
+    return idx, found
+
+
+def invalidate_row_index(sheet_name: str | None = None) -> int:
+    """탭 이름(None 이면 전체)의 인덱스를 버린다. 반환: 버린 개수"""
+    with _row_index_lock:
+        keys = [k for k in _row_indexes if sheet_name is None or k[1] == sheet_name]
+        for k in keys:
+            del _row_indexes[k]
+        return len(keys)
+
+
+def _row_indexes_for(sheet_key: str, sheet_name: str) -> list[RowIndex]:
+    with _row_index_lock:
+        return [i for (k, n, _), i in _row_indexes.items() if k == sheet_key and n == sheet_name]
+
+
+def _appended_start_row(resp):
+    """append_rows 응답의 updatedRange ('탭'!A12:F13) 에서 시작 행 번호"""
+    try:
+        rng = resp["updates"]["updatedRange"]
+        m = re.search(r"![A-Z]*(\d+)", rng)
+        return int(m.group(1)) if m else None
+    except Exception:
+        return None
+
+
+def note_rows_written(ws, sheet_name: str, *, rows=None, cells=None,
+                      appended=None, append_resp=None, deleted=None) -> None:
+    """
+    시트에 직접 쓴 뒤 인덱스들에 반영.
+    rows: {행번호: 행 값}, cells: {(행, 열): 값} (1-based), appended: [행 값], deleted: [행번호]
+    """
+    with _row_index_lock:
+        for idx in _row_indexes_for(_ws_key(ws), sheet_name):
+            if rows:
+                idx.note_rows(rows)
+            for (r, c), v in (cells or {}).items():
+                if idx.col is not None and c == idx.col + 1:
+                    idx._set(r, v)
+            if appended:
+                idx.note_append(appended, _appended_start_row(append_resp))
+            if deleted:
+                idx.note_delete(deleted)
+
+
+def get_row_index_stats() -> dict:
+    with _row_index_lock:
+        return dict(_row_index_stats, indexes=len(_row_indexes))
+
+
+# ===== 여러 행 한 번에 삭제 =====
+# ws.delete_rows(r) 를 행마다 부르면 행 수만큼 요청이 나간다.
+# 지울 행 번호를 연속 구간으로 묶어 deleteDimension 여러 개를 spreadsheets.batchUpdate 1회로 보낸다.
+# (구간은 아래쪽부터 지워야 위쪽 행 번호가 밀리지 않는다)
+def _row_spans(row_nos) -> list[tuple[int, int]]:
+    """행 번호들을 연속 구간 [(시작, 끝)] 으로 묶는다. 아래쪽 구간이 먼저 온다."""
+    spans: list[list[int]] = []
+    for r in sorted({int(r) for r in row_nos if int(r) >= 1}):
+        if spans and r == spans[-1][1] + 1:
+            spans[-1][1] = r
+        else:
+            spans.append([r, r])
+    return [(a, b) for a, b in reversed(spans)]
+
+
+def delete_sheet_rows(ws, row_nos, sheet_name: str | None = None) -> int:
+    """
+    시트 기준 행 번호(1-based)들을 batchUpdate 1회로 삭제하고 행 번호 인덱스에 반영한다.
+    반환: 삭제한 행 수. (로컬 복제본/변경 로그 처리는 호출한 쪽 몫)
+    """
+    spans = _row_spans(row_nos)
+    if not spans:
+        return 0
+    require_journal_drained(sheet_name or ws.title, sheet_key=_ws_key(ws))
+    requests = [
+        {
+            "deleteDimension": {
+                "range": {
+                    "sheetId": ws.id,
+                    "dimension": "ROWS",
+                    "startIndex": start - 1,
+                    "endIndex": end,
+                }
+            }
+        }
+        for start, end in spans
+    ]
+    ws.spreadsheet.batch_update({"requests": requests})
+    deleted = [r for start, end in spans for r in range(start, end + 1)]
+    note_rows_written(ws, sheet_name or ws.title, deleted=deleted)
+    return len(deleted)
+
+
+# ===== 쓰기 모음 (write-behind 버퍼) =====
+# 한 번의 사용자 동작에서 나오는 update_cell / 행 update / append_row / delete_rows 를
+# 워크시트별로 모아 두었다가 batch_update / append_rows / deleteDimension 몇 번으로 보낸다.
+#
+#   with write_buffer(EVENTS_SHEET_NAME, ws) as buf:
+#       buf.update_cell(r, 2, memo)
+#       buf.delete_rows([r2, r3])
+#
+# - 공용 버퍼(SheetWriteBuffer)는 (스프레드시트, 탭) 당 하나를 모듈에 두고 세션끼리 같이 쓴다.
+#   write_buffer() 는 부를 때마다 새 범위(WriteBufferScope)를 돌려주고, 요청은 먼저 그 범위에 쌓인다.
+#   범위의 with 블록이 정상으로 끝나면 쌓인 요청을 공용 버퍼로 넘기고, 예외로 끝나면 그 범위 것만 버린다.
+#   (다른 세션의 with 블록 / 요청에는 영향이 없고, 블록 도중에 시간 때문에 보내지는 일도 없다)
+# - 순서: 요청은 들어온 순서대로 '구간'으로 나뉜다. 한 구간 안에서는
+#   (셀/행 갱신 → 추가 → 삭제) 순으로 보내고, 삭제 뒤에 다시 갱신/추가가 오면 새 구간을 연다.
+#   (삭제 후 행 번호를 기준으로 한 갱신이 삭제보다 먼저 나가는 일이 없도록)
+# - 공용 버퍼를 보내는 시점: 범위.flush() / 쌓인 건수 >= max_ops / 재실행 끝(flush_write_buffers)
+#   / 백그라운드 타이머(가장 오래된 요청이 max_age_sec 경과)
+#   / 그 탭을 읽거나 워크시트 핸들을 꺼낼 때 (flush_pending_writes — 아직 안 보낸 쓰기를 읽지 못하는 일이 없도록)
+# - 실패: 실패한 구간부터 남은 요청은 버리고 RuntimeError 로 "몇 건 반영 후 실패"를 알린다.
+#   (다음 flush 때 같은 append 가 중복으로 나가지 않도록)
+# - 행 갱신은 번호가 이어지고 길이가 같은 행끼리 한 범위(A10:Z14)로 묶고,
+#   batch_update 한 번에 WRITE_BATCH_MAX_CELLS 칸까지만 보낸다 (넘으면 여러 번으로 나눔)
+WRITE_BUFFER_MAX_OPS = 500
+WRITE_BUFFER_MAX_AGE_SEC = 5.0
+WRITE_BUFFER_TICK_SEC = 1.0     # 백그라운드 타이머가 공용 버퍼 나이를 확인하는 간격
+WRITE_BATCH_MAX_CELLS = 20000
+
+
+def _row_blocks(rows: dict[int, list]) -> list[tuple[int, list[list]]]:
+    """{행번호: 값} → [(시작 행, [행 값...])] : 번호가 이어지고 길이가 같은 행끼리 (WRITE_BATCH_MAX_CELLS 칸까지) 묶는다"""
+    blocks = []
+    for r, vals in sorted(rows.items()):
+        if (blocks and r == blocks[-1][0] + len(blocks[-1][1]) and len(vals) == len(blocks[-1][1][0])
+                and (len(blocks[-1][1]) + 1) * max(len(vals), 1) <= WRITE_BATCH_MAX_CELLS):
+            blocks[-1][1].append(vals)
+        else:
+            blocks.append((r, [vals]))
+    return blocks
+
+
+def _batch_chunks(data: list[dict], max_cells: int = WRITE_BATCH_MAX_CELLS) -> list[list[dict]]:
+    """batch_update 범위 목록을 칸 수 max_cells 이하 묶음으로 나눈다"""
+    chunks, cur, size = [], [], 0
+    for d in data:
+        n = sum(max(len(v), 1) for v in d["values"])
+        if cur and size + n > max_cells:
+            chunks.append(cur)
+            cur, size = [], 0
+        cur.append(d)
+        size += n
+    if cur:
+        chunks.append(cur)
+    return chunks
+
+
+def _new_write_segment() -> dict:
+    return {"cells": {}, "rows": {}, "appends": [], "deletes": set()}
+
+
+def _segment_ops(seg: dict) -> int:
+    return len(seg["cells"]) + len(seg["rows"]) + len(seg["appends"]) + len(seg["deletes"])
+
+
+class _WriteSegments:
+    """요청을 구간으로 쌓는 부분 (공용 버퍼 / 세션 범위가 같이 쓴다). 하위 클래스가 _lock, _added 를 둔다"""
+
+    def _segment(self, for_delete: bool = False) -> dict:
+        if not self._segments or (not for_delete and self._segments[-1]["deletes"]):
+            self._segments.append(_new_write_segment())
+        return self._segments[-1]
+
+    def update_cell(self, row: int, col: int, value) -> None:
+        with self._lock:
+            seg = self._segment()
+            row_vals = seg["rows"].get(row)
+            if row_vals is not None and col <= len(row_vals):
+                row_vals[col - 1] = value
+            else:
+                seg["cells"][(row, col)] = value
+            self._added()
+
+    def update_row(self, row: int, values: list) -> None:
+        """row 행을 A열부터 values 로 덮어쓴다 (ws.update(f"A{row}:..."), [values]) 대응)"""
+        with self._lock:
+            seg = self._segment()
+            vals = list(values)
+            # 이 행에 먼저 쌓인 셀 갱신 중 새 행 값에 덮이는 것은 버린다
+            for (r, c) in [k for k in seg["cells"] if k[0] == row and k[1] <= len(vals)]:
+                del seg["cells"][(r, c)]
+            seg["rows"][row] = vals
+            self._added()
+
+    def append_row(self, values: list) -> None:
+        self.append_rows([values])
+
+    def append_rows(self, rows: list[list]) -> None:
+        if not rows:
+            return
+        with self._lock:
+            self._segment()["appends"].extend(list(r) for r in rows)
+            self._added(len(rows))
+
+    def delete_rows(self, row_nos) -> None:
+        """시트 기준 행 번호들 삭제 (같은 구간에 쌓인 갱신/추가가 먼저 반영된 뒤 삭제)"""
+        row_nos = {int(r) for r in row_nos}
+        if not row_nos:
+            return
+        with self._lock:
+            self._segment(for_delete=True)["deletes"].update(row_nos)
+            self._added(len(row_nos))
+
+    def _replay(self, segments: list[dict]) -> None:
+        """다른 쪽에서 쌓은 구간들을 같은 규칙으로 이어서 쌓는다 (구간 안 순서: 행 → 셀 → 추가 → 삭제)"""
+        for seg in segments:
+            for row, vals in seg["rows"].items():
+                self.update_row(row, vals)
+            for (row, col), value in seg["cells"].items():
+                self.update_cell(row, col, value)
+            self.append_rows(seg["appends"])
+            self.delete_rows(seg["deletes"])
+
+
+class SheetWriteBuffer(_WriteSegments):
+    """
+    (스프레드시트, 탭) 하나에 대한 공용 대기 쓰기 모음 (행/열 번호는 모두 1-based).
+    write_buffer() 가 모듈에 하나씩 만들어 두고, 요청은 WriteBufferScope 를 거쳐 들어온다.
+    """
+
+    def __init__(self, ws, sheet_name: str | None = None, tenant_id: str | None = None,
+                 value_input_option: str = "RAW",
+                 max_ops: int = WRITE_BUFFER_MAX_OPS,
+                 max_age_sec: float = WRITE_BUFFER_MAX_AGE_SEC):
+        self.ws = ws
+        self.sheet_name = sheet_name or ws.title
+        self.tenant_id = tenant_id
+        self.value_input_option = value_input_option
+        self.max_ops = max_ops
+        self.max_age_sec = max_age_sec
+        self._lock = threading.RLock()
+        self._segments: list[dict] = []
+        self._pending = 0
+        self._first_at = None
+        self._needs_reset = False   # 보낸 뒤 변경 로그에 reset 을 남길지 (범위 중 하나라도 log_reset=True 면)
+        self.stats = {"ops": 0, "requests": 0, "flushes": 0, "scopes": 0}
+
+    # ----- 요청 쌓기 -----
+    def _added(self, n: int = 1) -> None:
+        self._pending += n
+        self.stats["ops"] += n
+        if self._first_at is None:
+            self._first_at = time.monotonic()
+        if self._pending >= self.max_ops:
+            with tenant_scope(self.tenant_id):
+                self.flush()
+
+    def absorb(self, segments: list[dict], log_reset: bool = True) -> None:
+        """범위(WriteBufferScope)에서 쌓인 구간들을 받아 이어 붙인다"""
+        if not segments:
+            return
+        with self._lock:
+            self._needs_reset = self._needs_reset or log_reset
+            self.stats["scopes"] += 1
+            self._replay(segments)
+        _start_write_flusher()
+
+    def due(self, now: float | None = None) -> bool:
+        """가장 오래된 요청이 max_age_sec 를 넘겼는지 (백그라운드 타이머용)"""
+        first = self._first_at
+        return first is not None and (now or time.monotonic()) - first >= self.max_age_sec
+
+    # ----- 보내기 -----
+    def _send_segment(self, seg: dict) -> None:
+        data = []
+        for lo, block in _row_blocks(seg["rows"]):
+            hi = lo + len(block) - 1
+            data.append({"range": f"A{lo}:{_col_letter(max(len(block[0]), 1))}{hi}", "values": block})
+        for (r, c), v in sorted(seg["cells"].items()):
+            cell = f"{_col_letter(c)}{r}"
+            data.append({"range": f"{cell}:{cell}", "values": [[v]]})
+        for chunk in _batch_chunks(data):
+            self.ws.batch_update(chunk, value_input_option=self.value_input_option)
+            self.stats["requests"] += 1
+        if data:
+            note_rows_written(self.ws, self.sheet_name, rows=seg["rows"], cells=seg["cells"])
+
+        if seg["appends"]:
+            resp = self.ws.append_rows(seg["appends"], value_input_option=self.value_input_option)
+            self.stats["requests"] += 1
+            note_rows_written(self.ws, self.sheet_name, appended=seg["appends"], append_resp=resp)
+
+        if seg["deletes"]:
+            delete_sheet_rows(self.ws, seg["deletes"], self.sheet_name)
+            self.stats["requests"] += 1
+
+    def flush(self) -> int:
+        """
+        쌓인 요청을 순서대로 보낸다. 반환: 보낸 요청(op) 수
+        (행 번호로만 쓰므로 증분 대상 탭이면 변경 로그에 reset 을 남긴다.
+         넘긴 범위가 모두 log_reset=False 였으면 — 바뀐 행을 직접 남기는 경우 — 남기지 않는다)
+        """
+        with self._lock:
+            # 먼저 꺼내 둔다: 보내는 도중 같은 탭 읽기/핸들 조회가 flush_pending_writes 로 다시 들어와도 빈 버퍼
+            segments, total, log_reset = self._segments, self._pending, self._needs_reset
+            self._segments, self._pending, self._first_at, self._needs_reset = [], 0, None, False
+            if not segments:
+                return 0
+            try:
+                require_journal_drained(self.sheet_name, sheet_key=_ws_key(self.ws))
+            except Exception:
+                # 아직 아무것도 안 보냈으니 그대로 되돌려 둔다 (다음 flush 때 다시)
+                self._segments = segments + self._segments
+                self._pending += total
+                self._first_at = time.monotonic()
+                self._needs_reset = self._needs_reset or log_reset
+                raise
+
+            sent = 0
+            try:
+                for seg in segments:
+                    self._send_segment(seg)
+                    sent += _segment_ops(seg)
+            except Exception as e:
+                # 실패한 요청이 어디까지 반영됐는지 모르므로 행 번호 인덱스도 버린다
+                invalidate_row_index(self.sheet_name)
+                raise RuntimeError(
+                    f"'{self.sheet_name}' 시트 쓰기 {total}건 중 {sent}건 반영 후 실패: {e}"
+                ) from e
+            finally:
+                self.stats["flushes"] += 1
+                _discard_local_copies(self.sheet_name)
+                if log_reset or sent < total:
+                    record_sheet_changes(self.sheet_name, reset=True)
+            return sent
+
+    def discard(self) -> int:
+        with self._lock:
+            n = self._pending
+            self._segments, self._pending, self._first_at, self._needs_reset = [], 0, None, False
+            return n
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+
+class WriteBufferScope(_WriteSegments):
+    """
+    write_buffer() 한 번에 해당하는 요청 모음. 이 세션(스레드)만 쓰므로 다른 세션과 상태를 나누지 않는다.
+    with 블록이 끝나면 공용 버퍼로 넘기고(보내는 건 공용 버퍼 몫), 예외면 이 범위 것만 버린다.
+    """
+
+    def __init__(self, shared: SheetWriteBuffer):
+        self.shared = shared
+        self.sheet_name = shared.sheet_name
+        self._lock = threading.RLock()
+        self._segments: list[dict] = []
+        self._pending = 0
+        self._depth = 0
+
+    def _added(self, n: int = 1) -> None:
+        self._pending += n
+        if self._pending >= self.shared.max_ops:
+            self.commit()
+
+    def commit(self, log_reset: bool = True) -> int:
+        """쌓인 요청을 공용 버퍼로 넘긴다 (아직 보내지는 않는다). 반환: 넘긴 요청 수"""
+        with self._lock:
+            segments, n = self._segments, self._pending
+            self._segments, self._pending = [], 0
+        self.shared.absorb(segments, log_reset=log_reset)
+        return n
+
+    def flush(self, log_reset: bool = True) -> int:
+        """
+        지금 바로 보낸다 (공용 버퍼에 먼저 쌓인 다른 요청도 같이). 반환: 보낸 요청 수
+        호출한 쪽이 record_sheet_changes 로 바뀐 행을 직접 남기면 log_reset=False
+        """
+        self.commit(log_reset=log_reset)
+        with tenant_scope(self.shared.tenant_id):
+            return self.shared.flush()
+
+    def discard(self) -> int:
+        with self._lock:
+            n = self._pending
+            self._segments, self._pending = [], 0
+            return n
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def __enter__(self):
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._depth -= 1
+        if self._depth > 0:
+            return False
+        if exc_type is not None:
+            # 블록 안에서 예외가 나면 반쯤 쌓인 요청은 보내지 않는다 (이 범위 것만)
+            self.discard()
+            return False
+        self.commit()
+        return False
+
+
+_write_buffers: dict[tuple[str, str], SheetWriteBuffer] = {}   # (sheet_key, 탭) -> 공용 버퍼
+_write_buffers_lock = threading.Lock()
+_write_flusher: threading.Thread | None = None
+
+
+def write_buffer(sheet_name: str, ws=None, tenant_id: str | None = None) -> WriteBufferScope:
+    """
+    현재 테넌트의 (스프레드시트, 탭) 공용 쓰기 버퍼에 넣을 새 범위.
+    ws 를 넘기면 그 워크시트 객체를 쓰고, 없으면 get_worksheet_by_key 로 연다.
+    """
+    tenant_id = tenant_id or get_current_tenant_id()
+    sheet_key = _ws_key(ws) if ws is not None else resolve_sheet_key(sheet_name, tenant_id)
+    if ws is None:
+        ws = get_worksheet_by_key(get_gspread_client(), sheet_key, sheet_name)
+    with _write_buffers_lock:
+        shared = _write_buffers.get((sheet_key, sheet_name))
+        if shared is None:
+            shared = _write_buffers[(sheet_key, sheet_name)] = SheetWriteBuffer(ws, sheet_name, tenant_id)
+        else:
+            shared.ws = ws   # 핸들 캐시가 새로 연 워크시트면 그것으로
+    return WriteBufferScope(shared)
+
+
+def flush_pending_writes(sheet_name: str | None = None, sheet_key: str | None = None,
+                         tenant_id: str | None = None, due_only: bool = False) -> int:
+    """
+    공용 쓰기 버퍼 중 조건에 맞고 쌓인 게 있는 것을 보낸다. 반환: 보낸 요청 수
+    (sheet_name / sheet_key / tenant_id 가 None 이면 그 조건은 안 본다, due_only=True 면 오래된 것만)
+    """
+    if not _write_buffers:
+        return 0
+    now = time.monotonic()
+    with _write_buffers_lock:
+        targets = [
+            buf for (key, tab), buf in _write_buffers.items()
+            if buf.pending
+            and (sheet_name is None or tab == sheet_name)
+            and (sheet_key is None or key == sheet_key)
+            and (tenant_id is None or buf.tenant_id == tenant_id)
+            and (not due_only or buf.due(now))
+        ]
+    sent = 0
+    for buf in targets:
+        with tenant_scope(buf.tenant_id):
+            sent += buf.flush()
+    return sent
+
+
+def flush_write_buffers(tenant_id: str | None = None) -> int:
+    """재실행 끝에서 부른다: 이 테넌트의 공용 쓰기 버퍼를 모두 보낸다"""
+    return flush_pending_writes(tenant_id=tenant_id or get_current_tenant_id())
+
+
+def _start_write_flusher() -> None:
+    """오래된 공용 버퍼를 보내는 백그라운드 타이머 (프로세스당 1개)"""
+    global _write_flusher
+    with _write_buffers_lock:
+        if _write_flusher is not None and _write_flusher.is_alive():
+            return
+
+        def _loop():
+            with api_lane(LANE_BACKGROUND):
+                while True:
+                    time.sleep(WRITE_BUFFER_TICK_SEC)
+                    try:
+                        flush_pending_writes(due_only=True)
+                    except Exception as e:
+                        print(f"[write-buffer] 대기 쓰기 반영 실패: {e}")
+
+        _write_flusher = threading.Thread(target=_loop, name="write-buffer-flush", daemon=True)
+        _write_flusher.start()
+
+
+def get_write_buffer_stats() -> dict:
+    with _write_buffers_lock:
+        bufs = list(_write_buffers.values())
+    return {
+        "buffers": len(bufs),
+        "pending": sum(b.pending for b in bufs),
+        **{k: sum(b.stats[k] for b in bufs) for k in ("ops", "requests", "flushes", "scopes")},
+    }
+
+
+# ===== 행 버전 + compare-and-set 쓰기 =====
+# 다른 사람이 같은 행을 먼저 고쳤는지 보려고 쓰기 직전마다 get_all_values() 로 탭 전체를 받던 것을
+# 행 버전 비교로 바꾼다.
+# - 행 버전 = 행 내용(칸 앞뒤 공백, 뒤쪽 빈 칸 무시)의 crc32. 시트 화면에서 직접 고친 것도 잡힌다.
+#   (버전 컬럼을 따로 두지 않으므로 시트 구조는 그대로)
+# - 쓰는 쪽은 화면에 읽어 둔 값으로 기대 버전을 만들어 넘긴다 (row_versions / row_version)
+# - compare_and_set_rows 는 헤더 1행 + 쓸 행들만 batchGet 1회로 읽어서 버전을 비교하고,
+#   맞는 행만 쓴다. 어긋난 행은 쓰지 않고 RowConflict(지금 시트 값 포함)로 돌려준다.
+# - 시트에는 조건부 쓰기가 없으므로 읽기~쓰기 사이(한 번의 왕복)는 여전히 창이 남는다.
+CONFLICT_CHANGED = "changed"   # 읽은 뒤 다른 곳에서 고친 행
+CONFLICT_DELETED = "deleted"   # 읽은 뒤 지워진 행
+CONFLICT_EXISTS = "exists"     # 새 행으로 넣으려 했는데 같은 key 가 이미 있음
+
+
+def row_version(row) -> str:
+    """행 값(시트 헤더 순서) → 버전 문자열"""
+    cells = [str(v).strip() for v in row]
+    while cells and not cells[-1]:
+        cells.pop()
+    return f"{zlib.crc32(chr(31).join(cells).encode('utf-8')):08x}"
+
+
+def row_versions(values, key_field: str) -> dict[str, str]:
+    """
+    get_all_values() 모양의 값 → {key: 행 버전} (같은 key 가 여러 행이면 마지막 행).
+    첫 줄이 헤더면 이터레이터여도 된다 (큰 DF 를 행 목록으로 한꺼번에 풀지 않고 넘길 때).
+    """
+    rows = iter(values)
+    header = next(rows, None)
+    if not header or key_field not in header:
+        return {}
+    width = len(header)
+    col = list(header).index(key_field)
+    out = {}
+    for row in rows:
+        key = str(row[col]).strip() if col < len(row) else ""
+        if key:
+            out[key] = row_version(list(row[:width]))
+    return out
+
+
+class RowConflict:
+    """기대 버전과 달라서 쓰지 않은 행"""
+    __slots__ = ("key", "row_no", "reason", "expected", "current", "current_row")
+
+    def __init__(self, key, row_no, reason, expected, current, current_row):
+        self.key = key
+        self.row_no = row_no              # 시트 행 번호 (지워졌으면 None)
+        self.reason = reason              # CONFLICT_*
+        self.expected = expected          # 넘겨받은 기대 버전
+        self.current = current            # 지금 시트의 버전 (없으면 None)
+        self.current_row = current_row    # 지금 시트 값 {컬럼: 값} (없으면 {})
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class CasResult:
+    """compare_and_set_rows 결과"""
+    __slots__ = ("updated", "appended", "conflicts", "versions")
+
+    def __init__(self):
+        self.updated: list[str] = []               # 기존 행을 고친 key
+        self.appended: list[str] = []              # 새로 붙인 key
+        self.conflicts: list[RowConflict] = []
+        self.versions: dict[str, str] = {}         # 쓴 행의 새 버전 (이어서 또 쓸 때 기대 버전으로)
+
+    @property
+    def ok(self) -> bool:
+        return not self.conflicts
+
+
+CAS_CHUNK_ROWS = 400   # 한 번에 읽고 쓰는 행 수 (쓰기 버퍼 max_ops 보다 작게 — 중간 자동 flush 방지)
+_cas_stats = {"calls": 0, "rows": 0, "conflicts": 0, "retries": 0, "chunks": 0}
+
+
+def _read_sheet_rows(ws, sheet_name: str, row_nos, width: int) -> tuple[list[str], dict[int, list]]:
+    """헤더 1행 + row_nos 행들 (연속 구간으로 묶어서) batchGet 1회"""
+    tab = absolute_range_name(sheet_name)
+    last = _col_letter(max(width, 1))
+    spans = sorted(_row_spans(row_nos))
+    resp = ws.spreadsheet.values_batch_get(
+        [f"{tab}!1:1"] + [f"{tab}!A{lo}:{last}{hi}" for lo, hi in spans]
+    )
+    vrs = resp.get("valueRanges", [])
+    header = [str(h) for h in ((vrs[0].get("values") or [[]])[0] if vrs else [])]
+    rows = {}
+    for (lo, hi), vr in zip(spans, vrs[1:]):
+        got = vr.get("values", [])
+        for r in range(lo, hi + 1):
+            rows[r] = list(got[r - lo]) if r - lo < len(got) else []
+    return header, rows
+
+
+def compare_and_set_rows(ws, sheet_name: str, records: list[dict], id_field: str = "id",
+                         expected: dict | None = None) -> CasResult:
+    """
+    id_field 기준으로 records 를 쓴다 (있으면 그 행 갱신, 없으면 끝에 추가).
+    - records 의 컬럼 중 시트 헤더에 있는 것만 쓴다. 나머지 칸은 시트의 지금 값을 그대로 둔다.
+      있는 행은 지금 값과 다른 칸만 보낸다 (행 전체를 덮어쓰지 않는다).
+    - expected: {key: 기대 버전 또는 None}. None 은 "아직 없는 행" (새 행).
+      expected 에 없는 key 는 확인 없이 쓴다.
+    탭 전체를 읽지 않는다 (헤더 + 대상 행만). 증분 대상 탭이면 바뀐 행을 변경 로그에 남긴다.
+    """
+    expected = expected or {}
+    result = CasResult()
+    keyed = [(str(r.get(id_field, "")).strip(), r) for r in records]
+    if not keyed:
+        return result
+    if any(not k for k, _ in keyed):
+        raise ValueError(f"'{id_field}' 값이 없는 행은 compare_and_set_rows 로 쓸 수 없습니다.")
+    _cas_stats["calls"] += 1
+    _cas_stats["rows"] += len(keyed)
+
+    require_journal_drained(sheet_name, sheet_key=_ws_key(ws))   # 저널 대기분이 먼저 반영돼야 비교가 맞다
+    # 많이 쓰면 CAS_CHUNK_ROWS 행씩 (읽기 → 비교 → 쓰기) 를 나눠서 한다
+    for start in range(0, len(keyed), CAS_CHUNK_ROWS):
+        if start:
+            _cas_stats["chunks"] += 1
+        _cas_chunk(ws, sheet_name, keyed[start:start + CAS_CHUNK_ROWS], id_field, expected, result)
+    _cas_stats["conflicts"] += len(result.conflicts)
+    return result
+
+
+def _cas_chunk(ws, sheet_name: str, keyed: list[tuple[str, dict]], id_field: str,
+               expected: dict, result: CasResult) -> None:
+    for attempt in range(2):
+        idx = get_row_index(ws, sheet_name, id_field)
+        if idx.col is None:
+            raise ValueError(f"시트 헤더에 '{id_field}' 컬럼이 없습니다.")
+        row_of = {k: idx.rows_of(k)[-1] for k, _ in keyed if idx.rows_of(k)}
+        header, current = _read_sheet_rows(ws, sheet_name, row_of.values(), len(idx.header))
+        width = len(header)
+        ok = header == idx.header and all(
+            (current[r][idx.col] if idx.col < len(current[r]) else "").strip() == k
+            for k, r in row_of.items()
+        )
+        if ok:
+            break
+        # 헤더나 행 위치가 바뀜(다른 곳에서 행 추가/삭제) → 인덱스를 다시 만들고 1회 더
+        _cas_stats["retries"] += 1
+        invalidate_row_index(sheet_name)
+    else:
+        raise RuntimeError(f"'{sheet_name}' 시트의 행 위치가 계속 바뀌어 쓰기를 멈췄습니다.")
+
+    pos = {}
+    for i, h in enumerate(header):
+        pos.setdefault(h, i)
+
+    buf = write_buffer(sheet_name, ws)
+    changed_rows = []
+    for key, rec in keyed:
+        row_no = row_of.get(key)
+        now_vals = (current[row_no] + [""] * width)[:width] if row_no else None
+        now_ver = row_version(now_vals) if now_vals is not None else None
+
+        if key in expected:
+            want = expected[key]
+            reason = None
+            if want is None and now_vals is not None:
+                reason = CONFLICT_EXISTS
+            elif want is not None and now_vals is None:
+                reason = CONFLICT_DELETED
+            elif want is not None and want != now_ver:
+                reason = CONFLICT_CHANGED
+            if reason:
+                result.conflicts.append(RowConflict(
+                    key, row_no, reason, want, now_ver,
+                    dict(zip(header, now_vals)) if now_vals is not None else {},
+                ))
+                continue
+
+        vals = list(now_vals) if now_vals is not None else [""] * width
+        for col, v in rec.items():
+            if col in pos:
+                vals[pos[col]] = "" if v is None else str(v)
+        if row_no:
+            for i, (old, new) in enumerate(zip(now_vals, vals)):
+                if old != new:
+                    buf.update_cell(row_no, i + 1, new)
+            result.updated.append(key)
+        else:
+            buf.append_row(vals)
+            result.appended.append(key)
+        result.versions[key] = row_version(vals)
+        changed_rows.append(vals)
+
+    if changed_rows:
+        buf.flush(log_reset=False)
+        record_sheet_changes(sheet_name, upserts=changed_rows)
+
+
+def ensure_sheet_columns(ws, sheet_name: str, needed_cols: list[str]) -> list[str]:
+    """
+    헤더는 덮어쓰기/재정렬하지 않고 없는 컬럼만 끝에 붙인다. 반환: 지금 헤더.
+    헤더 1행만 읽고, 붙일 칸만 쓴다 (다른 곳에서 바꾼 기존 헤더 칸을 덮지 않는다).
+    """
+    header = [str(h) for h in ws.row_values(1)]
+    if not header:
+        ws.update(f"A1:{_col_letter(len(needed_cols))}1", [list(needed_cols)])
+        header = list(needed_cols)
+    else:
+        missing = [c for c in needed_cols if c not in header]
+        if not missing:
+            return header
+        start = len(header) + 1
+        ws.update(f"{_col_letter(start)}1:{_col_letter(start + len(missing) - 1)}1", [missing])
+        header = header + missing
+    # 헤더가 바뀌었으므로 헤더를 기억하는 것들은 버린다 (행 값은 그대로라 변경 로그 reset 은 필요 없다)
+    invalidate_row_index(sheet_name)
+    with _header_lock:
+        _header_cache.pop((_ws_key(ws), sheet_name), None)
+    _discard_local_copies(sheet_name)
+    return header
+
+
+def get_cas_stats() -> dict:
+    return dict(_cas_stats)
+
+
+# ===== 오프라인 쓰기 저널 (로컬 SQLite WAL → 백그라운드 재생) =====
+# 구글 API 가 느리거나 잠깐 끊겨도 입력이 막히거나 사라지지 않도록,
+# write_data_to_sheet / upsert_rows_by_id / append_rows_to_sheet 는 (JOURNAL_ENABLED 이면)
+# core.write_journal 에 연산을 남기고 바로 성공을 돌려준다.
+#
+# - 재생: (스프레드시트, 탭) 마다 스레드 1개가 그 탭의 연산을 저널 순서(seq)대로 시트에 보낸다
+#   (api_scheduler 백그라운드 레인). 순서는 탭 안에서만 지키면 되므로 한 탭이 재시도로 기다려도
+#   다른 탭 / 테넌트의 반영은 막히지 않는다. 대기 연산이 없는 탭의 스레드는 잠시 뒤 끝난다.
+#   일시 오류(429/5xx/연결 끊김)는 같은 연산을 간격을 늘려 가며 다시 보낸다 → 뒤 연산이 앞지르지 않는다.
+#   다시 보내도 안 되는 오류(헤더에 id 없음, 탭 없음 ...)는 failed 로 두고 넘어간다 (관리자 화면에서 처리).
+# - 멱등: write_data 는 덮어쓰기, upsert 는 id 기준이라 다시 보내도 결과가 같다.
+#   append(와 id 없는 upsert 행)는 처음 보내기 전에 그 탭의 마지막 행 번호(base_row)를 저널에 남기고,
+#   다시 보낼 때는 base_row 다음 행들만 읽어서 그 뒤에 이미 붙어 있으면 건너뛴다
+#   (내용이 같은 예전 행과 헷갈리지 않고, 탭 전체를 다시 읽지 않는다).
+# - 읽기: 아직 반영 안 된 연산은 read_values_from_sheet / read_data_from_sheet / read_values_delta /
+#   read_columns_from_sheet / load_tenant_bundle 결과에 덮어서 보여준다 (방금 쓴 값이 바로 보임).
+# - 행 번호 / 행 버전으로 쓰는 경로(locate_rows, SheetWriteBuffer.flush, delete_sheet_rows,
+#   compare_and_set_rows)는 그 탭의 대기 연산이 반영될 때까지 (최대 JOURNAL_DRAIN_WAIT_SEC) 기다렸다가 쓴다.
+#   시간 안에 다 반영되지 않으면 JournalBacklogError 로 멈춘다 (옛 행 번호 / 버전으로 쓰지 않도록).
+# - 계정 탭(Accounts)은 로그인 / 테넌트 시트 키 조회가 바로 봐야 하므로 저널을 거치지 않는다.
+JOURNAL_SKIP_TABS = {ACCOUNTS_SHEET_NAME}
+JOURNAL_RETRY_MIN_SEC = 1.0
+JOURNAL_RETRY_MAX_SEC = 60.0
+JOURNAL_IDLE_POLL_SEC = 5.0
+
+_replay_lock = threading.Lock()
+_replay_workers: dict[tuple[str, str], threading.Thread] = {}   # (sheet_key, 탭) → 재생 스레드
+_replay_wakes: dict[tuple[str, str], threading.Event] = {}
+_replay_local = threading.local()
+_journal_stats = {
+    "journaled": 0, "replayed": 0, "retries": 0, "failed": 0,
+    "dup_skipped": 0, "overlaid": 0, "drain_timeouts": 0,
+}
+
+
+def _in_replayer() -> bool:
+    return getattr(_replay_local, "active", False)
+
+
+def _journal_write(sheet_name: str, op: str, payload: dict) -> bool:
+    """저널에 남겼으면 True (부르는 쪽은 바로 성공 처리), 저널을 쓰지 않는 경우 False"""
+    if not JOURNAL_ENABLED or sheet_name in JOURNAL_SKIP_TABS or _in_replayer():
+        return False
+    tenant_id = get_current_tenant_id()
+    get_journal().append(tenant_id, resolve_sheet_key(sheet_name, tenant_id), sheet_name, op, payload)
+    _journal_stats["journaled"] += 1
+    # 복제본 / 증분 상태는 시트 그대로 두고(재생 때 맞춘다) 읽기 결과에만 덮어 보여준다
+    _discard_prefetched(sheet_name)
+    invalidate_sheet_cache(sheet_name, tenant_id)
+    start_write_replay(resolve_sheet_key(sheet_name, tenant_id), sheet_name)
+    return True
+
+
+def _journal_pending_ops(sheet_name: str, tenant_id: str | None = None, sheet_key: str | None = None):
+    if not JOURNAL_ENABLED or sheet_name in JOURNAL_SKIP_TABS or _in_replayer():
+        return []
+    return get_journal().pending_ops(sheet_key or resolve_sheet_key(sheet_name, tenant_id), sheet_name)
+
+
+def _journal_pending(sheet_name: str, tenant_id: str | None = None) -> bool:
+    if not JOURNAL_ENABLED or sheet_name in JOURNAL_SKIP_TABS or _in_replayer():
+        return False
+    return get_journal().has_pending(resolve_sheet_key(sheet_name, tenant_id), sheet_name)
+
+
+def _cell_text(v) -> str:
+    """get_all_values() 가 돌려줄 모양의 문자열"""
+    if v is None:
+        return ""
+    if isinstance(v, bool):
+        return "TRUE" if v else "FALSE"
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+
+def _row_text(row) -> list[str]:
+    vals = [_cell_text(v) for v in row]
+    while vals and vals[-1] == "":
+        vals.pop()
+    return vals
+
+
+def _overlay_upsert(values: list[list], header: list[str], rows: list[list], id_field: str) -> None:
+    # _upsert_rows_now 와 같은 규칙: 빈 시트면 헤더+전체, 헤더가 다르면 1행만 교체, id 가 있으면 마지막 행 갱신
+    if not values or not _row_text(values[0]):
+        values[:] = [list(header)] + [list(r) for r in rows]
+        return
+    if _row_text(values[0])[:len(header)] != list(header):
+        values[0] = list(header) + list(values[0][len(header):])
+    if id_field not in header:
+        return
+    col = header.index(id_field)
+    pos = {}
+    for i, row in enumerate(values[1:], start=1):
+        rid = str(row[col]).strip() if col < len(row) else ""
+        if rid:
+            pos[rid] = i
+    for row in rows:
+        rid = str(row[col]).strip() if col < len(row) else ""
+        if rid and rid in pos:
+            old = values[pos[rid]]
+            values[pos[rid]] = list(row) + list(old[len(row):])
+        else:
+            values.append(list(row))
+
+
+def _overlay_journal(sheet_name: str, values: list[list], tenant_id: str | None = None,
+                     sheet_key: str | None = None) -> list[list]:
+    """시트에서 읽은 values 위에 아직 반영 안 된 저널 연산을 순서대로 덮는다 (없으면 values 그대로)"""
+    ops = _journal_pending_ops(sheet_name, tenant_id, sheet_key)
+    if not ops:
+        return values
+    values = [list(r) for r in values]
+    for op in ops:
+        p = op.payload
+        if op.op == "write_data":
+            values = [[_cell_text(v) for v in r] for r in p["rows"]]
+        elif op.op == "append":
+            values.extend([_cell_text(v) for v in r] for r in p["rows"])
+        elif op.op == "upsert":
+            _overlay_upsert(values, p["header"], p["rows"], p["id_field"])
+    _journal_stats["overlaid"] += 1
+    return values
+
+
+def _is_transient_error(e: Exception) -> bool:
+    """다시 보내면 될 수도 있는 오류 (쿼터 / 서버 오류 / 연결 끊김)"""
+    if isinstance(e, gspread.exceptions.APIError):
+        code = getattr(e, "code", None)
+        return code in (408, 429) or (isinstance(code, int) and code >= 500)
+    if isinstance(e, HttpError):
+        return e.resp.status in (408, 429) or e.resp.status >= 500
+    return isinstance(e, (OSError, TimeoutError, TransportError))
+
+
+def _last_row_no(ws) -> int:
+    """A 열에 값이 있는 마지막 행 번호 (append 를 처음 보내기 전에 저널에 남긴다)"""
+    return len(ws.col_values(1))
+
+
+def _appended_after(ws, base_row: int, rows: list[list]) -> bool:
+    """base_row 다음 행들 중에 rows 가 연속으로 이미 붙어 있는지 (base_row 이후만 읽는다)"""
+    if not rows:
+        return True
+    width = max((len(r) for r in rows), default=1) or 1
+    tail = [_row_text(r) for r in ws.get_values(f"A{base_row + 1}:{_col_letter(width)}")]
+    want = [_row_text(r) for r in rows]
+    return any(tail[i:i + len(want)] == want for i in range(len(tail) - len(want) + 1))
+
+
+def _append_sent(op, ws, rows: list[list]) -> bool:
+    """
+    이 연산의 rows 가 지난 시도에서 이미 시트에 붙었는지.
+    base_row 가 없으면 아직 한 번도 보내지 않은 것이므로 지금 마지막 행 번호를 저널에 남기고 False.
+    """
+    p = op.payload
+    if p.get("base_row") is None:
+        p["base_row"] = _last_row_no(ws)
+        get_journal().note_payload(op.seq, p)
+        return False
+    return _appended_after(ws, int(p["base_row"]), rows)
+
+
+def _replay_op(op) -> None:
+    ws = get_worksheet_by_key(get_gspread_client(), op.sheet_key, op.tab)
+    p = op.payload
+    if op.op == "write_data":
+        _write_data_now(ws, op.tab, p["rows"])
+    elif op.op == "append":
+        if _append_sent(op, ws, p["rows"]):
+            _journal_stats["dup_skipped"] += 1
+            # 지난번에 시트까지는 갔지만 로컬 사본 반영 전에 끊긴 경우: 로컬 사본을 버리고 다시 읽게 한다
+            invalidate_replica_tab(op.tab)
+            return
+        _append_rows_now(ws, op.tab, p["rows"])
+    elif op.op == "upsert":
+        header, rows, id_field = p["header"], p["rows"], p["id_field"]
+        if id_field in header:
+            col = header.index(id_field)
+            blank = [r for r in rows if not str(r[col]).strip()]
+            if blank and _append_sent(op, ws, blank):
+                _journal_stats["dup_skipped"] += 1
+                rows = [r for r in rows if str(r[col]).strip()]
+        _upsert_rows_now(ws, op.tab, header, [dict(zip(header, r)) for r in rows], id_field)
+    else:
+        raise ValueError(f"알 수 없는 저널 연산: {op.op}")
+
+
+def _replay_loop(key: tuple[str, str]) -> None:
+    """(sheet_key, 탭) 하나의 대기 연산을 순서대로 보낸다. 대기 연산이 없으면 잠시 기다렸다가 끝난다"""
+    _replay_local.active = True
+    journal = get_journal()
+    wake = _replay_wakes[key]
+    delay = JOURNAL_RETRY_MIN_SEC
+    # 시트 반영은 화면 요청보다 뒤로 (api_scheduler 백그라운드 레인)
+    with api_lane(LANE_BACKGROUND):
+        while True:
+            op = journal.next_pending(*key)
+            if op is None:
+                if wake.wait(JOURNAL_IDLE_POLL_SEC):
+                    wake.clear()
+                    continue
+                with _replay_lock:
+                    # 끝내기 직전에 다시 확인 (그 사이 들어온 연산은 start_write_replay 가 이 스레드를 봤을 수 있다)
+                    if journal.has_pending(*key):
+                        continue
+                    _replay_workers.pop(key, None)
+                    return
+
+            journal.mark_sending(op.seq)
+            try:
+                with tenant_scope(op.tenant):
+                    _replay_op(op)
+            except Exception as e:
+                if _is_transient_error(e):
+                    # 순서를 지키려고 같은 연산을 다시 보낸다 (이 탭의 뒤 연산만 기다림)
+                    journal.note_error(op.seq, str(e))
+                    _journal_stats["retries"] += 1
+                    print(f"[journal] #{op.seq} {op.op} 재시도 대기 {delay:.0f}초 ({op.tab}): {e}")
+                    time.sleep(delay)
+                    delay = min(delay * 2, JOURNAL_RETRY_MAX_SEC)
+                    continue
+                journal.mark_failed(op.seq, f"{type(e).__name__}: {e}")
+                _journal_stats["failed"] += 1
+                print(f"[journal] #{op.seq} {op.op} 실패 ({op.tab}): {e}")
+                with tenant_scope(op.tenant):
+                    invalidate_sheet_cache(op.tab, sheet_key=op.sheet_key)
+            else:
+                journal.mark_done(op.seq)
+                _journal_stats["replayed"] += 1
+            delay = JOURNAL_RETRY_MIN_SEC
+
+
+def start_write_replay(sheet_key: str | None = None, sheet_name: str | None = None) -> bool:
+    """
+    대기 연산이 있는 (스프레드시트, 탭) 마다 재생 스레드를 띄운다 (이미 돌고 있으면 깨우기만).
+    sheet_key/sheet_name 을 주면 그 탭만. 재시작 후 남은 연산도 이어서 보낸다
+    """
+    if not JOURNAL_ENABLED:
+        return False
+    keys = [(sheet_key, sheet_name)] if sheet_key and sheet_name else get_journal().pending_keys()
+    with _replay_lock:
+        for key in keys:
+            wake = _replay_wakes.setdefault(key, threading.Event())
+            worker = _replay_workers.get(key)
+            if worker is None or not worker.is_alive():
+                worker = threading.Thread(
+                    target=_replay_loop, args=(key,), name=f"write-journal-replay:{key[1]}", daemon=True
+                )
+                _replay_workers[key] = worker
+                worker.start()
+            wake.set()
+    return True
+
+
+class JournalBacklogError(RuntimeError):
+    """행 번호 / 행 버전으로 쓰기 전에 그 탭의 저널 대기 연산이 시간 안에 반영되지 않음"""
+
+
+def drain_write_journal(sheet_name: str | None = None, timeout: float = JOURNAL_DRAIN_WAIT_SEC,
+                        sheet_key: str | None = None) -> bool:
+    """
+    sheet_name 탭(None 이면 전체)의 대기 연산이 시트에 반영될 때까지 기다린다.
+    반환: 다 반영됐으면 True, timeout 이 지났으면 False (재생 스레드 안에서는 바로 True)
+    """
+    if not JOURNAL_ENABLED or _in_replayer() or sheet_name in JOURNAL_SKIP_TABS:
+        return True
+    journal = get_journal()
+    if sheet_name is not None:
+        sheet_key = sheet_key or resolve_sheet_key(sheet_name)
+        pending = lambda: journal.has_pending(sheet_key, sheet_name)
+    else:
+        pending = lambda: journal.backlog() > 0
+    if not pending():
+        return True
+    if sheet_name is not None:
+        start_write_replay(sheet_key, sheet_name)
+    else:
+        start_write_replay()
+    deadline = time.monotonic() + timeout
+    while pending():
+        if time.monotonic() >= deadline:
+            _journal_stats["drain_timeouts"] += 1
+            return False
+        time.sleep(0.05)
+    return True
+
+
+def require_journal_drained(sheet_name: str, sheet_key: str | None = None) -> None:
+    """drain_write_journal 이 시간 안에 끝나지 않으면 JournalBacklogError (행 번호 / 버전 기반 쓰기 전에 부른다)"""
+    if not drain_write_journal(sheet_name, sheet_key=sheet_key):
+        raise JournalBacklogError(
+            f"'{sheet_name}' 시트에 아직 반영되지 않은 쓰기가 남아 있어 저장을 멈췄습니다. 잠시 후 다시 시도해 주세요."
+        )
+
+
+def get_write_backlog(tenant_id: str | None = None) -> int:
+    """시트에 아직 반영되지 않은 쓰기 연산 수 (tenant_id 가 None 이면 프로세스 전체)"""
+    if not JOURNAL_ENABLED:
+        return 0
+    return get_journal().backlog(tenant_id)
+
+
+def list_failed_writes(limit: int = 100) -> list[dict]:
+    if not JOURNAL_ENABLED:
+        return []
+    return get_journal().list_ops("failed", limit)
+
+
+def retry_failed_writes(seq: int | None = None) -> int:
+    """failed 연산을 다시 대기열로 (seq 가 None 이면 전부). 반환: 되돌린 수"""
+    n = get_journal().retry_failed(seq)
+    if n:
+        start_write_replay()
+    return n
+
+
+def discard_failed_write(seq: int) -> bool:
+    return get_journal().discard_failed(seq)
+
+
+def get_write_journal_stats() -> dict:
+    if not JOURNAL_ENABLED:
+        return {"enabled": False}
+    journal = get_journal()
+    return dict(
+        _journal_stats,
+        enabled=True,
+        path=journal.path,
+        counts=journal.counts(),
+        replaying=sorted(tab for (_, tab), t in list(_replay_workers.items()) if t.is_alive()),
+    )
+
+
 # ===== 공용 Read/Write =====
 def write_data_to_sheet(sheet_name: str, records: list[dict], header_list: list[str]) -> bool:
     """
     sheet_name 시트에 records 목록을 header_list 순서대로 덮어씁니다.
     기존 내용을 지우고 전체 데이터를 다시 씁니다.
+    (쓰기 저널이 켜져 있으면 로컬 저널에 남기고 바로 True, 시트 반영은 백그라운드)
     """
+    rows = [header_list]
+    for record in records:
+        rows.append([record.get(h, "") for h in header_list])
     try:
+        if _journal_write(sheet_name, "write_data", {"rows": rows}):
+            return True
         client = get_gspread_client()
         worksheet = get_worksheet(client, sheet_name)
-        worksheet.clear()
-        rows = [header_list]
-        for record in records:
-            rows.append([record.get(h, "") for h in header_list])
-        worksheet.update(rows)
+        _write_data_now(worksheet, sheet_name, rows)
         return True
     except Exception as e:
         st.error(f"❌ write_data_to_sheet 오류 ({sheet_name}): {e}")
         return False
 
+
+def _write_data_now(worksheet, sheet_name: str, rows: list[list]) -> None:
+    worksheet.clear()
+    worksheet.update(rows)
+    _replica_apply(sheet_name, "put_values", rows)
+    invalidate_row_index(sheet_name)
+    record_sheet_changes(sheet_name, reset=True)
+
 def _col_letter(n: int) -> str:
     # 1 -> A, 2 -> B, ... 26 -> Z, 27 -> AA ...
     s = ""
@@ -592,92 +3138,122 @@ def upsert_rows_by_id(sheet_name: str,
     - 삭제는 하지 않음(삭제는 delete_row_by_id로 별도 처리)
     """
     try:
+        if _journal_write(sheet_name, "upsert", {
+            "header": header_list,
+            "rows": [[str(r.get(c, "")) for c in header_list] for r in records],
+            "id_field": id_field,
+        }):
+            return True
         client = get_gspread_client()
         ws = get_worksheet(client, sheet_name)
-
-        values = ws.get_all_values()  # [header, row2, row3...]
-        last_col = _col_letter(len(header_list))
-
-        # 시트 비어있으면: 헤더+전체 한번에
-        if not values:
-            rows = [header_list] + [[str(r.get(c, "")) for c in header_list] for r in records]
-            ws.update(f"A1:{last_col}{len(rows)}", rows, value_input_option="USER_ENTERED")
-            return True
-
-        # 헤더 보정(필요시 1행만 업데이트)
-        header = values[0]
-        if header != header_list:
-            ws.update(f"A1:{last_col}1", [header_list], value_input_option="USER_ENTERED")
-            header = header_list  # 이후 로직은 header_list 기준으로
-
-        if id_field not in header:
-            raise ValueError(f"시트 헤더에 '{id_field}' 컬럼이 없습니다.")
-
-        id_idx = header.index(id_field)
-
-        # 기존 id -> row_number(시트 행번호) 매핑
-        existing = {}
-        for r_i, row in enumerate(values[1:], start=2):  # 2행부터 데이터
-            if id_idx < len(row):
-                rid = str(row[id_idx]).strip()
-                if rid:
-                    existing[rid] = r_i
-
-        updates = []
-        appends = []
-
-        for rec in records:
-            rid = str(rec.get(id_field, "")).strip()
-            row_vals = [str(rec.get(c, "")) for c in header_list]
-
-            if rid and rid in existing:
-                row_no = existing[rid]
-                updates.append({
-                    "range": f"A{row_no}:{last_col}{row_no}",
-                    "values": [row_vals],
-                })
-            else:
-                appends.append(row_vals)
-
-        # 부분 업데이트(1회)
-        if updates:
-            ws.batch_update(updates, value_input_option="USER_ENTERED")
-
-        # 신규 append(1회)
-        if appends:
-            ws.append_rows(appends, value_input_option="USER_ENTERED")
-
+        _upsert_rows_now(ws, sheet_name, header_list, records, id_field)
         return True
-
     except Exception as e:
         st.error(f"❌ upsert_rows_by_id 오류 ({sheet_name}): {e}")
         return False
 
 
+def _upsert_rows_now(ws, sheet_name: str, header_list: list[str], records: list[dict], id_field: str) -> None:
+    # 탭 전체 대신 id 컬럼 인덱스로 행 번호를 찾는다
+    idx, found = locate_rows(ws, sheet_name, [r.get(id_field, "") for r in records], id_field)
+    last_col = _col_letter(len(header_list))
+
+    # 시트 비어있으면: 헤더+전체 한번에
+    if not idx.header:
+        rows = [header_list] + [[str(r.get(c, "")) for c in header_list] for r in records]
+        ws.update(f"A1:{last_col}{len(rows)}", rows, value_input_option="USER_ENTERED")
+        _replica_apply(sheet_name, "put_values", rows)
+        invalidate_row_index(sheet_name)
+        record_sheet_changes(sheet_name, reset=True)
+        return
+
+    # 헤더 보정(필요시 1행만 업데이트)
+    header = idx.header
+    replica_rows = {}
+    if header != header_list:
+        ws.update(f"A1:{last_col}1", [header_list], value_input_option="USER_ENTERED")
+        replica_rows[1] = header_list
+        if id_field in header_list and header_list.index(id_field) != idx.col:
+            # id 컬럼 위치가 바뀌면 기존 인덱스의 행 번호를 믿을 수 없다
+            invalidate_row_index(sheet_name)
+            idx, found = locate_rows(ws, sheet_name, [r.get(id_field, "") for r in records], id_field)
+        header = header_list  # 이후 로직은 header_list 기준으로
+
+    if id_field not in header:
+        raise ValueError(f"시트 헤더에 '{id_field}' 컬럼이 없습니다.")
+
+    # 기존 id -> row_number(시트 행번호) 매핑 (같은 id 가 여러 행이면 마지막 행)
+    existing = {rid: rows[-1] for rid, rows in found.items()}
+
+    updates = []
+    appends = []
+
+    for rec in records:
+        rid = str(rec.get(id_field, "")).strip()
+        row_vals = [str(rec.get(c, "")) for c in header_list]
+
+        if rid and rid in existing:
+            row_no = existing[rid]
+            updates.append({
+                "range": f"A{row_no}:{last_col}{row_no}",
+                "values": [row_vals],
+            })
+            replica_rows[row_no] = row_vals
+        else:
+            appends.append(row_vals)
+
+    # 부분 업데이트(1회)
+    if updates:
+        ws.batch_update(updates, value_input_option="USER_ENTERED")
+
+    # 신규 append(1회)
+    resp = None
+    if appends:
+        resp = ws.append_rows(appends, value_input_option="USER_ENTERED")
+
+    note_rows_written(ws, sheet_name, rows=replica_rows, appended=appends, append_resp=resp)
+    _replica_apply(sheet_name, "update_rows", replica_rows)
+    _replica_apply(sheet_name, "append_rows", appends)
+    if 1 in replica_rows:
+        # 헤더가 바뀌면 로그의 행 값 순서를 믿을 수 없으므로 전체 재적재
+        record_sheet_changes(sheet_name, reset=True)
+    else:
+        record_sheet_changes(sheet_name, upserts=[v for r, v in replica_rows.items()] + appends)
+
+
 def delete_row_by_id(sheet_name: str, rid: str, id_field: str = "id") -> bool:
     """id_field 값이 rid인 행을 찾아서 1행 삭제"""
+    return delete_rows_by_ids(sheet_name, [rid], id_field)
+
+
+def delete_rows_by_ids(sheet_name: str, rids, id_field: str = "id") -> bool:
+    """
+    id_field 값이 rids 중 하나인 행을 id 마다 1행씩 삭제 (batchUpdate 1회).
+    못 찾은 id 는 건너뛴다(안전).
+    """
+    rids = [str(r).strip() for r in rids if str(r).strip()]
+    if not rids:
+        return True
     try:
         client = get_gspread_client()
         ws = get_worksheet(client, sheet_name)
 
-        values = ws.get_all_values()
-        if not values:
+        idx, found = locate_rows(ws, sheet_name, rids, id_field)
+        if not idx.header:
             return True
 
-        header = values[0]
-        if id_field not in header:
+        if idx.col is None:
             raise ValueError(f"시트 헤더에 '{id_field}' 컬럼이 없습니다.")
-        id_idx = header.index(id_field)
 
-        target = str(rid).strip()
-        for r_i, row in enumerate(values[1:], start=2):
-            if id_idx < len(row) and str(row[id_idx]).strip() == target:
-                ws.delete_rows(r_i)
-                return True
+        targets = {rid: found[rid][0] for rid in rids if found.get(rid)}
+        if targets:
+            delete_sheet_rows(ws, targets.values(), sheet_name)
+            _replica_apply(sheet_name, "delete_rows", sorted(targets.values()))
+            record_sheet_changes(sheet_name, deletes=list(targets))
 
-        return True  # 못 찾으면 그냥 True 처리(안전)
+        return True
     except Exception as e:
-        st.error(f"❌ delete_row_by_id 오류 ({sheet_name}): {e}")
+        st.error(f"❌ delete_rows_by_ids 오류 ({sheet_name}): {e}")
         return False
 
 
@@ -686,18 +3262,43 @@ def append_rows_to_sheet(sheet_name: str, records: list[dict], header_list: list
     """
     신규 레코드만 Google Sheet에 append 합니다.
     기존 내용은 건드리지 않고, 한 번의 API 호출로 여러 줄을 추가할 수 있습니다.
+    (쓰기 저널이 켜져 있으면 로컬 저널에 남기고 바로 True, 시트 반영은 백그라운드)
     """
+    rows = [[record.get(h, "") for h in header_list] for record in records]
     try:
+        if _journal_write(sheet_name, "append", {"rows": rows}):
+            return True
         client    = get_gspread_client()
         worksheet = get_worksheet(client, sheet_name)
-        rows = [[record.get(h, "") for h in header_list] for record in records]
-        worksheet.append_rows(rows)
+        _append_rows_now(worksheet, sheet_name, rows)
         return True
     except Exception as e:
         st.error(f"❌ append_rows_to_sheet 오류 ({sheet_name}): {e}")
         return False
 
+
+def _append_rows_now(worksheet, sheet_name: str, rows: list[list]) -> None:
+    resp = worksheet.append_rows(rows)
+    note_rows_written(worksheet, sheet_name, appended=rows, append_resp=resp)
+    _replica_apply(sheet_name, "append_rows", rows)
+    # header_list 가 시트 헤더 순서와 같다는 보장이 없어서 증분 대상 탭이면 전체 재적재
+    record_sheet_changes(sheet_name, reset=True)
+
+
 def read_data_from_sheet(sheet_name: str, default_if_empty=None):
+    values = _take_prefetched(sheet_name)
+    if values is not None:
+        data = _values_to_records(_overlay_journal(sheet_name, values))
+        return data if data else default_if_empty
+
+    if _replica_target(sheet_name)[0] is not None or _journal_pending(sheet_name):
+        try:
+            data = _values_to_records(read_values_from_sheet(sheet_name))
+            return data if data else default_if_empty
+        except Exception as e:
+            st.warning(f"[시트 읽기 실패] {sheet_name}: {e}")
+            return default_if_empty
+
     client = get_gspread_client()
     worksheet = get_worksheet(client, sheet_name)
     try:
@@ -709,6 +3310,20 @@ def read_data_from_sheet(sheet_name: str, default_if_empty=None):
 
 
 def read_memo_from_sheet(sheet_name: str):
+    values = _take_prefetched(sheet_name)
+    if values is not None:
+        val = values[0][0] if values and values[0] else None
+        return val if val not in (None, "") else " "
+
+    if _replica_target(sheet_name)[0] is not None:
+        try:
+            values = read_values_from_sheet(sheet_name)
+            val = values[0][0] if values and values[0] else None
+            return val if val not in (None, "") else " "
+        except Exception as e:
+            st.error(f"'{sheet_name}' 시트 (메모) 읽기 중 오류 발생: {e}")
+            return " "
+
     client = get_gspread_client()
     if client is None:
         return " "
@@ -732,7 +3347,7 @@ def save_memo_to_sheet(sheet_name: str, content: str) -> bool:
     if worksheet:
         try:
             worksheet.update_acell('A1', content)
-            st.cache_data.clear()
+            _replica_apply(sheet_name, "set_cell", 1, 1, content)   # 이 탭 캐시만 무효화
             return True
         except Exception as e:
             st.error(f"'{sheet_name}' 시트 (메모) 저장 중 오류 발생: {e}")
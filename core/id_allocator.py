@@ -0,0 +1,151 @@
+# core/id_allocator.py
+#
+# 고객ID 일련번호 발급기 (시트 최대 번호 + 로컬 SQLite + 블록 임대).
+# 고객ID 는 'YYYYMMDD' + 그날 일련번호(2자리 이상)다. 예전에는 새 ID 가 필요할 때마다
+# 고객 목록 전체에서 오늘 날짜로 시작하는 ID 를 세어 다음 번호를 정했기 때문에
+# (1) 발급할 때마다 O(n) 이고 (2) 두 세션이 같은 날 동시에 추가하면 같은 번호가 나왔다.
+#
+# - 기준은 시트: 임대할 때마다 floor_fn() (지금 시트에 있는 그날 최대 번호) 를 물어보고 그 다음부터 준다.
+#   서버가 재시작돼 로컬 파일이 지워졌거나 다른 인스턴스가 먼저 추가했어도 시트에 있는 번호는 다시 주지 않는다.
+# - 로컬 저장소: ID_ALLOCATOR_PATH 의 id_sequence(tenant, day, next_seq). 같은 서버의 여러 프로세스가
+#   아직 시트에 안 쓴 번호를 서로 겹쳐 빌리지 않게 할 뿐이다 (BEGIN IMMEDIATE). 지워져도 된다.
+# - 블록 임대: 프로세스는 ID_LEASE_BLOCK 개씩 빌려 두고 메모리에서 하나씩 나눠 준다 (발급 O(1)).
+#   다른 인스턴스가 같은 번호를 빌려 먼저 썼으면 추가(compare-and-set)가 충돌로 알려 주므로,
+#   부르는 쪽은 discard() 로 블록을 버리고 다시 받는다 (다음 임대가 시트를 다시 본다).
+# 이 모듈은 gspread / streamlit 에 의존하지 않는다 (순수 저장소).
+
+import datetime
+import os
+import sqlite3
+import threading
+
+from config import ID_ALLOCATOR_PATH, ID_LEASE_BLOCK
+
+KEEP_DAYS = 7   # 이보다 오래된 날짜 행은 열 때 지운다
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS id_sequence (
+    tenant   TEXT NOT NULL,
+    day      TEXT NOT NULL,
+    next_seq INTEGER NOT NULL,
+    PRIMARY KEY (tenant, day)
+);
+"""
+
+
+def format_customer_id(day: str, seq: int) -> str:
+    """('20260301', 7) → '2026030107' (100번째부터는 3자리)"""
+    return f"{day}{seq:02d}"
+
+
+def customer_id_seq(cust_id, day: str) -> int | None:
+    """day 로 시작하는 고객ID 의 일련번호 (형식이 다르면 None)"""
+    s = str(cust_id or "").strip()
+    tail = s[len(day):]
+    if s.startswith(day) and tail.isdigit():
+        return int(tail)
+    return None
+
+
+class IdSequenceStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")   # 준 번호가 전원이 나가도 되돌아가면 안 된다
+        self._conn.executescript(_SCHEMA)
+        cutoff = (datetime.date.today() - datetime.timedelta(days=KEEP_DAYS)).strftime("%Y%m%d")
+        self._conn.execute("DELETE FROM id_sequence WHERE day < ?", (cutoff,))
+
+    def lease(self, tenant: str, day: str, count: int, floor_fn=None) -> int:
+        """
+        (tenant, day) 의 번호 count 개 [start, start + count) 를 빌려 준다. 반환: start
+        start 는 로컬 다음 번호와 floor_fn() + 1 중 큰 값 (floor_fn 은 트랜잭션 밖에서 먼저 부른다)
+        """
+        floor = max(int(floor_fn() or 0), 0) if floor_fn else 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT next_seq FROM id_sequence WHERE tenant=? AND day=?", (tenant, day)
+                ).fetchone()
+                if row is None:
+                    start = floor + 1
+                    self._conn.execute(
+                        "INSERT INTO id_sequence(tenant, day, next_seq) VALUES (?,?,?)",
+                        (tenant, day, start + count),
+                    )
+                else:
+                    start = max(row[0], floor + 1)
+                    self._conn.execute(
+                        "UPDATE id_sequence SET next_seq=? WHERE tenant=? AND day=?",
+                        (start + count, tenant, day),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return start
+
+    def peek(self, tenant: str, day: str) -> int | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT next_seq FROM id_sequence WHERE tenant=? AND day=?", (tenant, day)
+            ).fetchone()
+        return row[0] if row else None
+
+
+class CustomerIdAllocator:
+    """테넌트·날짜별로 빌린 번호 블록을 메모리에서 나눠 준다"""
+
+    def __init__(self, store: IdSequenceStore, block: int = ID_LEASE_BLOCK):
+        self.store = store
+        self.block = max(int(block), 1)
+        self._lock = threading.Lock()
+        self._blocks: dict[tuple[str, str], list[int]] = {}   # (tenant, day) → [다음 번호, 끝(미포함)]
+        self.stats = {"allocated": 0, "leases": 0}
+
+    def allocate(self, tenant: str, day: str, n: int = 1, floor_fn=None) -> list[int]:
+        """일련번호 n 개 (오름차순). 남은 블록이 모자라면 max(block, 모자란 수) 만큼 새로 빌린다"""
+        out: list[int] = []
+        with self._lock:
+            key = (tenant, day)
+            while len(out) < n:
+                blk = self._blocks.get(key)
+                if blk is None or blk[0] >= blk[1]:
+                    want = max(self.block, n - len(out))
+                    start = self.store.lease(tenant, day, want, floor_fn)
+                    blk = self._blocks[key] = [start, start + want]
+                    self.stats["leases"] += 1
+                take = min(n - len(out), blk[1] - blk[0])
+                out.extend(range(blk[0], blk[0] + take))
+                blk[0] += take
+            # 지난 날짜 블록은 버린다
+            for old in [k for k in self._blocks if k[1] != day and k[0] == tenant]:
+                del self._blocks[old]
+            self.stats["allocated"] += n
+        return out
+
+    def discard(self, tenant: str, day: str) -> None:
+        """빌려 둔 블록을 버린다 (남은 번호를 다른 곳에서 이미 썼을 때 — 다음 발급은 새로 임대)"""
+        with self._lock:
+            self._blocks.pop((tenant, day), None)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return dict(self.stats, blocks={f"{t}:{d}": list(b) for (t, d), b in self._blocks.items()})
+
+
+_allocator: CustomerIdAllocator | None = None
+_allocator_lock = threading.Lock()
+
+
+def get_id_allocator() -> CustomerIdAllocator:
+    """프로세스 당 1개"""
+    global _allocator
+    with _allocator_lock:
+        if _allocator is None:
+            os.makedirs(os.path.dirname(ID_ALLOCATOR_PATH) or ".", exist_ok=True)
+            _allocator = CustomerIdAllocator(IdSequenceStore(ID_ALLOCATOR_PATH))
+        return _allocator
@@ -0,0 +1,162 @@
+# core/record_store.py
+#
+# 탭 스키마 레지스트리 + 타입이 정해진 열 단위 테이블.
+# read_data_from_sheet 의 list[dict] 는 페이지마다 다시 돌면서 safe_int / _as_int / str() 로 바꿔 썼다
+# (재실행마다, 세션마다). 여기서는 알려진 탭(일일결산, 진행업무, 완료업무, 예정업무, 일정, Accounts)의
+# 컬럼 타입을 한 곳에 두고, 시트 값(get_all_values 모양)을 열 단위로 한 번에 변환한 DataFrame 을 만든다.
+# 변환은 core.google_sheets.read_table 이 동기화(캐시 갱신) 때 한 번만 한다.
+#
+# 컬럼 종류
+# - int     : 금액 (int64). 쉼표/공백/소수는 safe_int 와 같은 규칙, 못 읽으면 0
+# - date    : 날짜 (datetime64, "YYYY-MM-DD"). 못 읽는 값이 하나라도 있으면 그 열은 문자열로 둔다
+#             (전체 덮어쓰기 저장 때 원래 값이 바뀌면 안 되므로)
+# - category: 구분/업무처럼 값 종류가 적은 열 (category)
+# - bool    : TRUE / 1 / Y ... → bool
+# - str     : 그 밖. 숫자처럼 보여도 숫자로 바꾸지 않는다 (전화번호 / 등록번호 앞자리 0 유지)
+# 스키마에 없는 시트 열은 str 로 그대로 두고, 스키마에 있는데 시트에 없는 열은 기본값으로 채운다.
+# 아직 dict 목록을 쓰는 화면은 table_to_records() 로 바꿔 쓴다 (날짜는 원래 문자열 모양 그대로).
+# 이 모듈은 gspread / streamlit 에 의존하지 않는다.
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    DAILY_SUMMARY_SHEET_NAME,
+    ACTIVE_TASKS_SHEET_NAME,
+    COMPLETED_TASKS_SHEET_NAME,
+    PLANNED_TASKS_SHEET_NAME,
+    EVENTS_SHEET_NAME,
+    ACCOUNTS_SHEET_NAME,
+)
+
+COL_STR = "str"
+COL_INT = "int"
+COL_DATE = "date"
+COL_CATEGORY = "category"
+COL_BOOL = "bool"
+
+DATE_FORMAT = "%Y-%m-%d"
+_TRUE_TEXTS = ("TRUE", "T", "YES", "Y", "1")
+
+# ===== 탭 스키마 =====
+# 탭 이름 → {컬럼: 종류} (순서 = 빈 시트일 때 테이블 컬럼 순서)
+TABLE_SCHEMAS: dict[str, dict[str, str]] = {
+    DAILY_SUMMARY_SHEET_NAME: {
+        "id": COL_STR, "date": COL_DATE, "time": COL_STR,
+        "category": COL_CATEGORY, "name": COL_STR, "task": COL_STR,
+        "income_cash": COL_INT, "income_etc": COL_INT,
+        "exp_cash": COL_INT, "cash_out": COL_INT, "exp_etc": COL_INT,
+        "memo": COL_STR,
+    },
+    ACTIVE_TASKS_SHEET_NAME: {
+        "id": COL_STR, "category": COL_CATEGORY, "date": COL_DATE, "name": COL_STR,
+        "work": COL_CATEGORY, "details": COL_STR,
+        "transfer": COL_INT, "cash": COL_INT, "card": COL_INT, "stamp": COL_INT,
+        "receivable": COL_INT, "planned_expense": COL_INT,
+        "processed": COL_BOOL, "processed_timestamp": COL_STR,
+    },
+    COMPLETED_TASKS_SHEET_NAME: {
+        "id": COL_STR, "category": COL_CATEGORY, "date": COL_DATE, "name": COL_STR,
+        "work": COL_CATEGORY, "details": COL_STR, "complete_date": COL_DATE,
+    },
+    PLANNED_TASKS_SHEET_NAME: {
+        "id": COL_STR, "date": COL_DATE, "period": COL_CATEGORY,
+        "content": COL_STR, "note": COL_STR,
+    },
+    EVENTS_SHEET_NAME: {
+        "date_str": COL_DATE, "event_text": COL_STR,
+    },
+    # 계정 탭은 관리자 화면에서 그대로 편집하므로 전부 문자열 (앞자리 0 / TRUE·FALSE 표기 유지)
+    ACCOUNTS_SHEET_NAME: {
+        "login_id": COL_STR, "password_hash": COL_STR, "tenant_id": COL_STR,
+        "office_name": COL_STR, "is_admin": COL_STR, "is_active": COL_STR,
+        "customer_sheet_key": COL_STR, "work_sheet_key": COL_STR,
+    },
+}
+
+
+def get_table_schema(sheet_name: str) -> dict[str, str]:
+    return TABLE_SCHEMAS.get(sheet_name, {})
+
+
+# ===== 열 변환 =====
+def _to_int64(text: pd.Series) -> pd.Series:
+    num = pd.to_numeric(text.str.replace(",", "", regex=False), errors="coerce").to_numpy(dtype="float64", copy=True)
+    num[~np.isfinite(num)] = 0
+    return pd.Series(np.trunc(num).astype("int64"), index=text.index)
+
+
+def _to_date(text: pd.Series) -> pd.Series:
+    parsed = pd.to_datetime(text, format=DATE_FORMAT, errors="coerce")
+    if (parsed.isna() & (text != "")).any():
+        return text
+    return parsed
+
+
+def _convert(text: pd.Series, kind: str) -> pd.Series:
+    if kind == COL_INT:
+        return _to_int64(text)
+    if kind == COL_DATE:
+        return _to_date(text)
+    if kind == COL_CATEGORY:
+        return text.astype("category")
+    if kind == COL_BOOL:
+        return text.str.upper().isin(_TRUE_TEXTS)
+    return text
+
+
+def empty_table(sheet_name: str) -> pd.DataFrame:
+    """스키마 컬럼/타입만 있는 빈 테이블"""
+    empty = pd.Series([], dtype=str)
+    return pd.DataFrame({c: _convert(empty, k) for c, k in get_table_schema(sheet_name).items()})
+
+
+def values_to_table(sheet_name: str, values: list[list]) -> pd.DataFrame:
+    """get_all_values() 모양의 값(1행 = 헤더) → 스키마 타입의 열 단위 DataFrame"""
+    schema = get_table_schema(sheet_name)
+    header = [str(h).strip() for h in values[0]] if values else []
+    if not header or len(values) < 2:
+        return empty_table(sheet_name)
+
+    raw = pd.DataFrame(values[1:], dtype=object)
+    columns = {}
+    for pos, name in enumerate(header):
+        if not name or name in columns:
+            continue   # 빈 헤더 / 중복 헤더는 첫 열만
+        if pos < raw.shape[1]:
+            text = raw[pos].fillna("").astype(str).str.strip()
+        else:
+            text = pd.Series([""] * len(raw), dtype=str)
+        columns[name] = _convert(text, schema.get(name, COL_STR))
+
+    for name, kind in schema.items():
+        if name not in columns:
+            columns[name] = _convert(pd.Series([""] * len(raw), dtype=str), kind)
+
+    return pd.DataFrame(columns)
+
+
+def table_to_records(table: pd.DataFrame) -> list[dict]:
+    """테이블 → dict 목록 (int / bool 은 파이썬 값, 날짜는 'YYYY-MM-DD' 문자열, 나머지는 문자열)"""
+    cols = {}
+    for name in table.columns:
+        col = table[name]
+        if pd.api.types.is_datetime64_any_dtype(col):
+            cols[name] = col.dt.strftime(DATE_FORMAT).fillna("").tolist()
+        elif isinstance(col.dtype, pd.CategoricalDtype):
+            cols[name] = col.astype(str).tolist()
+        else:
+            cols[name] = col.tolist()
+    names = list(cols)
+    return [dict(zip(names, row)) for row in zip(*cols.values())]
+
+
+def date_text(col: pd.Series) -> pd.Series:
+    """날짜 열(datetime64 또는 문자열로 남은 열) → 'YYYY-MM-DD' 문자열 열"""
+    if pd.api.types.is_datetime64_any_dtype(col):
+        return col.dt.strftime(DATE_FORMAT).fillna("")
+    return col.astype(str)
+
+
+def table_memory_bytes(table: pd.DataFrame) -> int:
+    return int(table.memory_usage(deep=True).sum())
@@ -0,0 +1,77 @@
+# core/sheet_backend.py
+#
+# 시트 저장소 백엔드 선택.
+# core/google_sheets 의 읽기/쓰기 헬퍼(get_worksheet, read_data_from_sheet, write_data_to_sheet,
+# upsert_rows_by_id, append_rows_to_sheet ...)는 모두 get_gspread_client() 가 돌려주는
+# gspread.Client 모양의 객체만 쓰고, 고객 폴더 등 Drive 작업은 get_drive_service() 만 쓴다.
+# 그 객체들을 누가 만들지를 여기서 고른다.
+#
+# - "google": 실제 Google Sheets / Drive (기본값, core/google_sheets.GoogleSheetsBackend)
+# - "fake"  : 네트워크 없이 도는 프로세스 내 가짜 시트 (core/fake_sheets.FakeSheetsBackend)
+#
+# 환경변수 HANWOORY_STORAGE_BACKEND 로 고르거나, 벤치마크/부하 테스트에서는
+# 읽기 전에 set_storage_backend(FakeSheetsBackend(...)) 로 직접 꽂는다.
+# 이 모듈은 streamlit 에 의존하지 않는다.
+
+import threading
+
+from config import STORAGE_BACKEND
+
+
+class SheetBackend:
+    """
+    저장소 백엔드 인터페이스.
+    - client(): gspread.Client 와 같은 모양 (open_by_key → Spreadsheet → Worksheet)
+    - drive(): googleapiclient 의 Drive v3 서비스와 같은 모양 (files().list/get/create(...).execute())
+    - file_versions(keys): {스프레드시트 ID: 'modifiedTime|version' 또는 None} (캐시 재검증용)
+    """
+
+    name = "base"
+
+    def client(self):
+        raise NotImplementedError
+
+    def drive(self):
+        raise NotImplementedError
+
+    def file_versions(self, sheet_keys) -> dict:
+        raise NotImplementedError
+
+
+_backend_lock = threading.Lock()
+_backend_factories: dict = {}
+_active_backend: SheetBackend | None = None
+
+
+def register_storage_backend(name: str, factory) -> None:
+    """name 으로 고를 수 있는 백엔드 생성 함수를 등록한다 (factory() -> SheetBackend)"""
+    with _backend_lock:
+        _backend_factories[name] = factory
+
+
+def set_storage_backend(backend: SheetBackend | None) -> SheetBackend | None:
+    """
+    사용할 백엔드를 직접 지정한다 (None 이면 다음 호출 때 설정값으로 다시 만든다).
+    반환: 이전 백엔드. 읽기/쓰기를 시작하기 전에 부르는 것이 원칙이다.
+    """
+    global _active_backend
+    with _backend_lock:
+        prev, _active_backend = _active_backend, backend
+    return prev
+
+
+def get_storage_backend() -> SheetBackend:
+    global _active_backend
+    with _backend_lock:
+        if _active_backend is not None:
+            return _active_backend
+        name = STORAGE_BACKEND
+    if name == "fake" and name not in _backend_factories:
+        import core.fake_sheets  # noqa: F401  (import 시 "fake" 등록)
+    with _backend_lock:
+        if _active_backend is None:
+            factory = _backend_factories.get(name)
+            if factory is None:
+                raise ValueError(f"알 수 없는 저장소 백엔드: {name!r}")
+            _active_backend = factory()
+        return _active_backend
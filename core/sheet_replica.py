@@ -0,0 +1,235 @@
+# core/sheet_replica.py
+#
+# 테넌트별 구글시트 탭을 로컬 SQLite 파일에 get_all_values() 형태 그대로 복제해 두는 저장소.
+# - 파일: REPLICA_DIR/{tenant_id}.sqlite3
+# - 읽기: 탭이 한 번이라도 동기화돼 있으면 네트워크 없이 바로 반환
+# - 쓰기: core.google_sheets 의 쓰기 헬퍼가 시트 반영 후 같은 연산을 복제본에도 적용
+# - 동기화(시트 → 복제본)는 core.google_sheets.start_replica_sync() 가 담당
+# - 탭마다 세대(generation) 번호를 두고 로컬 쓰기마다 올린다. 시트 전체를 받아 덮어쓰는 쪽은
+#   받기 전에 세대를 기억해 두었다가 put_values(expect_generation=) 로 넘긴다
+#   → 받는 사이에 로컬 쓰기가 있었으면 (받은 값이 더 오래된 것이므로) 덮어쓰지 않는다
+# 이 모듈은 gspread / streamlit 에 의존하지 않는다 (순수 저장소).
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from config import (
+    REPLICA_DIR,
+    CUSTOMER_SHEET_NAME,
+    DAILY_SUMMARY_SHEET_NAME,
+    DAILY_BALANCE_SHEET_NAME,
+    PLANNED_TASKS_SHEET_NAME,
+    ACTIVE_TASKS_SHEET_NAME,
+    COMPLETED_TASKS_SHEET_NAME,
+    EVENTS_SHEET_NAME,
+    MEMO_LONG_SHEET_NAME,
+    MEMO_MID_SHEET_NAME,
+    MEMO_SHORT_SHEET_NAME,
+)
+
+# 복제 대상 탭 (고객데이터 워크북 안의 탭들)
+REPLICA_TABS = (
+    CUSTOMER_SHEET_NAME,
+    DAILY_SUMMARY_SHEET_NAME,
+    DAILY_BALANCE_SHEET_NAME,
+    PLANNED_TASKS_SHEET_NAME,
+    ACTIVE_TASKS_SHEET_NAME,
+    COMPLETED_TASKS_SHEET_NAME,
+    EVENTS_SHEET_NAME,
+    MEMO_LONG_SHEET_NAME,
+    MEMO_MID_SHEET_NAME,
+    MEMO_SHORT_SHEET_NAME,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tab_rows (
+    sheet_key TEXT NOT NULL,
+    tab       TEXT NOT NULL,
+    row_no    INTEGER NOT NULL,
+    row_json  TEXT NOT NULL,
+    PRIMARY KEY (sheet_key, tab, row_no)
+);
+CREATE TABLE IF NOT EXISTS tab_meta (
+    sheet_key TEXT NOT NULL,
+    tab       TEXT NOT NULL,
+    synced_at REAL NOT NULL,
+    PRIMARY KEY (sheet_key, tab)
+);
+"""
+
+
+class SheetReplica:
+    """
+    SQLite 한 파일 = 테넌트 하나.
+    행 번호(row_no)는 시트와 같은 1-based (1행 = 헤더).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._generations: dict[tuple[str, str], int] = {}   # (sheet_key, tab) -> 로컬 쓰기 횟수
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    # ----- 읽기 -----
+    def get_values(self, sheet_key: str, tab: str):
+        """동기화된 적 없는 탭이면 None, 있으면 get_all_values() 와 같은 2차원 리스트"""
+        with self._lock:
+            meta = self._conn.execute(
+                "SELECT 1 FROM tab_meta WHERE sheet_key=? AND tab=?",
+                (sheet_key, tab),
+            ).fetchone()
+            if meta is None:
+                return None
+            rows = self._conn.execute(
+                "SELECT row_json FROM tab_rows WHERE sheet_key=? AND tab=? ORDER BY row_no",
+                (sheet_key, tab),
+            ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def synced_at(self, sheet_key: str, tab: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT synced_at FROM tab_meta WHERE sheet_key=? AND tab=?",
+                (sheet_key, tab),
+            ).fetchone()
+        return row[0] if row else None
+
+    def generation(self, sheet_key: str, tab: str) -> int:
+        """탭의 현재 세대 번호 (시트에서 전체를 받기 전에 기억해 둔다)"""
+        with self._lock:
+            return self._generations.get((sheet_key, tab), 0)
+
+    # ----- 쓰기 -----
+    def put_values(self, sheet_key: str, tab: str, values: list[list], expect_generation: int | None = None) -> bool:
+        """
+        탭 전체를 values 로 교체 (동기화/전체 덮어쓰기).
+        expect_generation 을 주면 그 사이에 로컬 쓰기가 있었을 때 덮어쓰지 않고 False 를 돌려준다.
+        """
+        with self._lock, self._conn:
+            if expect_generation is not None and self._generations.get((sheet_key, tab), 0) != expect_generation:
+                return False
+            self._bump(sheet_key, tab)
+            self._conn.execute(
+                "DELETE FROM tab_rows WHERE sheet_key=? AND tab=?", (sheet_key, tab)
+            )
+            self._conn.executemany(
+                "INSERT INTO tab_rows(sheet_key, tab, row_no, row_json) VALUES (?,?,?,?)",
+                [
+                    (sheet_key, tab, i, json.dumps([str(v) for v in row], ensure_ascii=False))
+                    for i, row in enumerate(values or [], start=1)
+                ],
+            )
+            self._touch(sheet_key, tab)
+        return True
+
+    def update_rows(self, sheet_key: str, tab: str, rows_by_no: dict[int, list]) -> None:
+        """{시트 행번호: 행 값} 덮어쓰기"""
+        if not rows_by_no:
+            return
+        with self._lock, self._conn:
+            self._bump(sheet_key, tab)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO tab_rows(sheet_key, tab, row_no, row_json) VALUES (?,?,?,?)",
+                [
+                    (sheet_key, tab, int(n), json.dumps([str(v) for v in row], ensure_ascii=False))
+                    for n, row in rows_by_no.items()
+                ],
+            )
+
+    def append_rows(self, sheet_key: str, tab: str, rows: list[list]) -> None:
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._bump(sheet_key, tab)
+            last = self._conn.execute(
+                "SELECT COALESCE(MAX(row_no), 0) FROM tab_rows WHERE sheet_key=? AND tab=?",
+                (sheet_key, tab),
+            ).fetchone()[0]
+            self._conn.executemany(
+                "INSERT INTO tab_rows(sheet_key, tab, row_no, row_json) VALUES (?,?,?,?)",
+                [
+                    (sheet_key, tab, last + i, json.dumps([str(v) for v in row], ensure_ascii=False))
+                    for i, row in enumerate(rows, start=1)
+                ],
+            )
+
+    def delete_rows(self, sheet_key: str, tab: str, row_nos) -> None:
+        """행 삭제 후 아래 행들을 위로 당긴다 (시트 delete_rows 와 동일)"""
+        with self._lock, self._conn:
+            self._bump(sheet_key, tab)
+            for n in sorted({int(x) for x in row_nos}, reverse=True):
+                self._conn.execute(
+                    "DELETE FROM tab_rows WHERE sheet_key=? AND tab=? AND row_no=?",
+                    (sheet_key, tab, n),
+                )
+                # PK 충돌을 피하려고 음수로 한 번 옮긴 뒤 되돌린다
+                self._conn.execute(
+                    "UPDATE tab_rows SET row_no = -(row_no - 1) "
+                    "WHERE sheet_key=? AND tab=? AND row_no>?",
+                    (sheet_key, tab, n),
+                )
+                self._conn.execute(
+                    "UPDATE tab_rows SET row_no = -row_no "
+                    "WHERE sheet_key=? AND tab=? AND row_no<0",
+                    (sheet_key, tab),
+                )
+
+    def set_cell(self, sheet_key: str, tab: str, row_no: int, col_no: int, value) -> None:
+        """1-based (row_no, col_no) 셀 하나 갱신 (update_cell / update_acell 대응)"""
+        with self._lock, self._conn:
+            self._bump(sheet_key, tab)
+            cur = self._conn.execute(
+                "SELECT row_json FROM tab_rows WHERE sheet_key=? AND tab=? AND row_no=?",
+                (sheet_key, tab, row_no),
+            ).fetchone()
+            row = json.loads(cur[0]) if cur else []
+            while len(row) < col_no:
+                row.append("")
+            row[col_no - 1] = str(value)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tab_rows(sheet_key, tab, row_no, row_json) VALUES (?,?,?,?)",
+                (sheet_key, tab, row_no, json.dumps(row, ensure_ascii=False)),
+            )
+
+    def drop(self, sheet_key: str, tab: str) -> None:
+        """탭을 '동기화 안 됨' 상태로 되돌린다 (다음 읽기 때 시트에서 다시 채움)"""
+        with self._lock, self._conn:
+            self._bump(sheet_key, tab)
+            self._conn.execute(
+                "DELETE FROM tab_rows WHERE sheet_key=? AND tab=?", (sheet_key, tab)
+            )
+            self._conn.execute(
+                "DELETE FROM tab_meta WHERE sheet_key=? AND tab=?", (sheet_key, tab)
+            )
+
+    def _bump(self, sheet_key: str, tab: str) -> None:
+        k = (sheet_key, tab)
+        self._generations[k] = self._generations.get(k, 0) + 1
+
+    def _touch(self, sheet_key: str, tab: str) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO tab_meta(sheet_key, tab, synced_at) VALUES (?,?,?)",
+            (sheet_key, tab, time.time()),
+        )
+
+
+_replicas: dict[str, SheetReplica] = {}
+_replicas_lock = threading.Lock()
+
+
+def get_replica(tenant_id: str) -> SheetReplica:
+    """테넌트별 SheetReplica (프로세스 당 1개)"""
+    with _replicas_lock:
+        rep = _replicas.get(tenant_id)
+        if rep is None:
+            os.makedirs(REPLICA_DIR, exist_ok=True)
+            safe_name = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in tenant_id)
+            rep = SheetReplica(os.path.join(REPLICA_DIR, f"{safe_name}.sqlite3"))
+            _replicas[tenant_id] = rep
+        return rep
@@ -0,0 +1,223 @@
+# core/write_journal.py
+#
+# 시트 쓰기 저널 (로컬 SQLite, WAL).
+# 구글 API 가 느리거나 끊겨도 사무실에서 입력한 내용을 잃지 않도록,
+# write_data_to_sheet / append_rows_to_sheet / upsert_rows_by_id 는 시트 대신 여기에 먼저 한 줄 남기고
+# 바로 성공을 돌려준다. 실제 시트 반영은 core.google_sheets 의 재생 스레드가 순서대로 한다.
+#
+# - 파일: JOURNAL_PATH (프로세스 전체 1개, 모든 테넌트 공용)
+# - 한 줄 = 연산 1건: seq(순서), op_id(멱등 키), tenant, sheet_key, tab, op, payload(JSON)
+#   순서는 (sheet_key, tab) 안에서만 지키면 된다 (재생도 그 단위로 따로 돈다)
+# - 상태: pending → done / failed.  attempts > 0 인 pending 은 "보냈는데 결과를 모르는" 연산이다
+#   (재생 도중 프로세스가 죽은 경우). 재생하는 쪽이 멱등하게 다시 보낸다.
+# - done 은 JOURNAL_KEEP_DONE_SEC 동안만 남긴다 (문제 추적용)
+# 이 모듈은 gspread / streamlit 에 의존하지 않는다 (순수 저장소).
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from config import JOURNAL_PATH, JOURNAL_KEEP_DONE_SEC
+
+STATUS_PENDING = "pending"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal (
+    seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+    op_id      TEXT NOT NULL UNIQUE,
+    tenant     TEXT NOT NULL,
+    sheet_key  TEXT NOT NULL,
+    tab        TEXT NOT NULL,
+    op         TEXT NOT NULL,
+    payload    TEXT NOT NULL,
+    status     TEXT NOT NULL DEFAULT 'pending',
+    attempts   INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT NOT NULL DEFAULT '',
+    created    REAL NOT NULL,
+    applied    REAL
+);
+CREATE INDEX IF NOT EXISTS journal_pending ON journal(status, seq);
+CREATE INDEX IF NOT EXISTS journal_pending_tab ON journal(status, sheet_key, tab, seq);
+"""
+
+
+def _json_default(v):
+    # numpy / pandas 스칼라는 파이썬 값으로, 나머지(date 등)는 문자열로
+    if hasattr(v, "item"):
+        try:
+            return v.item()
+        except Exception:
+            pass
+    return str(v)
+
+
+class JournalOp:
+    __slots__ = ("seq", "op_id", "tenant", "sheet_key", "tab", "op", "payload", "attempts", "created")
+
+    def __init__(self, row):
+        (self.seq, self.op_id, self.tenant, self.sheet_key, self.tab, self.op,
+         payload, self.attempts, self.created) = row
+        self.payload = json.loads(payload)
+
+
+class WriteJournal:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")   # 성공을 돌려준 쓰기는 전원이 나가도 남아야 한다
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._pending: dict[tuple[str, str], int] = {}
+        for key, tab, n in self._conn.execute(
+            "SELECT sheet_key, tab, COUNT(*) FROM journal WHERE status='pending' GROUP BY sheet_key, tab"
+        ):
+            self._pending[(key, tab)] = n
+
+    _COLS = "seq, op_id, tenant, sheet_key, tab, op, payload, attempts, created"
+
+    # ----- 기록 -----
+    def append(self, tenant: str, sheet_key: str, tab: str, op: str, payload: dict) -> int:
+        """연산 1건을 디스크에 남긴다 (커밋 후 반환). 반환: seq"""
+        body = json.dumps(payload, ensure_ascii=False, default=_json_default)
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "INSERT INTO journal(op_id, tenant, sheet_key, tab, op, payload, created) VALUES (?,?,?,?,?,?,?)",
+                (uuid.uuid4().hex, tenant, sheet_key, tab, op, body, time.time()),
+            )
+            self._pending[(sheet_key, tab)] = self._pending.get((sheet_key, tab), 0) + 1
+            return cur.lastrowid
+
+    # ----- 재생 -----
+    def next_pending(self, sheet_key: str, tab: str) -> JournalOp | None:
+        """(sheet_key, tab) 의 가장 오래된 pending 연산 (seq 순서)"""
+        if not self._pending.get((sheet_key, tab)):
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {self._COLS} FROM journal WHERE status='pending' AND sheet_key=? AND tab=? "
+                "ORDER BY seq LIMIT 1",
+                (sheet_key, tab),
+            ).fetchone()
+        return JournalOp(row) if row else None
+
+    def pending_keys(self) -> list[tuple[str, str]]:
+        """pending 연산이 있는 (sheet_key, tab) 목록"""
+        with self._lock:
+            return [k for k, n in self._pending.items() if n]
+
+    def pending_ops(self, sheet_key: str, tab: str) -> list[JournalOp]:
+        """(sheet_key, tab) 의 pending 연산들 (읽기 화면에 덮어 보여줄 때)"""
+        if not self._pending.get((sheet_key, tab)):
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {self._COLS} FROM journal WHERE status='pending' AND sheet_key=? AND tab=? ORDER BY seq",
+                (sheet_key, tab),
+            ).fetchall()
+        return [JournalOp(r) for r in rows]
+
+    def has_pending(self, sheet_key: str, tab: str) -> bool:
+        return bool(self._pending.get((sheet_key, tab)))
+
+    def mark_sending(self, seq: int) -> None:
+        """보내기 직전: attempts+1 (여기서 죽으면 다음 재생 때 '결과 모름'으로 취급)"""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE journal SET attempts=attempts+1 WHERE seq=?", (seq,))
+
+    def note_payload(self, seq: int, payload: dict) -> None:
+        """재생하는 쪽이 보내기 전에 알아낸 값(append 전 마지막 행 번호 등)을 연산에 덧붙여 남긴다"""
+        body = json.dumps(payload, ensure_ascii=False, default=_json_default)
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE journal SET payload=? WHERE seq=?", (body, seq))
+
+    def note_error(self, seq: int, error: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE journal SET last_error=? WHERE seq=?", (error[:500], seq))
+
+    def _finish(self, seq: int, status: str, error: str = "") -> None:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT sheet_key, tab, status FROM journal WHERE seq=?", (seq,)
+            ).fetchone()
+            if row is None or row[2] != STATUS_PENDING:
+                return
+            self._conn.execute(
+                "UPDATE journal SET status=?, last_error=?, applied=? WHERE seq=?",
+                (status, error[:500], time.time(), seq),
+            )
+            key = (row[0], row[1])
+            self._pending[key] = max(self._pending.get(key, 0) - 1, 0)
+            self._conn.execute(
+                "DELETE FROM journal WHERE status='done' AND applied < ?",
+                (time.time() - JOURNAL_KEEP_DONE_SEC,),
+            )
+
+    def mark_done(self, seq: int) -> None:
+        self._finish(seq, STATUS_DONE)
+
+    def mark_failed(self, seq: int, error: str) -> None:
+        """다시 보내도 안 되는 연산 (헤더 불일치 등). 관리자 화면에서 보고 다시 시도/버리기"""
+        self._finish(seq, STATUS_FAILED, error)
+
+    def retry_failed(self, seq: int | None = None) -> int:
+        """failed → pending (seq 가 None 이면 전부). 반환: 되돌린 수"""
+        with self._lock, self._conn:
+            where, args = ("status='failed'", ()) if seq is None else ("status='failed' AND seq=?", (seq,))
+            rows = self._conn.execute(f"SELECT sheet_key, tab FROM journal WHERE {where}", args).fetchall()
+            self._conn.execute(f"UPDATE journal SET status='pending', applied=NULL WHERE {where}", args)
+            for key, tab in rows:
+                self._pending[(key, tab)] = self._pending.get((key, tab), 0) + 1
+            return len(rows)
+
+    def discard_failed(self, seq: int) -> bool:
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "DELETE FROM journal WHERE seq=? AND status='failed'", (seq,)
+            ).rowcount > 0
+
+    # ----- 조회 -----
+    def backlog(self, tenant: str | None = None) -> int:
+        with self._lock:
+            if tenant is None:
+                return sum(self._pending.values())
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM journal WHERE status='pending' AND tenant=?", (tenant,)
+            ).fetchone()[0]
+
+    def list_ops(self, status: str, limit: int = 100) -> list[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, tenant, tab, op, attempts, last_error, created FROM journal "
+                "WHERE status=? ORDER BY seq LIMIT ?",
+                (status, limit),
+            ).fetchall()
+        keys = ("seq", "tenant", "tab", "op", "attempts", "last_error", "created")
+        return [dict(zip(keys, r)) for r in rows]
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM journal GROUP BY status").fetchall()
+        out = {STATUS_PENDING: 0, STATUS_DONE: 0, STATUS_FAILED: 0}
+        out.update(dict(rows))
+        return out
+
+
+_journal: WriteJournal | None = None
+_journal_lock = threading.Lock()
+
+
+def get_journal() -> WriteJournal:
+    """프로세스 당 1개"""
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            os.makedirs(os.path.dirname(JOURNAL_PATH) or ".", exist_ok=True)
+            _journal = WriteJournal(JOURNAL_PATH)
+        return _journal
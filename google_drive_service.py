@@ -1,7 +1,6 @@
 # google_drive_service.py
 
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
+from core.google_services import service_account_credentials, get_api_service
 
 SERVICE_ACCOUNT_PATH = ".streamlit/service_account.json"
 
@@ -13,11 +12,12 @@ TEMPLATE_SHEET_CUSTOMER = "1UhMUpSJif54NqJXapQBe7DxyvbCil3RNiQDPhUgjNec"
 PARENT_FOLDER_ID = "1vqkdbFM7rImOAFmPyh0-ngN36X-MspvY"
 
 def get_drive_service():
-    creds = Credentials.from_service_account_file(
+    # 키 파일 / 디스커버리 문서 / 인증 세션은 core.google_services 가 한 번만 만들고 재사용한다
+    creds = service_account_credentials(
         SERVICE_ACCOUNT_PATH,
         scopes=["https://www.googleapis.com/auth/drive"]
     )
-    return build("drive", "v3", credentials=creds)
+    return get_api_service("drive", "v3", creds)
 
 def create_user_folder(email: str):
     drive = get_drive_service()
@@ -57,8 +57,7 @@ def create_user_folder(email: str):
     }
 
 import pandas as pd
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
+from core.google_services import service_account_credentials, get_api_service
 
 SERVICE_ACCOUNT_PATH = ".streamlit/service_account.json"
 SCOPES = [
@@ -67,9 +66,9 @@ SCOPES = [
 ]
 
 def get_services():
-    creds = Credentials.from_service_account_file(SERVICE_ACCOUNT_PATH, scopes=SCOPES)
-    drive = build("drive", "v3", credentials=creds)
-    sheets = build("sheets", "v4", credentials=creds)
+    creds = service_account_credentials(SERVICE_ACCOUNT_PATH, SCOPES)
+    drive = get_api_service("drive", "v3", creds)
+    sheets = get_api_service("sheets", "v4", creds)
     return drive, sheets
 
 def create_user_folder(email: str):
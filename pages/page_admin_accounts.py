@@ -7,10 +7,13 @@ from config import (
     SESS_IS_ADMIN,
 )
 from core.google_sheets import (
-    read_data_from_sheet,
+    read_table,
     write_data_to_sheet,
     create_office_files_for_tenant,  # 🔹 새로 추가한 헬퍼 사용
+    invalidate_tenant_sheet_keys,
 )
+from core.customer_service import load_expiry_report
+from core.customer_expiry import EXPIRY_CARD, EXPIRY_PASSPORT
 
 # 기본 컬럼 정의 (없으면 자동으로 만들어서 맞춰줌)
 ACCOUNT_BASE_COLUMNS = [
@@ -48,15 +51,10 @@ def verify_password(password: str, hashed: str) -> bool:
         return False
 
 # ---- Accounts 시트 로드/저장 ----
-@st.cache_data(ttl=600)
 def load_accounts_df() -> pd.DataFrame:
-    records = read_data_from_sheet(ACCOUNTS_SHEET_NAME, default_if_empty=[]) or []
-
-    if not records:
-        # 아무 계정도 없으면 빈 df 리턴
-        return pd.DataFrame(columns=ACCOUNT_BASE_COLUMNS)
-
-    df = pd.DataFrame(records)
+    # 계정 탭은 모든 컬럼을 문자열로 읽는다 (core.record_store 스키마 — 전화/등록번호 앞자리 0 유지)
+    # 저장하면 write_data_to_sheet 가 캐시를 버리므로 따로 clear 할 필요 없음
+    df = read_table(ACCOUNTS_SHEET_NAME)
 
     # 기본 컬럼이 없으면 빈 값으로 채워 넣기
     for col in ACCOUNT_BASE_COLUMNS:
@@ -77,7 +75,8 @@ def save_accounts_df(df: pd.DataFrame) -> bool:
     data = df[header].to_dict(orient="records")
     ok = write_data_to_sheet(ACCOUNTS_SHEET_NAME, data, header_list=header)
     if ok:
-        load_accounts_df.clear()
+        # tenant_id / 시트 키가 바뀌었을 수 있으니 매핑 + 워크시트 핸들 캐시도 초기화
+        invalidate_tenant_sheet_keys()
     return ok
 
 # ---- 메인 렌더 ----
@@ -89,7 +88,7 @@ def render():
 
     st.subheader("🧩 사무소 계정 관리")
 
-    tab_list = st.tabs(["계정 목록", "계정 승인/수정", "새 계정 생성"])
+    tab_list = st.tabs(["계정 목록", "계정 승인/수정", "새 계정 생성", "만기 예정 (전체 사무소)"])
 
     # ========== 탭 1: 계정 목록 ==========
     with tab_list[0]:
@@ -342,3 +341,19 @@ def render():
                         st.success(f"새 계정 '{login_id}' 이(가) 생성되었습니다.")
                     else:
                         st.error("계정 저장 중 오류가 발생했습니다.")
+
+    # ========== 탭 4: 만기 예정 (전체 사무소) ==========
+    with tab_list[3]:
+        st.caption("활성 사무소 전체의 등록증 / 여권 만기 예정 고객입니다. (사무소별 만기 인덱스에서 모음)")
+        kind_label = st.radio("종류", ["등록증", "여권"], horizontal=True, key="admin_expiry_kind")
+        months = st.number_input("오늘부터 몇 개월 이내", min_value=1, max_value=24,
+                                 value=4 if kind_label == "등록증" else 6, key="admin_expiry_months")
+        if st.button("🔎 조회", key="admin_expiry_run"):
+            kind = EXPIRY_CARD if kind_label == "등록증" else EXPIRY_PASSPORT
+            with st.spinner("사무소별 고객 시트를 확인하는 중..."):
+                report = load_expiry_report(kind, int(months))
+            if report.empty:
+                st.info("만기 예정 고객이 없습니다.")
+            else:
+                st.write(f"총 {len(report)}명")
+                st.dataframe(report, use_container_width=True, hide_index=True)
@@ -0,0 +1,141 @@
+import datetime
+
+import streamlit as st
+import pandas as pd
+
+from config import SESS_IS_ADMIN
+from core.api_metrics import (
+    get_api_events,
+    summarize_by_page,
+    summarize_by,
+    recent_reruns,
+    export_api_events_jsonl,
+    clear_api_events,
+)
+from core.api_scheduler import get_api_scheduler_stats
+from core.google_services import get_service_registry_stats
+from core.cache_snapshot import get_snapshot_stats
+from core.customer_search import get_customer_search_stats
+from core.customer_expiry import get_expiry_stats
+from core.customer_dedupe import get_dedupe_stats
+from core.google_sheets import (
+    get_sheet_cache_stats,
+    get_row_index_stats,
+    get_delta_sync_stats,
+    get_prefetch_stats,
+    get_write_journal_stats,
+    get_cas_stats,
+    list_failed_writes,
+    retry_failed_writes,
+    discard_failed_write,
+)
+
+
+# ---- 메인 렌더 ----
+def render():
+    # --- 접근 권한 체크 ---
+    if not st.session_state.get(SESS_IS_ADMIN, False):
+        st.error("이 페이지에 접근할 권한이 없습니다. (관리자 전용)")
+        st.stop()
+
+    st.subheader("📈 구글 API 사용량")
+    st.caption("Sheets / Drive 요청을 재실행·페이지 단위로 모은 값입니다. (이 서버 프로세스 기준, 최근 기록만 보관)")
+
+    events = get_api_events()
+    if not events:
+        st.info("아직 기록된 API 호출이 없습니다.")
+
+    tab_list = st.tabs(["페이지별", "최근 재실행", "함수/탭별", "캐시·스케줄러", "내보내기"])
+
+    # ========== 탭 1: 페이지별 ==========
+    with tab_list[0]:
+        rows = summarize_by_page(events)
+        if rows:
+            df = pd.DataFrame(rows)[[
+                "page", "reruns", "calls", "calls_per_rerun",
+                "latency_ms", "bytes_in", "bytes_out", "retries", "errors",
+            ]]
+            st.dataframe(df, use_container_width=True, hide_index=True)
+
+    # ========== 탭 2: 최근 재실행 ==========
+    with tab_list[1]:
+        rows = recent_reruns(limit=30)
+        if rows:
+            df = pd.DataFrame(rows)
+            df["started"] = df["started"].map(
+                lambda t: datetime.datetime.fromtimestamp(t).strftime("%H:%M:%S")
+            )
+            st.dataframe(
+                df[["rerun", "started", "page", "tenant", "calls", "latency_ms",
+                    "bytes_in", "bytes_out", "retries", "errors"]],
+                use_container_width=True, hide_index=True,
+            )
+            rerun_ids = [r["rerun"] for r in rows]
+            picked = st.selectbox("재실행 상세", rerun_ids, key="api_metrics_rerun_pick")
+            detail = get_api_events(rerun=picked)
+            st.dataframe(
+                pd.DataFrame(detail)[["fn", "kind", "sheet", "latency_ms", "bytes_in",
+                                      "bytes_out", "retries", "status", "thread"]],
+                use_container_width=True, hide_index=True,
+            )
+
+    # ========== 탭 3: 함수/탭별 ==========
+    with tab_list[2]:
+        field = st.radio(
+            "묶음 기준", ["fn", "sheet", "kind", "tenant"], horizontal=True,
+            key="api_metrics_group_field",
+        )
+        rows = summarize_by(field, events)
+        if rows:
+            st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+    # ========== 탭 4: 캐시·스케줄러 ==========
+    with tab_list[3]:
+        st.markdown("#### API 스케줄러")
+        st.json(get_api_scheduler_stats())
+        st.markdown("#### 인증 세션 / 서비스 객체")
+        st.json(get_service_registry_stats())
+        st.markdown("#### 캐시 / 인덱스")
+        st.json({
+            "sheet_cache": get_sheet_cache_stats(),
+            "row_index": get_row_index_stats(),
+            "delta_sync": get_delta_sync_stats(),
+            "prefetch": get_prefetch_stats(),
+            "disk_snapshot": get_snapshot_stats(),
+            "compare_and_set": get_cas_stats(),
+            "customer_search": get_customer_search_stats(),
+            "customer_expiry": get_expiry_stats(),
+            "customer_dedupe": get_dedupe_stats(),
+        })
+        st.markdown("#### 쓰기 저널 (시트 반영 대기)")
+        st.json(get_write_journal_stats())
+        failed = list_failed_writes()
+        if failed:
+            st.warning(f"시트에 반영하지 못한 쓰기 {len(failed)}건")
+            df = pd.DataFrame(failed)
+            df["created"] = df["created"].map(
+                lambda t: datetime.datetime.fromtimestamp(t).strftime("%m-%d %H:%M:%S")
+            )
+            st.dataframe(df, use_container_width=True, hide_index=True)
+            col_a, col_b, col_c = st.columns([2, 1, 1])
+            picked = col_a.selectbox("연산", [r["seq"] for r in failed], key="api_metrics_journal_pick")
+            if col_b.button("🔁 다시 보내기", key="api_metrics_journal_retry"):
+                retry_failed_writes(picked)
+                st.rerun()
+            if col_c.button("🗑️ 버리기", key="api_metrics_journal_discard"):
+                discard_failed_write(picked)
+                st.rerun()
+
+    # ========== 탭 5: 내보내기 ==========
+    with tab_list[4]:
+        st.write(f"보관 중인 호출 기록: {len(events)}건")
+        st.download_button(
+            "⬇️ JSON lines 로 내려받기",
+            data=export_api_events_jsonl(events=events).encode("utf-8"),
+            file_name=f"api_calls_{datetime.datetime.now():%Y%m%d_%H%M%S}.jsonl",
+            mime="application/json",
+            disabled=not events,
+        )
+        if st.button("🧹 기록 비우기", key="api_metrics_clear"):
+            clear_api_events()
+            st.rerun()
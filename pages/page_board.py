@@ -20,6 +20,10 @@ from core.google_sheets import (
     get_gspread_client,
     get_worksheet,
     get_current_agent_info,
+    locate_rows,
+    note_rows_written,
+    delete_sheet_rows,
+    sheet_cache,
 )
 
 # ===== 상수 =====
@@ -65,7 +69,7 @@ def _normalize_records(records: List[Dict], header_list: List[str]) -> List[Dict
     return norm
 
 
-@st.cache_data(ttl=10)
+@sheet_cache(ttl=10, tabs=(BOARD_SHEET_NAME,))
 def load_board_posts() -> List[Dict]:
     """게시판 전체 글 목록 (공지 + 일반)"""
     records = read_data_from_sheet(BOARD_SHEET_NAME, default_if_empty=[]) or []
@@ -99,27 +103,23 @@ def _update_row_by_id(sheet_name: str, header_list: List[str], record: Dict, id_
     try:
         client = get_gspread_client()
         ws = get_worksheet(client, sheet_name)
-        values = ws.get_all_values()
-        if not values:
+        target_id = str(record.get(id_field, "")).strip()
+        idx, found = locate_rows(ws, sheet_name, [target_id], id_field)
+        if not idx.header:
             return False
 
-        header = values[0]
-        if id_field not in header:
+        if idx.col is None:
             st.error(f"{sheet_name} 시트에 {id_field} 컬럼이 없습니다.")
             return False
 
-        id_idx = header.index(id_field)
-        target_row = None
-        for idx, row in enumerate(values[1:], start=2):
-            if len(row) > id_idx and str(row[id_idx]).strip() == str(record.get(id_field, "")).strip():
-                target_row = idx
-                break
-
-        if not target_row:
+        rows = found.get(target_id)
+        if not rows:
             return False
+        target_row = rows[0]
 
         row_values = [str(record.get(col, "")) for col in header_list]
         ws.update(f"A{target_row}", [row_values])
+        note_rows_written(ws, sheet_name, rows={target_row: row_values})
         return True
     except Exception as e:
         st.error(f"❌ _update_row_by_id 오류 ({sheet_name}): {e}")
@@ -131,25 +131,12 @@ def _delete_rows_by_field(sheet_name: str, field_name: str, field_value: str) ->
     try:
         client = get_gspread_client()
         ws = get_worksheet(client, sheet_name)
-        values = ws.get_all_values()
-        if not values:
-            return 0
-
-        header = values[0]
-        if field_name not in header:
+        idx, found = locate_rows(ws, sheet_name, [field_value], field_name)
+        if not idx.header or idx.col is None:
             return 0
 
-        idx_field = header.index(field_name)
-        targets = []
-        for idx, row in enumerate(values[1:], start=2):
-            if len(row) > idx_field and str(row[idx_field]).strip() == str(field_value).strip():
-                targets.append(idx)
-
-        deleted = 0
-        for r in reversed(targets):
-            ws.delete_rows(r)
-            deleted += 1
-        return deleted
+        targets = found.get(str(field_value).strip(), [])
+        return delete_sheet_rows(ws, targets, sheet_name)
     except Exception as e:
         st.error(f"❌ _delete_rows_by_field 오류 ({sheet_name}): {e}")
         return 0
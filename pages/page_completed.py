@@ -4,16 +4,14 @@ import streamlit as st
 import pandas as pd
 
 from config import COMPLETED_TASKS_SHEET_NAME
-from core.google_sheets import read_data_from_sheet
+from core.google_sheets import read_table
+from core.record_store import date_text
 
 
 # --- 완료업무 로드 함수 (이 파일 안에서 자체 정의) ---
-def load_completed_tasks_from_sheet():
-    records = read_data_from_sheet(COMPLETED_TASKS_SHEET_NAME, default_if_empty=[])
-
-    if not records:
-        return []
-    return records
+def load_completed_tasks_from_sheet() -> pd.DataFrame:
+    """완료업무 탭 (complete_date / date 는 datetime64, category / work 는 category)"""
+    return read_table(COMPLETED_TASKS_SHEET_NAME)
 
 
 def render():
@@ -28,29 +26,27 @@ def render():
     )
 
     # 구글시트에서 완료업무 불러오기
-    completed_tasks_list = load_completed_tasks_from_sheet()
+    df_completed = load_completed_tasks_from_sheet()
 
-    if not completed_tasks_list:
+    if df_completed.empty:
         st.info("완료된 업무가 없습니다.")
         return
 
-    df_completed = pd.DataFrame(completed_tasks_list)
-
     # category 정리
-    if "category" in df_completed.columns:
-        df_completed["category"] = df_completed["category"].fillna("")
-
-    # 완료일 기준 정렬
-    if "complete_date" in df_completed.columns:
-        df_completed["complete_date_dt"] = pd.to_datetime(
-            df_completed["complete_date"],
-            errors="coerce",
-        )
-        df_completed = df_completed.sort_values(
-            by=["category", "complete_date_dt"],
-            ascending=[True, False],
-        )
-        df_completed = df_completed.drop(columns=["complete_date_dt"])
+    df_completed["category"] = df_completed["category"].astype(str)
+
+    # 완료일 기준 정렬 (완료일은 이미 날짜 타입, 못 읽은 값이 있으면 문자열로 남아 있다)
+    df_completed["complete_date_dt"] = pd.to_datetime(
+        df_completed["complete_date"],
+        errors="coerce",
+    )
+    df_completed = df_completed.sort_values(
+        by=["category", "complete_date_dt"],
+        ascending=[True, False],
+    )
+    df_completed = df_completed.drop(columns=["complete_date_dt"])
+    for col in ("date", "complete_date"):
+        df_completed[col] = date_text(df_completed[col])
 
     # 화면에서 숨길 컬럼 (id 등)
     columns_to_display = [
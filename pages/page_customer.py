@@ -1,6 +1,5 @@
 # pages/page_customer.py
 
-import datetime
 import pandas as pd
 import streamlit as st
 from googleapiclient.errors import HttpError
@@ -28,14 +27,20 @@ from core.google_sheets import (
     get_worksheet,
     get_drive_service,
     append_rows_to_sheet,
+    invalidate_replica_tab,
+    locate_rows,
+    delete_sheet_rows,
 )
 
 from core.customer_service import (
     load_customer_df_from_sheet,
+    reload_session_customer_df,
+    clear_customer_df_cache,
     save_customer_batch_update,
     create_customer_folders,
     extract_folder_id,
     is_customer_folder_enabled,
+    search_session_customers,
 )
 
 
@@ -58,6 +63,9 @@ def render():
     # --- 1) 원본 DataFrame 로드 ---
     df_customer_main = st.session_state[SESS_DF_CUSTOMER].copy()
     df_customer_main = df_customer_main.sort_values("고객ID", ascending=False).reset_index(drop=True)
+    # 아직 저장 안 한 새 행(고객ID 없음)은 맨 위에
+    _unsaved = df_customer_main["고객ID"].fillna("").astype(str).str.strip() == ""
+    df_customer_main = pd.concat([df_customer_main[_unsaved], df_customer_main[~_unsaved]], ignore_index=True)
 
     # --- 1-1) 폴더 ID → URL 변환 (어드민 전용 폴더 기능용) ---
     if "폴더" in df_customer_main.columns:
@@ -96,8 +104,8 @@ def render():
             client = get_gspread_client()
             worksheet = get_worksheet(client, CUSTOMER_SHEET_NAME)
             create_customer_folders(df_customer_main, worksheet)
-            load_customer_df_from_sheet.clear()
-            st.session_state[SESS_DF_CUSTOMER] = load_customer_df_from_sheet()
+            clear_customer_df_cache()
+            reload_session_customer_df()
             st.success("✅ 폴더 매핑이 최신화 되었습니다.")
     else:
         # 필요하면 안내 문구 정도만
@@ -115,14 +123,9 @@ def render():
     # 3-2) 행 추가
     with col_add:
         if st.button("➕ 행 추가", use_container_width=True):
-            today_str = datetime.date.today().strftime('%Y%m%d')
-            existing_ids = df_customer_main["고객ID"].astype(str)
-            today_ids = existing_ids[existing_ids.str.startswith(today_str)]
-            next_seq = str(len(today_ids) + 1).zfill(2)
-            new_id = today_str + next_seq
-
+            # 고객ID 는 저장할 때 받는다 (누를 때마다 번호를 쓰지 않게)
             new_row = {col: " " for col in df_customer_main.columns}
-            new_row["고객ID"] = new_id
+            new_row["고객ID"] = ""
             df_customer_main = pd.concat(
                 [pd.DataFrame([new_row]), df_customer_main],
                 ignore_index=True
@@ -135,16 +138,15 @@ def render():
         st.text_input("🔍 검색", key=SESS_CUSTOMER_SEARCH_TERM)
         search_term = st.session_state.get(SESS_CUSTOMER_SEARCH_TERM, "")
 
-    # 4) 검색 필터링
+    # 4) 검색 필터링 (고객 검색 인덱스: 이름/여권/등록증/전화/주소, 초성·부분 일치)
     df_display_full = df_for_ui.copy()
-    df_for_search = df_display_full.fillna(" ").astype(str)
 
     if search_term:
-        mask = df_for_search.apply(
-            lambda row: search_term.lower() in row.str.lower().to_string(), axis=1
-        )
-        df_display_filtered = df_display_full[mask]
-        st.session_state[SESS_CUSTOMER_SEARCH_MASK_INDICES] = df_display_full[mask].index.tolist()
+        tenant_id = st.session_state.get(SESS_TENANT_ID, DEFAULT_TENANT_ID)
+        # df_customer_main 과 df_display_full 은 행 순서가 같다 (고객ID 가 빈 새 행도 찾는다)
+        hit_rows = search_session_customers(tenant_id, df_customer_main, search_term)
+        df_display_filtered = df_display_full.iloc[hit_rows]
+        st.session_state[SESS_CUSTOMER_SEARCH_MASK_INDICES] = df_display_filtered.index.tolist()
     else:
         df_display_filtered = df_display_full
         st.session_state[SESS_CUSTOMER_SEARCH_MASK_INDICES] = df_display_full.index.tolist()
@@ -178,27 +180,20 @@ def render():
                 worksheet = get_worksheet(gs_client, CUSTOMER_SHEET_NAME)
                 drive_svc = get_drive_service()
 
-                # 시트의 고객ID → 행 번호 맵
-                rows_all = worksheet.get_all_values()
-                if not rows_all:
+                # 시트의 고객ID → 행 번호 맵 (고객ID 컬럼만 읽는 행 번호 인덱스)
+                pending_ids = [str(x).strip() for x in st.session_state.get("PENDING_DELETE_IDS", [])]
+                id_index, id_rows = locate_rows(worksheet, CUSTOMER_SHEET_NAME, pending_ids, "고객ID")
+                if not id_index.header:
                     st.error("시트가 비어 있습니다.")
                     st.stop()
-                hdr = rows_all[0]
-                try:
-                    id_col_idx = hdr.index("고객ID")
-                except ValueError:
+                if id_index.col is None:
                     st.error("'고객ID' 컬럼을 시트에서 찾을 수 없습니다.")
                     st.stop()
 
-                id_to_sheetrow = {}
-                for r_idx, row_vals in enumerate(rows_all[1:], start=2):
-                    cid_val = (row_vals[id_col_idx] or "").strip()
-                    if cid_val:
-                        id_to_sheetrow[cid_val] = r_idx
-
                 # 선택된 ID들 순회
                 deleted_count = 0
-                for del_id in st.session_state.get("PENDING_DELETE_IDS", []):
+                rows_to_delete = []
+                for del_id in pending_ids:
                     # 1) DF에서 해당 행 찾기
                     idx_list = full_df.index[full_df["고객ID"].astype(str).str.strip() == str(del_id).strip()].tolist()
                     if not idx_list:
@@ -235,31 +230,24 @@ def render():
                                 else:
                                     st.warning(f"폴더 삭제 중 오류(ID={folder_id}): {e}")
 
-                    # 4) 시트 행 삭제(정확한 행 번호)
-                    sheet_row = id_to_sheetrow.get(str(del_id).strip())
-
-                    if sheet_row:
-                        try:
-                            worksheet.delete_rows(sheet_row)
-                        except Exception as e:
-                            st.warning(f"시트 행 삭제 중 오류(ID={del_id}, row={sheet_row}): {e}")
-                        # 맵 재생성 (행 당김 반영)
-                        rows_all = worksheet.get_all_values()
-                        id_to_sheetrow = {}
-                        if rows_all:
-                            hdr2 = rows_all[0]
-                            if "고객ID" in hdr2:
-                                id_col_idx2 = hdr2.index("고객ID")
-                                for r_idx2, row_vals2 in enumerate(rows_all[1:], start=2):
-                                    cid2 = (row_vals2[id_col_idx2] or "").strip()
-                                    if cid2:
-                                        id_to_sheetrow[cid2] = r_idx2
+                    # 4) 시트 행 번호 모아 두기 (삭제는 루프 뒤에 한 번에)
+                    sheet_rows = id_rows.get(del_id)
+                    if sheet_rows:
+                        rows_to_delete.append(sheet_rows[0])
 
                     # 5) 로컬 DF에서도 제거 + Undo 스택에 보관
                     deleted_stack.append((i, full_df.loc[i].copy()))
                     full_df = full_df.drop(index=i)
                     deleted_count += 1
 
+                # 모은 행들을 연속 구간으로 묶어 batchUpdate 1회로 삭제
+                if rows_to_delete:
+                    try:
+                        delete_sheet_rows(worksheet, rows_to_delete, CUSTOMER_SHEET_NAME)
+                    except Exception as e:
+                        st.warning(f"시트 행 삭제 중 오류({len(rows_to_delete)}행): {e}")
+                invalidate_replica_tab(CUSTOMER_SHEET_NAME, keep_row_index=True)
+
                 # 6) 인덱스 재정렬 및 세션 반영
                 full_df = full_df.sort_values("고객ID", ascending=False).reset_index(drop=True)
                 st.session_state[SESS_DF_CUSTOMER] = full_df
@@ -295,7 +283,7 @@ def render():
 
     # 11) 삭제할 고객ID 선택
     with col_select:
-        options = df_display_for_editor["고객ID"].tolist()
+        options = [cid for cid in df_display_for_editor["고객ID"].tolist() if str(cid).strip()]
         selected_delete_ids = st.multiselect(
             "삭제할 고객ID 선택",
             options=options,
@@ -349,9 +337,8 @@ def render():
                 st.success(f"✅ 신규 {len(new_rows)}건이 추가되었습니다.")
 
                 # 공통: DF는 새로 다시 읽어와서 세션에 반영
-                load_customer_df_from_sheet.clear()
-                fresh_df = load_customer_df_from_sheet(tenant_id)
-                st.session_state[SESS_DF_CUSTOMER] = fresh_df
+                clear_customer_df_cache()
+                fresh_df = reload_session_customer_df(tenant_id)
 
                 # 👉 폴더 기능이 켜져 있을 때만 실제 폴더 생성 + 메시지 출력
                 if is_customer_folder_enabled():
@@ -365,7 +352,9 @@ def render():
                 st.success("🔄 업데이트가 반영되었습니다.")
 
             # 4) 최종 리프레시
-            load_customer_df_from_sheet.clear()
-            st.session_state[SESS_DF_CUSTOMER] = load_customer_df_from_sheet(tenant_id)
+            clear_customer_df_cache()
+            reload_session_customer_df(tenant_id)
             st.session_state[SESS_CUSTOMER_DATA_EDITOR_KEY] += 1
-            st.rerun()
+            if ok:
+                st.rerun()
+            # 충돌로 저장 못 한 행이 있으면 다시 그리지 않고 안내(충돌 목록)를 남겨 둔다
@@ -21,7 +21,19 @@ from core.google_sheets import (
     write_data_to_sheet,
     get_gspread_client,
     get_worksheet,
+    invalidate_replica_tab,
+    write_buffer,
+    locate_rows,
+    note_rows_written,
+    invalidate_sheet_cache,
+    read_table,
+    read_values_delta,
+    ensure_sheet_columns,
+    compare_and_set_rows,
+    row_versions,
+    CONFLICT_CHANGED,
 )
+from core.record_store import table_to_records
 
 # ✅ 입력용 드롭다운
 INCOME_METHODS = ["이체", "현금", "카드", "미수"]  # 미수: 수익/매출(순수익)에 포함하지 않음
@@ -103,40 +115,29 @@ def upsert_daily_records(records: list[dict]) -> bool:
         client = get_gspread_client()
         ws = get_worksheet(client, DAILY_SUMMARY_SHEET_NAME)
 
-        values = ws.get_all_values()
-        if not values:
+        # 탭 전체 대신 id 컬럼 인덱스로 행 번호를 찾는다
+        rec_ids = [rec.get("id", "") for rec in records]
+        idx, found = locate_rows(ws, DAILY_SUMMARY_SHEET_NAME, rec_ids)
+        if not idx.header:
             # 시트가 비어있으면: 헤더 + records 전체
             rows = [header]
             for rec in records:
                 rows.append([str(rec.get(h, "")) for h in header])
             ws.update(rows)
+            invalidate_replica_tab(DAILY_SUMMARY_SHEET_NAME)
             return True
 
-        sheet_header = values[0]
-        if "id" not in sheet_header:
+        if idx.col is None:
             # 헤더가 깨진 경우: 헤더부터 정상화(최소 안전장치)
             ws.update([header])
-            sheet_header = header
-
-        id_col = sheet_header.index("id")
+            invalidate_replica_tab(DAILY_SUMMARY_SHEET_NAME)
+            idx, found = locate_rows(ws, DAILY_SUMMARY_SHEET_NAME, rec_ids)
 
         # id -> 시트 row번호(2부터 시작)
-        existing = {}
-        for r_i, row in enumerate(values[1:], start=2):
-            rid = row[id_col].strip() if len(row) > id_col else ""
-            if rid:
-                existing[rid] = r_i
-
-        # 헤더 길이에 맞춰 A~ 끝열 범위 계산
-        def _col_letter(n: int) -> str:
-            # 1->A, 26->Z, 27->AA
-            s = ""
-            while n:
-                n, r = divmod(n - 1, 26)
-                s = chr(65 + r) + s
-            return s
-
-        last_col = _col_letter(len(header))
+        existing = {rid: rows[-1] for rid, rows in found.items()}
+
+        # 행 갱신/추가는 모아서 batch_update + append_rows 로 보낸다
+        buf = write_buffer(DAILY_SUMMARY_SHEET_NAME, ws)
 
         for rec in records:
             rid = str(rec.get("id", "")).strip()
@@ -147,11 +148,11 @@ def upsert_daily_records(records: list[dict]) -> bool:
             row_vals = [str(rec.get(h, "")) for h in header]
 
             if rid in existing:
-                row_no = existing[rid]
-                ws.update(f"A{row_no}:{last_col}{row_no}", [row_vals])
+                buf.update_row(existing[rid], row_vals)
             else:
-                ws.append_row(row_vals)
+                buf.append_row(row_vals)
 
+        buf.flush()
         return True
 
     except Exception as e:
@@ -163,21 +164,16 @@ def delete_daily_record_by_id(record_id: str) -> bool:
     try:
         client = get_gspread_client()
         ws = get_worksheet(client, DAILY_SUMMARY_SHEET_NAME)
-        values = ws.get_all_values()
-        if not values:
+        idx, found = locate_rows(ws, DAILY_SUMMARY_SHEET_NAME, [record_id])
+        if not idx.header or idx.col is None:
             return False
 
-        header = values[0]
-        if "id" not in header:
-            return False
-
-        id_col = header.index("id")
-
-        for row_no, row in enumerate(values[1:], start=2):
-            rid = row[id_col].strip() if len(row) > id_col else ""
-            if rid == str(record_id).strip():
-                ws.delete_rows(row_no)
-                return True
+        rows = found.get(str(record_id).strip())
+        if rows:
+            ws.delete_rows(rows[0])
+            note_rows_written(ws, DAILY_SUMMARY_SHEET_NAME, deleted=[rows[0]])
+            invalidate_replica_tab(DAILY_SUMMARY_SHEET_NAME, keep_row_index=True)
+            return True
 
         return False
 
@@ -218,76 +214,52 @@ def _norm(x) -> str:
 
 
 def _ensure_active_tasks_header(ws, header_needed: list[str]) -> list[str]:
-    """✅ 헤더는 '덮어쓰기/재정렬' 금지. 필요한 컬럼만 **끝에 추가**한다."""
-    values = ws.get_all_values()
-    if not values:
-        # 완전 빈 시트라면 헤더만 먼저 생성
-        ws.update(f"A1:{_col_letter(len(header_needed))}1", [header_needed])
-        return header_needed
-
-    header = values[0]
-    missing = [h for h in header_needed if h not in header]
-    if missing:
-        new_header = header + missing
-        ws.update(f"A1:{_col_letter(len(new_header))}1", [new_header])
-        return new_header
-
-    return header
+    """✅ 헤더는 '덮어쓰기/재정렬' 금지. 필요한 컬럼만 **끝에 추가**한다. (헤더 1행만 읽는다)"""
+    return ensure_sheet_columns(ws, ACTIVE_TASKS_SHEET_NAME, header_needed)
 
 
-def _repair_active_tasks_shift_if_needed(ws, header: list[str]) -> None:
+def _repair_active_tasks_shift_if_needed(ws, header: list[str]) -> int:
     """
-    ✅ 과거 데이터가 '헤더 강제 교체'로 인해 밀린 경우 복구.
+    ✅ 과거 데이터가 '헤더 강제 교체'로 인해 밀린 경우 복구. 반환: 고친 행 수
     - 증상: cash 컬럼에 TRUE/FALSE, planned_expense 가 비어있고, transfer 에 숫자가 들어있음
     - 복구: planned_expense <- transfer, processed <- cash, processed_timestamp <- card
             transfer/cash/card -> 0
     """
     need_cols = ["transfer", "cash", "card", "planned_expense", "processed", "processed_timestamp"]
     if any(c not in header for c in need_cols):
-        return
+        return 0
 
     idx = {c: header.index(c) for c in need_cols}
     # transfer..processed_timestamp 가 연속이면 한 번에 업데이트 가능
     start_i = min(idx.values())
     end_i = max(idx.values())
 
-    values = ws.get_all_values()
-    if len(values) <= 1:
-        return
+    # 탭 전체 대신 그 열 구간만 읽는다 (off = 구간 안에서의 위치)
+    values = ws.get_values(f"{_col_letter(start_i+1)}2:{_col_letter(end_i+1)}")
+    off = {c: i - start_i for c, i in idx.items()}
 
     ranges = []
     payloads = []
 
-    for row_no, row in enumerate(values[1:], start=2):
-        cash_v = row[idx["cash"]] if idx["cash"] < len(row) else ""
-        proc_v = row[idx["processed"]] if idx["processed"] < len(row) else ""
-        tr_v = row[idx["transfer"]] if idx["transfer"] < len(row) else ""
-        card_v = row[idx["card"]] if idx["card"] < len(row) else ""
+    for row_no, row in enumerate(values, start=2):
+        cash_v = row[off["cash"]] if off["cash"] < len(row) else ""
+        proc_v = row[off["processed"]] if off["processed"] < len(row) else ""
+        tr_v = row[off["transfer"]] if off["transfer"] < len(row) else ""
+        card_v = row[off["card"]] if off["card"] < len(row) else ""
 
         cash_s = str(cash_v).strip().upper()
         # '밀림' 휴리스틱
         if cash_s in ("TRUE", "FALSE") and str(proc_v).strip() == "" and str(tr_v).strip().isdigit():
-            new_tr = "0"
-            new_cash = "0"
-            new_card = "0"
-            new_planned = str(tr_v).strip()
-            new_proc = cash_s
-            new_ts = str(card_v).strip()
-
-            # 필요한 컬럼들을 한 번에 업데이트(연속 범위)
-            row_out = []
-            for col_i in range(start_i, end_i + 1):
-                # 기본은 원래 값 유지
-                v = row[col_i] if col_i < len(row) else ""
-                row_out.append(v)
+            # 필요한 컬럼들을 한 번에 업데이트(연속 범위), 기본은 원래 값 유지
+            row_out = [row[i] if i < len(row) else "" for i in range(end_i - start_i + 1)]
 
             # 덮어쓸 위치
-            row_out[idx["transfer"] - start_i] = new_tr
-            row_out[idx["cash"] - start_i] = new_cash
-            row_out[idx["card"] - start_i] = new_card
-            row_out[idx["planned_expense"] - start_i] = new_planned
-            row_out[idx["processed"] - start_i] = new_proc
-            row_out[idx["processed_timestamp"] - start_i] = new_ts
+            row_out[off["transfer"]] = "0"
+            row_out[off["cash"]] = "0"
+            row_out[off["card"]] = "0"
+            row_out[off["planned_expense"]] = str(tr_v).strip()
+            row_out[off["processed"]] = cash_s
+            row_out[off["processed_timestamp"]] = str(card_v).strip()
 
             a1 = f"{_col_letter(start_i+1)}{row_no}:{_col_letter(end_i+1)}{row_no}"
             ranges.append(a1)
@@ -297,8 +269,17 @@ def _repair_active_tasks_shift_if_needed(ws, header: list[str]) -> None:
         # 여러 행을 개별 범위로 업데이트 (안전: 필요한 셀만)
         batch = [{"range": r, "values": v} for r, v in zip(ranges, payloads)]
         ws.batch_update(batch)
+    return len(ranges)
 
 
+def _ensure_active_tasks_schema(ws) -> None:
+    """진행업무 헤더 보정 + 밀림 복구는 세션당 1회 (홈 화면과 같은 플래그)"""
+    if st.session_state.get("active_schema_checked", False):
+        return
+    header = _ensure_active_tasks_header(ws, ACTIVE_TASKS_HEADER_V2)
+    if _repair_active_tasks_shift_if_needed(ws, header):
+        invalidate_replica_tab(ACTIVE_TASKS_SHEET_NAME)
+    st.session_state["active_schema_checked"] = True
 
 
 def _col_letter(n: int) -> str:
@@ -309,46 +290,26 @@ def _col_letter(n: int) -> str:
     return s
 
 
-def upsert_active_task_records(records: list[dict]) -> bool:
-    """✅ 진행업무 시트에 id 기준 upsert (전체 덮어쓰기 금지)"""
+def upsert_active_task_records(records: list[dict], expected: dict | None = None) -> bool:
+    """
+    ✅ 진행업무 시트에 id 기준 upsert (전체 덮어쓰기 금지)
+    expected: {id: 읽어 둔 행 버전} — 주면 그 사이 다른 곳에서 바뀐 행은 쓰지 않고 False
+    """
     try:
         if not records:
             return True
 
         client = get_gspread_client()
         ws = get_worksheet(client, ACTIVE_TASKS_SHEET_NAME)
-
-        header = _ensure_active_tasks_header(ws, ACTIVE_TASKS_HEADER_V2)
-        values = ws.get_all_values()
-        header = values[0] if values else header
-
-        if "id" not in header:
-            return False
-
-        id_col = header.index("id")
-        existing = {}
-        for row_no, row in enumerate(values[1:], start=2):
-            rid = row[id_col].strip() if len(row) > id_col else ""
-            if rid:
-                existing[rid] = row_no
-
-        last_col = _col_letter(len(header))
+        _ensure_active_tasks_schema(ws)
 
         for rec in records:
-            rid = _norm(rec.get("id"))
-            if not rid:
-                rid = str(uuid.uuid4())
-                rec["id"] = rid
+            if not _norm(rec.get("id")):
+                rec["id"] = str(uuid.uuid4())
 
-            row_vals = [str(rec.get(h, "")) for h in header]
-
-            if rid in existing:
-                row_no = existing[rid]
-                ws.update(f"A{row_no}:{last_col}{row_no}", [row_vals])
-            else:
-                ws.append_row(row_vals)
-
-        return True
+        # 탭 전체를 읽지 않고 대상 행만 확인해서 쓴다 (변경 로그도 여기서 남긴다)
+        result = compare_and_set_rows(ws, ACTIVE_TASKS_SHEET_NAME, records, "id", expected)
+        return result.ok
 
     except Exception as e:
         st.error(f"❌ 진행업무 반영 실패: {e}")
@@ -399,13 +360,13 @@ def apply_daily_to_active_tasks(
         if income_type == "미수" and income_amt > 0:
             add_receivable += income_amt
 
-        # 2) 기존 진행업무 로드 (✅ 캐시 우회: gspread로 직접 읽기)
+        # 2) 기존 진행업무 로드 (변경 로그로 맞춘 값 — 탭 전체를 다시 받지 않는다)
         client = get_gspread_client()
         ws = get_worksheet(client, ACTIVE_TASKS_SHEET_NAME)
-        _ = _ensure_active_tasks_header(ws, ACTIVE_TASKS_HEADER_V2)
-        _repair_active_tasks_shift_if_needed(ws, ws.get_all_values()[0])
+        _ensure_active_tasks_schema(ws)
 
-        values = ws.get_all_values() or []
+        values = read_values_delta(ACTIVE_TASKS_SHEET_NAME) or []
+        versions = row_versions(values, "id")
 
         tasks: list[dict] = []
         if values and len(values) > 1:
@@ -426,6 +387,7 @@ def apply_daily_to_active_tasks(
                 target = dict(t)
                 break
 
+        base_version = None  # None = 새 행
         if target is None:
             target = {
                 "id": str(uuid.uuid4()),
@@ -443,23 +405,43 @@ def apply_daily_to_active_tasks(
                 "processed": "FALSE",
                 "processed_timestamp": "",
             }
+        else:
+            base_version = versions.get(_norm(target.get("id")))
 
         # 4) 누적
-        target["transfer"] = safe_int(target.get("transfer")) + add_transfer
-        target["cash"] = safe_int(target.get("cash")) + add_cash
-        target["card"] = safe_int(target.get("card")) + add_card
-        target["stamp"] = safe_int(target.get("stamp")) + add_stamp
-        target["receivable"] = safe_int(target.get("receivable")) + add_receivable
-
-        target["planned_expense"] = (
-            safe_int(target.get("transfer"))
-            + safe_int(target.get("cash"))
-            + safe_int(target.get("card"))
-            + safe_int(target.get("stamp"))
-        )
+        def _accumulated(base: dict) -> dict:
+            rec = dict(base)
+            rec["transfer"] = safe_int(rec.get("transfer")) + add_transfer
+            rec["cash"] = safe_int(rec.get("cash")) + add_cash
+            rec["card"] = safe_int(rec.get("card")) + add_card
+            rec["stamp"] = safe_int(rec.get("stamp")) + add_stamp
+            rec["receivable"] = safe_int(rec.get("receivable")) + add_receivable
+
+            rec["planned_expense"] = (
+                safe_int(rec.get("transfer"))
+                + safe_int(rec.get("cash"))
+                + safe_int(rec.get("card"))
+                + safe_int(rec.get("stamp"))
+            )
+            return rec
+
+        # 5) id 기준 compare-and-set
+        #    읽어 둔 값이 그 사이 다른 입력으로 바뀌었으면 충돌로 돌아온 최신 행에 다시 누적한다
+        for _ in range(3):
+            rec = _accumulated(target)
+            result = compare_and_set_rows(
+                ws, ACTIVE_TASKS_SHEET_NAME, [rec], "id", {rec["id"]: base_version}
+            )
+            if result.ok:
+                return True
+            conflict = result.conflicts[0]
+            if conflict.reason != CONFLICT_CHANGED:
+                st.error("❌ 진행업무 반영 실패: 대상 업무가 다른 곳에서 삭제되었습니다.")
+                return False
+            target, base_version = dict(conflict.current_row), conflict.current
 
-        # 5) id 기준 upsert
-        return upsert_active_task_records([target])
+        st.error("❌ 진행업무 반영 실패: 같은 업무가 계속 수정되고 있습니다. 잠시 후 다시 시도해 주세요.")
+        return False
 
     except Exception as e:
         st.error(f"❌ 진행업무 반영 오류: {e}")
@@ -473,26 +455,9 @@ def load_daily():
     """
     ✅ '일일결산' 시트 헤더(사용자 제공):
     id, date, time, category, name, task, income_cash, income_etc, exp_cash, cash_out, exp_etc, memo
+    (금액 컬럼 int 변환은 read_table 이 캐시 갱신 때 한 번만 한다)
     """
-    records = read_data_from_sheet(DAILY_SUMMARY_SHEET_NAME, default_if_empty=[])
-    processed_records = []
-    for r in records:
-        entry = {
-            "id": r.get("id", str(uuid.uuid4())),
-            "date": str(r.get("date", "")),
-            "time": str(r.get("time", "")),
-            "category": str(r.get("category", "")),
-            "name": str(r.get("name", "")),
-            "task": str(r.get("task", "")),
-            "income_cash": safe_int(r.get("income_cash")),
-            "income_etc": safe_int(r.get("income_etc")),
-            "exp_cash": safe_int(r.get("exp_cash")),
-            "cash_out": safe_int(r.get("cash_out")),
-            "exp_etc": safe_int(r.get("exp_etc")),
-            "memo": str(r.get("memo", "")),
-        }
-        processed_records.append(entry)
-    return processed_records
+    return table_to_records(read_table(DAILY_SUMMARY_SHEET_NAME))
 
 
 def save_daily(data_list_of_dicts):
@@ -599,7 +564,7 @@ def _save_active_tasks_from_session():
         header_list=header,
     )
     if ok:
-        st.cache_data.clear()
+        invalidate_sheet_cache(ACTIVE_TASKS_SHEET_NAME)
         return True
     return False
 
@@ -817,7 +782,7 @@ def render():
 
             ok = upsert_daily_records([updated])
             if ok:
-                st.cache_data.clear()
+                invalidate_sheet_cache(DAILY_SUMMARY_SHEET_NAME)
                 st.success("저장되었습니다.")
                 st.rerun()
             else:
@@ -839,7 +804,7 @@ def render():
                     ok = delete_daily_record_by_id(row_data.get("id"))
                     st.session_state.pop("daily_pending_delete_id", None)
                     if ok:
-                        st.cache_data.clear()
+                        invalidate_sheet_cache(DAILY_SUMMARY_SHEET_NAME)
                         st.success("삭제되었습니다.")
                         st.rerun()
                     else:
@@ -1093,8 +1058,9 @@ def render():
                     ) or []
                 except Exception:
                     pass
-# ✅ 화면/요약 즉시 반영용
-                st.cache_data.clear()
+# ✅ 화면/요약 즉시 반영용 (이 테넌트의 일일결산/진행업무 캐시만)
+                invalidate_sheet_cache(DAILY_SUMMARY_SHEET_NAME)
+                invalidate_sheet_cache(ACTIVE_TASKS_SHEET_NAME)
                 st.success("추가 완료")
                 st.rerun()
             else:
@@ -14,7 +14,8 @@ from config import (
 )
 
 from core.customer_service import (
-    load_customer_df_from_sheet,
+    reload_session_customer_df,
+    search_session_customers,
 )
 
 from core.google_sheets import (
@@ -258,6 +259,14 @@ ROLE_WIDGETS = {
     "agent": "ayin",          # 행정사(향후 확장용)
 }
 
+def _find_customers(tenant_id: str, df_cust: pd.DataFrame, keyword: str) -> pd.DataFrame:
+    """한글 이름 검색 (고객 검색 인덱스: 부분 일치 + 초성). 빈 검색어면 빈 DataFrame"""
+    kw = (keyword or "").strip()
+    if not kw or df_cust.empty:
+        return pd.DataFrame()
+    return df_cust.iloc[search_session_customers(tenant_id, df_cust, kw, fields=("한글",))]
+
+
 def normalize_field_name(name: str) -> str:
     """
     PDF 위젯 이름에서 '#...', ' [숫자]' 같은 꼬리표를 제거해서
@@ -709,7 +718,7 @@ def render():
                    "위임장/대행업무수행확인서의 행정사 정보가 비어 있을 수 있습니다.")
 
     if SESS_DF_CUSTOMER not in st.session_state:
-        st.session_state[SESS_DF_CUSTOMER] = load_customer_df_from_sheet(tenant_id)
+        reload_session_customer_df(tenant_id)
     df_cust: pd.DataFrame = st.session_state[SESS_DF_CUSTOMER]
 
     # ✅ 누락 경고/확인용 상태
@@ -824,11 +833,7 @@ def render():
             applicant_kw = st.text_input("검색", key="doc_search")
 
         with b2:
-            matched = (
-                df_cust[df_cust["한글"].str.contains(applicant_kw.strip(), na=False)]
-                if applicant_kw.strip()
-                else pd.DataFrame()
-            )
+            matched = _find_customers(tenant_id, df_cust, applicant_kw)
             if not matched.empty:
                 for idx, row_tmp in matched.iterrows():
                     label = format_label(row_tmp)
@@ -858,11 +863,7 @@ def render():
                 guardian_kw = st.text_input("검색", key="doc_guardian_search")
 
             with c2:
-                후보 = (
-                    df_cust[df_cust["한글"].str.contains(guardian_kw.strip(), na=False)]
-                    if guardian_kw.strip()
-                    else pd.DataFrame()
-                )
+                후보 = _find_customers(tenant_id, df_cust, guardian_kw)
                 if not 후보.empty:
                     for _, row2 in 후보.iterrows():
                         cust_id = row2["고객ID"]
@@ -896,11 +897,7 @@ def render():
             숙소키워드 = st.text_input("검색", key="doc_accommodation_search")
 
         with a2:
-            matched_provs = (
-                df_cust[df_cust["한글"].str.contains(숙소키워드.strip(), na=False)]
-                if 숙소키워드.strip()
-                else pd.DataFrame()
-            )
+            matched_provs = _find_customers(tenant_id, df_cust, 숙소키워드)
             if not matched_provs.empty:
                 for idx2, prov_row in matched_provs.iterrows():
                     label2 = format_label(prov_row)
@@ -930,11 +927,7 @@ def render():
                 guarantor_kw = st.text_input("검색", key="doc_guarantor_search")
 
             with d2:
-                matched_guars = (
-                    df_cust[df_cust["한글"].str.contains(guarantor_kw.strip(), na=False)]
-                    if guarantor_kw.strip()
-                    else pd.DataFrame()
-                )
+                matched_guars = _find_customers(tenant_id, df_cust, guarantor_kw)
                 if not matched_guars.empty:
                     for _, grow in matched_guars.iterrows():
                         cust_id = grow["고객ID"]
@@ -970,11 +963,7 @@ def render():
                 agg_kw = st.text_input("이름 검색", key="doc_agg_search")
 
             with e2:
-                matched_agg = (
-                    df_cust[df_cust["한글"].str.contains(agg_kw.strip(), na=False)]
-                    if agg_kw.strip()
-                    else pd.DataFrame()
-                )
+                matched_agg = _find_customers(tenant_id, df_cust, agg_kw)
                 if not matched_agg.empty:
                     for _, arow in matched_agg.iterrows():
                         cust_id = arow["고객ID"]
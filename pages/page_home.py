@@ -39,10 +39,27 @@ from core.google_sheets import (
     get_worksheet,         
     upsert_rows_by_id,  
     delete_row_by_id, 
+    invalidate_replica_tab,
+    load_tenant_bundle,
+    write_buffer,
+    read_records_by_columns,
+    read_table,
+    ensure_sheet_columns,
+    sheet_cache,
+    invalidate_sheet_cache,
 )
 
+from core.record_store import table_to_records
 from core.customer_service import (
-    load_customer_df_from_sheet,
+    load_customer_columns_df,
+    col_index_to_letter,
+)
+from core.customer_expiry import (
+    EXPIRY_COLUMNS,
+    EXPIRY_CARD,
+    EXPIRY_PASSPORT,
+    get_expiry_index,
+    add_months,
 )
 
 
@@ -64,10 +81,6 @@ def _as_int(v) -> int:
         return 0
 
 
-@st.cache_data(ttl=30, show_spinner=False)
-def _load_active_tasks_cached(sheet_name: str):
-    return read_data_from_sheet(sheet_name, default_if_empty=[])
-
 # 혹시 _as_int를 쓰는 코드가 남아있으면 대비
 _as_int = _as_int
 
@@ -100,53 +113,40 @@ def _money_box(placeholder: str, value_int: int, key: str, disabled: bool = Fals
 
 
 def _ensure_active_tasks_cols(ws, needed_cols: list[str]) -> list[str]:
-    """✅ 헤더는 덮어쓰기/재정렬 금지. 필요한 컬럼만 끝에 추가."""
-    values = ws.get_all_values()
-    if not values:
-        ws.update(f"A1:{col_index_to_letter(len(needed_cols))}1", [needed_cols])
-        return needed_cols
-
-    header = values[0]
-    missing = [c for c in needed_cols if c not in header]
-    if missing:
-        new_header = header + missing
-        ws.update(f"A1:{col_index_to_letter(len(new_header))}1", [new_header])
-        return new_header
-    return header
-
-def _repair_active_tasks_shift_if_needed(ws, header: list[str]) -> None:
-    """✅ 헤더를 중간에 끼워넣어 기존 데이터가 밀린 경우 복구."""
+    """✅ 헤더는 덮어쓰기/재정렬 금지. 필요한 컬럼만 끝에 추가. (헤더 1행만 읽는다)"""
+    return ensure_sheet_columns(ws, ACTIVE_TASKS_SHEET_NAME, needed_cols)
+
+def _repair_active_tasks_shift_if_needed(ws, header: list[str]) -> int:
+    """✅ 헤더를 중간에 끼워넣어 기존 데이터가 밀린 경우 복구. 반환: 고친 행 수"""
     need = ["transfer", "cash", "card", "planned_expense", "processed", "processed_timestamp"]
     if any(c not in header for c in need):
-        return
+        return 0
     idx = {c: header.index(c) for c in need}
     start_i = min(idx.values())
     end_i = max(idx.values())
 
-    values = ws.get_all_values()
-    if len(values) <= 1:
-        return
+    # 탭 전체 대신 transfer..processed_timestamp 열 구간만 읽는다 (off = 구간 안 위치)
+    values = ws.get_values(f"{col_index_to_letter(start_i+1)}2:{col_index_to_letter(end_i+1)}")
+    off = {c: i - start_i for c, i in idx.items()}
 
     ranges, payloads = [], []
-    for row_no, row in enumerate(values[1:], start=2):
-        cash_v = row[idx["cash"]] if idx["cash"] < len(row) else ""
-        proc_v = row[idx["processed"]] if idx["processed"] < len(row) else ""
-        tr_v = row[idx["transfer"]] if idx["transfer"] < len(row) else ""
-        card_v = row[idx["card"]] if idx["card"] < len(row) else ""
+    for row_no, row in enumerate(values, start=2):
+        cash_v = row[off["cash"]] if off["cash"] < len(row) else ""
+        proc_v = row[off["processed"]] if off["processed"] < len(row) else ""
+        tr_v = row[off["transfer"]] if off["transfer"] < len(row) else ""
+        card_v = row[off["card"]] if off["card"] < len(row) else ""
 
         cash_s = str(cash_v).strip().upper()
         if cash_s in ("TRUE", "FALSE") and str(proc_v).strip() == "" and str(tr_v).strip().isdigit():
             # transfer(구 planned) -> planned_expense, cash(구 processed) -> processed, card(구 timestamp) -> processed_timestamp
-            row_out = []
-            for col_i in range(start_i, end_i + 1):
-                row_out.append(row[col_i] if col_i < len(row) else "")
+            row_out = [row[i] if i < len(row) else "" for i in range(end_i - start_i + 1)]
 
-            row_out[idx["transfer"] - start_i] = "0"
-            row_out[idx["cash"] - start_i] = "0"
-            row_out[idx["card"] - start_i] = "0"
-            row_out[idx["planned_expense"] - start_i] = str(tr_v).strip()
-            row_out[idx["processed"] - start_i] = cash_s
-            row_out[idx["processed_timestamp"] - start_i] = str(card_v).strip()
+            row_out[off["transfer"]] = "0"
+            row_out[off["cash"]] = "0"
+            row_out[off["card"]] = "0"
+            row_out[off["planned_expense"]] = str(tr_v).strip()
+            row_out[off["processed"]] = cash_s
+            row_out[off["processed_timestamp"]] = str(card_v).strip()
 
             a1 = f"{col_index_to_letter(start_i+1)}{row_no}:{col_index_to_letter(end_i+1)}{row_no}"
             ranges.append(a1)
@@ -154,6 +154,7 @@ def _repair_active_tasks_shift_if_needed(ws, header: list[str]) -> None:
 
     if ranges:
         ws.batch_update([{"range": r, "values": v} for r, v in zip(ranges, payloads)])
+    return len(ranges)
 
 def _extract_selected_date(date_raw) -> str | None:
     """
@@ -213,10 +214,14 @@ except Exception:
 
 st.session_state.setdefault("home_calendar_nonce", 0)
 
-@st.cache_data(ttl=300)
+# '일정' 시트에서 읽는 컬럼 (옛날/새 이름 모두)
+EVENT_COLUMNS = ("date", "date_str", "날짜", "일자", "memo", "event_text", "메모", "내용")
+
+
+@sheet_cache(ttl=300, tabs=(EVENTS_SHEET_NAME,), tenant=lambda tenant_id: tenant_id)
 def load_calendar_events_for_tenant(tenant_id: str) -> dict:
     """현재 테넌트의 '일정' 시트를 읽어서 { 'YYYY-MM-DD': [메모1, 메모2, ...] } 형태로 반환."""
-    rows = read_data_from_sheet(EVENTS_SHEET_NAME, default_if_empty=[])
+    rows = read_records_by_columns(EVENTS_SHEET_NAME, EVENT_COLUMNS, default_if_empty=[])
     events_by_date: dict[str, list[str]] = {}
     if not rows:
         return {}
@@ -285,24 +290,23 @@ def save_calendar_events_for_date(date_str: str, lines: list[str]) -> bool:
         found = ws.findall(date_str)
         target_rows = [c.row for c in found if c.col == 1]
 
-        if lines:
-            memo_text = "\n".join(lines)
-
-            if target_rows:
-                # 첫 번째 row는 내용만 갱신
-                first_row = min(target_rows)
-                ws.update_cell(first_row, 1, date_str)
-                ws.update_cell(first_row, 2, memo_text)
-                # 나머지 중복 row 는 모두 삭제 (아래에서 위 순서로)
-                for row_idx in sorted(target_rows[1:], reverse=True):
-                    ws.delete_rows(row_idx)
+        # 갱신/삭제/추가를 모아서 한 번에 보낸다 (with 종료 시 공용 쓰기 버퍼로 넘기고, 재실행 끝에 보낸다)
+        with write_buffer(EVENTS_SHEET_NAME, ws) as buf:
+            if lines:
+                memo_text = "\n".join(lines)
+
+                if target_rows:
+                    # 첫 번째 row는 내용만 갱신
+                    first_row = min(target_rows)
+                    buf.update_row(first_row, [date_str, memo_text])
+                    # 나머지 중복 row 는 모두 삭제
+                    buf.delete_rows(target_rows[1:])
+                else:
+                    # 기존 row 가 없으면 새로 추가 (append)
+                    buf.append_row([date_str, memo_text])
             else:
-                # 기존 row 가 없으면 새로 추가 (append)
-                ws.append_row([date_str, memo_text])
-        else:
-            # lines 가 비어 있으면 해당 날짜의 row 모두 삭제
-            for row_idx in sorted(target_rows, reverse=True):
-                ws.delete_rows(row_idx)
+                # lines 가 비어 있으면 해당 날짜의 row 모두 삭제
+                buf.delete_rows(target_rows)
 
         # 캐시 비우기 (이 테넌트 일정 다시 로드되도록)
         load_calendar_events_for_tenant.clear()
@@ -494,7 +498,8 @@ else:
 # ─────────────────────────────
 # 1) 단기메모 로드/저장
 # ─────────────────────────────
-@st.cache_data(ttl=60)   # ✅ 캐시 적용 (60초 정도만 캐시)
+# ✅ 60초 캐시, 그 뒤엔 Drive modifiedTime 으로 재검증
+@sheet_cache(ttl=60, tabs=(MEMO_SHORT_SHEET_NAME,), tenant=lambda tenant_id=None: tenant_id)
 def load_short_memo(tenant_id: str | None = None):
     """
     구글시트 '단기메모' 시트에서 A1 셀 내용을 읽어옵니다.
@@ -533,30 +538,38 @@ def save_active_tasks_to_sheet(data_list_of_dicts):
     ok = upsert_rows_by_id(ACTIVE_TASKS_SHEET_NAME, header_list=header, records=data_list_of_dicts, id_field="id")
     return ok
 
-@st.cache_data(ttl=60)
 def load_completed_tasks_from_sheet():
-    """완료업무 시트 전체 로드"""
-    records = read_data_from_sheet(COMPLETED_TASKS_SHEET_NAME, default_if_empty=[])
-    return [{
-        'id': r.get('id', str(uuid.uuid4())),
-        'category': str(r.get('category', '')),
-        'date': str(r.get('date', '')),
-        'name': str(r.get('name', '')),
-        'work': str(r.get('work', '')),
-        'details': str(r.get('details', '')),
-        'complete_date': str(r.get('complete_date', '')),
-    } for r in records]
+    """완료업무 시트 전체 로드 (타입 변환은 read_table 캐시에서 한 번만)"""
+    return table_to_records(read_table(COMPLETED_TASKS_SHEET_NAME))
 
 
 def save_completed_tasks_to_sheet(records):
     """완료업무 전체를 시트에 덮어쓰기 저장"""
     header = ['id', 'category', 'date', 'name', 'work', 'details', 'complete_date']
     ok = upsert_rows_by_id(COMPLETED_TASKS_SHEET_NAME, records, header_list=header)
-    if ok:
-        load_completed_tasks_from_sheet.clear()
     return ok
 
 
+# 홈 첫 진입 시 batchGet 한 번으로 미리 받아 둘 탭 (일정 / 단기메모 / 진행업무)
+HOME_BUNDLE_TABS = (EVENTS_SHEET_NAME, MEMO_SHORT_SHEET_NAME, ACTIVE_TASKS_SHEET_NAME)
+SESS_HOME_BUNDLE_LOADED = "home_bundle_loaded"
+
+
+def _prefetch_home_bundle():
+    """
+    세션(테넌트)당 1회: 홈에서 읽는 탭들을 묶어서 받아 두면 아래 캐시 로더들이 그 값을 쓴다.
+    다른 세션이 이미 채워 둔 캐시(증분 상태 / sheet_cache)가 있는 탭은 다시 받지 않는다.
+    """
+    tenant_id = st.session_state.get(SESS_TENANT_ID, DEFAULT_TENANT_ID)
+    if st.session_state.get(SESS_HOME_BUNDLE_LOADED) == tenant_id:
+        return
+    st.session_state[SESS_HOME_BUNDLE_LOADED] = tenant_id
+    try:
+        load_tenant_bundle(HOME_BUNDLE_TABS, skip_warm=True)
+    except Exception as e:
+        print(f"[bundle] 홈 묶음 로드 실패, 탭별로 읽습니다: {e}")
+
+
 # load_events_from_sheet
 # 3) 홈 페이지 렌더
 # ─────────────────────────────
@@ -565,6 +578,7 @@ def render():
     HOME 페이지 렌더링 함수.
     기존 app.py 의 PAGE_HOME 블럭과 UI/동작을 동일하게 유지.
     """
+    _prefetch_home_bundle()
 
     # 좌/우 두 칼럼
     home_col_left, home_col_right = st.columns(2)
@@ -756,106 +770,25 @@ def render():
     with home_col_right:
         st.subheader("2. 🪪 등록증 만기 4개월 전")
 
-        # 👉 홈 들어올 때마다, 현재 테넌트 기준으로 고객 DF 다시 로딩
+        # 👉 만기 인덱스: 고객 컬럼을 읽을 때 만들어 둔 (만기일, 고객) 정렬 목록에서 구간만 잘라 낸다
         tenant_id = st.session_state.get(SESS_TENANT_ID, DEFAULT_TENANT_ID)
-        df_customers_for_alert_view = load_customer_df_from_sheet(tenant_id)
-        st.session_state[SESS_DF_CUSTOMER] = df_customers_for_alert_view.copy()
+        #    (세션 고객 DF 는 여기서 다시 읽지 않는다 — 만기 컬럼 캐시만으로 충분하고,
+        #     세션 DF 는 로그인 / 고객관리 저장 때 맞춰진다)
+        df_customers_for_alert_view = load_customer_columns_df(tenant_id, EXPIRY_COLUMNS)
+        expiry_index = get_expiry_index(tenant_id)
+        if not expiry_index.ready:
+            expiry_index.sync(df_customers_for_alert_view)
+        today = datetime.date.today()
 
         if df_customers_for_alert_view.empty:
             st.write("(표시할 고객 없음)")
         else:
-            # 표시용 기본 컬럼 구성
-            df_alert_display_prepared_view = pd.DataFrame()
-            df_alert_display_prepared_view['한글이름'] = df_customers_for_alert_view.get('한글', pd.Series(dtype='str'))
-            df_alert_display_prepared_view['영문이름'] = (
-                df_customers_for_alert_view.get('성', pd.Series(dtype='str')).fillna('') + ' ' +
-                df_customers_for_alert_view.get('명', pd.Series(dtype='str')).fillna('')
-            )
-            df_alert_display_prepared_view['여권번호'] = (
-                df_customers_for_alert_view.get('여권', pd.Series(dtype='str'))
-                .astype(str).str.strip()
-            )
-
-            # 전화번호 포맷
-            def _fmt_part(x, width):
-                x = str(x)
-                x = x.split('.')[0]
-                if x.strip() and x.lower() != 'nan':
-                    return x.zfill(width)
-                return " "
-
-            df_alert_display_prepared_view['전화번호'] = (
-                df_customers_for_alert_view.get('연', pd.Series(dtype='str')).apply(lambda x: _fmt_part(x, 3)) + ' ' +
-                df_customers_for_alert_view.get('락', pd.Series(dtype='str')).apply(lambda x: _fmt_part(x, 4)) + ' ' +
-                df_customers_for_alert_view.get('처', pd.Series(dtype='str')).apply(lambda x: _fmt_part(x, 4))
-            ).str.replace(r'^\s* \s*$', '(정보없음)', regex=True).str.replace(
-                r'^\s*--\s*$', '(정보없음)', regex=True
-            )
-
-            # 생년월일 계산 함수
-            def format_birthdate_alert_view(reg_front_val, reg_back_val=None):
-                """
-                reg_front_val: '등록증' 앞 6자리(YYMMDD)
-                reg_back_val : '번호' 뒤 7자리(선택) - 첫 자리가 세기 판단에 도움
-                반환: 'YYYY-MM-DD' 또는 ''
-                """
-                s = str(reg_front_val or "").strip()
-                s = s.split('.')[0]  # '680101.0' 같은 형태 방지
-                if len(s) < 6 or not s[:6].isdigit():
-                    return ""
-                yy = int(s[:2]); mm = int(s[2:4]); dd = int(s[4:6])
-
-                # 세기 판단: '번호' 첫 자리(1,2,5,6=1900 / 3,4,7,8=2000). 없으면 휴리스틱
-                century = None
-                if reg_back_val:
-                    rb = str(reg_back_val).strip().split('.')[0]
-                    if len(rb) >= 1 and rb[0].isdigit():
-                        gd = rb[0]
-                        if gd in ("1", "2", "5", "6"):
-                            century = 1900
-                        elif gd in ("3", "4", "7", "8"):
-                            century = 2000
-                if century is None:
-                    curr_yy = datetime.date.today().year % 100
-                    century = 1900 if yy > curr_yy else 2000
-
-                try:
-                    d = datetime.date(century + yy, mm, dd)
-                    return d.strftime("%Y-%m-%d")
-                except ValueError:
-                    return ""
-
-            # 생년월일 컬럼 생성
-            df_alert_display_prepared_view['생년월일'] = df_customers_for_alert_view.apply(
-                lambda r: format_birthdate_alert_view(r.get('등록증'), r.get('번호')),
-                axis=1
-            )
-
             # 등록증 만기 알림 (오늘 ~ 4개월 이내)
-            df_customers_for_alert_view['등록증만기일_dt_alert'] = pd.to_datetime(
-                df_customers_for_alert_view.get('만기일')
-                    .astype(str)
-                    .str.replace(".", "-")
-                    .str.slice(0, 10),
-                format="%Y-%m-%d",
-                errors="coerce",
+            card_alerts_df = expiry_index.expiring_frame(
+                EXPIRY_CARD, today, add_months(today, 4), "등록증만기일"
             )
-            today_ts = pd.Timestamp.today().normalize()
-            card_alert_limit_date = today_ts + pd.DateOffset(months=4)
-
-            card_alerts_df = df_customers_for_alert_view[
-                df_customers_for_alert_view['등록증만기일_dt_alert'].notna() &
-                (df_customers_for_alert_view['등록증만기일_dt_alert'] <= card_alert_limit_date) &
-                (df_customers_for_alert_view['등록증만기일_dt_alert'] >= today_ts)
-            ].sort_values(by='등록증만기일_dt_alert')
-
             if not card_alerts_df.empty:
-                display_df_card_alert_view = df_alert_display_prepared_view.loc[card_alerts_df.index].copy()
-                display_df_card_alert_view['등록증만기일'] = card_alerts_df['등록증만기일_dt_alert'].dt.strftime('%Y-%m-%d')
-                st.dataframe(
-                    display_df_card_alert_view[['한글이름', '등록증만기일', '여권번호', '생년월일', '전화번호']],
-                    use_container_width=True, hide_index=True
-                )
+                st.dataframe(card_alerts_df, use_container_width=True, hide_index=True)
             else:
                 st.write("(만기 예정 등록증 없음)")
 
@@ -864,29 +797,11 @@ def render():
         if df_customers_for_alert_view.empty:
             st.write("(표시할 고객 없음)")
         else:
-            df_customers_for_alert_view['여권만기일_dt_alert'] = pd.to_datetime(
-                df_customers_for_alert_view.get('만기')
-                    .astype(str)
-                    .str.replace(".", "-")
-                    .str.slice(0, 10),
-                format="%Y-%m-%d",
-                errors="coerce",
-            )   
-            today_ts = pd.Timestamp.today().normalize()
-            passport_alert_limit_date = today_ts + pd.DateOffset(months=6)
-            passport_alerts_df = df_customers_for_alert_view[
-                df_customers_for_alert_view['여권만기일_dt_alert'].notna() &
-                (df_customers_for_alert_view['여권만기일_dt_alert'] <= passport_alert_limit_date) &
-                (df_customers_for_alert_view['여권만기일_dt_alert'] >= today_ts)
-            ].sort_values(by='여권만기일_dt_alert')
-
+            passport_alerts_df = expiry_index.expiring_frame(
+                EXPIRY_PASSPORT, today, add_months(today, 6), "여권만기일"
+            )
             if not passport_alerts_df.empty:
-                display_df_passport_alert_view = df_alert_display_prepared_view.loc[passport_alerts_df.index].copy()
-                display_df_passport_alert_view['여권만기일'] = passport_alerts_df['여권만기일_dt_alert'].dt.strftime('%Y-%m-%d')
-                st.dataframe(
-                    display_df_passport_alert_view[['한글이름', '여권만기일', '여권번호', '생년월일', '전화번호']],
-                    use_container_width=True, hide_index=True
-                )
+                st.dataframe(passport_alerts_df, use_container_width=True, hide_index=True)
             else:
                 st.write("(만기 예정 여권 없음)")
 
@@ -1047,11 +962,14 @@ def render():
                 "transfer","cash","card","stamp","receivable",
                 "planned_expense","processed","processed_timestamp"
             ])
-            _repair_active_tasks_shift_if_needed(ws_active, header_now)
+            if _repair_active_tasks_shift_if_needed(ws_active, header_now):
+                invalidate_replica_tab(ACTIVE_TASKS_SHEET_NAME)
         except Exception:
             pass
         st.session_state["active_schema_checked"] = True
-    active_tasks = _load_active_tasks_cached(ACTIVE_TASKS_SHEET_NAME)
+    # 진행업무는 변경 로그로 맞춘 타입 테이블 (금액 int64, 합계는 열 단위로 한 번에)
+    active_df = read_table(ACTIVE_TASKS_SHEET_NAME)
+    active_tasks = table_to_records(active_df)
     st.session_state[SESS_ACTIVE_TASKS_TEMP] = active_tasks
 
     구분_옵션_active_opts = ["출입국", "전자민원", "공증", "여권", "초청", "영주권", "기타"]
@@ -1059,37 +977,20 @@ def render():
 
     with title_r:
         # ✅ 지출예정 합계 + 항목별(결제수단/구분) 합계
-        sum_transfer = 0
-        sum_cash = 0
-        sum_card = 0
-        sum_stamp = 0
-        sum_receivable = 0
-        sum_planned = 0
+        paid = active_df[["transfer", "cash", "card", "stamp"]].sum(axis=1)
+        planned = active_df["planned_expense"].where(active_df["planned_expense"] > 0, paid)
 
-        cat_planned = {c: 0 for c in 구분_옵션_active_opts}
+        sum_transfer = int(active_df["transfer"].sum())
+        sum_cash = int(active_df["cash"].sum())
+        sum_card = int(active_df["card"].sum())
+        sum_stamp = int(active_df["stamp"].sum())
+        sum_receivable = int(active_df["receivable"].sum())
+        sum_planned = int(planned.sum())
 
-        for t in active_tasks:
-            tr = _as_int(t.get("transfer"))
-            ca = _as_int(t.get("cash"))
-            cd = _as_int(t.get("card"))
-            stp =_as_int(t.get("stamp"))
-            rec =_as_int(t.get("receivable"))
-
-            planned =_as_int(t.get("planned_expense"))
-            if planned <= 0:
-                planned = tr + ca + cd + stp
-
-            sum_transfer += tr
-            sum_cash += ca
-            sum_card += cd
-            sum_stamp += stp
-            sum_receivable += rec
-            sum_planned += planned
-
-            cat = str(t.get("category", "기타")).strip() or "기타"
-            if cat not in cat_planned:
-                cat_planned[cat] = 0
-            cat_planned[cat] += planned
+        cat_planned = {c: 0 for c in 구분_옵션_active_opts}
+        cats = active_df["category"].astype(str).str.strip().replace("", "기타")
+        for cat, amount in planned.groupby(cats).sum().items():
+            cat_planned[cat] = cat_planned.get(cat, 0) + int(amount)
 
                 # ✅ 2줄 요약: '지출예정 : (좌) / 금액(우)' + '(이체/현금/카드/인지) (미수)'
         st.markdown(
@@ -1229,7 +1130,7 @@ def render():
                         for u in changed:
                             by_id[u["id"]] = u
                         st.session_state[SESS_ACTIVE_TASKS_TEMP] = list(by_id.values())
-                        st.cache_data.clear()
+                        invalidate_sheet_cache(ACTIVE_TASKS_SHEET_NAME)
                         st.success(f"✅ 수정 저장 완료: {len(changed)}건")
                     else:
                         st.error("수정 저장 실패(시트 권한/네트워크/헤더 확인).")
@@ -10,11 +10,12 @@ from config import (
 from core.google_sheets import (
     read_memo_from_sheet,
     save_memo_to_sheet,
+    sheet_cache,
 )
 
 
 # --- 메모 로드/저장 래퍼 함수들 ---
-@st.cache_data(ttl=60)     # ✅ 이 줄 추가
+@sheet_cache(ttl=60, tabs=(MEMO_LONG_SHEET_NAME,))   # ✅ 테넌트별 캐시
 def load_long_memo() -> str:
     """구글시트 '장기메모' 시트에서 A1 내용 읽기"""
     return read_memo_from_sheet(MEMO_LONG_SHEET_NAME)
@@ -27,7 +28,7 @@ def save_long_memo(content: str) -> bool:
     return ok
 
 
-@st.cache_data(ttl=60)     # ✅ 이 줄 추가
+@sheet_cache(ttl=60, tabs=(MEMO_MID_SHEET_NAME,))    # ✅ 테넌트별 캐시
 def load_mid_memo() -> str:
     """구글시트 '중기메모' 시트에서 A1 내용 읽기"""
     return read_memo_from_sheet(MEMO_MID_SHEET_NAME)
@@ -16,6 +16,9 @@ from core.google_sheets import (
     get_work_sheet_key_for_tenant,
     get_current_tenant_id,
     get_sheet_column_widths,
+    get_spreadsheet_by_key,
+    get_worksheet_by_key,
+    sheet_cache,
 )
 
 # 어드민 전용 업무정리 스프레드시트 ID
@@ -63,27 +66,27 @@ def _values_to_df(values: list[list[str]]) -> pd.DataFrame:
     return df
 
 
-@st.cache_data(ttl=600)
+# TTL 이 지나면 Drive modifiedTime 만 확인하고, 안 바뀌었으면 캐시를 연장
+@sheet_cache(ttl=600, tabs=lambda sheet_key: [(sheet_key, "*")])
 def load_reference_sheet_titles(sheet_key: str) -> list[str]:
     """업무정리 파일의 시트명 목록"""
     client = get_gspread_client()
     if client is None:
         return []
 
-    sh = client.open_by_key(sheet_key)
+    sh = get_spreadsheet_by_key(client, sheet_key)
     return [ws.title for ws in sh.worksheets()]
 
 
-@st.cache_data(ttl=300)
+@sheet_cache(ttl=300, tabs=lambda sheet_key, sheet_name: [(sheet_key, sheet_name)])
 def load_reference_sheet_df(sheet_key: str, sheet_name: str) -> pd.DataFrame:
     """특정 시트 내용을 DataFrame으로 로드"""
     client = get_gspread_client()
     if client is None:
         return pd.DataFrame()
 
-    sh = client.open_by_key(sheet_key)
     try:
-        ws = sh.worksheet(sheet_name)
+        ws = get_worksheet_by_key(client, sheet_key, sheet_name)
     except Exception:
         return pd.DataFrame()
 
@@ -35,7 +35,10 @@ from config import (
 
 from core.customer_service import (
     upsert_customer_from_scan,
+    find_scan_duplicates,
+    SCAN_NEW_CUSTOMER,
 )
+from core.customer_dedupe import exact_match_ids
 
 # -----------------------------
 # 1) Tesseract 기본 유틸 (간단 버전)
@@ -1069,6 +1072,63 @@ def parse_arc(img, fast: bool = False):
 # 3) 페이지 렌더 함수
 # -----------------------------
 
+# -----------------------------
+# 중복 고객 확인 (스캔 저장 전)
+# -----------------------------
+SESS_SCAN_DEDUPE_PENDING = "scan_dedupe_pending"
+
+
+def _show_scan_upsert_result(ok: bool, msg: str):
+    if ok:
+        st.session_state["scan_saved_ok"] = True
+        st.success(f"✅ {msg}")
+    else:
+        st.error(f"❌ {msg}")
+
+    if st.session_state.get("scan_saved_ok"):
+        st.success("✅ 고객관리 데이터에 반영이 완료되었습니다.")
+
+
+def _render_duplicate_candidates(pending: dict):
+    """비슷한 기존 고객 후보(점수 순)를 보여주고, 사용자가 고른 고객에 반영하거나 새 고객으로 추가"""
+    candidates = pending["candidates"]
+    if pending.get("ambiguous"):
+        st.warning("⚠️ 여권번호와 등록번호가 서로 다른 기존 고객과 일치합니다. 반영할 고객을 골라 주세요.")
+    else:
+        st.warning("⚠️ 비슷한 기존 고객이 있습니다. 같은 사람이면 고객을 골라 반영하고, 아니면 새 고객으로 추가하세요.")
+    st.dataframe(
+        [
+            {
+                "고객ID": c["cust_id"],
+                "점수": c["score"],
+                "한글": c["row"].get("한글", ""),
+                "영문이름": f"{c['row'].get('성', '')} {c['row'].get('명', '')}".strip(),
+                "국적": c["row"].get("국가", ""),
+                "여권": c["row"].get("여권", ""),
+                "등록증": c["row"].get("등록증", ""),
+                "근거": ", ".join(c["reasons"]),
+            }
+            for c in candidates
+        ],
+        use_container_width=True, hide_index=True,
+    )
+
+    options = [c["cust_id"] for c in candidates] + [SCAN_NEW_CUSTOMER]
+    labels = {c["cust_id"]: f"{c['cust_id']} · {c['row'].get('한글', '')} ({c['score']:.2f})" for c in candidates}
+    labels[SCAN_NEW_CUSTOMER] = "➕ 새 고객으로 추가"
+    choice = st.radio("반영할 고객", options, format_func=labels.get, key="scan_dedupe_choice")
+
+    c1, c2 = st.columns(2)
+    if c1.button("💾 선택한 대로 반영", use_container_width=True, key="scan_dedupe_apply"):
+        st.session_state.pop(SESS_SCAN_DEDUPE_PENDING, None)
+        _show_scan_upsert_result(*upsert_customer_from_scan(
+            pending["passport"], pending["arc"], pending["extra"], target_id=choice
+        ))
+    if c2.button("취소", use_container_width=True, key="scan_dedupe_cancel"):
+        st.session_state.pop(SESS_SCAN_DEDUPE_PENDING, None)
+        st.rerun()
+
+
 def render():
     """
     스캔으로 고객 추가/수정 페이지 (기존 PAGE_SCAN 코드 모듈화 버전)
@@ -1324,16 +1384,22 @@ def render():
                 "V":  V.strip(),
             }
 
-            ok, msg = upsert_customer_from_scan(passport_data, arc_data, extra_data)
-
-            if ok:
-                st.session_state["scan_saved_ok"] = True
-                st.success(f"✅ {msg}")
+            # 🔎 같거나 비슷한 기존 고객: 정확히 일치(여권/등록번호)하는 고객이 한 명이면 바로 반영,
+            #    비슷한 고객만 있거나 여권/등록번호가 서로 다른 고객과 일치하면 골라서 반영
+            candidates = find_scan_duplicates(passport_data, arc_data)
+            exact_ids = exact_match_ids(candidates)
+            if candidates and len(exact_ids) != 1:
+                st.session_state[SESS_SCAN_DEDUPE_PENDING] = {
+                    "passport": passport_data, "arc": arc_data, "extra": extra_data,
+                    "candidates": [c.as_dict() for c in candidates],
+                    "ambiguous": len(exact_ids) > 1,
+                }
             else:
-                st.error(f"❌ {msg}")
+                st.session_state.pop(SESS_SCAN_DEDUPE_PENDING, None)
+                _show_scan_upsert_result(*upsert_customer_from_scan(passport_data, arc_data, extra_data))
 
-            if st.session_state.get("scan_saved_ok"):
-                st.success("✅ 고객관리 데이터에 반영이 완료되었습니다.")
+    if st.session_state.get(SESS_SCAN_DEDUPE_PENDING):
+        _render_duplicate_candidates(st.session_state[SESS_SCAN_DEDUPE_PENDING])
 
 
     if st.button("← 고객관리로 돌아가기", use_container_width=True):
@@ -0,0 +1,434 @@
+"""
+가짜 시트 백엔드(core.fake_sheets) 위에서 주요 업무 흐름의 구글 API 비용을 잰다.
+
+  python scripts/bench_workflows.py                       # 측정 + 기준값과 비교 (나빠지면 종료코드 1)
+  python scripts/bench_workflows.py --write-baseline      # 현재 결과를 기준값으로 저장 (--only 와 같이 쓰면 그 흐름만 교체)
+  python scripts/bench_workflows.py --only daily_entry --latency-ms 80
+
+- 시드 데이터: 고객 10,000명 / 일일결산 50,000행 / 진행업무 5,000건 (옵션으로 조절)
+- 흐름마다 새 프로세스에서 시드 → 준비(측정 제외) → 실제 앱 함수 실행(측정) 순서로 돈다.
+  (모듈 캐시 / 핸들 캐시 / 행 인덱스가 흐름끼리 섞이지 않게)
+- 측정값: API 호출 수, 주고받은 바이트, 걸린 시간(ms), 최대 메모리(tracemalloc, KB)
+- 호출 수 / 바이트는 결정적이라 기준값보다 늘면 바로 회귀로 본다.
+  시간 / 메모리는 기계마다 달라서 --tolerance(기본 50%) 를 넘을 때만 회귀로 본다.
+  흐름이 실패하거나 기준값에 없는 흐름이 있어도 실패로 본다.
+- 선택 의존성(WORKFLOW_REQUIRES)이 없는 환경에서는 그 흐름을 건너뛴다 (기준값 항목은 그대로 둔다).
+"""
+
+import argparse
+import datetime
+import importlib.util
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+BASELINE_PATH = os.path.join(ROOT, "scripts", "bench_baseline.json")
+
+CUSTOMER_HEADER = [
+    "고객ID", "한글", "성", "명", "연", "락", "처",
+    "등록증", "번호", "발급일", "V", "만기일",
+    "여권", "발급", "만기", "주소", "위임내역", "비고", "폴더",
+]
+DAILY_HEADER = [
+    "id", "date", "time", "category", "name", "task",
+    "income_cash", "income_etc", "exp_cash", "cash_out", "exp_etc", "memo",
+]
+ACTIVE_HEADER = [
+    "id", "category", "date", "name", "work", "details",
+    "transfer", "cash", "card", "stamp", "receivable", "planned_expense",
+    "processed", "processed_timestamp",
+]
+
+FAMILY = ["NGUYEN", "TRAN", "LE", "PHAM", "WANG", "LI", "ZHANG", "KIM", "PARK", "SMITH"]
+GIVEN = ["VAN AN", "THI HOA", "MING", "WEI", "JUN", "ANNA", "MARIA", "DUC", "LAN", "YU"]
+HANGUL = ["응웬", "쩐", "레", "팜", "왕", "리", "장", "김", "박", "스미스"]
+WORKS = ["체류연장", "체류자격변경", "외국인등록", "재입국허가", "여권재발급", "공증", "초청"]
+CATEGORIES = ["출입국", "전자민원", "공증", "여권", "초청", "영주권", "기타"]
+FOLDERLESS = 300   # 시트 '폴더' 칸이 비어 있고 Drive 폴더도 없는 고객 수 (폴더 일괄 생성 흐름용)
+
+
+# ===== 시드 데이터 =====
+def _customer_rows(n: int, rnd: random.Random) -> list[list[str]]:
+    base = datetime.date(2019, 1, 1)
+    rows = []
+    for i in range(n):
+        day = base + datetime.timedelta(days=i // 20)
+        cid = f"{day:%Y%m%d}{i % 20 + 1:02d}"
+        f = rnd.randrange(len(FAMILY))
+        issue = day + datetime.timedelta(days=rnd.randrange(0, 300))
+        rows.append([
+            cid, HANGUL[f], FAMILY[f], GIVEN[rnd.randrange(len(GIVEN))],
+            "010", f"{rnd.randrange(10000):04d}", f"{rnd.randrange(10000):04d}",
+            f"{rnd.randrange(800101, 991231)}", f"{rnd.randrange(5000000, 6999999)}",
+            f"{issue:%Y.%m.%d}", rnd.choice(["E-9", "F-4", "D-2", "F-6", "H-2"]),
+            f"{issue + datetime.timedelta(days=rnd.randrange(300, 1100)):%Y.%m.%d}",
+            f"M{i:08d}", f"{issue:%Y.%m.%d}",
+            f"{issue + datetime.timedelta(days=3650):%Y.%m.%d}",
+            f"서울시 구로구 디지털로 {rnd.randrange(1, 300)}", "", "",
+            "" if i >= n - FOLDERLESS else f"fld{cid}",
+        ])
+    return rows
+
+
+def _daily_rows(n: int, rnd: random.Random) -> list[list[str]]:
+    base = datetime.date(2020, 1, 1)
+    rows = []
+    for i in range(n):
+        day = base + datetime.timedelta(days=i // 25)
+        rows.append([
+            f"d{i:07d}", f"{day:%Y-%m-%d}", f"{9 + i % 9:02d}:{i % 60:02d}",
+            rnd.choice(CATEGORIES), f"고객{rnd.randrange(10000)}", rnd.choice(WORKS),
+            str(rnd.choice([0, 30000, 50000, 100000])), "0",
+            str(rnd.choice([0, 0, 6000, 30000])), "0", "0", "",
+        ])
+    return rows
+
+
+def _active_rows(n: int, rnd: random.Random) -> list[list[str]]:
+    base = datetime.date(2024, 1, 1)
+    rows = []
+    for i in range(n):
+        day = base + datetime.timedelta(days=i // 10)
+        transfer, cash = rnd.choice([0, 30000]), rnd.choice([0, 6000])
+        rows.append([
+            f"t{i:06d}", rnd.choice(CATEGORIES), f"{day:%Y-%m-%d}", f"고객{i}", rnd.choice(WORKS), "",
+            str(transfer), str(cash), "0", "0", "0", str(transfer + cash), "FALSE", "",
+        ])
+    return rows
+
+
+def seed_backend(args):
+    """고객데이터 워크북(SHEET_KEY) + 고객 폴더들을 채운 가짜 백엔드를 꽂는다"""
+    from config import (
+        SHEET_KEY,
+        CUSTOMER_PARENT_FOLDER_ID,
+        CUSTOMER_SHEET_NAME,
+        DAILY_SUMMARY_SHEET_NAME,
+        DAILY_BALANCE_SHEET_NAME,
+        ACTIVE_TASKS_SHEET_NAME,
+        PLANNED_TASKS_SHEET_NAME,
+        COMPLETED_TASKS_SHEET_NAME,
+        EVENTS_SHEET_NAME,
+    )
+    from core.fake_sheets import FakeSheetsBackend
+    from core.sheet_backend import set_storage_backend
+
+    rnd = random.Random(args.seed)
+    customers = _customer_rows(args.customers, rnd)
+    events = [
+        [f"{datetime.date(2025, 1, 1) + datetime.timedelta(days=d):%Y-%m-%d}", f"일정 {d}"]
+        for d in range(365)
+    ]
+    backend = FakeSheetsBackend(latency_sec=args.latency_ms / 1000.0)
+    backend.create_spreadsheet(key=SHEET_KEY, tabs={
+        CUSTOMER_SHEET_NAME: [CUSTOMER_HEADER] + customers,
+        DAILY_SUMMARY_SHEET_NAME: [DAILY_HEADER] + _daily_rows(args.ledger, rnd),
+        DAILY_BALANCE_SHEET_NAME: [["key", "value"], ["cash", "1000000"], ["profit_cash", "0"]],
+        ACTIVE_TASKS_SHEET_NAME: [ACTIVE_HEADER] + _active_rows(args.tasks, rnd),
+        PLANNED_TASKS_SHEET_NAME: [["id", "date", "period", "content", "note"]],
+        COMPLETED_TASKS_SHEET_NAME: [ACTIVE_HEADER + ["complete_date"]],
+        EVENTS_SHEET_NAME: [["date", "memo"]] + events,
+    })
+    backend.create_drive_file("고객폴더", file_id=CUSTOMER_PARENT_FOLDER_ID)
+    for row in customers:
+        if row[-1]:
+            backend.create_drive_file(row[0], parents=[CUSTOMER_PARENT_FOLDER_ID], file_id=row[-1])
+    set_storage_backend(backend)
+    return backend, customers
+
+
+def _login_session():
+    import streamlit as st
+    from config import SESS_TENANT_ID, SESS_IS_ADMIN, DEFAULT_TENANT_ID
+
+    st.session_state[SESS_TENANT_ID] = DEFAULT_TENANT_ID
+    st.session_state[SESS_IS_ADMIN] = True   # 고객 폴더 기능은 관리자(기본 테넌트)만
+    return DEFAULT_TENANT_ID
+
+
+# ===== 업무 흐름 =====
+# 각 흐름은 prepare(customers) -> run() 을 돌려준다. prepare 는 측정에서 빠진다.
+def wf_customer_batch_update(customers):
+    """고객관리 '저장': 300행 수정 + 5행 추가 (추가분은 폴더 생성까지)"""
+    import pandas as pd
+    from config import CUSTOMER_SHEET_NAME
+    from core.google_sheets import get_gspread_client, get_worksheet
+    from core.customer_service import load_customer_df_from_sheet, save_customer_batch_update
+
+    tenant_id = _login_session()
+    ws = get_worksheet(get_gspread_client(), CUSTOMER_SHEET_NAME)
+    df = load_customer_df_from_sheet(tenant_id).copy()
+    step = max(len(df) // 300, 1)
+    for i in range(0, min(step * 300, len(df)), step):
+        df.at[i, "비고"] = f"bench 수정 {i}"
+    # '행 추가' 처럼 고객ID 없이 붙인다 (ID 는 저장할 때 받는다)
+    new = [{**{h: " " for h in df.columns}, "고객ID": "", "한글": f"신규{k}"} for k in range(1, 6)]
+    edited = pd.concat([pd.DataFrame(new), df], ignore_index=True)
+
+    return lambda: save_customer_batch_update(edited, ws)
+
+
+def wf_scan_upsert_existing(customers):
+    """스캔 저장: 여권번호가 이미 있는 고객 갱신"""
+    from core.customer_service import upsert_customer_from_scan
+
+    _login_session()
+    row = customers[len(customers) // 2]
+    passport = {"성": row[2], "명": row[3], "여권": row[12], "만기": "2035.01.01"}
+    arc = {"주소": "서울시 영등포구 국회대로 1"}
+    return lambda: upsert_customer_from_scan(passport, arc, {"V": "F-4"})
+
+
+def wf_scan_upsert_new(customers):
+    """스캔 저장: 처음 보는 고객 추가 (ID 발급 + 폴더 생성)"""
+    from core.customer_service import upsert_customer_from_scan
+
+    _login_session()
+    passport = {"성": "BENCH", "명": "NEW", "국가": "VNM", "여권": "N99999999", "만기": "2034.05.05"}
+    arc = {"한글": "벤치", "등록증": "900101", "번호": "5123456"}
+    return lambda: upsert_customer_from_scan(passport, arc, {"연": "010", "락": "1234", "처": "5678"})
+
+
+def wf_daily_entry(customers):
+    """일일결산 1건 저장: 진행업무 누적 반영 + 일일결산 upsert"""
+    from pages.page_daily import apply_daily_to_active_tasks, upsert_daily_records, _pack_memo
+
+    _login_session()
+    today = datetime.date.today().strftime("%Y-%m-%d")
+    record = {
+        "id": "", "date": today, "time": "10:30", "category": "출입국", "name": "고객1234",
+        "task": "체류연장", "income_cash": 60000, "income_etc": 0, "exp_cash": 0,
+        "cash_out": 0, "exp_etc": 30000, "memo": _pack_memo("", "현금", "이체", ""),
+    }
+
+    def run():
+        apply_daily_to_active_tasks(
+            date_str=today, category="출입국", name="고객1234", work="체류연장", memo_user="",
+            income_type="현금", income_amt=60000, exp1_type="이체", exp1_amt=30000,
+            exp2_type="", exp2_amt=0,
+        )
+        return upsert_daily_records([record])
+
+    return run
+
+
+def wf_calendar_save(customers):
+    """홈 달력: 하루치 일정 교체 저장"""
+    from pages.page_home import save_calendar_events_for_date
+
+    _login_session()
+    return lambda: save_calendar_events_for_date("2025-06-15", ["출국 예정 고객 연락", "서류 접수"])
+
+
+def wf_customer_folders(customers):
+    """'폴더 일괄 생성/연동': 폴더가 없는 고객 300명"""
+    from config import CUSTOMER_SHEET_NAME
+    from core.google_sheets import get_gspread_client, get_worksheet
+    from core.customer_service import load_customer_df_from_sheet, create_customer_folders
+
+    tenant_id = _login_session()
+    ws = get_worksheet(get_gspread_client(), CUSTOMER_SHEET_NAME)
+    df = load_customer_df_from_sheet(tenant_id).copy()
+    return lambda: create_customer_folders(df, ws)
+
+
+WORKFLOWS = {
+    "customer_batch_update": wf_customer_batch_update,
+    "scan_upsert_existing": wf_scan_upsert_existing,
+    "scan_upsert_new": wf_scan_upsert_new,
+    "daily_entry": wf_daily_entry,
+    "calendar_save": wf_calendar_save,
+    "customer_folders": wf_customer_folders,
+}
+
+# 흐름이 불러오는 화면이 쓰는 선택 의존성 (없으면 그 흐름은 건너뛴다)
+WORKFLOW_REQUIRES = {
+    "calendar_save": ("streamlit_calendar",),
+}
+
+
+def missing_requirements(name: str) -> list[str]:
+    return [m for m in WORKFLOW_REQUIRES.get(name, ()) if importlib.util.find_spec(m) is None]
+
+
+# ===== 측정 =====
+def run_one(name: str, args, trace_memory: bool = False) -> dict:
+    """
+    현재 프로세스에서 흐름 1개를 시드부터 돌리고 지표를 돌려준다.
+    tracemalloc 은 실행을 몇 배 느리게 하므로, 메모리는 따로 한 번 더 돌려서 잰다 (trace_memory=True).
+    """
+    from core.api_metrics import clear_api_events
+
+    backend, customers = seed_backend(args)
+    run = WORKFLOWS[name](customers)
+    backend.reset_stats()
+    clear_api_events()
+
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    result = run()
+    wall = time.perf_counter() - started
+    peak = 0
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    stats = backend.stats()
+    return {
+        "ok": result is not False and not (isinstance(result, tuple) and result[0] is False),
+        "calls": stats["total"]["calls"],
+        "bytes": stats["total"]["bytes_out"] + stats["total"]["bytes_in"],
+        "wall_ms": round(wall * 1000, 1),
+        "peak_kb": round(peak / 1024, 1),
+        "methods": {m: s["calls"] for m, s in sorted(stats["methods"].items())},
+    }
+
+
+def _run_subprocess(name: str, args, trace_memory: bool) -> dict:
+    cmd = [
+        sys.executable, os.path.abspath(__file__), "--run-one", name,
+        "--customers", str(args.customers), "--ledger", str(args.ledger),
+        "--tasks", str(args.tasks), "--latency-ms", str(args.latency_ms), "--seed", str(args.seed),
+    ]
+    if trace_memory:
+        cmd.append("--trace-memory")
+    # 쓰기 저널은 끈다 (켜면 시트 반영이 백그라운드 재생으로 넘어가서 워크플로 안에서 호출을 셀 수 없다)
+    # 고객ID 발급 순번도 실행마다 새 파일 (앞 실행이 빌려 간 번호에 따라 ID 가 달라지지 않게)
+    # 캐시 스냅샷도 실행마다 빈 폴더 (앞 실행이 남긴 스냅샷을 되살리면 호출 수가 실행 순서에 따라 달라진다)
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, HANWOORY_ENV="local", HANWOORY_REPLICA="", HANWOORY_STORAGE_BACKEND="fake",
+                   HANWOORY_WRITE_JOURNAL="", HANWOORY_ID_ALLOCATOR_PATH=os.path.join(tmp, "ids.sqlite3"),
+                   HANWOORY_SNAPSHOT_DIR=os.path.join(tmp, "snapshots"))
+        proc = subprocess.run(cmd, capture_output=True, text=True, cwd=ROOT, env=env)
+    lines = [ln for ln in proc.stdout.splitlines() if ln.startswith("{")]
+    if proc.returncode != 0 or not lines:
+        err = (proc.stderr.strip().splitlines() or ["(출력 없음)"])[-1]
+        return {"error": err}
+    return json.loads(lines[-1])
+
+
+def run_isolated(name: str, args) -> dict:
+    """흐름마다 새 파이썬 프로세스 (캐시가 섞이지 않게): 시간/호출 1회 + 메모리 1회"""
+    missing = missing_requirements(name)
+    if missing:
+        return {"skipped": f"{', '.join(missing)} 없음"}
+    timed = _run_subprocess(name, args, trace_memory=False)
+    if "error" in timed:
+        return timed
+    traced = _run_subprocess(name, args, trace_memory=True)
+    timed["peak_kb"] = traced.get("peak_kb", 0)
+    return timed
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """기준값보다 나빠진 항목 목록"""
+    problems = []
+    if not baseline:
+        return problems
+    for name, cur in results.items():
+        if "skipped" in cur:
+            continue
+        if "error" in cur:
+            problems.append(f"{name}: 실행 실패 ({cur['error']})")
+            continue
+        base = baseline.get("workflows", {}).get(name)
+        if not base:
+            problems.append(f"{name}: 기준값 없음 (--write-baseline --only {name} 로 추가)")
+            continue
+        for key in ("calls", "bytes"):
+            if cur[key] > base[key]:
+                problems.append(f"{name}: {key} {base[key]} → {cur[key]}")
+        for key in ("wall_ms", "peak_kb"):
+            if base[key] and cur[key] > base[key] * (1 + tolerance):
+                problems.append(f"{name}: {key} {base[key]} → {cur[key]} (+{cur[key] / base[key] - 1:.0%})")
+    return problems
+
+
+def _fmt_row(name, cur, base):
+    if "error" in cur:
+        return f"{name:<24} 실패: {cur['error']}"
+    if "skipped" in cur:
+        return f"{name:<24} 건너뜀: {cur['skipped']}"
+
+    def delta(key):
+        if not base or not base.get(key):
+            return ""
+        return f" ({cur[key] / base[key] - 1:+.0%})"
+
+    return (
+        f"{name:<24} {cur['calls']:>6}{delta('calls'):<8} {cur['bytes'] / 1024:>10.1f}{delta('bytes'):<8}"
+        f" {cur['wall_ms']:>9.1f}{delta('wall_ms'):<8} {cur['peak_kb'] / 1024:>8.1f}{delta('peak_kb'):<8}"
+        f"{'' if cur['ok'] else '  (함수가 실패를 돌려줌)'}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="가짜 시트 백엔드 기반 업무 흐름 벤치마크")
+    parser.add_argument("--customers", type=int, default=10000)
+    parser.add_argument("--ledger", type=int, default=50000)
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="API 호출 1건당 흉내 낼 지연")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--only", action="append", choices=sorted(WORKFLOWS), help="이 흐름만 (여러 번 가능)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--write-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="시간/메모리 허용 증가율")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON 으로만 출력")
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    parser.add_argument("--trace-memory", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        print(json.dumps(run_one(args.run_one, args, args.trace_memory), ensure_ascii=False))
+        return
+
+    results = {name: run_isolated(name, args) for name in (args.only or WORKFLOWS)}
+    meta = {"customers": args.customers, "ledger": args.ledger, "tasks": args.tasks,
+            "latency_ms": args.latency_ms, "seed": args.seed}
+
+    if args.json:
+        print(json.dumps({"meta": meta, "workflows": results}, ensure_ascii=False, indent=2))
+        return
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("meta") != meta:
+            print(f"⚠ 기준값의 시드 조건이 다릅니다: {baseline.get('meta')} (비교 생략)")
+            baseline = {}
+
+    print(f"{'workflow':<24} {'calls':>14} {'KB':>18} {'wall ms':>17} {'peak MB':>16}")
+    for name, cur in results.items():
+        print(_fmt_row(name, cur, baseline.get("workflows", {}).get(name)))
+
+    if args.write_baseline:
+        # 이번에 잰 흐름만 바꾸고, 건너뛰었거나 실행하지 않은 흐름은 기존 기준값을 둔다 (없어진 흐름은 뺀다)
+        saved = baseline.get("workflows", {})
+        saved.update({n: r for n, r in results.items() if "error" not in r and "skipped" not in r})
+        ok = {n: saved[n] for n in WORKFLOWS if n in saved}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "workflows": ok}, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"기준값 저장: {args.baseline} ({len(ok)}개 흐름)")
+        return
+
+    problems = compare(results, baseline, args.tolerance)
+    for p in problems:
+        print(f"❌ 회귀: {p}")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()